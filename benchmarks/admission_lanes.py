@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Priority lanes under a background burst, against one stub Ollama.
+
+Starts the stub server (see stub_llm_server.py) serving ``--parallel``
+requests at once, like a single local Ollama instance, and sends through
+ModelManager:
+
+- a burst of ``--background`` background requests (thread summaries, agent
+  reflections) and ``--formatting`` formatter requests at t=0
+- ``--routing`` intent routing and ``--interactive`` chat requests arriving
+  every ``--interval-ms`` while the burst is being worked off
+
+once with every call admitted straight to the provider, and once through
+the admission controller (see jarvis/models/admission.py) with
+LLM_MAX_CONCURRENCY set to ``--parallel``. Reports latency per lane,
+answered and shed requests, and the controller's queue wait percentiles.
+
+Exits 1 if interactive p95 latency is worse with admission control than
+without it, or if an interactive request is shed.
+
+Usage:
+    python benchmarks/admission_lanes.py [--parallel N] [--background N] [--formatting N]
+                                         [--routing N] [--interactive N] [--interval-ms MS]
+                                         [--background-max-wait S] [--json FILE]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm_server import Faults, StubLLMServer  # noqa: E402
+
+LANES = ("interactive", "routing", "formatting", "background")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered))) - 1))]
+
+
+async def run_mode(args, admission_on):
+    from jarvis.models import admission
+    from jarvis.models.model_manager import ModelManager
+
+    # A fresh controller (and counters) per mode
+    admission._controller = admission.AdmissionController(enabled=admission_on)
+    manager = ModelManager()
+    latencies = {lane: [] for lane in LANES}
+    answered = {lane: 0 for lane in LANES}
+
+    async def one(lane, i, delay):
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        # Distinct prompts: nothing may be coalesced or cached
+        text = await manager.generate(f"{lane} request {i}", max_tokens=200, cache_site=None, lane=lane)
+        latencies[lane].append((time.perf_counter() - start) * 1000)
+        if not text.startswith("Error"):
+            answered[lane] += 1
+
+    interval = args.interval_ms / 1000.0
+    jobs = [one("background", i, 0.0) for i in range(args.background)]
+    jobs += [one("formatting", i, 0.0) for i in range(args.formatting)]
+    jobs += [one("routing", i, 0.05 + i * interval) for i in range(args.routing)]
+    jobs += [one("interactive", i, 0.1 + i * interval) for i in range(args.interactive)]
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await manager.aclose()
+    elapsed = time.perf_counter() - start
+
+    stats = admission.get_admission_controller().get_stats()
+    return {
+        "elapsed_s": elapsed,
+        "lanes": {
+            lane: {
+                "requests": len(latencies[lane]),
+                "answered": answered[lane],
+                "p50_ms": percentile(latencies[lane], 50),
+                "p95_ms": percentile(latencies[lane], 95),
+                "max_ms": max(latencies[lane]) if latencies[lane] else None,
+                "shed": stats["lanes"][lane]["shed"] + stats["lanes"][lane]["rejected"],
+                "wait_p95_ms": stats["lanes"][lane]["wait_p95_ms"],
+            }
+            for lane in LANES
+        },
+    }
+
+
+def print_results(label, result):
+    print(f"\n{label} ({result['elapsed_s']:.1f} s)")
+    print(f"{'lane':<13}{'requests':>9}{'answered':>9}{'shed':>6}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"
+          f"{'wait p95':>10}")
+    for lane, r in result["lanes"].items():
+        if not r["requests"]:
+            continue
+        wait = "-" if r["wait_p95_ms"] is None else f"{r['wait_p95_ms']:.0f}"
+        print(f"{lane:<13}{r['requests']:>9}{r['answered']:>9}{r['shed']:>6}{r['p50_ms']:>9.0f}"
+              f"{r['p95_ms']:>9.0f}{r['max_ms']:>9.0f}{wait:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admission control lanes under a background burst")
+    parser.add_argument("--parallel", type=int, default=2, help="requests the stub serves at once")
+    parser.add_argument("--background", type=int, default=40)
+    parser.add_argument("--formatting", type=int, default=10)
+    parser.add_argument("--routing", type=int, default=10)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=150.0, help="arrival gap of routing/chat requests")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="stub time to first token")
+    parser.add_argument("--background-max-wait", type=float, default=5.0,
+                        help="queue wait after which background requests are shed (s)")
+    parser.add_argument("--json", type=Path, help="write both runs' results here")
+    args = parser.parse_args()
+
+    faults = Faults(latency_ms=args.latency_ms, tokens_per_s=200.0, tokens=24, parallel=args.parallel)
+    server = StubLLMServer(faults, model="stub").start()
+    # Configuration is read at import time, so set it before jarvis is imported
+    os.environ.update({
+        "OLLAMA_HOST": server.url, "OLLAMA_MODEL": "stub",
+        "CLAUDE_API_KEY": "", "OPENAI_API_KEY": "", "OPENAI_KEY": "",
+        # Let the client send everything, so without admission the server's queue decides the order
+        "OLLAMA_MAX_CONCURRENCY": "64",
+        "LLM_MAX_CONCURRENCY": str(args.parallel),
+        "LLM_LANE_BACKGROUND_MAX_WAIT": str(args.background_max_wait),
+        "RESPONSE_CACHE": "0", "MODEL_COALESCE": "0",
+    })
+    logging.disable(logging.WARNING)
+
+    try:
+        runs = {}
+        for label, admission_on in (("no admission control", False), ("admission control", True)):
+            runs[label] = asyncio.run(run_mode(args, admission_on))
+            print_results(label, runs[label])
+    finally:
+        server.stop()
+
+    if args.json:
+        args.json.write_text(json.dumps(runs, indent=2), encoding="utf-8")
+
+    before = runs["no admission control"]["lanes"]["interactive"]
+    after = runs["admission control"]["lanes"]["interactive"]
+    print(f"\ninteractive p95: {before['p95_ms']:.0f} -> {after['p95_ms']:.0f} ms")
+    regressions = []
+    if after["p95_ms"] > before["p95_ms"]:
+        regressions.append(f"interactive p95 {after['p95_ms']:.0f} ms > {before['p95_ms']:.0f} ms")
+    if after["answered"] < after["requests"]:
+        regressions.append(f"{after['requests'] - after['answered']} interactive requests not answered")
+    if regressions:
+        print("❌ Admission control regressed:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
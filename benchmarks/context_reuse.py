@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Replayed-conversation benchmark for prompt prefix reuse on Ollama.
+
+Replays ``--turns`` messages from the intent corpus through two call sites
+against the stub server (see stub_llm_server.py), which simulates Ollama's
+prompt cache: a request only evaluates the tokens after the prefix it shares
+with the previous prompt and reply, at ``--prompt-tokens-per-s``.
+
+Scenarios:
+- chat: persona, recalled memories that change every turn, history and the
+  message, like brain.conversation and Jarvis.chat
+- intent: IntentRouter's tool catalog and instructions, per-user history and
+  the request
+
+Modes:
+- legacy: the previous layout, turn-specific text (memories, the request)
+  early and the last three messages, as one /api/generate prompt
+- chat api: the current layout (static system prompt, history packed to the
+  token budget, turn-specific text last) through the real clients
+  (brain.llm.chat, ModelManager/OllamaModel) on /api/chat
+- generate+context: the same clients against a server without /api/chat,
+  continuing from the ``context`` returned for the previous turn
+
+Reports prompt tokens sent, prompt tokens evaluated and latency per turn.
+Exits 1 if the chat api mode evaluates more prompt tokens per turn than
+legacy in either scenario.
+
+Usage:
+    python benchmarks/context_reuse.py [--turns N] [--prompt-tokens-per-s N] [--corpus FILE] [--json FILE]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "intent_corpus.txt"
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm_server import Faults, StubLLMServer  # noqa: E402
+
+MODES = ("legacy", "chat api", "generate+context")
+
+MEMORIES = [
+    "User prefers metric units",
+    "User is training for a half marathon in May",
+    "User holds BTC and ETH, checks prices most mornings",
+    "User likes lo-fi playlists while working",
+    "User's standup is at 9:30 on weekdays",
+]
+
+
+def turn_memories(turn):
+    """Two recalled memories that change from turn to turn."""
+    return [MEMORIES[turn % len(MEMORIES)], MEMORIES[(turn * 3 + 1) % len(MEMORIES)]]
+
+
+def legacy_chat_prompt(persona, memories, history, message):
+    """brain/Jarvis layout before context packing: memories in the system prompt, last three messages."""
+    joined = "\n- ".join(memories)
+    prompt = f"{persona}\n\nRelevant memories:\n- {joined}\n\nRecent conversation:"
+    for msg in history[-3:]:
+        role = "User" if msg["role"] == "user" else "Assistant"
+        prompt += f"\n{role}: {msg['content']}"
+    return prompt + f"\nUser: {message}\nAssistant:"
+
+
+def legacy_intent_prompt(text, context):
+    """IntentRouter's prompt before the static catalog moved into the system message."""
+    fragments = context.prompt_fragments
+    prompt = f"""
+You are Jarvis, an AI assistant with access to multiple tools. Analyze the user's request and determine the correct tool to use.
+
+USER REQUEST: "{text}"
+
+AVAILABLE TOOLS:
+{fragments['tools']}
+
+RECENT CONVERSATION HISTORY:
+{fragments['history']}
+
+PREVIOUS INTENTS:
+{fragments['intents']}
+
+INSTRUCTIONS:
+1. Determine the user's intent (trading, music, fitness, news, system, search, chat)
+2. Select the most appropriate tool from the available tools
+3. Extract any arguments needed for the tool
+4. Provide confidence score (0.0-1.0)
+5. Explain your reasoning
+
+RESPONSE FORMAT (JSON):
+{{
+    "intent_type": "trading|music|fitness|news|system|search|chat",
+    "confidence": 0.95,
+    "tool_name": "trading.trading.get_balance",
+    "arguments": {{}},
+    "reasoning": "User is asking for portfolio balance, which maps to trading tool",
+    "context_used": ["recent_trading_queries", "user_preferences"],
+    "fallback_suggestions": ["Try /portfolio command", "Check /balance"]
+}}
+
+ANALYZE THE REQUEST:
+"""
+    # ModelManager flattened messages into one /api/generate prompt
+    return f"System: You are an intelligent intent analysis system.\n\nUser: {prompt}\n"
+
+
+def legacy_generate(server, prompt):
+    import httpx
+
+    response = httpx.post(f"{server.url}/api/generate", timeout=60,
+                          json={"model": "stub", "prompt": prompt, "stream": False, "keep_alive": "30m"})
+    response.raise_for_status()
+    return response.json()["response"]
+
+
+def run_chat(server, mode, messages):
+    from brain import conversation, llm, memory
+
+    # A fresh conversation for every mode
+    os.environ["MEMORY_DB_PATH"] = str(Path.cwd() / f"memory-{mode.replace(' ', '-')}.sqlite")
+    llm._CHAT_API = True
+    history = []
+    turns = []
+    for i, message in enumerate(messages):
+        memories = turn_memories(i)
+        memory.save_message("user", message)
+        before = len(server.evals)
+        start = time.perf_counter()
+        if mode == "legacy":
+            reply = legacy_generate(server, legacy_chat_prompt(conversation.PERSONA, memories, history, message))
+        else:
+            reply = llm.chat(conversation.chat_messages(message, memories), cache_site=None)
+        turns.append(((time.perf_counter() - start) * 1000, server.evals[before:]))
+        memory.save_message("assistant", reply)
+        history += [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+    return turns
+
+
+async def run_intent(server, mode, messages):
+    from jarvis.intelligence.intent_router import IntentRouter
+
+    router = IntentRouter()
+    ollama = router.model_manager.ollama_model
+    ollama.chat_api = True
+    turns = []
+    clock = datetime(2026, 1, 1, 9, 0)
+    try:
+        for i, text in enumerate(messages):
+            context = await router._get_context("bench-user", "bench")
+            before = len(server.evals)
+            start = time.perf_counter()
+            if mode == "legacy":
+                await asyncio.to_thread(legacy_generate, server, legacy_intent_prompt(text, context))
+            else:
+                await router._llm_generate(*router._build_intent_prompt(text, context))
+            turns.append(((time.perf_counter() - start) * 1000, server.evals[before:]))
+            router.context_retriever.store.record("bench-user", {
+                "role": "user",
+                "content": text,
+                "timestamp": (clock + timedelta(minutes=i)).isoformat(),
+                "intent": {"intent_type": "chat", "tool_name": "jarvis_chat", "confidence": 0.9},
+            })
+    finally:
+        router.intent_log.close()
+        await router.model_manager.aclose()
+    return turns
+
+
+def summarize(turns):
+    evals = [e for _, per_turn in turns for e in per_turn]
+    n = max(1, len(turns))
+    latencies = sorted(ms for ms, _ in turns)
+    return {
+        "turns": len(turns),
+        "requests": len(evals),
+        "prompt_tokens_per_turn": sum(e["prompt_tokens"] for e in evals) / n,
+        "evaluated_per_turn": sum(e["prompt_eval_count"] for e in evals) / n,
+        # Steady state: what a turn costs once the conversation is under way
+        "evaluated_last_half": (sum(e["prompt_eval_count"] for _, t in turns[n // 2:] for e in t)
+                                / max(1, len(turns) - n // 2)),
+        "p50_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+        "mean_ms": sum(latencies) / n,
+        "endpoints": sorted({e["path"] for e in evals}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt prefix reuse on a replayed conversation")
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument("--prompt-tokens-per-s", type=float, default=400.0,
+                        help="simulated prompt evaluation speed (a CPU-bound 8B model)")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="one message per line")
+    parser.add_argument("--json", type=Path, help="write the results here")
+    args = parser.parse_args()
+
+    corpus = [line.strip() for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    messages = [corpus[i % len(corpus)] for i in range(args.turns)]
+
+    faults = Faults(latency_ms=5.0, tokens_per_s=2000.0, tokens=24, prompt_tokens_per_s=args.prompt_tokens_per_s)
+    server = StubLLMServer(faults, model="stub").start()
+    os.environ.update({
+        "OLLAMA_HOST": server.url, "OLLAMA_MODEL": "stub", "LLM_PROVIDER": "ollama",
+        # Local model only: no cloud provider to route to
+        "CLAUDE_API_KEY": "", "OPENAI_API_KEY": "", "OPENAI_KEY": "",
+        # Every turn has to reach the model; no routing shortcuts or persistent state
+        "RESPONSE_CACHE": "0", "INTENT_FAST_PATH": "0", "ROUTING_CACHE_DB": "",
+    })
+    logging.disable(logging.WARNING)
+
+    results = {}
+    cwd = os.getcwd()
+    scratch = tempfile.TemporaryDirectory()
+    # Memory database and intent log go in a scratch directory
+    os.chdir(scratch.name)
+    try:
+        for scenario in ("chat", "intent"):
+            for mode in MODES:
+                with server.lock:
+                    server.kv.clear()
+                server.chat_api = mode != "generate+context"
+                if scenario == "chat":
+                    turns = run_chat(server, mode, messages)
+                else:
+                    turns = asyncio.run(run_intent(server, mode, messages))
+                results[(scenario, mode)] = summarize(turns)
+    finally:
+        os.chdir(cwd)
+        scratch.cleanup()
+        server.stop()
+
+    print(f"{args.turns} turns, prompt evaluation at {args.prompt_tokens_per_s:g} tokens/s")
+    print(f"{'scenario':<9}{'mode':<19}{'sent/turn':>10}{'eval/turn':>10}{'eval late':>10}"
+          f"{'p50 ms':>9}{'mean ms':>9}  endpoint")
+    for (scenario, mode), r in results.items():
+        print(f"{scenario:<9}{mode:<19}{r['prompt_tokens_per_turn']:>10.0f}{r['evaluated_per_turn']:>10.0f}"
+              f"{r['evaluated_last_half']:>10.0f}{r['p50_ms']:>9.0f}{r['mean_ms']:>9.0f}  {','.join(r['endpoints'])}")
+    if args.json:
+        args.json.write_text(json.dumps({f"{s}/{m}": r for (s, m), r in results.items()}, indent=2),
+                             encoding="utf-8")
+
+    regressions = []
+    for scenario in ("chat", "intent"):
+        legacy, packed = results[(scenario, "legacy")], results[(scenario, "chat api")]
+        print(f"{scenario}: {legacy['evaluated_per_turn'] / max(1.0, packed['evaluated_per_turn']):.1f}x "
+              f"fewer prompt tokens evaluated per turn, mean latency "
+              f"{legacy['mean_ms']:.0f} -> {packed['mean_ms']:.0f} ms")
+        if packed["evaluated_per_turn"] > legacy["evaluated_per_turn"]:
+            regressions.append(f"{scenario}: {packed['evaluated_per_turn']:.0f} > "
+                               f"{legacy['evaluated_per_turn']:.0f} tokens evaluated per turn")
+    if regressions:
+        print("❌ Prefix reuse regressed:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
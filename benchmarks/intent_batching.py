@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Bursty LLM intent classification benchmark.
+
+Fires bursts of concurrent messages at IntentRouter.analyze_intent with the
+fast routing tiers off, so every message needs the LLM, and compares model
+calls and wall time with micro-batching disabled and enabled. The model is a
+stub whose latency grows a little with prompt size (``--llm-ms`` per call
+plus ``--per-item-ms`` per classified message) and which serves
+``--concurrency`` calls at a time, like a local Ollama model (default 1).
+Lone messages (no burst) are timed too: batching must not make them wait.
+
+Usage:
+    python benchmarks/intent_batching.py [--corpus FILE] [--burst N] [--bursts N]
+                                         [--llm-ms MS] [--per-item-ms MS] [--concurrency N]
+                                         [--window-ms MS] [--max-items N]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "intent_corpus.txt"
+
+sys.path.insert(0, str(ROOT))
+
+_REQUEST_RE = re.compile(r"^\[(\d+)\] USER REQUEST:", re.MULTILINE)
+
+
+class StubModelManager:
+    """Answers every request with a confident chat intent."""
+
+    def __init__(self, call_ms, per_item_ms, concurrency):
+        self.call_ms = call_ms
+        self.per_item_ms = per_item_ms
+        self.slots = asyncio.Semaphore(concurrency)
+        self.calls = 0
+
+    async def generate_response(self, messages, cache_site=None):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        indexes = [int(i) for i in _REQUEST_RE.findall(prompt)]
+        async with self.slots:
+            await asyncio.sleep((self.call_ms + self.per_item_ms * max(1, len(indexes))) / 1000.0)
+        answer = {"intent_type": "chat", "confidence": 0.9, "tool_name": "jarvis_chat",
+                  "arguments": {}, "reasoning": "stub"}
+        if not indexes:
+            return json.dumps(answer)
+        return json.dumps([dict(answer, index=i) for i in indexes])
+
+
+async def run_bursts(router, messages, burst, bursts):
+    latencies = []
+    unanswered = 0
+
+    async def one(text, n):
+        nonlocal unanswered
+        start = time.perf_counter()
+        result = await router.analyze_intent(f"{text} #{n}", f"user{n % 7}", "bench")
+        latencies.append((time.perf_counter() - start) * 1000)
+        if result.tier != "llm":
+            unanswered += 1
+
+    started = time.perf_counter()
+    n = 0
+    for _ in range(bursts):
+        batch = []
+        for _ in range(burst):
+            batch.append(one(messages[n % len(messages)], n))
+            n += 1
+        await asyncio.gather(*batch)
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "messages": n,
+        "wall_s": wall,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "unanswered": unanswered,
+    }
+
+
+async def run(args):
+    from jarvis.intelligence.intent_batcher import MicroBatcher
+    from jarvis.intelligence.intent_router import IntentRouter
+
+    messages = [line.strip() for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    router = IntentRouter()
+    router.llm_available = True
+
+    results = {}
+    for name, window in (("unbatched", 0.0), ("batched", args.window_ms)):
+        stub = StubModelManager(args.llm_ms, args.per_item_ms, args.concurrency)
+        router.model_manager = stub
+        router.intent_batcher = MicroBatcher(router._llm_intent_batch, window_ms=window,
+                                             max_items=args.max_items, name=name)
+        router.routing_cache.clear()
+        stats = await run_bursts(router, messages, args.burst, args.bursts)
+        stats["llm_calls"] = stub.calls
+        stats["lone_p50_ms"] = (await run_bursts(router, messages, 1, args.bursts))["p50_ms"]
+        results[name] = stats
+    router.intent_log.close()
+
+    print(f"{args.bursts} bursts of {args.burst} messages, stub LLM {args.llm_ms:g} ms + "
+          f"{args.per_item_ms:g} ms/message x{args.concurrency}, window {args.window_ms:g} ms, batch <= {args.max_items}")
+    print(f"{'':<12}{'LLM calls':>10}{'msg/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'lone p50':>10}")
+    for name, stats in results.items():
+        print(f"{name:<12}{stats['llm_calls']:>10}{stats['messages'] / stats['wall_s']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['lone_p50_ms']:>10.1f}")
+    unbatched, batched = results["unbatched"], results["batched"]
+    print(f"LLM calls per message: {unbatched['llm_calls'] / unbatched['messages']:.2f} -> "
+          f"{batched['llm_calls'] / batched['messages']:.2f}")
+
+    if batched["unanswered"] or batched["llm_calls"] > unbatched["llm_calls"]:
+        print(f"❌ Batching lost {batched['unanswered']} answers or made more LLM calls")
+        return 1
+    if batched["lone_p50_ms"] > unbatched["lone_p50_ms"] + args.window_ms / 2:
+        print(f"❌ Lone messages waited for the batching window "
+              f"(p50 {unbatched['lone_p50_ms']:.1f} -> {batched['lone_p50_ms']:.1f} ms)")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched LLM intent classification")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="one message per line")
+    parser.add_argument("--burst", type=int, default=16, help="concurrent messages per burst")
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--llm-ms", type=float, default=50.0, help="stub latency per model call")
+    parser.add_argument("--per-item-ms", type=float, default=2.0, help="stub latency per classified message")
+    parser.add_argument("--concurrency", type=int, default=1, help="model calls served at once")
+    parser.add_argument("--window-ms", type=float, default=20.0)
+    parser.add_argument("--max-items", type=int, default=8)
+    args = parser.parse_args()
+    args.corpus = args.corpus.resolve()
+
+    # Every message goes to the (stub) LLM; no persistent caches, logs in a scratch directory
+    os.environ["INTENT_FAST_PATH"] = "0"
+    os.environ["ROUTING_CACHE_DB"] = ""
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as scratch:
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            return asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Intent pattern matching benchmark.
+
+Compares the compiled pattern engine used by IntentRouter against the
+original sequential ``re.search`` loop over the same pattern table, checks
+that both pick the same intent and pattern for every message, and reports
+per-message latency.
+
+Usage:
+    python benchmarks/intent_patterns.py [--corpus FILE] [--rounds N]
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from jarvis.intelligence.intent_router import IntentRouter, IntentType  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "intent_corpus.txt"
+
+
+def sequential_match(intent_patterns, text):
+    """Reference implementation: the pre-compilation matching loop."""
+    for pattern in intent_patterns.get(IntentType.CHAT, []):
+        if re.search(pattern, text):
+            return IntentType.CHAT, pattern
+    for intent_type, patterns in intent_patterns.items():
+        if intent_type == IntentType.CHAT:
+            continue
+        for pattern in patterns:
+            if re.search(pattern, text):
+                return intent_type, pattern
+    return None
+
+
+def compiled_match(engine, text):
+    match = engine.first(text)
+    return (match.intent, match.pattern) if match else None
+
+
+def time_per_message(fn, messages, rounds):
+    samples = []
+    for _ in range(rounds):
+        for text in messages:
+            start = time.perf_counter()
+            fn(text)
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent pattern matching")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="one message per line")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    messages = [line.strip().lower() for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    router = IntentRouter()
+    patterns = router.intent_patterns
+    engine = router.pattern_engine
+
+    mismatches = [
+        (text, sequential_match(patterns, text), compiled_match(engine, text))
+        for text in messages
+        if sequential_match(patterns, text) != compiled_match(engine, text)
+    ]
+    for text, expected, got in mismatches:
+        print(f"❌ {text!r}: sequential={expected} compiled={got}")
+
+    # Warm up regex and token caches before timing
+    for text in messages:
+        sequential_match(patterns, text)
+        compiled_match(engine, text)
+
+    sequential = time_per_message(lambda t: sequential_match(patterns, t), messages, args.rounds)
+    compiled = time_per_message(lambda t: compiled_match(engine, t), messages, args.rounds)
+
+    def pick_tool(text):
+        match = engine.first(text)
+        return router._determine_tool_from_pattern(match.intent, text) if match else None
+
+    tools = time_per_message(pick_tool, messages, args.rounds)
+
+    print(f"Corpus: {len(messages)} messages x {args.rounds} rounds")
+    print(f"{'':<22}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    for name, stats in (("sequential re.search", sequential), ("compiled engine", compiled), ("engine + tool pick", tools)):
+        print(f"{name:<22}{stats['mean']:>10.2f}{stats['p50']:>10.2f}{stats['p99']:>10.2f}")
+    print(f"Speedup: {sequential['mean'] / compiled['mean']:.1f}x")
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} routing mismatches")
+        return 1
+    print("✅ Identical routing output")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
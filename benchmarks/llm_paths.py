@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput of every LLM client path against the stub server.
+
+Starts the stub server (see stub_llm_server.py), which answers as both
+Ollama and OpenAI with ``--latency-ms`` to the first token, ``--tokens``
+tokens at ``--tokens-per-s`` and optional injected failures, and drives
+each client path at every ``--concurrency`` level:
+
+- brain.generate, brain.astream (brain/llm.py, Ollama)
+- OllamaModel.generate, OllamaModel.agenerate, OllamaModel.astream
+- ModelManager.generate[ollama], ModelManager.stream[ollama],
+  ModelManager.generate[openai] (needs the openai package)
+- DualModelManager.generate_response
+
+Synchronous paths run on a thread pool, async ones on one event loop.
+Response caching and coalescing are off and every prompt is distinct, so
+each call reaches the server; admission control is off unless
+``--admission`` is given.
+
+Per path and concurrency it reports p50/p95/p99 latency, time to first
+token for the streaming paths, throughput (calls and tokens per second),
+errors, and overhead per call: client-side latency minus the time the
+server spent serving the call's requests, i.e. what the client itself
+costs beyond the network round-trip and generation (connection setup,
+serialization, retries, thread and loop scheduling, pool queueing).
+
+Results go to ``--json`` with the commit and settings, so runs can be
+compared across commits: ``--baseline FILE`` prints the change against an
+earlier JSON file and exits 1 if any path's p95 latency or overhead grew
+by more than ``--tolerance`` (plus 5 ms of scheduling noise).
+
+Usage:
+    python benchmarks/llm_paths.py [--paths a,b] [--concurrency 1,4,16] [--requests N]
+                                   [--latency-ms MS] [--jitter-ms MS] [--tokens N] [--tokens-per-s N]
+                                   [--error-rate F] [--hang-rate F] [--hang-s S] [--parallel N]
+                                   [--admission] [--json FILE] [--baseline FILE] [--tolerance F]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm_server import Faults, StubLLMServer  # noqa: E402
+
+SYSTEM = "You are a benchmark assistant."
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered))) - 1))]
+
+
+def is_error(text):
+    from brain.llm import FALLBACK_REPLY
+
+    return not text or text.startswith(("Error", "[LLM unavailable")) or text == FALLBACK_REPLY
+
+
+# -- paths ------------------------------------------------------------------
+# Each path is (kind, setup); setup() returns the call and an optional async
+# cleanup. kind is "sync" (prompt -> text), "async" (prompt -> awaitable
+# text) or "stream" (prompt -> async iterator of fragments).
+
+def brain_generate():
+    from brain import llm
+
+    return lambda prompt: llm.generate(SYSTEM, prompt, cache_site=None), None
+
+
+def brain_astream():
+    from brain import llm
+
+    return lambda prompt: llm.astream(SYSTEM, prompt, cache_site=None), None
+
+
+def _ollama_model():
+    from jarvis.models.local_model import OllamaModel
+
+    return OllamaModel()
+
+
+def ollama_generate():
+    model = _ollama_model()
+    return lambda prompt: model.generate(prompt, system_prompt=SYSTEM, max_tokens=200), None
+
+
+def ollama_agenerate():
+    model = _ollama_model()
+    return lambda prompt: model.agenerate(prompt, system_prompt=SYSTEM, max_tokens=200), model.pool.aclose
+
+
+def ollama_astream():
+    model = _ollama_model()
+    return lambda prompt: model.astream(prompt, system_prompt=SYSTEM, max_tokens=200), model.pool.aclose
+
+
+def _manager(provider):
+    from jarvis.models.model_manager import ModelManager
+
+    manager = ModelManager()
+    if provider == "ollama":
+        # Streams take the router's order; keep the cloud out of it
+        manager.openai_available = False
+    elif not manager.openai_available:
+        raise RuntimeError("OpenAI client unavailable (is the openai package installed?)")
+    return manager
+
+
+def manager_generate(provider):
+    def setup():
+        manager = _manager(provider)
+        return (lambda prompt: manager.generate(prompt, SYSTEM, max_tokens=200, cache_site=None,
+                                                providers=(provider,)), manager.aclose)
+    return setup
+
+
+def manager_stream():
+    manager = _manager("ollama")
+    return lambda prompt: manager.stream(prompt, SYSTEM, max_tokens=200, cache_site=None), manager.aclose
+
+
+def dual_generate():
+    from jarvis.models.dual_model_manager import DualModelManager
+
+    manager = DualModelManager()
+
+    def call(prompt):
+        result = manager.generate_response(prompt, system_prompt=SYSTEM)
+        return result.get("ollama") or f"Error: {result.get('error')}"
+    return call, None
+
+
+PATHS = {
+    "brain.generate": ("sync", brain_generate),
+    "brain.astream": ("stream", brain_astream),
+    "OllamaModel.generate": ("sync", ollama_generate),
+    "OllamaModel.agenerate": ("async", ollama_agenerate),
+    "OllamaModel.astream": ("stream", ollama_astream),
+    "ModelManager.generate[ollama]": ("async", manager_generate("ollama")),
+    "ModelManager.stream[ollama]": ("stream", manager_stream),
+    "ModelManager.generate[openai]": ("async", manager_generate("openai")),
+    "DualModelManager.generate_response": ("sync", dual_generate),
+}
+
+
+# -- driving ----------------------------------------------------------------
+
+def timed_sync(call, prompt):
+    start = time.perf_counter()
+    try:
+        text = call(prompt)
+    except Exception as e:
+        text = f"Error: {e}"
+    return (time.perf_counter() - start) * 1000, None, text
+
+
+async def timed_async(kind, call, prompt):
+    start = time.perf_counter()
+    first = None
+    try:
+        if kind == "stream":
+            parts = []
+            async for fragment in call(prompt):
+                if first is None:
+                    first = (time.perf_counter() - start) * 1000
+                parts.append(fragment)
+            text = "".join(parts)
+        else:
+            text = await call(prompt)
+    except Exception as e:
+        text = f"Error: {e}"
+    return (time.perf_counter() - start) * 1000, first, text
+
+
+def run_level(server, name, kind, call, concurrency, requests, level_id):
+    prompts = [f"{name} c{concurrency} request {level_id}-{i}" for i in range(requests)]
+    with server.lock:
+        served_before = len(server.service_s)
+    start = time.perf_counter()
+    if kind == "sync":
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(lambda p: timed_sync(call, p), prompts))
+    else:
+        async def drive():
+            slots = asyncio.Semaphore(concurrency)
+
+            async def one(prompt):
+                async with slots:
+                    return await timed_async(kind, call, prompt)
+            return await asyncio.gather(*(one(p) for p in prompts))
+        samples = asyncio.get_event_loop().run_until_complete(drive())
+    elapsed = time.perf_counter() - start
+    with server.lock:
+        served = server.service_s[served_before:]
+
+    latencies = [ms for ms, _, _ in samples]
+    ttfts = [first for _, first, _ in samples if first is not None]
+    ok = sum(1 for _, _, text in samples if not is_error(text))
+    return {
+        "calls": len(samples),
+        "errors": len(samples) - ok,
+        "server_requests": len(served),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "ttft_p50_ms": percentile(ttfts, 50),
+        "ttft_p95_ms": percentile(ttfts, 95),
+        "overhead_ms": (sum(latencies) - sum(served) * 1000) / max(1, len(samples)),
+        "calls_per_s": len(samples) / elapsed,
+        "tokens_per_s": ok * server.faults.tokens / elapsed,
+    }
+
+
+def run_path(server, name, args):
+    kind, setup = PATHS[name]
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        call, cleanup = setup()
+        # Connection setup and model loading are not what is measured
+        run_level(server, name, kind, call, 1, args.warmup, "warmup")
+        results = {}
+        for concurrency in args.concurrency:
+            results[str(concurrency)] = run_level(server, name, kind, call, concurrency, args.requests,
+                                                  concurrency)
+        if cleanup is not None:
+            loop.run_until_complete(cleanup())
+        return results
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def fmt(value, spec=".0f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_results(results):
+    print(f"{'path':<36}{'conc':>5}{'calls':>6}{'err':>5}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}"
+          f"{'ttft p50':>9}{'overhead':>9}{'calls/s':>9}{'tok/s':>8}")
+    for name, levels in results.items():
+        if "error" in levels:
+            print(f"{name:<36}  skipped: {levels['error']}")
+            continue
+        for concurrency, r in levels.items():
+            print(f"{name:<36}{concurrency:>5}{r['calls']:>6}{r['errors']:>5}{fmt(r['p50_ms']):>8}"
+                  f"{fmt(r['p95_ms']):>8}{fmt(r['p99_ms']):>8}{fmt(r['ttft_p50_ms']):>9}"
+                  f"{fmt(r['overhead_ms'], '.1f'):>9}{fmt(r['calls_per_s'], '.1f'):>9}"
+                  f"{fmt(r['tokens_per_s']):>8}")
+
+
+def compare(results, baseline, tolerance):
+    """Print changes against a baseline run; return the regressions."""
+    regressions = []
+    print(f"\nagainst baseline {baseline['meta'].get('commit') or '?'}:")
+    for name, levels in results.items():
+        for concurrency, r in levels.items():
+            before = baseline["results"].get(name, {}).get(concurrency)
+            if not isinstance(r, dict) or not isinstance(before, dict) or "p95_ms" not in before:
+                continue
+            print(f"  {name} c{concurrency}: p95 {before['p95_ms']:.0f} -> {r['p95_ms']:.0f} ms, "
+                  f"overhead {before['overhead_ms']:.1f} -> {r['overhead_ms']:.1f} ms")
+            for metric in ("p95_ms", "overhead_ms"):
+                if r[metric] > before[metric] * (1 + tolerance) + 5:
+                    regressions.append(f"{name} c{concurrency}: {metric} {r[metric]:.1f} > {before[metric]:.1f}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput of the LLM client paths")
+    parser.add_argument("--paths", default=",".join(PATHS), help="comma-separated subset of: " + ", ".join(PATHS))
+    parser.add_argument("--concurrency", default="1,4,16",
+                        type=lambda s: [int(c) for c in s.split(",") if c.strip()])
+    parser.add_argument("--requests", type=int, default=48, help="calls per path and concurrency level")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=24, help="tokens per reply")
+    parser.add_argument("--tokens-per-s", type=float, default=400.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-s", type=float, default=2.0)
+    parser.add_argument("--parallel", type=int, default=0, help="requests the stub serves at once (0: unlimited)")
+    parser.add_argument("--admission", action="store_true", help="keep LLM admission control on")
+    parser.add_argument("--json", type=Path, help="write the results here")
+    parser.add_argument("--baseline", type=Path, help="an earlier --json file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative growth against the baseline")
+    args = parser.parse_args()
+
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    unknown = [p for p in paths if p not in PATHS]
+    if unknown:
+        parser.error(f"unknown paths: {', '.join(unknown)}")
+
+    faults = Faults(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, tokens=args.tokens,
+                    tokens_per_s=args.tokens_per_s, error_rate=args.error_rate, hang_rate=args.hang_rate,
+                    hang_s=args.hang_s, parallel=args.parallel)
+    server = StubLLMServer(faults, model="stub", seed=1).start()
+    # Configuration is read at import time, so set it before brain and jarvis are imported
+    os.environ.update({
+        "OLLAMA_HOST": server.url, "OLLAMA_MODEL": "stub", "LLM_PROVIDER": "ollama",
+        "OPENAI_API_KEY": "stub", "OPENAI_KEY": "", "OPENAI_BASE_URL": server.url + "/v1",
+        "CLAUDE_API_KEY": "",
+        # Every call has to reach the server
+        "RESPONSE_CACHE": "0", "MODEL_COALESCE": "0", "ROUTING_CACHE_DB": "",
+        "LLM_ADMISSION": "1" if args.admission else "0",
+    })
+    logging.disable(logging.WARNING)
+
+    results = {}
+    try:
+        for name in paths:
+            try:
+                results[name] = run_path(server, name, args)
+            except Exception as e:
+                results[name] = {"error": str(e)}
+    finally:
+        server.stop()
+
+    print(f"stub: {args.latency_ms:g} ms to first token, {args.tokens} tokens at {args.tokens_per_s:g}/s, "
+          f"error rate {args.error_rate:g}, hang rate {args.hang_rate:g}")
+    print_results(results)
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+    }
+    if args.json:
+        args.json.write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print("❌ Regressed against the baseline:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Fault-injection scenarios for ModelManager's adaptive provider routing.
+
+Starts one stub LLM server per provider (see stub_llm_server.py), points
+Claude, OpenAI and Ollama at them and runs the same phases twice: with the
+adaptive router and with the fixed Claude > OpenAI > Ollama order (circuit
+breakers on in both). Each phase changes the stub servers' faults, sends
+``--requests`` generations ``--concurrency`` at a time and reports which
+provider answered, latency percentiles and circuit states.
+
+Phases: all healthy; Claude slow; Claude failing; Claude recovered (after
+the breaker cooldown, so the half-open probe closes the circuit, or a
+demoted Claude's statistics have gone stale); cloud down with a flaky
+Ollama. The router's refresh and exploration intervals are set to the
+breaker cooldown so recovery fits in a phase. The stub servers are reseeded
+at the start of every phase, so both runs draw the same injected failures
+however many requests each provider got before.
+
+Exits 1 if the adaptive router is slower than the fixed order at p50 in any
+phase, or answers fewer requests.
+
+Requires the anthropic, openai and aiohttp packages, like ModelManager.
+
+Usage:
+    python benchmarks/provider_routing.py [--requests N] [--concurrency N] [--slow-ms MS]
+                                          [--hedge] [--cooldown S] [--timeout S] [--json FILE]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_llm_server import Faults, StubLLMServer  # noqa: E402
+
+PROVIDERS = ("claude", "openai", "ollama")
+HEALTHY = dict(latency_ms=80.0, jitter_ms=20.0, error_rate=0.0, hang_rate=0.0)
+
+
+def phases(slow_ms):
+    return [
+        ("healthy", {name: HEALTHY for name in PROVIDERS}),
+        ("claude slow", {"claude": dict(HEALTHY, latency_ms=slow_ms)}),
+        ("claude failing", {"claude": dict(HEALTHY, error_rate=1.0)}),
+        ("claude recovered", {"claude": HEALTHY}),
+        ("cloud down, ollama flaky", {"claude": dict(HEALTHY, error_rate=1.0),
+                                      "openai": dict(HEALTHY, error_rate=1.0),
+                                      "ollama": dict(HEALTHY, hang_rate=0.3)}),
+    ]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered))) - 1))]
+
+
+async def run_phase(manager, requests, concurrency):
+    from jarvis.models.model_manager import NO_MODELS_MESSAGE
+
+    before = dict(manager.router.picks)
+    slots = asyncio.Semaphore(concurrency)
+    latencies, failed = [], 0
+
+    async def one(i):
+        nonlocal failed
+        async with slots:
+            start = time.perf_counter()
+            text = await manager.generate(f"benchmark request {i}", max_tokens=200)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if text == NO_MODELS_MESSAGE or text.startswith("Error"):
+                failed += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {
+        "answered": requests - failed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "picks": {name: manager.router.picks[name] - before.get(name, 0) for name in PROVIDERS},
+        "circuits": {name: manager.router.breakers[name].state for name in PROVIDERS},
+    }
+
+
+async def run_mode(servers, adaptive, args):
+    from jarvis.models.model_manager import ModelManager
+
+    manager = ModelManager()
+    manager.router.adaptive = adaptive
+    manager.router.timeouts["ollama"] = args.timeout
+    results = []
+    try:
+        for index, (name, changes) in enumerate(phases(args.slow_ms)):
+            for provider, faults in changes.items():
+                servers[provider].configure(**faults)
+            for seed, server in enumerate(servers.values()):
+                server.reseed(index * len(servers) + seed)
+            if name == "claude recovered":
+                # Let the breaker cooldown pass so the next request is a half-open probe
+                await asyncio.sleep(args.cooldown + 0.1)
+            results.append((name, await run_phase(manager, args.requests, args.concurrency)))
+    finally:
+        await manager.aclose()
+    return results, manager.get_stats()["router"]
+
+
+def print_results(label, results):
+    print(f"\n{label}")
+    print(f"{'phase':<26}{'answered':>9}{'p50 ms':>9}{'p95 ms':>9}  picks (claude/openai/ollama)  circuits")
+    for name, r in results:
+        picks = "/".join(str(r["picks"][p]) for p in PROVIDERS)
+        circuits = " ".join(f"{p[:2]}:{r['circuits'][p]}" for p in PROVIDERS)
+        print(f"{name:<26}{r['answered']:>9}{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}  {picks:<29}{circuits}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive provider routing under injected faults")
+    parser.add_argument("--requests", type=int, default=40, help="generations per phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--slow-ms", type=float, default=1500.0, help="Claude latency in the slow phase")
+    parser.add_argument("--hedge", action="store_true", help="enable hedged requests")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="circuit breaker cooldown (s)")
+    parser.add_argument("--timeout", type=float, default=3.0, help="per-attempt timeout for cloud providers (s)")
+    parser.add_argument("--json", type=Path, help="write both runs' results here")
+    args = parser.parse_args()
+
+    servers = {name: StubLLMServer(Faults(**HEALTHY, hang_s=args.timeout * 3), model="stub", seed=i).start()
+               for i, name in enumerate(PROVIDERS)}
+    # Configuration is read at import time, so set it before jarvis is imported
+    os.environ.update({
+        "CLAUDE_API_KEY": "stub", "ANTHROPIC_BASE_URL": servers["claude"].url,
+        "OPENAI_API_KEY": "stub", "OPENAI_BASE_URL": servers["openai"].url + "/v1",
+        "OLLAMA_HOST": servers["ollama"].url, "OLLAMA_MODEL": "stub",
+        "MODEL_REQUEST_TIMEOUT": str(args.timeout),
+        "MODEL_BREAKER_COOLDOWN": str(args.cooldown),
+        # Phases last seconds, not minutes: let a demoted provider's numbers go stale
+        # (and unmeasured providers be explored) on the breaker's time scale
+        "MODEL_ROUTER_REFRESH": str(args.cooldown),
+        "MODEL_ROUTER_EXPLORE_INTERVAL": str(args.cooldown),
+        "MODEL_HEDGE": "1" if args.hedge else "0",
+        # Phases repeat the same prompts; every request has to reach a provider
+        "RESPONSE_CACHE": "0",
+    })
+    logging.disable(logging.WARNING)
+
+    try:
+        runs = {}
+        for label, adaptive in (("fixed order", False), ("adaptive", True)):
+            for server in servers.values():
+                server.configure(**HEALTHY)
+            runs[label] = asyncio.run(run_mode(servers, adaptive, args))
+            print_results(label, runs[label][0])
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    stats = runs["adaptive"][1]
+    print(f"\nadaptive router: {stats['hedges']} hedges ({stats['hedge_wins']} won), "
+          f"{stats['exhausted']} requests with no provider left")
+    if args.json:
+        args.json.write_text(json.dumps({label: {"phases": dict(results), "router": router}
+                                         for label, (results, router) in runs.items()}, indent=2),
+                             encoding="utf-8")
+
+    regressions = []
+    for (name, fixed), (_, adaptive) in zip(runs["fixed order"][0], runs["adaptive"][0]):
+        if adaptive["answered"] < fixed["answered"]:
+            regressions.append(f"{name}: answered {adaptive['answered']} < {fixed['answered']}")
+        # 10% slack for scheduling noise on the healthy phases
+        if adaptive["p50_ms"] > fixed["p50_ms"] * 1.1 + 5:
+            regressions.append(f"{name}: p50 {adaptive['p50_ms']:.0f} ms > {fixed['p50_ms']:.0f} ms")
+    if regressions:
+        print("❌ Adaptive routing regressed:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Offline routing accuracy and latency benchmark.
+
+Replays a labeled message corpus through IntentRouter, client/llm_router
+and the Discord command router with a deterministic stub LLM, and reports
+accuracy, confusion matrices, per-message latency percentiles and LLM calls
+per message. ``compare`` measures two revisions (or saved reports) and exits
+non-zero on regressions, so routing changes stop being deployed blind.
+
+Routing caches are disabled, the routing rules are compiled without an
+artifact cache or file watcher, intent classification is not batched, and
+logs go to a temporary directory, so runs are repeatable and nothing in the
+checkout is touched.
+
+Usage:
+    python benchmarks/routing run [--root DIR] [--corpus FILE] [--rounds N] [--llm-ms MS]
+                                  [--routers NAME ...] [--out REPORT.json] [--matrix]
+    python benchmarks/routing compare BASE [HEAD]      # revisions, "." or REPORT.json
+                                  [--max-accuracy-drop F] [--max-latency-increase F]
+                                  [--min-latency-delta-ms MS] [--save-dir DIR]
+    python benchmarks/routing bootstrap [--intents-log FILE] [--requests FILE ...]
+                                  [--text FILE ...] [--out FILE] [--fill]
+
+Examples:
+    python benchmarks/routing compare HEAD .            # before committing
+    python benchmarks/routing compare main HEAD --rounds 20
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent.parent
+DEFAULT_CORPUS = HERE.parent / "data" / "routing_corpus.jsonl"
+
+sys.path.insert(0, str(HERE))
+
+import compare as compare_mod  # noqa: E402
+import corpus as corpus_mod  # noqa: E402
+import harness  # noqa: E402
+
+# Applied before any jarvis import so module-level configuration picks them up
+BENCH_ENV = {
+    "ROUTING_CACHE_DB": "",
+    "ROUTING_RULES_CACHE": "",
+    "ROUTING_RULES_POLL": "0",
+    "INTENT_BATCH_WINDOW_MS": "0",
+}
+
+
+@contextlib.contextmanager
+def isolated(root: Path):
+    """Import routers from ``root`` and run in a scratch directory."""
+    os.environ.update(BENCH_ENV)
+    sys.path[1:1] = [str(root), str(root / "client")]
+    logging.disable(logging.WARNING)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="routing-bench-") as scratch:
+        os.chdir(scratch)
+        try:
+            yield
+        finally:
+            os.chdir(cwd)
+
+
+def cmd_run(args) -> int:
+    entries = corpus_mod.load_corpus(args.corpus)
+    root = args.root.resolve()
+    with isolated(root):
+        report = harness.run(entries, root, args.corpus, args.routers, args.rounds, args.llm_ms)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    if not args.quiet:
+        harness.print_report(report, matrix=args.matrix)
+    return 0
+
+
+def cmd_compare(args) -> int:
+    run_args = ["--corpus", str(args.corpus), "--rounds", str(args.rounds), "--llm-ms", str(args.llm_ms),
+                "--routers", *args.routers]
+    thresholds = compare_mod.Thresholds(args.max_accuracy_drop, args.max_latency_increase,
+                                        args.min_latency_delta_ms)
+    reports = {}
+    for side, spec in (("base", args.base), ("head", args.head)):
+        try:
+            reports[side] = compare_mod.load_side(spec, ROOT, run_args)
+        except (ValueError, RuntimeError) as e:
+            print(f"❌ {side}: {e}")
+            return 2
+        if args.save_dir:
+            args.save_dir.mkdir(parents=True, exist_ok=True)
+            (args.save_dir / f"{side}.json").write_text(json.dumps(reports[side], indent=2, sort_keys=True),
+                                                        encoding="utf-8")
+
+    regressions = compare_mod.compare(reports["base"], reports["head"], thresholds)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+def cmd_bootstrap(args) -> int:
+    existing = corpus_mod.load_corpus(args.out) if args.out.exists() else []
+    with isolated(ROOT):
+        new = []
+        if args.intents_log:
+            new.extend(corpus_mod.from_intent_log(args.intents_log))
+        for path in args.requests:
+            new.extend(corpus_mod.from_requests(path))
+        for path in args.text:
+            new.extend(corpus_mod.from_text(path))
+        entries = corpus_mod.merge(existing, new)
+
+        if args.fill:
+            # Label whatever is still unlabeled with this tree's current answers
+            predictions = asyncio.run(harness.replay(entries, list(harness.ADAPTERS), 0, 0.0))["predictions"]
+            for entry in entries:
+                if entry.get("reviewed"):
+                    continue
+                for task, by_text in predictions.items():
+                    entry["labels"].setdefault(task, by_text[entry["text"]])
+
+    corpus_mod.save_corpus(args.out, entries)
+    unreviewed = sum(not entry.get("reviewed") for entry in entries)
+    print(f"📚 {len(entries)} messages in {args.out} ({len(entries) - len(existing)} new, "
+          f"{unreviewed} awaiting review)")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Routing accuracy and latency benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def replay_options(p):
+        p.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="labeled JSONL corpus")
+        p.add_argument("--rounds", type=int, default=5, help="timed passes over the corpus")
+        p.add_argument("--llm-ms", type=float, default=0.0, help="simulated LLM latency per call")
+        p.add_argument("--routers", nargs="+", default=list(harness.ADAPTERS), choices=list(harness.ADAPTERS))
+
+    p = sub.add_parser("run", help="measure one tree")
+    replay_options(p)
+    p.add_argument("--root", type=Path, default=ROOT, help="tree whose routers are measured")
+    p.add_argument("--out", type=Path, help="write the JSON report here")
+    p.add_argument("--matrix", action="store_true", help="print confusion matrices")
+    p.add_argument("--quiet", action="store_true")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="compare two revisions or reports; exit 1 on regression")
+    replay_options(p)
+    p.add_argument("base", help="git revision, '.' for the working tree, or a report .json")
+    p.add_argument("head", nargs="?", default=".", help="defaults to the working tree")
+    p.add_argument("--max-accuracy-drop", type=float, default=0.0, help="allowed accuracy drop (fraction)")
+    p.add_argument("--max-latency-increase", type=float, default=0.25, help="allowed p50/p99 growth (fraction)")
+    p.add_argument("--min-latency-delta-ms", type=float, default=0.05,
+                   help="latency growth below this is treated as noise")
+    p.add_argument("--save-dir", type=Path, help="keep both reports as base.json/head.json")
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("bootstrap", help="build or extend the labeled corpus from recorded traffic")
+    p.add_argument("--intents-log", type=Path, default=ROOT / "logs" / "intents.log")
+    p.add_argument("--requests", type=Path, nargs="*", default=[], help="recorded request JSONL files")
+    p.add_argument("--text", type=Path, nargs="*", default=[], help="plain files, one message per line")
+    p.add_argument("--out", type=Path, default=DEFAULT_CORPUS)
+    p.add_argument("--fill", action="store_true", help="label missing tasks with the current routers' answers")
+    p.set_defaults(func=cmd_bootstrap)
+
+    args = parser.parse_args()
+    # Paths are used after changing into the scratch directory
+    for name in ("corpus", "out", "intents_log"):
+        if getattr(args, name, None) is not None:
+            setattr(args, name, getattr(args, name).resolve())
+    for name in ("requests", "text"):
+        if getattr(args, name, None):
+            setattr(args, name, [path.resolve() for path in getattr(args, name)])
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Compare two routing benchmark reports and flag regressions.
+
+Either side can be a saved report (``*.json``), ``.`` for the working tree,
+or any git revision. Revisions are checked out into a temporary worktree
+and measured in a subprocess, so each side imports only its own code while
+both use this checkout's harness and corpus.
+
+A run fails when, for any task or router present in the base report:
+- accuracy drops by more than ``max_accuracy_drop`` (fraction, default 0)
+- p50 or p99 latency grows by more than ``max_latency_increase`` (fraction)
+  *and* by more than ``min_latency_delta_ms``, so sub-microsecond noise on
+  fast routers does not fail the build
+- the LLM call rate per message goes up
+- a router that was available is not
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+MAIN = Path(__file__).resolve().parent / "__main__.py"
+
+
+@dataclass
+class Thresholds:
+    max_accuracy_drop: float = 0.0
+    max_latency_increase: float = 0.25
+    min_latency_delta_ms: float = 0.05
+
+
+def _git(root: Path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", str(root), *args], capture_output=True, text=True)
+
+
+def load_side(spec: str, repo: Path, run_args: Sequence[str]) -> Dict[str, Any]:
+    """Load a saved report, or measure the working tree or a git revision."""
+    path = Path(spec)
+    if spec.endswith(".json") and path.is_file():
+        return json.loads(path.read_text(encoding="utf-8"))
+    if spec == ".":
+        return _measure(repo, run_args)
+
+    if _git(repo, "rev-parse", "--verify", "--quiet", f"{spec}^{{commit}}").returncode != 0:
+        raise ValueError(f"{spec!r} is neither a report file nor a git revision")
+    with tempfile.TemporaryDirectory(prefix="routing-bench-") as scratch:
+        tree = Path(scratch) / "tree"
+        added = _git(repo, "worktree", "add", "--detach", "--quiet", str(tree), spec)
+        if added.returncode != 0:
+            raise RuntimeError(f"git worktree add {spec} failed: {added.stderr.strip()}")
+        try:
+            return _measure(tree, run_args)
+        finally:
+            _git(repo, "worktree", "remove", "--force", str(tree))
+
+
+def _measure(root: Path, run_args: Sequence[str]) -> Dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+        out_path = Path(out.name)
+    try:
+        cmd = [sys.executable, str(MAIN), "run", "--root", str(root), "--out", str(out_path), "--quiet", *run_args]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"benchmark run for {root} failed:\n{proc.stderr.strip()}")
+        return json.loads(out_path.read_text(encoding="utf-8"))
+    finally:
+        out_path.unlink(missing_ok=True)
+
+
+def _pct(value: Optional[float]) -> str:
+    return f"{value:.1%}" if value is not None else "-"
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], thresholds: Thresholds) -> List[str]:
+    """Print the comparison and return the list of regressions."""
+    regressions: List[str] = []
+    if base["meta"]["corpus_hash"] != head["meta"]["corpus_hash"]:
+        print("⚠️ Reports were produced from different corpora; only shared messages are comparable")
+
+    print(f"base {base['meta']['revision'] or base['meta']['root']}  ->  "
+          f"head {head['meta']['revision'] or head['meta']['root']}\n")
+    print(f"{'task':<24}{'base':>9}{'head':>9}{'delta':>9}")
+    for task, before in base["tasks"].items():
+        after = head["tasks"].get(task)
+        if after is None or before["accuracy"] is None:
+            continue
+        delta = (after["accuracy"] or 0.0) - before["accuracy"]
+        flag = ""
+        if delta < -thresholds.max_accuracy_drop - 1e-9:
+            flag = "  ❌"
+            regressions.append(f"{task} accuracy {_pct(before['accuracy'])} -> {_pct(after['accuracy'])}")
+        print(f"{task:<24}{_pct(before['accuracy']):>9}{_pct(after['accuracy']):>9}{delta * 100:>+8.1f}p{flag}")
+
+    print(f"\n{'router':<16}{'metric':<10}{'base':>10}{'head':>10}{'change':>9}")
+    for name, before in base["routers"].items():
+        after = head["routers"].get(name, {"available": False})
+        if not before.get("available"):
+            continue
+        if not after.get("available"):
+            regressions.append(f"{name} is unavailable: {after.get('error', 'missing from report')}")
+            print(f"{name:<16}unavailable  ❌")
+            continue
+        for metric in ("p50_ms", "p99_ms", "mean_ms"):
+            old, new = before["latency_ms"][metric], after["latency_ms"][metric]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if metric != "mean_ms" and change > thresholds.max_latency_increase \
+                    and new - old > thresholds.min_latency_delta_ms:
+                flag = "  ❌"
+                regressions.append(f"{name} {metric} {old:.4f} -> {new:.4f} ms ({change:+.0%})")
+            print(f"{name:<16}{metric:<10}{old:>10.4f}{new:>10.4f}{change:>+9.0%}{flag}")
+        old_calls, new_calls = before["llm_calls_per_msg"], after["llm_calls_per_msg"]
+        flag = ""
+        if new_calls > old_calls + 1e-9:
+            flag = "  ❌"
+            regressions.append(f"{name} LLM calls per message {old_calls:.2f} -> {new_calls:.2f}")
+        print(f"{name:<16}{'LLM/msg':<10}{old_calls:>10.2f}{new_calls:>10.2f}{'':>9}{flag}")
+
+    flips = _flips(base, head)
+    if flips:
+        print(f"\nMessages that regressed ({len(flips)}):")
+        for line in flips[:25]:
+            print(f"  {line}")
+        if len(flips) > 25:
+            print(f"  ... {len(flips) - 25} more")
+    return regressions
+
+
+def _flips(base: Dict[str, Any], head: Dict[str, Any]) -> List[str]:
+    """Labeled messages routed correctly in base and incorrectly in head."""
+    expected = head.get("expected", {})
+    flips = []
+    for task, before in base.get("predictions", {}).items():
+        after = head.get("predictions", {}).get(task, {})
+        labels = expected.get(task, {})
+        for text, label in labels.items():
+            if text in before and text in after and before[text] == label != after[text]:
+                flips.append(f"[{task}] {text!r}: {label} -> {after[text]}")
+    return flips
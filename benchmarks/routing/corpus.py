@@ -0,0 +1,148 @@
+"""
+Labeled routing corpus.
+
+The corpus is JSONL, one message per line:
+
+    {"text": "what's the price of btc",
+     "labels": {"intent_router.intent": "trading",
+                "intent_router.tool": "trading.get_quote",
+                "llm_router.tool": "trading.get_quote",
+                "command_router.tool": "natural_language"},
+     "source": "intents.log", "reviewed": true}
+
+``labels`` is keyed by task (see harness.TASKS); a message without a label
+for a task is still replayed for latency but not scored on that task.
+Bootstrapped entries are marked ``"reviewed": false`` until someone has
+checked their labels; merging a fresh bootstrap never overwrites the labels
+of an entry that is already in the corpus.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Keys that hold the user's message in recorded request logs
+TEXT_KEYS = ("input_text", "query", "text", "message", "content")
+
+
+def _entry(text: str, labels: Optional[Dict[str, str]] = None, source: str = "",
+           reviewed: bool = False) -> Dict[str, Any]:
+    return {"text": text, "labels": dict(labels or {}), "source": source, "reviewed": reviewed}
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    """Read a corpus file, dropping duplicate messages (first one wins)."""
+    entries, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: {e}") from None
+            text = (raw.get("text") or "").strip()
+            key = normalize(text)
+            if not text or key in seen:
+                continue
+            seen.add(key)
+            entries.append(_entry(text, raw.get("labels"), raw.get("source", ""), bool(raw.get("reviewed"))))
+    return entries
+
+
+def save_corpus(path: Path, entries: Iterable[Dict[str, Any]]):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, sort_keys=True) + "\n")
+    tmp.replace(path)
+
+
+def from_intent_log(path: Path) -> Iterator[Dict[str, Any]]:
+    """Entries from IntentRouter's intent log (live file and rotated backups).
+
+    The logged decision becomes the intent_router label. These are the
+    router's own answers, so they need review before they mean anything.
+    """
+    from jarvis.intelligence.intent_log import iter_log_entries, log_files
+
+    for log_file in log_files(Path(path)):
+        for record in iter_log_entries(log_file):
+            text = (record.get("input_text") or "").strip()
+            result = record.get("intent_result") or {}
+            if not text:
+                continue
+            labels = {}
+            if result.get("intent_type"):
+                labels["intent_router.intent"] = result["intent_type"]
+            if result.get("tool_name"):
+                labels["intent_router.tool"] = result["tool_name"]
+            yield _entry(text, labels, source=f"intents.log:{result.get('tier') or 'unknown'}")
+
+
+def from_requests(path: Path) -> Iterator[Dict[str, Any]]:
+    """Entries from a recorded request log (JSONL).
+
+    The message is taken from the first of TEXT_KEYS present. Labels are
+    kept if the record carries them, either as a ``labels`` mapping or as
+    ``intent``/``tool`` fields for the intent router.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            text = next((record[k] for k in TEXT_KEYS if isinstance(record.get(k), str) and record[k].strip()), "")
+            if not text:
+                continue
+            labels = dict(record.get("labels") or {})
+            if record.get("intent"):
+                labels.setdefault("intent_router.intent", record["intent"])
+            if record.get("tool"):
+                labels.setdefault("intent_router.tool", record["tool"])
+            yield _entry(text.strip(), labels, source=Path(path).name)
+
+
+def from_text(path: Path) -> Iterator[Dict[str, Any]]:
+    """Unlabeled entries from a plain corpus file, one message per line."""
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            yield _entry(line.strip(), source=Path(path).name)
+
+
+def merge(existing: List[Dict[str, Any]], new: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add new messages to a corpus.
+
+    Messages already in the corpus keep their labels; labels for tasks they
+    do not cover yet are filled in unless the entry has been reviewed. Later
+    duplicates in ``new`` (e.g. newer log entries) replace earlier labels.
+    """
+    merged = [dict(entry, labels=dict(entry["labels"])) for entry in existing]
+    index = {normalize(entry["text"]): entry for entry in merged}
+    added = {}
+    for entry in new:
+        key = normalize(entry["text"])
+        current = index.get(key)
+        if current is None:
+            current = added.get(key)
+            if current is None:
+                added[key] = dict(entry, labels=dict(entry["labels"]))
+            else:
+                current["labels"].update(entry["labels"])
+            continue
+        if not current.get("reviewed"):
+            for task, label in entry["labels"].items():
+                current["labels"].setdefault(task, label)
+    return merged + list(added.values())
@@ -0,0 +1,302 @@
+"""
+Router adapters, replay and metrics for the routing benchmark.
+
+Each adapter wraps one router the way the bot calls it and maps a message to
+a label per task:
+
+- intent_router.intent / intent_router.tool: IntentRouter.analyze_intent
+- llm_router.tool: client/llm_router.route_natural_language (the /nl path)
+- command_router.tool: DiscordCommandRouter.parse_command, i.e. the shared
+  command table; "natural_language" when no command matches
+
+Model calls go to a deterministic stub that counts calls, sleeps
+``llm_ms`` and never gives a confident answer, so every run over the same
+corpus routes identically and the LLM call rate per message is measurable.
+
+Adapters import the routers from whatever tree is first on sys.path, so the
+same harness measures any revision (see compare.py). A router that cannot
+be imported in that tree is reported as unavailable instead of failing the
+run. Nothing here imports jarvis at module level.
+"""
+import asyncio
+import hashlib
+import math
+import platform
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+TASKS = ("intent_router.intent", "intent_router.tool", "llm_router.tool", "command_router.tool")
+PERCENTILES = (50, 90, 99)
+REPORT_VERSION = 1
+
+
+class StubLLM:
+    """Counts model calls; every answer is too unsure to act on."""
+
+    def __init__(self, delay_ms: float = 0.0):
+        self.delay = delay_ms / 1000.0
+        self.calls = 0
+
+    async def intent_analysis(self, text, context):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return None
+
+    def generate(self, system, user, cache_site=None):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return '{"tool": "jarvis_chat", "args": {}}'
+
+
+class RouterAdapter:
+    name = ""
+    tasks: Sequence[str] = ()
+
+    def __init__(self, stub: StubLLM):
+        self.stub = stub
+
+    def setup(self):
+        """Import and configure the router; raise if it does not exist."""
+        raise NotImplementedError
+
+    async def route(self, text: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class IntentRouterAdapter(RouterAdapter):
+    name = "intent_router"
+    tasks = ("intent_router.intent", "intent_router.tool")
+
+    def setup(self):
+        from jarvis.intelligence.intent_router import IntentRouter
+
+        self.router = IntentRouter()
+        self.router.llm_available = True
+        self.router._llm_intent_analysis = self.stub.intent_analysis
+
+    async def route(self, text):
+        result = await self.router.analyze_intent(text, "bench", "bench")
+        return {"intent_router.intent": result.intent_type.value, "intent_router.tool": result.tool_name}
+
+    def close(self):
+        intent_log = getattr(self.router, "intent_log", None)
+        if intent_log is not None and hasattr(intent_log, "close"):
+            intent_log.close()
+
+
+class LLMRouterAdapter(RouterAdapter):
+    name = "llm_router"
+    tasks = ("llm_router.tool",)
+
+    def setup(self):
+        import llm_router
+
+        llm_router.BRAIN_AVAILABLE = True
+        llm_router.llm_generate = self.stub.generate
+        llm_router._ROUTING_CACHE = False
+        self.module = llm_router
+
+    async def route(self, text):
+        tool, _ = self.module.route_natural_language(text, None)
+        return {"llm_router.tool": tool or "none"}
+
+
+class CommandRouterAdapter(RouterAdapter):
+    name = "command_router"
+    tasks = ("command_router.tool",)
+
+    def setup(self):
+        # DiscordCommandRouter.parse_command is a thin wrapper over the shared
+        # table, and importing the router itself needs discord.py and bot config
+        from jarvis.intelligence.command_rules import get_command_table
+
+        self.table = get_command_table()
+
+    async def route(self, text):
+        command = self.table.match(text)
+        return {"command_router.tool": command.tool if command is not None else "natural_language"}
+
+
+ADAPTERS = {adapter.name: adapter for adapter in (IntentRouterAdapter, LLMRouterAdapter, CommandRouterAdapter)}
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    out = {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 4) if ordered else None,
+        "max_ms": round(ordered[-1], 4) if ordered else None,
+    }
+    for q in PERCENTILES:
+        value = percentile(ordered, q)
+        out[f"p{q:g}_ms"] = round(value, 4) if value is not None else None
+    return out
+
+
+def score(expected: List[Optional[str]], predicted: List[str]) -> Dict[str, Any]:
+    """Accuracy, confusion matrix and per-class precision/recall for one task."""
+    confusion: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    predicted_counts: Dict[str, int] = defaultdict(int)
+    labeled = correct = 0
+    for want, got in zip(expected, predicted):
+        if want is None:
+            continue
+        labeled += 1
+        correct += want == got
+        confusion[want][got] += 1
+        predicted_counts[got] += 1
+    per_class = {}
+    for label in sorted(set(confusion) | set(predicted_counts)):
+        hits = confusion.get(label, {}).get(label, 0)
+        support = sum(confusion.get(label, {}).values())
+        per_class[label] = {
+            "support": support,
+            "precision": round(hits / predicted_counts[label], 4) if predicted_counts.get(label) else None,
+            "recall": round(hits / support, 4) if support else None,
+        }
+    return {
+        "labeled": labeled,
+        "correct": correct,
+        "accuracy": round(correct / labeled, 4) if labeled else None,
+        "confusion": {want: dict(row) for want, row in sorted(confusion.items())},
+        "per_class": per_class,
+    }
+
+
+def corpus_hash(entries: List[Dict[str, Any]]) -> str:
+    digest = hashlib.sha256()
+    for entry in entries:
+        digest.update(entry["text"].encode("utf-8"))
+        digest.update(repr(sorted(entry["labels"].items())).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def git_revision(root: Path) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "-C", str(root), "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(["git", "-C", str(root), "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if out.returncode != 0:
+        return None
+    return out.stdout.strip() + ("+dirty" if dirty.stdout.strip() else "")
+
+
+async def replay(entries: List[Dict[str, Any]], routers: Sequence[str], rounds: int,
+                 llm_ms: float) -> Dict[str, Any]:
+    """Route every message through each router and collect predictions and timings."""
+    texts = [entry["text"] for entry in entries]
+    report_routers: Dict[str, Any] = {}
+    predictions: Dict[str, Dict[str, str]] = {}
+
+    for name in routers:
+        stub = StubLLM(llm_ms)
+        adapter = ADAPTERS[name](stub)
+        try:
+            adapter.setup()
+        except Exception as e:
+            report_routers[name] = {"available": False, "error": f"{type(e).__name__}: {e}"}
+            continue
+        try:
+            # One untimed pass warms regex and token caches; its labels are the predictions
+            labels = [await adapter.route(text) for text in texts]
+            stub.calls = 0
+            timings: List[List[float]] = [[] for _ in texts]
+            for _ in range(rounds):
+                for i, text in enumerate(texts):
+                    start = time.perf_counter()
+                    await adapter.route(text)
+                    timings[i].append((time.perf_counter() - start) * 1000)
+        finally:
+            adapter.close()
+        for task in adapter.tasks:
+            predictions[task] = {text: label.get(task, "none") for text, label in zip(texts, labels)}
+        report_routers[name] = {
+            "available": True,
+            # Percentiles over each message's median, so a GC pause in one
+            # round does not show up as a tail latency regression
+            "latency_ms": latency_summary([statistics.median(t) for t in timings if t]),
+            "llm_calls_per_msg": round(stub.calls / (rounds * len(texts)), 4) if texts and rounds else 0.0,
+        }
+
+    tasks, expected = {}, {}
+    for task, by_text in predictions.items():
+        labels = [entry["labels"].get(task) for entry in entries]
+        tasks[task] = score(labels, [by_text[text] for text in texts])
+        expected[task] = {text: label for text, label in zip(texts, labels) if label is not None}
+    return {"routers": report_routers, "tasks": tasks, "predictions": predictions, "expected": expected}
+
+
+def run(entries: List[Dict[str, Any]], root: Path, corpus_path: Path, routers: Sequence[str] = tuple(ADAPTERS),
+        rounds: int = 5, llm_ms: float = 0.0) -> Dict[str, Any]:
+    result = asyncio.run(replay(entries, routers, rounds, llm_ms))
+    result["meta"] = {
+        "version": REPORT_VERSION,
+        "root": str(root),
+        "revision": git_revision(root),
+        "corpus": str(corpus_path),
+        "corpus_hash": corpus_hash(entries),
+        "messages": len(entries),
+        "rounds": rounds,
+        "llm_ms": llm_ms,
+        "python": platform.python_version(),
+    }
+    return result
+
+
+def format_confusion(confusion: Dict[str, Dict[str, int]]) -> List[str]:
+    """Confusion matrix as text; columns are numbered to keep long tool names readable."""
+    labels = sorted(set(confusion) | {got for row in confusion.values() for got in row})
+    if not labels:
+        return []
+    width = max(len(label) for label in labels) + 5
+    cell = max(4, len(str(max((n for row in confusion.values() for n in row.values()), default=0))) + 1)
+    lines = [" " * width + "".join(f"{i:>{cell}}" for i in range(len(labels)))]
+    for i, want in enumerate(labels):
+        row = confusion.get(want, {})
+        cells = "".join(f"{(row.get(got) or '.'):>{cell}}" for got in labels)
+        lines.append(f"{i:>3} {want:<{width - 4}}{cells}")
+    return lines
+
+
+def print_report(report: Dict[str, Any], matrix: bool = False):
+    meta = report["meta"]
+    print(f"Revision {meta['revision'] or meta['root']}: {meta['messages']} messages x {meta['rounds']} rounds, "
+          f"LLM stub {meta['llm_ms']:g} ms")
+    print(f"{'router':<16}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'LLM/msg':>10}")
+    for name, router in report["routers"].items():
+        if not router["available"]:
+            print(f"{name:<16}unavailable ({router['error']})")
+            continue
+        lat = router["latency_ms"]
+        print(f"{name:<16}{lat['mean_ms']:>10.4f}{lat['p50_ms']:>10.4f}{lat['p90_ms']:>10.4f}"
+              f"{lat['p99_ms']:>10.4f}{router['llm_calls_per_msg']:>10.2f}")
+    print()
+    print(f"{'task':<24}{'labeled':>9}{'correct':>9}{'accuracy':>10}")
+    for task, result in report["tasks"].items():
+        accuracy = f"{result['accuracy']:.1%}" if result["accuracy"] is not None else "-"
+        print(f"{task:<24}{result['labeled']:>9}{result['correct']:>9}{accuracy:>10}")
+    if matrix:
+        for task, result in report["tasks"].items():
+            if result["labeled"]:
+                print(f"\n{task} (rows expected, columns predicted)")
+                print("\n".join(format_confusion(result["confusion"])))
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+End-to-end message routing benchmark.
+
+Replays a message corpus through two pipelines and reports per-message
+latency and the number of LLM calls:
+
+- layered: what the Discord bot used to do per message — IntentRouter,
+  the format-time detect_query_intent pass, and client/llm_router again
+  behind /nl for every message that lands on jarvis_chat
+- shared: RoutingService.route once; /nl only routes messages for which
+  the decision carries no route hint
+
+LLM calls are replaced by a stub that sleeps ``--llm-ms`` and answers
+"unsure", so both pipelines reach their model fallbacks; with the default
+of 0 no LLM is configured and only routing CPU time is measured. Routing
+caches are disabled and logs go to a temporary directory, so rounds are
+comparable and nothing in the checkout is touched.
+
+Usage:
+    python benchmarks/routing_e2e.py [--corpus FILE ...] [--rounds N] [--llm-ms MS]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = Path(__file__).resolve().parent / "data"
+DEFAULT_CORPORA = [DATA / "intent_corpus.txt", DATA / "slash_commands.txt"]
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "client"))
+
+
+def legacy_query_intent(query):
+    """detect_query_intent as the command routers ran it before the shared rules."""
+    query_lower = query.lower()
+    intent_patterns = {
+        "specific_list": {"pattern": r"list|top \d+|what are|show me|give me",
+                          "expects_detailed_response": True, "should_extract_items": True},
+        "follow_up": {"pattern": r"more about|details on|tell me more|explain|elaborate|more information",
+                      "needs_context": True, "expects_detailed_response": True},
+        "comparison": {"pattern": r"compare|versus|vs|difference between",
+                       "expects_detailed_response": True, "needs_multiple_sources": True},
+        "current_events": {"pattern": r"latest|recent|new|today|this week|breaking",
+                           "prefers_news_source": True, "time_sensitive": True},
+    }
+    detected = {"intent_type": "general", "confidence": 0.5, "metadata": {}}
+    for name, spec in intent_patterns.items():
+        if re.search(spec["pattern"], query_lower):
+            detected = {"intent_type": name, "confidence": 0.8,
+                        "metadata": {k: v for k, v in spec.items() if k != "pattern"}}
+            break
+    return detected
+
+
+class StubLLM:
+    """Counts model calls; every answer is too unsure to act on."""
+
+    def __init__(self, delay_ms):
+        self.delay = delay_ms / 1000.0
+        self.calls = 0
+
+    async def intent_analysis(self, text, context):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return None
+
+    def generate(self, system, user, cache_site=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return '{"tool": "jarvis_chat", "args": {}}'
+
+
+async def layered(router, llm_router, text):
+    result = await router.analyze_intent(text, "bench", "bench")
+    legacy_query_intent(text)
+    http_routed = result.tool_name == "jarvis_chat"
+    if http_routed:
+        llm_router.route_natural_language(text, None)
+    return http_routed
+
+
+async def shared(service, llm_router, text):
+    decision = await service.route(text, "bench", "bench")
+    http_routed = decision.tool_name == "jarvis_chat" and decision.route_hint() is None
+    if http_routed:
+        llm_router.route_natural_language(text, None)
+    return http_routed
+
+
+async def replay(pipeline, messages, rounds, stub, histogram):
+    stub.calls = 0
+    http_routed = 0
+    for _ in range(rounds):
+        for text in messages:
+            start = time.perf_counter()
+            http_routed += await pipeline(text)
+            histogram.record((time.perf_counter() - start) * 1000)
+    total = rounds * len(messages)
+    return {"llm_calls": stub.calls / total, "http_routed": http_routed / total}
+
+
+async def run(args):
+    from jarvis.intelligence.intent_router import IntentRouter
+    from jarvis.intelligence.latency import LatencyHistogram
+    from jarvis.intelligence.routing_service import RoutingService
+    import llm_router
+
+    messages = []
+    for corpus in args.corpus:
+        messages.extend(line.strip() for line in corpus.read_text(encoding="utf-8").splitlines() if line.strip())
+
+    stub = StubLLM(args.llm_ms)
+    router = IntentRouter()
+    router.llm_available = args.llm_ms > 0
+    router._llm_intent_analysis = stub.intent_analysis
+    llm_router.BRAIN_AVAILABLE = args.llm_ms > 0
+    llm_router.llm_generate = stub.generate
+    llm_router._ROUTING_CACHE = False
+    service = RoutingService(intent_router=router)
+
+    pipelines = {
+        "layered": lambda text: layered(router, llm_router, text),
+        "shared": lambda text: shared(service, llm_router, text),
+    }
+    # Warm up regex and token caches before timing
+    for pipeline in pipelines.values():
+        await replay(pipeline, messages, 1, stub, LatencyHistogram())
+
+    results = {}
+    for name, pipeline in pipelines.items():
+        histogram = LatencyHistogram()
+        counts = await replay(pipeline, messages, args.rounds, stub, histogram)
+        results[name] = (histogram.summary((50, 90, 99)), counts)
+    router.intent_log.close()
+
+    print(f"Corpus: {len(messages)} messages x {args.rounds} rounds, LLM stub {args.llm_ms:g} ms")
+    print(f"{'':<10}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'LLM/msg':>10}{'/nl route':>11}")
+    for name, (summary, counts) in results.items():
+        print(f"{name:<10}{summary['mean_ms']:>10.3f}{summary['p50_ms']:>10.3f}{summary['p90_ms']:>10.3f}"
+              f"{summary['p99_ms']:>10.3f}{counts['llm_calls']:>10.2f}{counts['http_routed']:>10.0%}")
+    layered_mean = results["layered"][0]["mean_ms"]
+    shared_mean = results["shared"][0]["mean_ms"]
+    print(f"Speedup: {layered_mean / shared_mean:.1f}x")
+
+    if results["shared"][1]["llm_calls"] > results["layered"][1]["llm_calls"]:
+        print("❌ Shared routing made more LLM calls than the layered pipeline")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end message routing")
+    parser.add_argument("--corpus", type=Path, nargs="+", default=DEFAULT_CORPORA, help="one message per line")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="simulated LLM latency (0 = no LLM)")
+    args = parser.parse_args()
+    args.corpus = [path.resolve() for path in args.corpus]
+
+    # No persistent caches, and intent logs in a scratch directory
+    os.environ["ROUTING_CACHE_DB"] = ""
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as scratch:
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            return asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Local fake LLM server with configurable latency, token rate and faults.
+
+Speaks enough of three APIs for the Jarvis clients to talk to it:
+
+- Ollama: GET /api/version, /api/tags, /api/ps; POST /api/generate and
+  /api/chat (NDJSON when "stream" is true)
+- OpenAI: POST /v1/chat/completions (SSE when "stream" is true)
+- Anthropic: POST /v1/messages (SSE when "stream" is true)
+
+Every reply is ``--tokens`` words. The first token arrives after
+``--latency-ms`` (± ``--jitter-ms``), the rest at ``--tokens-per-s``.
+Faults are drawn per request: ``--error-rate`` answers HTTP 500 and
+``--hang-rate`` sleeps ``--hang-s`` before answering at all.
+
+Ollama residency is simulated: a request for a model that is not loaded
+pays ``--load-ms`` first (reported as ``load_duration``), then the model
+stays loaded for the request's ``keep_alive`` (default 5m). /api/ps lists
+loaded models with their expiry, and a generate request without a prompt
+only loads the model, like Ollama.
+
+Ollama's prompt cache is simulated too: each model remembers the tokens of
+its last prompt and reply, a request only evaluates the tokens after the
+prefix it shares with them (``prompt_eval_count``, at ``--prompt-tokens-per-s``
+before the first token), and /api/generate returns the conversation as
+``context`` and accepts it back. ``chat_api = False`` makes /api/chat 404,
+like Ollama builds that predate it. ``--parallel`` caps the requests
+served at once, like OLLAMA_NUM_PARALLEL on a single Ollama instance;
+the rest wait for a free slot before their latency starts. Faults can be
+changed while the server runs (``StubLLMServer.configure``), which is how
+the scenarios in provider_routing.py make a provider fail and recover.
+
+Point the clients at it with OLLAMA_HOST, OPENAI_BASE_URL (include /v1) or
+ANTHROPIC_BASE_URL.
+
+Usage:
+    python benchmarks/stub_llm_server.py [--port 11500] [--latency-ms MS] [--tokens-per-s N]
+                                         [--error-rate F] [--hang-rate F] [--seed N]
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    tokens_per_s: float = 200.0
+    tokens: int = 24
+    error_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_s: float = 30.0
+    load_ms: float = 0.0
+    prompt_tokens_per_s: float = 0.0  # 0: prompt evaluation is free
+    parallel: int = 0  # requests served at once; 0: unlimited
+
+
+_DURATION_RE = re.compile(r"^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$")
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _tokens(text: str) -> List[int]:
+    """Stand-in token ids: one per word or punctuation mark."""
+    return [zlib.crc32(piece.encode("utf-8")) for piece in _PIECE_RE.findall(text)]
+
+
+def _prompt_tokens(body: Dict[str, Any], chat: bool) -> List[int]:
+    """Token ids of the templated prompt, like Ollama renders it."""
+    if chat:
+        tokens = []
+        for message in body.get("messages") or []:
+            tokens += _tokens(f"<|{message.get('role', 'user')}|> {message.get('content') or ''}")
+        return tokens + _tokens("<|assistant|>")
+    tokens = list(body.get("context") or [])
+    if body.get("system") and not tokens:
+        tokens += _tokens(f"<|system|> {body['system']}")
+    return tokens + _tokens(f"<|user|> {body.get('prompt') or ''} <|assistant|>")
+
+
+def _keep_alive_s(value: Any) -> float:
+    if value is None:
+        return 300.0
+    match = _DURATION_RE.match(str(value).strip().lower())
+    if not match:
+        return 300.0
+    seconds = float(match.group(1)) * {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, None: 1.0}[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections are not errors
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class StubLLMServer:
+    """The fake server on a background thread; ``port=0`` picks a free port."""
+
+    def __init__(self, faults: Optional[Faults] = None, host: str = "127.0.0.1", port: int = 0,
+                 model: str = "stub", seed: Optional[int] = None):
+        self.faults = faults or Faults()
+        self.model = model
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "errors": 0, "hangs": 0, "loads": 0}
+        # Ollama model -> time it is unloaded
+        self.resident: Dict[str, float] = {}
+        # Ollama model -> tokens of its last prompt and reply (the KV cache)
+        self.kv: Dict[str, List[int]] = {}
+        # Per Ollama generation: endpoint, prompt tokens and how many were evaluated
+        self.evals: List[Dict[str, Any]] = []
+        # Seconds spent serving each completed POST, from slot to last byte
+        self.service_s: List[float] = []
+        self.chat_api = True
+        self.generating = 0
+        self.peak_generating = 0
+        self._slots = threading.Condition()
+        self.httpd = _HTTPServer((host, port), _handler_for(self))
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, **changes) -> Faults:
+        with self.lock:
+            self.faults = replace(self.faults, **changes)
+            return self.faults
+
+    def reseed(self, seed: Optional[int]):
+        """Restart the fault and jitter draws, so runs can be given the same sequence."""
+        with self.lock:
+            self.random.seed(seed)
+
+    def start(self) -> "StubLLMServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def draw(self):
+        """Faults and timing for one request."""
+        with self.lock:
+            faults = self.faults
+            self.counts["requests"] += 1
+            roll = self.random.random()
+            jitter = self.random.uniform(-faults.jitter_ms, faults.jitter_ms) if faults.jitter_ms else 0.0
+            outcome = "ok"
+            if roll < faults.error_rate:
+                outcome = "error"
+                self.counts["errors"] += 1
+            elif roll < faults.error_rate + faults.hang_rate:
+                outcome = "hang"
+                self.counts["hangs"] += 1
+        return faults, outcome, max(0.0, faults.latency_ms + jitter) / 1000.0
+
+    @contextmanager
+    def slot(self, faults: Faults):
+        """Hold one of the ``parallel`` request slots (no limit when it is 0)."""
+        with self._slots:
+            while faults.parallel > 0 and self.generating >= faults.parallel:
+                self._slots.wait()
+            self.generating += 1
+            self.peak_generating = max(self.peak_generating, self.generating)
+        try:
+            yield
+        finally:
+            with self._slots:
+                self.generating -= 1
+                self._slots.notify()
+
+    def admit(self, model: str, keep_alive: Any, faults: Faults) -> float:
+        """Seconds spent loading ``model`` for this request (0 if it is resident)."""
+        now = time.time()
+        with self.lock:
+            cold = self.resident.get(model, 0.0) <= now
+            self.resident[model] = now + _keep_alive_s(keep_alive)
+            if cold:
+                self.counts["loads"] += 1
+        return faults.load_ms / 1000.0 if cold else 0.0
+
+    def prompt_eval(self, model: str, tokens: List[int], path: str) -> int:
+        """Tokens of ``tokens`` not already in ``model``'s cache (at least one, like llama.cpp)."""
+        with self.lock:
+            cached = self.kv.get(model, [])
+            shared = 0
+            for a, b in zip(cached, tokens):
+                if a != b:
+                    break
+                shared += 1
+            evaluated = max(1, len(tokens) - shared)
+            self.evals.append({"path": path, "prompt_tokens": len(tokens), "prompt_eval_count": evaluated})
+        return evaluated
+
+    def loaded(self) -> Dict[str, float]:
+        now = time.time()
+        with self.lock:
+            return {model: until for model, until in self.resident.items() if until > now}
+
+    def words(self, faults: Faults) -> Iterator[str]:
+        for i in range(faults.tokens):
+            yield ("stub" if i == 0 else " token") + (f" {i}" if i % 8 == 7 else "")
+
+
+def _handler_for(server: StubLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Like Ollama: no Nagle delay between the headers and a short body
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _start_stream(self, content_type: str):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+        def _chunk(self, data: str):
+            raw = data.encode("utf-8")
+            self.wfile.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+            self.wfile.flush()
+
+        def _end_stream(self):
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/api/version":
+                self._json(200, {"version": "0.0.0-stub"})
+            elif self.path == "/api/tags":
+                self._json(200, {"models": [{"name": f"{server.model}:latest"}]})
+            elif self.path == "/api/ps":
+                models = []
+                for name, until in server.loaded().items():
+                    expires = datetime.fromtimestamp(min(until, 1e10), timezone.utc).isoformat()
+                    models.append({"name": name, "model": name, "expires_at": expires})
+                self._json(200, {"models": models})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                body = {}
+            routes = {
+                "/api/generate": self._ollama,
+                "/api/chat": self._ollama,
+                "/v1/chat/completions": self._openai,
+                "/chat/completions": self._openai,
+                "/v1/messages": self._anthropic,
+            }
+            route = routes.get(self.path.split("?")[0])
+            if route is None or (self.path.startswith("/api/chat") and not server.chat_api):
+                self._json(404, {"error": "not found"})
+                return
+
+            faults, outcome, first_delay = server.draw()
+            with server.slot(faults):
+                served = time.perf_counter()
+                if outcome == "hang":
+                    time.sleep(faults.hang_s)
+                try:
+                    if outcome == "error":
+                        time.sleep(first_delay)
+                        self._json(500, {"error": {"message": "injected failure", "type": "server_error"}})
+                        return
+                    route(body, faults, first_delay)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout or lost hedge)
+                finally:
+                    with server.lock:
+                        server.service_s.append(time.perf_counter() - served)
+
+        def _paced(self, faults: Faults, first_delay: float) -> Iterator[str]:
+            time.sleep(first_delay)
+            gap = 1.0 / faults.tokens_per_s if faults.tokens_per_s > 0 else 0.0
+            for i, word in enumerate(server.words(faults)):
+                if i and gap:
+                    time.sleep(gap)
+                yield word
+
+        def _ollama(self, body, faults, first_delay):
+            chat = self.path.startswith("/api/chat")
+            started = time.perf_counter_ns()
+            model = body.get("model", server.model)
+            if ":" not in model:
+                model += ":latest"
+            load_s = server.admit(model, body.get("keep_alive"), faults)
+            time.sleep(load_s)
+            if not body.get("prompt") and not body.get("messages"):
+                # Load-only request
+                self._json(200, {"model": model, "created_at": datetime.now(timezone.utc).isoformat(),
+                                 "response": "", "done": True, "done_reason": "load",
+                                 "load_duration": int(load_s * 1e9)})
+                return
+
+            prompt = _prompt_tokens(body, chat)
+            evaluated = server.prompt_eval(model, prompt, self.path)
+            eval_s = evaluated / faults.prompt_tokens_per_s if faults.prompt_tokens_per_s > 0 else 0.0
+            reply = []
+
+            def message(text, done):
+                out = {"model": body.get("model", server.model), "done": done}
+                if chat:
+                    out["message"] = {"role": "assistant", "content": text}
+                else:
+                    out["response"] = text
+                if done:
+                    context = prompt + _tokens("".join(reply))
+                    with server.lock:
+                        server.kv[model] = context
+                    out.update(total_duration=time.perf_counter_ns() - started,
+                               load_duration=int(load_s * 1e9),
+                               prompt_eval_count=evaluated,
+                               prompt_eval_duration=int(eval_s * 1e9),
+                               eval_count=faults.tokens)
+                    if not chat:
+                        out["context"] = context
+                return out
+
+            if body.get("stream", True):
+                self._start_stream("application/x-ndjson")
+                for word in self._paced(faults, first_delay + eval_s):
+                    reply.append(word)
+                    self._chunk(json.dumps(message(word, False)) + "\n")
+                self._chunk(json.dumps(message("", True)) + "\n")
+                self._end_stream()
+            else:
+                reply.extend(self._paced(faults, first_delay + eval_s))
+                self._json(200, message("".join(reply), True))
+
+        def _openai(self, body, faults, first_delay):
+            model = body.get("model", server.model)
+            if body.get("stream"):
+                self._start_stream("text/event-stream")
+                for word in self._paced(faults, first_delay):
+                    chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": [{"index": 0, "delta": {"content": word},
+                                                          "finish_reason": None}]}
+                    self._chunk(f"data: {json.dumps(chunk)}\n\n")
+                self._chunk("data: [DONE]\n\n")
+                self._end_stream()
+                return
+            text = "".join(self._paced(faults, first_delay))
+            self._json(200, {
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": faults.tokens,
+                          "total_tokens": faults.tokens + 1},
+            })
+
+        def _anthropic(self, body, faults, first_delay):
+            model = body.get("model", server.model)
+            message = {"id": "stub", "type": "message", "role": "assistant", "model": model,
+                       "stop_reason": None, "stop_sequence": None,
+                       "usage": {"input_tokens": 1, "output_tokens": 0}}
+            if body.get("stream"):
+                def event(name, payload):
+                    self._chunk(f"event: {name}\ndata: {json.dumps(dict(payload, type=name))}\n\n")
+
+                self._start_stream("text/event-stream")
+                event("message_start", {"message": dict(message, content=[])})
+                event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+                for word in self._paced(faults, first_delay):
+                    event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": word}})
+                event("content_block_stop", {"index": 0})
+                event("message_delta", {"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                        "usage": {"output_tokens": faults.tokens}})
+                event("message_stop", {})
+                self._end_stream()
+                return
+            text = "".join(self._paced(faults, first_delay))
+            self._json(200, dict(message, content=[{"type": "text", "text": text}], stop_reason="end_turn",
+                                 usage={"input_tokens": 1, "output_tokens": faults.tokens}))
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama/OpenAI/Anthropic server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--model", default="stub")
+    parser.add_argument("--seed", type=int)
+    defaults = Faults()
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    faults = Faults(**{field: getattr(args, field) for field in asdict(defaults)})
+
+    server = StubLLMServer(faults, args.host, args.port, args.model, args.seed)
+    print(f"Stub LLM server on {server.url} ({faults})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
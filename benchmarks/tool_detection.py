@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tool detection benchmark.
+
+Compares ToolManager's compiled detection tables (jarvis/tools/tool_detection)
+against the original per-call approach: pattern lists run one by one with
+``re.search(pattern, query, re.IGNORECASE)`` and no prefilter. Checks that
+both pick the same tool call for every query and reports per-query latency
+and throughput, for the first match and for all candidates.
+
+Usage:
+    python benchmarks/tool_detection.py [--corpus FILE] [--rounds N]
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from jarvis.tools.tool_detection import DETECTION_RULES, ToolDetector  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "data" / "tool_queries.txt"
+ALL_TOOLS = [rule.tool for rule in DETECTION_RULES]
+
+
+def legacy_search_type(query):
+    """WebSearch.detect_search_type before compilation."""
+    query_lower = query.lower()
+    for pattern in [
+        r"(news|headlines|latest|recent|update|breaking)\s+(about|on|regarding|of)",
+        r"(what happened|what's happening|what is happening)",
+        r"(today|yesterday|this week)'s (news|updates|events)",
+    ]:
+        if re.search(pattern, query_lower):
+            return "news"
+    for pattern in [
+        r"(image|images|picture|pictures|photo|photos|photograph|photographs)\s+of",
+        r"(what does|how does).+(look like)",
+        r"(show|display).+(image|picture|photo)",
+    ]:
+        if re.search(pattern, query_lower):
+            return "images"
+    return "text"
+
+
+def legacy_detect(query, available):
+    """Reference implementation: the pre-compilation detection loop."""
+    query = query.lower()
+    for rule in DETECTION_RULES:
+        if rule.tool not in available:
+            continue
+        for pattern in list(rule.patterns):
+            match = re.search(pattern, query, re.IGNORECASE)
+            if match:
+                resolved = rule.resolver(match, query, legacy_search_type)
+                if resolved is not None:
+                    params, confidence = resolved
+                    return [{"tool": rule.tool, "params": params, "confidence": confidence}]
+    return []
+
+
+def time_per_query(fn, queries, rounds):
+    samples = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tool call detection")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="one query per line")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    queries = [line.strip() for line in args.corpus.read_text(encoding="utf-8").splitlines() if line.strip()]
+    detector = ToolDetector()
+
+    def compiled_first(query):
+        return [c.as_call() for c in detector.candidates(query, ALL_TOOLS, limit=1)]
+
+    mismatches = [
+        (query, legacy_detect(query, ALL_TOOLS), compiled_first(query))
+        for query in queries
+        if legacy_detect(query, ALL_TOOLS) != compiled_first(query)
+    ]
+    for query, expected, got in mismatches:
+        print(f"❌ {query!r}: legacy={expected} compiled={got}")
+
+    # Warm up the re module cache and the compiled tables before timing
+    for query in queries:
+        legacy_detect(query, ALL_TOOLS)
+        compiled_first(query)
+
+    results = [
+        ("legacy re.search", time_per_query(lambda q: legacy_detect(q, ALL_TOOLS), queries, args.rounds)),
+        ("compiled first", time_per_query(compiled_first, queries, args.rounds)),
+        ("compiled all", time_per_query(lambda q: detector.candidates(q, ALL_TOOLS), queries, args.rounds)),
+    ]
+
+    print(f"Corpus: {len(queries)} queries x {args.rounds} rounds")
+    print(f"{'':<18}{'mean µs':>10}{'p50 µs':>10}{'p99 µs':>10}{'queries/s':>12}")
+    for name, stats in results:
+        print(f"{name:<18}{stats['mean']:>10.2f}{stats['p50']:>10.2f}{stats['p99']:>10.2f}{1e6 / stats['mean']:>12,.0f}")
+    print(f"Speedup: {results[0][1]['mean'] / results[1][1]['mean']:.1f}x")
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} detection mismatches")
+        return 1
+    print("✅ Identical detection output")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,12 @@ Components:
 - llm: simple LLM adapter (Ollama/OpenAI) with safe fallbacks
 - memory: SQLite-backed short/long-term memory utilities
 - chat: FastAPI app exposing a /chat endpoint
+- conversation: one jarvis_chat turn (memory + persona + LLM), blocking or streamed
 """
 
 __all__ = [
     "config",
+    "conversation",
     "llm",
     "memory",
 ]
@@ -13,23 +13,20 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 from .config import load_config
-from .llm import generate
+from .conversation import chat_messages
+from .llm import chat as llm_chat
 from . import memory
 
 
 app = FastAPI(title="Jarvis Brain", version="0.1.0")
 
 
-def _jarvis_system_prompt(used: List[str]) -> str:
-    base = (
-        "You are Jarvis, a concise, helpful AI assistant. "
-        "Use helpful bullet points and short sentences. "
-        "If the user mentions past goals or preferences, acknowledge them."
-    )
-    if used:
-        joined = "\n- ".join(used)
-        return base + f"\n\nRelevant memories:\n- {joined}"
-    return base
+# Static, so every turn starts with the same prefix (memories go with the message)
+JARVIS_PERSONA = (
+    "You are Jarvis, a concise, helpful AI assistant. "
+    "Use helpful bullet points and short sentences. "
+    "If the user mentions past goals or preferences, acknowledge them."
+)
 
 
 async def _coerce_body(request: Request) -> Dict[str, Any]:
@@ -85,8 +82,8 @@ async def chat(request: Request) -> JSONResponse:
         except Exception:
             pass
 
-    system_prompt = _jarvis_system_prompt(used_memories)
-    reply = generate(system_prompt, user_input)
+    messages = chat_messages(user_input, used_memories, persona=JARVIS_PERSONA)
+    reply = llm_chat(messages)
     # Ensure recall is visible even if the LLM is not configured
     if used_memories:
         preview = "\n\nRecall: " + "; ".join(used_memories[:2])
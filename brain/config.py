@@ -5,6 +5,7 @@ Environment variables (with defaults):
 - LLM_PROVIDER: one of ["ollama", "openai"], default "ollama"
 - OLLAMA_MODEL: default "llama3.1"
 - OPENAI_MODEL: default "gpt-4o-mini"
+- OLLAMA_KEEP_ALIVE: default "30m" (how long Ollama keeps the model loaded; seconds or a duration)
 - MEMORY_DB_PATH: default "./data/memory.sqlite"
 """
 from __future__ import annotations
@@ -26,6 +27,17 @@ class BrainConfig:
     openai_model: str
     openai_api_key: str | None
     memory_db_path: Path
+    ollama_keep_alive: int | float | str = "30m"
+
+
+def _keep_alive(raw: str) -> int | float | str:
+    """Bare numbers are seconds for Ollama; anything else is passed as a duration string."""
+    raw = raw.strip()
+    try:
+        value = float(raw)
+    except ValueError:
+        return raw
+    return int(value) if value.is_integer() else value
 
 
 def load_config() -> BrainConfig:
@@ -36,6 +48,7 @@ def load_config() -> BrainConfig:
     # Check for OPENAI_KEY (primary) and OPENAI_API_KEY (fallback)
     openai_api_key = os.getenv("OPENAI_KEY") or os.getenv("OPENAI_API_KEY") or None
     memory_db_path = Path(os.getenv("MEMORY_DB_PATH", "./data/memory.sqlite")).resolve()
+    ollama_keep_alive = _keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
 
     # Ensure data dir exists
     if not memory_db_path.parent.exists():
@@ -48,5 +61,6 @@ def load_config() -> BrainConfig:
         openai_model=openai_model,
         openai_api_key=openai_api_key,
         memory_db_path=memory_db_path,
+        ollama_keep_alive=ollama_keep_alive,
     )
 
@@ -0,0 +1,132 @@
+"""
+One jarvis_chat turn: memory lookup, persona prompt, LLM reply, bookkeeping.
+
+The MCP server's jarvis_chat tool and the streaming /nl endpoint both go
+through here, so a streamed reply is saved, summarized and annotated with
+recalled memories exactly like a blocking one.
+
+The persona is a fixed system message followed by the stored history,
+packed to a token budget, so consecutive turns share a byte-identical
+prefix that Ollama does not re-evaluate; recalled memories change every
+turn and go in front of the new message instead of into the system prompt.
+
+Expose:
+    reply(message) -> str
+    stream_reply(message) -> async iterator of text fragments
+    chat_messages(message, used_memories, persona=PERSONA) -> messages for brain.llm.chat
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Dict, List, Set
+
+from . import memory
+from .llm import FALLBACK_REPLY, astream_chat, chat
+
+PERSONA = (
+    "You are Jarvis, a concise, helpful AI assistant. "
+    "Use short sentences and helpful bullet points when useful."
+)
+
+# Stored messages considered for history before packing to the token budget
+HISTORY_MESSAGES = 40
+
+# Background summarizations, referenced so they are not garbage collected mid-run
+_pending: Set[asyncio.Task] = set()
+
+
+def _pack(messages: List[Dict[str, str]], offset: int) -> List[Dict[str, str]]:
+    try:
+        from jarvis.models.context_window import pack_messages
+    except ImportError:
+        # Without the token estimator, send no history rather than guess its size
+        return messages[:1] + messages[-1:]
+    return pack_messages(messages, offset=offset)
+
+
+def chat_messages(message: str, used_memories: List[str], persona: str = PERSONA) -> List[Dict[str, str]]:
+    """Persona, packed history, then memories and the message as the new turn.
+
+    Call after the message has been saved; it is left out of the history.
+    """
+    rows = memory.recent_messages(HISTORY_MESSAGES + 1)
+    if rows and rows[-1][1] == "user" and rows[-1][2] == message:
+        rows = rows[:-1]
+    rows = rows[-HISTORY_MESSAGES:]
+    history = [{"role": "assistant" if role == "assistant" else "user", "content": text}
+               for _id, role, text, _ts in rows]
+    turn = message
+    if used_memories:
+        joined = "\n- ".join(used_memories)
+        turn = f"Relevant memories:\n- {joined}\n\n{message}"
+    messages = [{"role": "system", "content": persona}, *history, {"role": "user", "content": turn}]
+    # Row ids anchor where history is cut, so the cut holds still as the window slides
+    return _pack(messages, offset=rows[0][0] if rows else 0)
+
+
+def begin_turn(message: str) -> List[str]:
+    """Save the user's message and return the memories relevant to it."""
+    memory.save_message("user", message)
+    return [m[2] for m in memory.search_memories(message, limit=5)]
+
+
+def recall_preview(reply: str, used_memories: List[str]) -> str:
+    """Suffix that makes memory use visible, or "" if there is none to add."""
+    if not used_memories:
+        return ""
+    preview = "\n\nRecall: " + "; ".join(used_memories[:2])
+    return "" if preview in reply else preview
+
+
+def save_reply(reply: str) -> None:
+    memory.save_message("assistant", reply)
+
+
+def maybe_summarize() -> None:
+    """Periodically summarize the thread into long-term memory."""
+    try:
+        recent = memory.recent_messages(100)
+        if len(recent) % 10 == 0:
+            memory.summarize_thread()
+    except Exception:
+        pass
+
+
+def reply(message: str) -> str:
+    """Run a full turn and return the reply text."""
+    used_memories = begin_turn(message)
+    text = chat(chat_messages(message, used_memories))
+    # Hard fallback if brain returns unavailability marker
+    if not text or text.startswith("[LLM unavailable"):
+        text = FALLBACK_REPLY
+    save_reply(text)
+    maybe_summarize()
+    return (text or "").strip() + recall_preview(text, used_memories)
+
+
+async def stream_reply(message: str) -> AsyncIterator[str]:
+    """Run a full turn, yielding the reply as it is generated.
+
+    The recall preview arrives as the last fragment. Memory writes run in a
+    worker thread and summarization (another LLM call) runs after the
+    stream has ended, so neither holds up the tokens.
+    """
+    used_memories = await asyncio.to_thread(begin_turn, message)
+    messages = await asyncio.to_thread(chat_messages, message, used_memories)
+    parts: List[str] = []
+    async for text in astream_chat(messages):
+        parts.append(text)
+        yield text
+
+    text = "".join(parts)
+    if not text.strip():
+        text = FALLBACK_REPLY
+        yield text
+    await asyncio.to_thread(save_reply, text)
+    preview = recall_preview(text, used_memories)
+    if preview:
+        yield preview
+
+    task = asyncio.create_task(asyncio.to_thread(maybe_summarize))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
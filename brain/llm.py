@@ -1,72 +1,193 @@
 """
 LLM adapter: supports Ollama (local) and OpenAI (if API key set).
 
-Expose a single function:
-    generate(system_prompt, user_prompt, tools_schema=None) -> str
+Expose:
+    generate(system_prompt, user_prompt, tools_schema=None, cache_site=None, lane=None) -> str
+    chat(messages, cache_site=None, lane=None) -> str
+    astream(system_prompt, user_prompt, cache_site=None, lane=None) -> async iterator of text fragments
+    astream_chat(messages, cache_site=None, lane=None) -> async iterator of text fragments
 
 Notes:
-- For Ollama, use /api/generate with non-streaming requests.
-- For OpenAI, use chat.completions if the openai package is available.
+- For Ollama, use /api/chat (non-streaming for generate/chat, NDJSON for the
+  streams) with keep_alive so the model stays loaded between sparse messages.
+  Messages go out as given, so a static system prompt followed by history is
+  a byte-identical prefix that Ollama does not re-evaluate. Servers without
+  /api/chat get /api/generate, continuing from the previous turn's returned
+  context when jarvis.models.context_window is importable.
+- For OpenAI, use chat.completions if the openai package is available;
+  astream reads the server-sent events directly over httpx.
 - If neither backend is usable, return a safe fallback string.
+- astream only falls back to the next backend before the first fragment.
+- Calls that opt in with a cache_site go through the shared response cache
+  (jarvis.models.response_cache) when the jarvis package is importable;
+  fallback and error replies are never cached.
+- Model calls wait for a slot from the process-wide admission controller
+  (jarvis.models.admission) in ``lane``, derived from cache_site by
+  default, when the jarvis package is importable; an interactive call that
+  is not admitted returns (or yields) the fallback reply, any other lane
+  gets an empty string (or no fragments) so callers can tell it apart.
 """
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 
 from .config import load_config
 
+FALLBACK_REPLY = "I registered your message. I'll remember key details and respond succinctly."
 
-def _format_messages(system_prompt: str, user_prompt: str) -> list[dict[str, str]]:
+_RESPONSE_CACHE = None
+_OLLAMA_CONTEXTS = None
+_ADMISSION = None
+# Cleared if the Ollama server turns out not to have /api/chat
+_CHAT_API = True
+
+
+def _response_cache():
+    """Lazily open the shared LLM response cache (None if unavailable or disabled)."""
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        try:
+            from jarvis.models.response_cache import get_response_cache
+
+            _RESPONSE_CACHE = get_response_cache() or False
+        except Exception:
+            _RESPONSE_CACHE = False
+    return _RESPONSE_CACHE or None
+
+
+def _ollama_contexts():
+    """Lazily create the /api/generate context store (None if jarvis is unavailable)."""
+    global _OLLAMA_CONTEXTS
+    if _OLLAMA_CONTEXTS is None:
+        try:
+            from jarvis.models.context_window import OllamaContexts
+
+            _OLLAMA_CONTEXTS = OllamaContexts()
+        except Exception:
+            _OLLAMA_CONTEXTS = False
+    return _OLLAMA_CONTEXTS or None
+
+
+def _admission():
+    """Lazily get the admission controller (None if jarvis is unavailable)."""
+    global _ADMISSION
+    if _ADMISSION is None:
+        try:
+            from jarvis.models import admission
+
+            _ADMISSION = admission
+        except Exception:
+            _ADMISSION = False
+    return _ADMISSION or None
+
+
+def _lane(lane: Optional[str], cache_site: Optional[str]) -> Optional[str]:
+    admission = _admission()
+    if lane or admission is None:
+        return lane
+    return admission.lane_for(cache_site)
+
+
+def _cache_request(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    cfg = load_config()
+    system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+    turns = [m for m in messages if m["role"] != "system"]
+    if len(turns) == 1:
+        prompt = turns[0]["content"]
+    else:
+        prompt = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    return {
+        "prompt": prompt,
+        "system": system,
+        "model": f"brain:{cfg.llm_provider}:{cfg.ollama_model}|{cfg.openai_model}",
+        "params": {"temperature": 0.3},
+    }
+
+
+def _rejected_reply(lane: Optional[str]) -> str:
+    """What a call that was not admitted returns: the chat fallback only for interactive calls."""
+    admission = _admission()
+    if admission is None or (lane or admission.DEFAULT_LANE) == admission.DEFAULT_LANE:
+        return FALLBACK_REPLY
+    return ""
+
+
+def _cacheable(text: str) -> bool:
+    return bool(text.strip()) and text != FALLBACK_REPLY and not text.startswith("[LLM unavailable")
+
+
+def _format_messages(system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
     return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt},
     ]
 
 
-def _generate_ollama(system_prompt: str, user_prompt: str) -> str:
+def _chat_api_missing(status: int, body: str) -> bool:
+    """True, and use /api/generate from now on, if this Ollama has no /api/chat."""
+    global _CHAT_API
+    # A missing model is a 404 too, but its error names the model
+    if status == 404 and "model" not in body.lower():
+        _CHAT_API = False
+        return True
+    return False
+
+
+def _ollama_request(messages: List[Dict[str, str]], stream: bool) -> Tuple[str, Dict[str, Any]]:
+    """URL and body for /api/chat, or /api/generate (continuing a stored context) without it."""
     cfg = load_config()
-    url = f"{cfg.ollama_host}/api/generate"
-    prompt = f"{system_prompt}\n\nUser: {user_prompt}\nAssistant:"
+    payload: Dict[str, Any] = {"model": cfg.ollama_model, "stream": stream, "keep_alive": cfg.ollama_keep_alive}
+    if _CHAT_API:
+        payload["messages"] = messages
+        return f"{cfg.ollama_host}/api/chat", payload
+    contexts = _ollama_contexts()
+    if contexts is not None:
+        payload.update(contexts.generate_payload(cfg.ollama_model, messages))
+    else:
+        transcript = "\n".join(
+            f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}"
+            for m in messages if m["role"] != "system"
+        )
+        payload["system"] = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        payload["prompt"] = f"{transcript}\nAssistant:"
+    return f"{cfg.ollama_host}/api/generate", payload
+
+
+def _ollama_text(data: Dict[str, Any]) -> str:
+    # /api/chat: { message: { role, content } }; /api/generate: { response }
+    message = data.get("message")
+    if message is not None:
+        return message.get("content") or ""
+    return data.get("response") or ""
+
 
+def _remember_context(messages: List[Dict[str, str]], reply: str, data: Dict[str, Any]) -> None:
+    contexts = _ollama_contexts() if data.get("context") else None
+    if contexts is not None:
+        contexts.remember(load_config().ollama_model, messages, reply, data["context"])
+
+
+def _generate_ollama(messages: List[Dict[str, str]]) -> str:
     try:
         with httpx.Client(timeout=120) as client:
-            # First try /api/generate
-            resp = client.post(
-                url,
-                json={
-                    "model": cfg.ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                },
-            )
-            if resp.status_code == 404:
-                # Some Ollama builds prefer /api/chat; try that path
-                chat_url = f"{cfg.ollama_host}/api/chat"
-                chat_payload = {
-                    "model": cfg.ollama_model,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    "stream": False,
-                }
-                chat_resp = client.post(chat_url, json=chat_payload)
-                chat_resp.raise_for_status()
-                data = chat_resp.json()
-                # Newer API shape: { message: { role, content }, ... }
-                msg = data.get("message") or {}
-                return (msg.get("content") or "").strip()
+            url, payload = _ollama_request(messages, stream=False)
+            resp = client.post(url, json=payload)
+            if url.endswith("/api/chat") and _chat_api_missing(resp.status_code, resp.text):
+                url, payload = _ollama_request(messages, stream=False)
+                resp = client.post(url, json=payload)
             resp.raise_for_status()
             data = resp.json()
-            return data.get("response", "") or ""
+            text = _ollama_text(data)
+            _remember_context(messages, text, data)
+            return text
     except Exception as e:
         return f"[LLM unavailable: Ollama error {e}]"
 
 
-def _generate_openai(system_prompt: str, user_prompt: str) -> str:
+def _generate_openai(messages: List[Dict[str, str]]) -> str:
     cfg = load_config()
     if not cfg.openai_api_key:
         return "[LLM unavailable: OPENAI_KEY not set]"
@@ -78,8 +199,6 @@ def _generate_openai(system_prompt: str, user_prompt: str) -> str:
         except Exception:
             OpenAI = None  # type: ignore
 
-        messages = _format_messages(system_prompt, user_prompt)
-
         if OpenAI is not None:
             client = OpenAI()
             res = client.chat.completions.create(
@@ -109,24 +228,207 @@ def _generate_openai(system_prompt: str, user_prompt: str) -> str:
         return f"[LLM unavailable: OpenAI error {e}]"
 
 
-def generate(system_prompt: str, user_prompt: str, tools_schema: Optional[dict] = None) -> str:
+def generate(
+    system_prompt: str,
+    user_prompt: str,
+    tools_schema: Optional[dict] = None,
+    cache_site: Optional[str] = None,
+    lane: Optional[str] = None,
+) -> str:
     """Generate a response using the configured LLM backend.
 
     tools_schema is accepted for future extension but not used in this minimal adapter.
+    cache_site opts the call into the response cache under that label; None bypasses it.
+    lane is the admission lane; derived from cache_site by default.
     """
+    return chat(_format_messages(system_prompt, user_prompt), cache_site=cache_site, lane=lane)
+
+
+def chat(messages: List[Dict[str, str]], cache_site: Optional[str] = None, lane: Optional[str] = None) -> str:
+    """Reply to role/content messages (system first, then history, then the new turn)."""
+    cache = _response_cache() if cache_site else None
+    if cache is None:
+        return _admitted_generate(messages, _lane(lane, cache_site))
+    request = _cache_request(messages)
+    cached = cache.get(cache_site, **request)
+    if cached is not None:
+        return cached
+    text = _admitted_generate(messages, _lane(lane, cache_site))
+    if _cacheable(text):
+        cache.put(cache_site, response=text, **request)
+    return text
+
+
+def _admitted_generate(messages: List[Dict[str, str]], lane: Optional[str]) -> str:
+    admission = _admission()
+    if admission is None:
+        return _generate(messages)
+    try:
+        ticket = admission.get_admission_controller().acquire_sync(lane)
+    except admission.AdmissionRejected:
+        return _rejected_reply(lane)
+    try:
+        return _generate(messages)
+    finally:
+        ticket.release()
+
+
+def _generate(messages: List[Dict[str, str]]) -> str:
     cfg = load_config()
 
     # Prefer OpenAI if explicitly configured and key set
     if cfg.llm_provider == "openai" and cfg.openai_api_key:
-        return _generate_openai(system_prompt, user_prompt)
+        return _generate_openai(messages)
 
     # Otherwise, try Ollama first, then OpenAI as a fallback if key exists
-    text = _generate_ollama(system_prompt, user_prompt)
+    text = _generate_ollama(messages)
     if text.startswith("[LLM unavailable") and cfg.openai_api_key:
-        return _generate_openai(system_prompt, user_prompt)
+        return _generate_openai(messages)
 
     # If both fail, provide a safe fallback so the endpoint still responds
     if text.startswith("[LLM unavailable") or not text.strip():
         # Minimal heuristic reply to keep flows unblocked
-        return "I registered your message. I'll remember key details and respond succinctly."
+        return FALLBACK_REPLY
     return text
+
+
+async def _astream_ollama(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    url, payload = _ollama_request(messages, stream=True)
+    parts = []
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120, connect=10)) as client:
+        async with client.stream("POST", url, json=payload) as resp:
+            if resp.status_code == 404 and url.endswith("/api/chat"):
+                body = (await resp.aread()).decode("utf-8", "replace")
+                if not _chat_api_missing(resp.status_code, body):
+                    resp.raise_for_status()
+            else:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(data["error"])
+                    text = _ollama_text(data)
+                    if text:
+                        parts.append(text)
+                        yield text
+                    if data.get("done"):
+                        _remember_context(messages, "".join(parts), data)
+                        break
+                return
+    # No /api/chat on this server: the flag is cleared, so this goes to /api/generate
+    async for text in _astream_ollama(messages):
+        yield text
+
+
+async def _astream_openai(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    cfg = load_config()
+    if not cfg.openai_api_key:
+        raise RuntimeError("OPENAI_KEY not set")
+    headers = {
+        "Authorization": f"Bearer {cfg.openai_api_key}",
+        "Content-Type": "application/json",
+    }
+    payload: Dict[str, Any] = {
+        "model": cfg.openai_model,
+        "messages": messages,
+        "temperature": 0.3,
+        "stream": True,
+    }
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120, connect=10)) as client:
+        async with client.stream(
+            "POST", "https://api.openai.com/v1/chat/completions", headers=headers, json=payload
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                text = (choices[0].get("delta") or {}).get("content") if choices else None
+                if text:
+                    yield text
+
+
+async def astream(system_prompt: str, user_prompt: str, cache_site: Optional[str] = None,
+                  lane: Optional[str] = None) -> AsyncIterator[str]:
+    """Stream a response from the configured backend, in the same order as generate().
+
+    A backend that fails before its first fragment is skipped; if none
+    produces anything, the fallback reply is yielded as a single fragment.
+    Errors after the first fragment propagate, since retrying elsewhere would
+    repeat text the caller has already shown. A response cache hit for
+    cache_site is yielded as a single fragment; a completed stream is cached.
+    """
+    stream = astream_chat(_format_messages(system_prompt, user_prompt), cache_site=cache_site, lane=lane)
+    try:
+        async for text in stream:
+            yield text
+    finally:
+        await stream.aclose()
+
+
+async def astream_chat(messages: List[Dict[str, str]], cache_site: Optional[str] = None,
+                       lane: Optional[str] = None) -> AsyncIterator[str]:
+    """Streaming counterpart of chat(); see astream()."""
+    cache = _response_cache() if cache_site else None
+    request = _cache_request(messages) if cache else {}
+    if cache is not None:
+        cached = cache.get(cache_site, **request)
+        if cached is not None:
+            yield cached
+            return
+
+    admission = _admission()
+    ticket = None
+    if admission is not None:
+        try:
+            lane = _lane(lane, cache_site)
+            ticket = await admission.get_admission_controller().acquire(lane)
+        except admission.AdmissionRejected:
+            text = _rejected_reply(lane)
+            if text:
+                yield text
+            return
+
+    parts = []
+    stream = _astream(messages)
+    try:
+        async for text in stream:
+            parts.append(text)
+            yield text
+    finally:
+        await stream.aclose()
+        if ticket is not None:
+            ticket.release()
+    text = "".join(parts)
+    if cache is not None and _cacheable(text):
+        cache.put(cache_site, response=text, **request)
+
+
+async def _astream(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    cfg = load_config()
+    backends = [_astream_ollama, _astream_openai]
+    if cfg.llm_provider == "openai" and cfg.openai_api_key:
+        backends = [_astream_openai]
+    elif not cfg.openai_api_key:
+        backends = [_astream_ollama]
+
+    for backend in backends:
+        stream = backend(messages)
+        try:
+            try:
+                first = await stream.__anext__()
+            except Exception:
+                continue
+            yield first
+            async for text in stream:
+                yield text
+            return
+        finally:
+            await stream.aclose()
+
+    yield FALLBACK_REPLY
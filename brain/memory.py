@@ -19,7 +19,7 @@ from contextlib import contextmanager
 from typing import List, Tuple
 
 from .config import load_config
-from .llm import generate
+from .llm import FALLBACK_REPLY, generate
 
 
 def _ensure_schema(conn: sqlite3.Connection) -> None:
@@ -101,7 +101,11 @@ def _all_message_texts(limit: int = 50) -> str:
 
 
 def summarize_thread() -> str:
-    """Summarize the last 50 messages and store as a memory with tag='summary'."""
+    """Summarize the last 50 messages and store as a memory with tag='summary'.
+
+    Returns "" without saving anything if the LLM produced no real summary
+    (the call was shed by admission control or no backend answered).
+    """
     convo = _all_message_texts(50)
     if not convo.strip():
         return ""
@@ -110,8 +114,9 @@ def summarize_thread() -> str:
         "Capture goals, decisions, follow-ups, and specific entities. Be brief."
     )
     user = f"Conversation to summarize:\n\n{convo}\n\nReturn only the summary bullets."
-    summary = generate(system, user)
-    if summary and summary.strip():
-        save_memory("summary", summary.strip())
-    return summary.strip()
+    summary = generate(system, user, cache_site="summarize_thread").strip()
+    if not summary or summary == FALLBACK_REPLY or summary.startswith("[LLM unavailable"):
+        return ""
+    save_memory("summary", summary)
+    return summary
 
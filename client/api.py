@@ -3,6 +3,13 @@
 Routes
 - GET /tools → list available tools
 - POST /run-tool → {"tool": "<name>", "args": {...}} → runs a tool
+- GET /status → connected servers, NL routing cache and LLM response cache hit rates
+- POST /run-plan → execute a multi-step plan, results returned when all finish
+- POST /run-plan/stream → same plan, per-step results streamed as SSE events
+- POST /nl → {"message": "...", "route"?: {...}} → routes free text to a tool; a
+  "route" the caller already decided is executed as-is
+- POST /nl/stream → same request, the reply streamed as SSE ``route``/``token``/
+  ``done`` events (``error`` on failure)
 
 Design
 - Uses the same stdio transport to spawn the MCP server subprocess.
@@ -25,6 +32,7 @@ import logging
 
 from fastapi import FastAPI, HTTPException, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 import httpx
@@ -653,6 +661,165 @@ class DisconnectServerRequest(BaseModel):
     forget: bool = False
 
 
+_PLAN_OPTIONS = (
+    "max_concurrency",
+    "per_server_concurrency",
+    "failure_policy",
+    "step_timeout",
+    "plan_timeout",
+    "hedge_after",
+    "max_retries",
+    "dedupe",
+    "memo_ttl",
+)
+
+
+def _parse_plan_body(body: Any) -> tuple[List[Any], Dict[str, Any]]:
+    """Split a /run-plan body into (steps, execute_plan options).
+
+    Accepts either {"steps": [...], ...options} or a bare list of steps.
+    """
+    options: Dict[str, Any] = {}
+    if isinstance(body, dict) and "steps" in body:
+        steps = body["steps"]
+        for key in _PLAN_OPTIONS:
+            if body.get(key) is not None:
+                options[key] = body[key]
+    elif isinstance(body, list):
+        steps = body
+    else:
+        raise HTTPException(status_code=400, detail="Expected request body to be {\"steps\": [...]} or a JSON array of steps")
+
+    if not isinstance(steps, list):
+        raise HTTPException(status_code=400, detail="steps must be a list")
+
+    # If any step attempts server routing, reject with a clear message
+    for s in steps:
+        if isinstance(s, dict) and s.get("server") not in (None, "", "jarvis"):
+            raise HTTPException(status_code=400, detail="server routing not supported in HTTP API")
+    return steps, options
+
+
+def _precomputed_route(payload: Dict[str, Any], tools_map: Dict[str, Any]) -> Optional[tuple[str, Dict[str, Any]]]:
+    """(tool, args) from a caller that already routed the message, if usable.
+
+    The Discord bot routes every message once and sends the decision along
+    as {"route": {"tool": ..., "arguments": ...}}; re-routing it here would
+    repeat the pattern matching and possibly the LLM call.
+    """
+    route = payload.get("route")
+    if not isinstance(route, dict):
+        return None
+    tool = route.get("tool")
+    args = route.get("arguments")
+    if not isinstance(tool, str) or (tool != "jarvis_chat" and tool not in tools_map):
+        return None
+    args = dict(args) if isinstance(args, dict) else {}
+    if tool == "jarvis_chat" and not args.get("message"):
+        args["message"] = payload.get("message")
+    return tool, args
+
+
+def _sse_event(event: str, payload: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+def _summary_prompt(raw_text: str) -> str:
+    return (
+        "Summarize this tool output for the user in 3-6 concise bullet points or 1 short paragraph. "
+        "Remove raw JSON. Answer directly and plainly. Output only the summary.\n\n---\n"
+        f"{raw_text[:2000]}"
+    )
+
+
+def _is_preformatted(raw_text: Any) -> bool:
+    """Tool output that is already a user-facing report (e.g. trading dashboards)."""
+    return isinstance(raw_text, str) and raw_text.strip().startswith("📊")
+
+
+def _needs_summary(routed_tool: str, raw_text: Any) -> bool:
+    return not _is_preformatted(raw_text) and SUMMARIZER_ENABLED and routed_tool != "jarvis_chat"
+
+
+def _data_payload(raw_result: Any) -> Any:
+    raw_payload = _result_to_json(raw_result)
+    data_payload = raw_payload.get("text") or raw_payload.get("value") or raw_payload
+    if isinstance(data_payload, str):
+        try:
+            data_payload = json.loads(data_payload)
+        except Exception:
+            pass
+    return data_payload
+
+
+async def _route_nl(manager: "SessionManager", payload: Dict[str, Any], message: str) -> tuple[str, Dict[str, Any], str, str]:
+    """(tool, args, server alias, routed_by) for a free-text message."""
+    # Step 1: collect tools
+    alias_order = manager.list_aliases()
+    tools_map: Dict[str, Any] = {}
+    tool_alias_map: Dict[str, str] = {}
+    for alias in alias_order:
+        try:
+            tool_list = await manager.list_tools_cached(alias)
+        except Exception:
+            continue
+        for tool_obj in tool_list:
+            if tool_obj.name not in tools_map:
+                tools_map[tool_obj.name] = tool_obj
+                tool_alias_map[tool_obj.name] = alias
+
+    # Step 2: reuse the caller's routing decision when it names a known tool,
+    # otherwise try NL routing
+    route = _precomputed_route(payload, tools_map)
+    if route is not None:
+        routed_tool, routed_args = route
+        return routed_tool, routed_args, tool_alias_map.get(routed_tool, manager.default_alias), "caller"
+    try:
+        sys.path.append(str(Path(__file__).resolve().parent))
+        from llm_router import route_natural_language  # type: ignore
+
+        route_tool, route_args = route_natural_language(message, tools_map)
+        if route_tool:
+            return route_tool, route_args or {}, tool_alias_map.get(route_tool, manager.default_alias), "llm_router"
+    except Exception:
+        pass
+    return "jarvis_chat", {"message": message}, manager.default_alias, "llm_router"
+
+
+def _brain_stream():
+    """brain.conversation.stream_reply when the brain package imports in this process."""
+    try:
+        from brain.conversation import stream_reply  # type: ignore
+    except Exception:
+        return None
+    return stream_reply
+
+
+async def _close_model_clients() -> None:
+    """Close pooled model provider connections, if anything in this process opened them."""
+    model_manager = sys.modules.get("jarvis.models.model_manager")
+    if model_manager is not None:
+        await model_manager.aclose_model_managers()
+
+
+def _close_routing_caches() -> None:
+    """Close the routing caches' SQLite connections, if any were opened."""
+    routing_cache = sys.modules.get("jarvis.intelligence.routing_cache")
+    if routing_cache is not None:
+        routing_cache.close_routing_caches()
+
+
+class _PlanRouter:
+    """Adapter giving the orchestrator a call_tool_server() over SessionManager."""
+
+    def __init__(self, manager: "SessionManager"):
+        self._manager = manager
+
+    async def call_tool_server(self, server, tool, args):
+        alias = server or self._manager.default_alias
+        return await self._manager.call_tool(alias, tool, args or {})
+
+
 def create_app() -> FastAPI:
     default_params = _jarvis_stdio_params()
     saved_servers = {
@@ -670,6 +837,8 @@ def create_app() -> FastAPI:
             yield
         finally:
             await manager.shutdown()
+            await _close_model_clients()
+            _close_routing_caches()
 
     app = FastAPI(lifespan=lifespan)
 
@@ -687,6 +856,30 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.get("/status")
+    async def status():
+        manager: SessionManager = app.state.manager
+        try:
+            sys.path.append(str(Path(__file__).resolve().parent))
+            from llm_router import routing_cache_stats  # type: ignore
+
+            routing_cache = routing_cache_stats()
+        except Exception:
+            routing_cache = {}
+        try:
+            from jarvis.models.response_cache import response_cache_stats
+
+            response_cache = response_cache_stats()
+        except Exception:
+            response_cache = {}
+        return {
+            "status": "running",
+            "default": manager.default_alias,
+            "connected": [s["alias"] for s in manager.list_servers() if s["connected"]],
+            "routing_cache": routing_cache,
+            "response_cache": response_cache,
+        }
+
     @app.get("/servers")
     async def list_servers():
         manager: SessionManager = app.state.manager
@@ -765,41 +958,24 @@ def create_app() -> FastAPI:
     @app.post("/run-plan")
     async def run_plan(body: Any = Body(...)):
         manager: SessionManager = app.state.manager
-
-        # Accept either {"steps": [...]} or a bare list
-        if isinstance(body, dict) and "steps" in body:
-            steps = body["steps"]
-        elif isinstance(body, list):
-            steps = body
-        else:
-            raise HTTPException(status_code=400, detail="Expected request body to be {\"steps\": [...]} or a JSON array of steps")
-
-        if not isinstance(steps, list):
-            raise HTTPException(status_code=400, detail="steps must be a list")
-
-        # If any step attempts server routing, reject with a clear message
-        for s in steps:
-            if isinstance(s, dict) and s.get("server") not in (None, "", "jarvis"):
-                raise HTTPException(status_code=400, detail="server routing not supported in HTTP API")
+        steps, options = _parse_plan_body(body)
 
         # Prefer orchestrator if available for retries/parallelism; else simple loop
         try:
             from orchestrator.executor import execute_plan  # type: ignore
 
-            class _Router:
-                def __init__(self, _manager: SessionManager):
-                    self._manager = _manager
-
-                async def call_tool_server(self, server, tool, args):
-                    alias = server or self._manager.default_alias
-                    return await self._manager.call_tool(alias, tool, args or {})
-
-            router = _Router(manager)
-            results = await execute_plan(steps, router)
+            router = _PlanRouter(manager)
+            try:
+                results = await execute_plan(steps, router, **options)
+            except ValueError as exc:
+                # Malformed DAG (unknown/cyclic dependencies) or bad option
+                raise HTTPException(status_code=400, detail=f"invalid plan: {exc}")
             for step, res in zip(steps, results):
                 alias = (step or {}).get("server") or manager.default_alias
                 res.setdefault("server", alias)
             return results
+        except HTTPException:
+            raise
         except Exception:
             # Fallback: sequential execution
             out: List[Dict[str, Any]] = []
@@ -817,6 +993,68 @@ def create_app() -> FastAPI:
                     out.append({"server": alias, "tool": tool, "ok": False, "error": str(e)})
             return out
 
+    @app.post("/run-plan/stream")
+    async def run_plan_stream(body: Any = Body(...)):
+        """Server-Sent Events variant of /run-plan.
+
+        Emits one ``step`` event per step as soon as it finishes (in completion
+        order, with index/id/timings), then a ``summary`` event. Invalid plans
+        produce a single ``error`` event.
+        """
+        manager: SessionManager = app.state.manager
+        steps, options = _parse_plan_body(body)
+
+        from orchestrator.executor import execute_plan  # type: ignore
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def _on_step(event: Dict[str, Any]) -> None:
+            event.setdefault("server", (steps[event["index"]] or {}).get("server") or manager.default_alias)
+            queue.put_nowait(("step", event))
+
+        async def _produce() -> None:
+            started = time.perf_counter()
+            try:
+                results = await execute_plan(steps, _PlanRouter(manager), on_step=_on_step, **options)
+                ok_count = sum(1 for r in results if r.get("ok"))
+                queue.put_nowait((
+                    "summary",
+                    {
+                        "steps": len(results),
+                        "ok": ok_count,
+                        "failed": len(results) - ok_count,
+                        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                    },
+                ))
+            except ValueError as exc:
+                queue.put_nowait(("error", {"detail": f"invalid plan: {exc}"}))
+            except Exception as exc:
+                queue.put_nowait(("error", {"detail": str(exc)}))
+            finally:
+                queue.put_nowait(None)
+
+        async def _events():
+            producer = asyncio.create_task(_produce())
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    event, payload = item
+                    yield _sse_event(event, payload)
+            finally:
+                # Client went away: stop the plan instead of running it to completion
+                if not producer.done():
+                    producer.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await producer
+
+        return StreamingResponse(
+            _events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @app.post("/nl")
     async def natural_language(payload: Dict[str, Any]):
         manager: SessionManager = app.state.manager
@@ -825,60 +1063,20 @@ def create_app() -> FastAPI:
             return {"text": "Sorry, that failed: message is required", "meta": {"routed_tool": None}}
 
         try:
-            # Step 1: collect tools
-            alias_order = manager.list_aliases()
-            tools_map: Dict[str, Any] = {}
-            tool_alias_map: Dict[str, str] = {}
-            for alias in alias_order:
-                try:
-                    tool_list = await manager.list_tools_cached(alias)
-                except Exception:
-                    continue
-                for tool_obj in tool_list:
-                    if tool_obj.name not in tools_map:
-                        tools_map[tool_obj.name] = tool_obj
-                        tool_alias_map[tool_obj.name] = alias
-
-            routed_tool = "jarvis_chat"
-            routed_args: Dict[str, Any] = {"message": message}
-            routed_alias = manager.default_alias
-
-            # Step 2: try NL routing
-            try:
-                sys.path.append(str(Path(__file__).resolve().parent))
-                from llm_router import route_natural_language  # type: ignore
-
-                route_tool, route_args = route_natural_language(message, tools_map)
-                if route_tool:
-                    routed_tool = route_tool
-                    routed_args = route_args or {}
-                    routed_alias = tool_alias_map.get(route_tool, manager.default_alias)
-            except Exception:
-                routed_tool = "jarvis_chat"
-                routed_args = {"message": message}
-                routed_alias = manager.default_alias
+            routed_tool, routed_args, routed_alias, routed_by = await _route_nl(manager, payload, message)
 
             # Call routed tool
             raw_result = await manager.call_tool(routed_alias, routed_tool, routed_args)
             raw_text = _normalize_mcp_result(raw_result)
-            raw_payload = _result_to_json(raw_result)
-            data_payload = raw_payload.get("text") or raw_payload.get("value") or raw_payload
-            if isinstance(data_payload, str):
-                try:
-                    data_payload = json.loads(data_payload)
-                except Exception:
-                    pass
+            data_payload = _data_payload(raw_result)
 
-            if isinstance(raw_text, str) and raw_text.strip().startswith("📊"):
-                summary_text = raw_text.strip()
-            elif SUMMARIZER_ENABLED and routed_tool != "jarvis_chat":
-                summary_prompt = (
-                    "Summarize this tool output for the user in 3-6 concise bullet points or 1 short paragraph. "
-                    "Remove raw JSON. Answer directly and plainly. Output only the summary.\n\n---\n"
-                    f"{raw_text[:2000]}"
+            if _needs_summary(routed_tool, raw_text):
+                summary_result = await manager.call_tool(
+                    manager.default_alias, "jarvis_chat", {"message": _summary_prompt(raw_text)}
                 )
-                summary_result = await manager.call_tool(manager.default_alias, "jarvis_chat", {"message": summary_prompt})
                 summary_text = _normalize_mcp_result(summary_result) or raw_text
+            elif _is_preformatted(raw_text):
+                summary_text = raw_text.strip()
             else:
                 summary_text = raw_text
 
@@ -886,6 +1084,7 @@ def create_app() -> FastAPI:
                 "text": summary_text,
                 "meta": {
                     "routed_tool": routed_tool,
+                    "routed_by": routed_by,
                     "server": routed_alias,
                     "data": data_payload,
                 },
@@ -893,6 +1092,72 @@ def create_app() -> FastAPI:
         except Exception as e:
             return {"text": f"Sorry, that failed: {e}", "meta": {"routed_tool": None}}
 
+    @app.post("/nl/stream")
+    async def natural_language_stream(payload: Dict[str, Any]):
+        """Server-Sent Events variant of /nl.
+
+        Emits a ``route`` event once the tool is chosen, ``token`` events
+        ({"text": fragment}) as the reply is generated, then ``done`` with the
+        full text and the same meta as /nl. Failures produce an ``error``
+        event; if it arrives before any token the caller can retry on /nl.
+
+        MCP tool results arrive whole, so tokens are generated in this
+        process: jarvis_chat turns (and summaries of other tools' output) run
+        through brain.conversation, which keeps the same memory bookkeeping
+        as the jarvis_chat tool. Without the brain package the reply is sent
+        as a single token.
+        """
+        manager: SessionManager = app.state.manager
+        message = (payload or {}).get("message")
+
+        async def _events():
+            if not message or not isinstance(message, str):
+                yield _sse_event("error", {"detail": "message is required"})
+                return
+            try:
+                routed_tool, routed_args, routed_alias, routed_by = await _route_nl(manager, payload, message)
+                meta: Dict[str, Any] = {"routed_tool": routed_tool, "routed_by": routed_by, "server": routed_alias}
+                yield _sse_event("route", meta)
+
+                stream_reply = _brain_stream()
+                chat_message = None
+                if routed_tool == "jarvis_chat" and routed_alias == manager.default_alias:
+                    chat_message = routed_args.get("message") or message
+                    meta["data"] = None
+                else:
+                    raw_result = await manager.call_tool(routed_alias, routed_tool, routed_args)
+                    raw_text = _normalize_mcp_result(raw_result)
+                    meta["data"] = _data_payload(raw_result)
+                    if _needs_summary(routed_tool, raw_text):
+                        chat_message = _summary_prompt(raw_text)
+                    else:
+                        text = raw_text.strip() if _is_preformatted(raw_text) else raw_text
+                        yield _sse_event("token", {"text": text})
+                        yield _sse_event("done", {"text": text, "meta": meta})
+                        return
+
+                if stream_reply is None:
+                    result = await manager.call_tool(manager.default_alias, "jarvis_chat", {"message": chat_message})
+                    text = _normalize_mcp_result(result)
+                    yield _sse_event("token", {"text": text})
+                else:
+                    parts: List[str] = []
+                    async for fragment in stream_reply(chat_message):
+                        parts.append(fragment)
+                        yield _sse_event("token", {"text": fragment})
+                    text = "".join(parts)
+                if meta["data"] is None:
+                    meta["data"] = text
+                yield _sse_event("done", {"text": text, "meta": meta})
+            except Exception as e:
+                yield _sse_event("error", {"detail": str(e)})
+
+        return StreamingResponse(
+            _events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     return app
 
 
@@ -17,6 +17,57 @@ try:
 except Exception:
     BRAIN_AVAILABLE = False
 
+_ROUTING_CACHE = None
+
+
+def _routing_cache():
+    """Lazily open the shared routing decision cache (None if unavailable)."""
+    global _ROUTING_CACHE
+    if _ROUTING_CACHE is None:
+        try:
+            from jarvis.intelligence.routing_cache import get_routing_cache
+
+            _ROUTING_CACHE = get_routing_cache("llm_router")
+        except Exception:
+            _ROUTING_CACHE = False
+    return _ROUTING_CACHE or None
+
+
+def _catalog_key(tools: Optional[Dict[str, Any]], allow_multi: bool) -> Optional[str]:
+    """Cache namespace for a tool catalog; plans are only valid when multi-step is allowed."""
+    if _routing_cache() is None:
+        return None
+    from jarvis.intelligence.routing_cache import catalog_version
+
+    return f"{catalog_version(tools)}:{int(bool(allow_multi))}"
+
+
+def _cached_route(query: str, catalog: str) -> Tuple[Optional[str], Optional[Dict]]:
+    cache = _routing_cache()
+    if cache is None:
+        return None, None
+    hit = cache.get(query, catalog)
+    if not isinstance(hit, dict) or not hit.get("tool"):
+        return None, None
+    args = hit.get("args") or {}
+    if hit["tool"] == "jarvis_chat":
+        args["message"] = query
+    return hit["tool"], args
+
+
+def _remember_route(query: str, catalog: str, tool: str, args: Dict[str, Any]) -> None:
+    cache = _routing_cache()
+    if cache is None:
+        return
+    # Only argument-free decisions are safe to serve for near-duplicate wording
+    cache.put(query, catalog, {"tool": tool, "args": args}, fuzzy=not args)
+
+
+def routing_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the NL routing cache (empty if disabled)."""
+    cache = _routing_cache()
+    return cache.get_stats() if cache is not None else {}
+
 
 def _normalize_server_tool_name(tool_name: str) -> Tuple[str, str]:
     """Split tool into server.tool format if not already."""
@@ -33,105 +84,43 @@ def _normalize_server_tool_name(tool_name: str) -> Tuple[str, str]:
 
 
 def _trading_symbol(match: re.Match[str]) -> Dict[str, Any]:
-    """Parse trading symbols into standard format."""
-    symbol = match.group(1).upper()
-    # Common crypto symbols
-    if symbol in {"BTC", "ETH", "SOL", "ADA", "XRP", "DOGE", "MATIC", "LINK", "DOT", "AVAX"}:
-        return {"symbol": f"{symbol}/USDT"}
-    # Stock symbols (typically 1-5 chars)
-    if len(symbol) <= 5 and not '/' in symbol:
-        # Could be stock or crypto - let the trading server decide
-        return {"symbol": symbol}
-    if '/' in symbol:
-        return {"symbol": symbol}
-    # Default to crypto pair
-    return {"symbol": f"{symbol}/USDT"}
-
-
-# Enhanced keyword shortcuts with better coverage
-KEYWORD_SHORTCUTS = [
-    # Fitness shortcuts
-    {"tool": "fitness.list_workouts", "args": {"muscle_group": "legs"}, 
-     "contains": ["leg workout", "leg workouts", "legs", "lower body", "squat", "lunges"]},
-    {"tool": "fitness.list_workouts", "args": {"muscle_group": "upper"}, 
-     "contains": ["upper body", "upper workouts", "arm workout", "shoulder workout", 
-                  "chest workout", "back workout", "biceps", "triceps"]},
-    {"tool": "fitness.list_workouts", "args": {"muscle_group": "core"}, 
-     "contains": ["core workout", "ab workout", "abs", "midsection", "plank", "crunches"]},
-    {"tool": "fitness.list_workouts", "args": {}, 
-     "contains": ["all workouts", "every workout", "full workout list", "show workouts"]},
-    {"tool": "fitness.search_workouts", "args": {"query": "cardio"}, 
-     "contains": ["cardio workout", "hiit", "endurance", "running", "cycling"]},
-    
-    # Budget shortcuts
-    {"tool": "budget.get_balance", "args": {}, 
-     "contains": ["budget balance", "current balance", "wallet balance", "financial overview", 
-                  "how much money", "account balance", "my balance"]},
-    {"tool": "budget.get_transactions", "args": {"limit": 20}, 
-     "contains": ["recent transactions", "list transactions", "show expenses", 
-                  "spending history", "last purchases", "transaction history"]},
-    {"tool": "budget.add_transaction", 
-     "pattern": re.compile(r"(?:spent|paid|bought|purchased)\s+\$?(\d+(?:\.\d{2})?)\s+(?:on|for|at)\s+(.+)", re.IGNORECASE),
-     "builder": lambda m: {"amount": float(m.group(1)), "description": m.group(2).strip(), "type": "expense"}},
-    {"tool": "budget.get_monthly_stats", "args": {}, 
-     "contains": ["monthly spending", "month over month", "monthly stats", "this month's spend", 
-                  "monthly budget", "monthly expenses"]},
-    {"tool": "budget.get_category_stats", "args": {}, 
-     "contains": ["category breakdown", "spending by category", "top categories", "expense categories"]},
-    
-    # Trading shortcuts
-    {"tool": "trading.get_price", "args": {"symbol": "BTC/USDT"}, 
-     "contains": ["btc price", "bitcoin price", "price of btc", "bitcoin value"]},
-    {"tool": "trading.get_price", "args": {"symbol": "ETH/USDT"}, 
-     "contains": ["eth price", "ethereum price", "price of eth", "ethereum value"]},
-    {"tool": "trading.get_price", 
-     "pattern": re.compile(r"(?:price|quote|value)\s+(?:of\s+)?([A-Za-z]{2,6}(?:/[A-Za-z]{3,4})?)", re.IGNORECASE),
-     "builder": _trading_symbol},
-    {"tool": "trading.get_momentum", 
-     "pattern": re.compile(r"(?:momentum|trend|direction)\s+(?:of\s+)?([A-Za-z]{2,6}(?:/[A-Za-z]{3,4})?)", re.IGNORECASE),
-     "builder": _trading_symbol},
-    {"tool": "trading.get_analysis", 
-     "pattern": re.compile(r"(?:analyze|analysis|technical analysis)\s+(?:of\s+)?([A-Za-z]{2,6}(?:/[A-Za-z]{3,4})?)", re.IGNORECASE),
-     "builder": _trading_symbol},
-    {"tool": "trading.list_positions", "args": {}, 
-     "contains": ["my positions", "open positions", "current trades", "portfolio", "holdings"]},
-    
-    # System (Solo Leveling) shortcuts
-    {"tool": "system.get_status", "args": {}, 
-     "contains": ["quest status", "xp status", "game status", "leveling status", "my level", "player stats"]},
-    {"tool": "system.list_quests", "args": {}, 
-     "contains": ["list quests", "show quests", "available quests", "my quests", "quest list", 
-                  "daily quests", "weekly quests"]},
-    {"tool": "system.list_tasks", "args": {}, 
-     "contains": ["list tasks", "show tasks", "my tasks", "task list"]},
-    {"tool": "system.update_quest", 
-     "pattern": re.compile(r"(?:complete|finish|done with)\s+quest\s+(?:#)?(\d+|.+)", re.IGNORECASE),
-     "builder": lambda m: {"quest_id": m.group(1).strip(), "status": "completed"}},
-    {"tool": "system.check_progress", 
-     "pattern": re.compile(r"(?:progress|status)\s+(?:on|of)\s+(.+)", re.IGNORECASE),
-     "builder": lambda m: {"title": m.group(1).strip()}},
-    
-    # Jarvis core shortcuts
-    {"tool": "jarvis_get_status", "args": {}, 
-     "contains": ["jarvis status", "system status", "overall status", "give me a status", "health check"]},
-    {"tool": "jarvis_get_settings", "args": {}, 
-     "contains": ["list settings", "show settings", "configuration", "jarvis settings", "preferences"]},
-    {"tool": "jarvis_web_search", 
-     "pattern": re.compile(r"(?:search|google|look up|find online|web search)\s+(?:for\s+)?(.+)", re.IGNORECASE),
-     "builder": lambda m: {"query": m.group(1).strip()}},
-    {"tool": "jarvis_get_tasks", "args": {"status": "all"}, 
-     "contains": ["jarvis tasks", "todo list", "task list", "pending tasks"]},
-    
-    # Weather is common enough to warrant special handling
-    {"tool": "jarvis_web_search", "args": {"query": "weather"}, 
-     "contains": ["current weather", "today's weather", "weather report", "weather forecast"]},
-]
+    """Parse trading symbols into standard format.
+
+    Known crypto (by ticker or name) becomes a BASE/USDT pair; other 1-5
+    letter symbols are left for the trading server to decide.
+    """
+    from jarvis.intelligence.symbol_resolver import USDT_PAIR, get_symbol_resolver
+
+    resolver = get_symbol_resolver()
+    symbol = match.group(1)
+    return {"symbol": resolver.canonical(resolver.lookup(symbol) or symbol, USDT_PAIR)}
+
+
+# Keyword shortcuts live in jarvis/intelligence/routing_rules.json and reload
+# when the file changes; regex shortcuts name one of these argument builders
+_SHORTCUT_BUILDERS = {
+    "trading_symbol": _trading_symbol,
+}
+_RULES_STORE = None
+
+
+def _keyword_shortcuts() -> Tuple[Any, ...]:
+    """Current keyword shortcuts from the shared routing rules (empty if unavailable)."""
+    global _RULES_STORE
+    if _RULES_STORE is None:
+        try:
+            from jarvis.intelligence.routing_rules import get_routing_rules_store
+
+            _RULES_STORE = get_routing_rules_store()
+        except Exception:
+            _RULES_STORE = False
+    return _RULES_STORE.current.keyword_shortcuts if _RULES_STORE else ()
 
 
 def _match_keyword_shortcut(query: str, tools: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
     """Match query against keyword shortcuts."""
-    for shortcut in KEYWORD_SHORTCUTS:
-        tool = shortcut["tool"]
+    for shortcut in _keyword_shortcuts():
+        tool = shortcut.tool
         
         # Check if tool is available
         if tools:
@@ -148,19 +137,16 @@ def _match_keyword_shortcut(query: str, tools: Optional[Dict[str, Any]] = None)
                     continue
         
         # Check contains patterns
-        contains = shortcut.get("contains", [])
-        for phrase in contains:
+        for phrase in shortcut.contains:
             if phrase in query:
-                args = shortcut.get("args", {}).copy()
-                return tool, args
+                return tool, dict(shortcut.args)
         
         # Check regex patterns
-        pattern = shortcut.get("pattern")
-        if pattern:
-            match = pattern.search(query)
+        if shortcut.pattern is not None:
+            match = shortcut.pattern.search(query)
             if match:
-                builder = shortcut.get("builder")
-                args = builder(match) if builder else shortcut.get("args", {}).copy()
+                builder = _SHORTCUT_BUILDERS.get(shortcut.builder)
+                args = builder(match) if builder else shortcut.build_args(match)
                 return tool, args
     
     return None, None
@@ -249,6 +235,14 @@ def route_natural_language(query: str, tools: Optional[Dict[str, Any]] = None,
     if tool_shortcut:
         return tool_shortcut, args_shortcut
     
+    # Then reuse a previous LLM decision for the same query and tool catalog.
+    # Conversation context can change the answer, so only context-free calls are cached.
+    catalog = _catalog_key(tools, allow_multi) if BRAIN_AVAILABLE and context is None else None
+    if catalog:
+        cached_tool, cached_args = _cached_route(q, catalog)
+        if cached_tool:
+            return cached_tool, cached_args
+    
     # Detect multi-intent queries
     if allow_multi and _detect_multi_intent(query) and tools and "orchestrator.run_plan" in tools:
         if BRAIN_AVAILABLE:
@@ -262,11 +256,13 @@ Available servers:
 - budget: Financial tracking and statistics  
 - trading: Crypto/stock prices, analysis, portfolio
 
-Return ONLY JSON: {"steps": [{"server": "...", "tool": "...", "args": {...}, "parallel": true/false}, ...]}
+Return ONLY JSON: {"steps": [{"id": "...", "server": "...", "tool": "...", "args": {...}, "depends_on": ["..."]}, ...]}
 
 Rules:
 - Use exact tool names from the provided list
-- Set parallel=true for independent steps
+- Give every step a short unique id
+- List in depends_on only the steps whose output a step needs; independent steps run concurrently
+- Use "{{step_id}}" or "{{step_id.field}}" in args to pass an earlier step's result
 - Include server field for each step
 - Minimal valid args per schema
 - Order steps logically"""
@@ -278,7 +274,7 @@ Rules:
             })
             
             try:
-                raw = llm_generate(system, user)
+                raw = llm_generate(system, user, cache_site="llm_router.plan")
                 payload = _extract_json_object(raw)
                 if isinstance(payload, dict) and isinstance(payload.get("steps"), list):
                     steps = payload["steps"]
@@ -288,6 +284,8 @@ Rules:
                             if "server" not in step and "tool" in step:
                                 server, _ = _normalize_server_tool_name(step["tool"])
                                 step["server"] = server
+                    if catalog:
+                        _remember_route(q, catalog, "orchestrator.run_plan", {"steps": steps})
                     return "orchestrator.run_plan", {"steps": steps}
             except Exception:
                 pass
@@ -331,7 +329,7 @@ NEVER invent tools. Match schema requirements."""
         })
         
         try:
-            raw = llm_generate(system, user)
+            raw = llm_generate(system, user, cache_site="llm_router.route")
             payload = _extract_json_object(raw)
             
             if not isinstance(payload, dict):
@@ -352,12 +350,16 @@ NEVER invent tools. Match schema requirements."""
                         break
                 else:
                     # Default to chat if tool not found
+                    if catalog:
+                        _remember_route(q, catalog, "jarvis_chat", {"message": query})
                     return "jarvis_chat", {"message": query}
             
             # Ensure chat messages have content
             if tool == "jarvis_chat" and "message" not in args:
                 args["message"] = query
             
+            if catalog:
+                _remember_route(q, catalog, tool, args)
             return tool, args
             
         except Exception as e:
@@ -1,9 +1,10 @@
 """HTTP client for Jarvis Client HTTP Server."""
 import asyncio
+import json
 import time
 import logging
 import aiohttp
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -182,18 +183,22 @@ class JarvisClientMCPClient:
         
         return f"Error: Failed to call tool after {max_retries} attempts"
     
-    async def natural_language_query(self, query: str) -> str:
+    async def natural_language_query(self, query: str, route: Optional[Dict[str, Any]] = None) -> str:
         """
         Send a natural language query to the Jarvis Client.
         
         Args:
             query: The natural language query
+            route: Routing decision already made for the query
+                (RoutingDecision.route_hint()); /nl executes it instead of routing again
             
         Returns:
             Response from Jarvis
         """
         try:
             payload = {"message": query}
+            if route:
+                payload["route"] = route
             
             logger.info(f"Sending natural language query: {query}")
             
@@ -217,3 +222,92 @@ class JarvisClientMCPClient:
             logger.error(error_msg)
             return error_msg
 
+
+    async def stream_plan(self, steps: List[Dict[str, Any]], **options) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Execute a multi-step plan via /run-plan/stream, yielding progress.
+
+        Yields (event, payload) tuples as the server reports them: one
+        ("step", result) per finished step (completion order, with index, id
+        and elapsed_ms), then ("summary", {...}) or ("error", {"detail": ...}).
+
+        Args:
+            steps: Plan steps ({"tool", "args", ...} dicts)
+            **options: execute_plan options (failure_policy, plan_timeout, ...)
+        """
+        payload = {"steps": steps, **options}
+        try:
+            async with self.session.post(
+                f"{self.base_url}/run-plan/stream",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=self.timeout.total),
+                headers={'Accept': 'text/event-stream'}
+            ) as response:
+                if response.status != 200:
+                    error_msg = await response.text()
+                    logger.error(f"Plan stream failed: HTTP {response.status} - {error_msg}")
+                    yield "error", {"detail": error_msg}
+                    return
+
+                async for event, data in self._iter_sse(response):
+                    yield event, data
+        except Exception as e:
+            error_msg = f"Plan stream error: {str(e)}"
+            logger.error(error_msg)
+            yield "error", {"detail": error_msg}
+
+    async def stream_natural_language(self, query: str,
+                                      route: Optional[Dict[str, Any]] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Send a natural language query to /nl/stream, yielding the reply as it is generated.
+
+        Yields (event, payload) tuples: ("route", meta) once the tool is
+        chosen, ("token", {"text": ...}) per fragment, then ("done",
+        {"text", "meta"}) or ("error", {"detail": ...}). Connection failures
+        are reported as an error event too.
+
+        Args:
+            query: The natural language query
+            route: Routing decision already made for the query
+                (RoutingDecision.route_hint()); executed instead of routing again
+        """
+        payload: Dict[str, Any] = {"message": query}
+        if route:
+            payload["route"] = route
+        try:
+            async with self.session.post(
+                f"{self.base_url}/nl/stream",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=self.timeout.total),
+                headers={'Accept': 'text/event-stream'}
+            ) as response:
+                if response.status != 200:
+                    error_msg = await response.text()
+                    logger.error(f"Natural language stream failed: HTTP {response.status} - {error_msg}")
+                    yield "error", {"detail": error_msg}
+                    return
+                async for event, data in self._iter_sse(response):
+                    yield event, data
+        except Exception as e:
+            error_msg = f"Natural language stream error: {str(e)}"
+            logger.error(error_msg)
+            yield "error", {"detail": error_msg}
+
+    @staticmethod
+    async def _iter_sse(response: aiohttp.ClientResponse) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Parse a text/event-stream body into (event, JSON payload) tuples."""
+        event = "message"
+        data_lines: List[str] = []
+        async for raw in response.content:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[5:].strip())
+            elif not line and data_lines:
+                # Blank line terminates an SSE event
+                try:
+                    yield event, json.loads("\n".join(data_lines))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring malformed stream event: {data_lines!r}")
+                event, data_lines = "message", []
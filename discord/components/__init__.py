@@ -16,8 +16,9 @@ These components have been fully migrated and are imported/initialized in discor
    - Handles Discord voice channel music playback
    - Initialized in on_ready() if MUSIC_PLAYER_AVAILABLE
 
-3. **IntentRouter** (from jarvis.intelligence)
-   - Provides intelligent intent analysis and routing
+3. **RoutingService** (from jarvis.intelligence)
+   - Routes each message once (slash commands, then IntentRouter tiers) and
+     returns a RoutingDecision reused by the executor, formatter and /nl
    - Initialized in on_ready() if INTELLIGENCE_AVAILABLE
 
 4. **ModelManager** (from jarvis.models.model_manager)
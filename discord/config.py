@@ -43,6 +43,11 @@ DISCORD_CLIENT_SERVER = os.getenv('DISCORD_CLIENT_SERVER', 'YOUR_DISCORD_SERVER_
 DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL', '')
 EVENT_NOTIFICATION_CHANNEL_ID = os.getenv('EVENT_NOTIFICATION_CHANNEL_ID', None)
 
+# Stream jarvis_chat replies into Discord as they are generated (edits the reply in place)
+STREAM_REPLIES = os.getenv('DISCORD_STREAM_REPLIES', '1') != '0'
+# Seconds between edits of a streaming reply; Discord allows about 5 edits per 5 seconds
+STREAM_EDIT_INTERVAL = float(os.getenv('DISCORD_STREAM_EDIT_INTERVAL', '1.2'))
+
 # Feature flags
 MODEL_AVAILABLE = False
 EVENT_LISTENER_AVAILABLE = False
@@ -76,7 +81,7 @@ def _check_event_listener_available():
 def _check_intelligence_available():
     """Check if intelligence is available (lazy import)."""
     try:
-        from jarvis.intelligence import IntentRouter, IntentResult, IntentType
+        from jarvis.intelligence import RoutingService
         return True
     except ImportError:
         return False
@@ -1,16 +1,18 @@
 """Tool execution handler (agent system removed for performance)."""
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Import clients and routers from discord_bot namespace
 try:
     from discord_bot.clients import RobustMCPClient, JarvisClientMCPClient
     from discord_bot.routers import DiscordCommandRouter
+    from discord_bot.utils import StreamingReply
 except ImportError:
     # Fallback: try relative imports if running as normal package
     try:
         from ..clients import RobustMCPClient, JarvisClientMCPClient
         from ..routers import DiscordCommandRouter
+        from ..utils import StreamingReply
     except ImportError:
         # Type hints only - actual imports come from main.py
         from typing import TYPE_CHECKING
@@ -29,7 +31,8 @@ async def execute_intelligent_tool(
     message,
     jarvis_client: JarvisClientMCPClient,
     command_router: DiscordCommandRouter,
-    robust_mcp_client: RobustMCPClient = None
+    robust_mcp_client: RobustMCPClient = None,
+    decision=None
 ) -> str:
     """
     Execute a tool based on intelligent intent analysis.
@@ -44,6 +47,8 @@ async def execute_intelligent_tool(
         jarvis_client: HTTP MCP client
         command_router: Command router instance
         robust_mcp_client: Direct MCP client (optional)
+        decision: RoutingDecision the tool came from (optional); its server is
+            used as-is and it is forwarded to /nl so the message isn't routed twice
         
     Returns:
         Tool execution result
@@ -53,7 +58,9 @@ async def execute_intelligent_tool(
         # Note: Most tools go through "jarvis" server which proxies to other MCP servers
         server = "jarvis"  # Default server
         
-        if tool_name.startswith("music_"):
+        if decision is not None and decision.server:
+            server = decision.server
+        elif tool_name.startswith("music_"):
             server = "local"
         elif tool_name.startswith("events_"):
             server = "local"
@@ -99,7 +106,8 @@ async def execute_intelligent_tool(
             message_content = arguments.get("message", "")
             if not message_content and message and hasattr(message, 'content'):
                 message_content = message.content
-            return await jarvis_client.natural_language_query(message_content)
+            route = decision.route_hint() if decision is not None else None
+            return await jarvis_client.natural_language_query(message_content, route=route)
         else:
             return await jarvis_client.call_tool(tool_name, arguments, server)
             
@@ -107,3 +115,40 @@ async def execute_intelligent_tool(
         logger.error(f"Error executing intelligent tool: {e}")
         return f"❌ Error executing tool: {str(e)}"
 
+
+async def stream_chat_reply(decision, message, jarvis_client: JarvisClientMCPClient) -> Optional[str]:
+    """
+    Answer a jarvis_chat decision by streaming /nl/stream into a progressively edited reply.
+    
+    The streamed text is the final answer: it is not passed through the
+    response formatter (which would cost a second LLM call and hold the
+    whole reply back) and it is already sent when this returns.
+    
+    Returns:
+        The full reply text, or None if the stream failed before anything
+        was shown, in which case the caller should answer the normal way
+    """
+    reply = StreamingReply(message)
+    query = decision.arguments.get("message") or message.content
+    try:
+        async for event, payload in jarvis_client.stream_natural_language(query, route=decision.route_hint()):
+            if event == "token":
+                await reply.append(payload.get("text") or "")
+            elif event == "done":
+                return await reply.finish(payload.get("text"))
+            elif event == "error":
+                if not reply.started:
+                    logger.warning(f"Reply stream failed before the first token: {payload.get('detail')}")
+                    return None
+                logger.warning(f"Reply stream failed midway: {payload.get('detail')}")
+                await reply.append("\n\n⚠️ Response interrupted.")
+                break
+        # Stream closed without a done event
+        return await reply.finish() if reply.started else None
+    except Exception as e:
+        if not reply.started:
+            logger.warning(f"Reply stream failed before the first token: {e}")
+            return None
+        # Part of the answer is already on screen; don't answer a second time
+        logger.error(f"Reply stream failed midway: {e}")
+        return reply.text
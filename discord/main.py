@@ -127,6 +127,7 @@ send_error_webhook = utils_init.send_error_webhook
 # Import handlers
 tool_executor = _import_package_module("handlers/tool_executor", "tool_executor")
 execute_intelligent_tool = tool_executor.execute_intelligent_tool
+stream_chat_reply = tool_executor.stream_chat_reply
 
 # Import optional components
 # The discord library should already be in sys.modules from config.py
@@ -141,15 +142,16 @@ except ImportError:
     MusicPlayer = None
 
 try:
-    from jarvis.intelligence import IntentRouter
+    from jarvis.intelligence import RoutingService
 except ImportError:
-    IntentRouter = None
+    RoutingService = None
 
 try:
-    from jarvis.models.model_manager import ModelManager
+    from jarvis.models.model_manager import ModelManager, aclose_model_managers
     from formatter import format_response
 except ImportError:
     ModelManager = None
+    aclose_model_managers = None
     format_response = None
 
 try:
@@ -181,9 +183,10 @@ model_manager: Optional[ModelManager] = None
 conversation_context: Optional[ConversationContext] = None
 event_listener: Optional[TradingEventListener] = None
 music_player: Optional[MusicPlayer] = None
-intent_router: Optional[IntentRouter] = None
+routing_service: Optional[RoutingService] = None
 server_manager: Optional[ServerManager] = None
 robust_mcp_client: Optional[RobustMCPClient] = None
+ollama_residency = None  # Keeps the Ollama model loaded (jarvis.ollama_residency)
 
 
 @client.event
@@ -191,7 +194,7 @@ async def on_ready():
     """Event handler for when the bot is ready."""
     global session, jarvis_client, command_router, model_manager
     global conversation_context, event_listener, music_player
-    global intent_router, server_manager, robust_mcp_client
+    global routing_service, server_manager, robust_mcp_client, ollama_residency
     
     logger.info(f'{client.user} has connected to Discord!')
     logger.info(f'Bot is in {len(client.guilds)} guilds')
@@ -256,13 +259,13 @@ async def on_ready():
         command_router = None
     
     # Initialize intelligence core
-    if config.INTELLIGENCE_AVAILABLE and IntentRouter:
+    if config.INTELLIGENCE_AVAILABLE and RoutingService:
         try:
-            intent_router = IntentRouter()
+            routing_service = RoutingService()
             logger.info("🧠 Intelligence core initialized")
         except Exception as e:
             logger.warning(f"⚠️ Could not initialize intelligence core: {e}")
-            intent_router = None
+            routing_service = None
     
     # Initialize model manager for AI-powered response formatting
     if config.MODEL_AVAILABLE and ModelManager:
@@ -278,6 +281,10 @@ async def on_ready():
                         logger.info(f"✅ Ollama is available: {model_manager.ollama_model.model_name}")
                 except Exception as e:
                     logger.warning(f"⚠️ Error checking Ollama availability: {e}")
+                
+                # Preload the model and keep it resident between messages
+                ollama_residency = model_manager.ollama_model.residency
+                ollama_residency.start()
             
             # Verify OpenAI availability
             if model_manager.openai_available and model_manager.openai_model:
@@ -309,10 +316,22 @@ async def on_ready():
         logger.error(f"Failed to get available tools: {e}")
 
 
+@client.event
+async def on_typing(channel, user, when):
+    """Warm the local model while a user types, so their message finds it loaded."""
+    if ollama_residency is None or user == client.user:
+        return
+    if config.DISCORD_CLIENT_SERVER and config.DISCORD_CLIENT_SERVER != 'YOUR_DISCORD_SERVER_ID_HERE':
+        guild = getattr(channel, "guild", None)
+        if guild is None or str(guild.id) != config.DISCORD_CLIENT_SERVER:
+            return
+    ollama_residency.schedule_warm(reason="typing")
+
+
 @client.event
 async def on_message(message):
     """Event handler for incoming Discord messages."""
-    global command_router, model_manager, conversation_context, intent_router
+    global command_router, model_manager, conversation_context, routing_service
     global jarvis_client, robust_mcp_client
     
     # Ignore messages from the bot itself
@@ -333,50 +352,61 @@ async def on_message(message):
             if conversation_context:
                 user_context = conversation_context.get_context(message.author.id)
             
-            # Step 1: Intelligent intent analysis (if available)
+            # Step 1: Route the message once; the decision is reused by every later step
             raw_response = None
-            intent_result = None
+            streamed_response = None
+            decision = None
             
-            if intent_router and config.INTELLIGENCE_AVAILABLE:
+            if routing_service and config.INTELLIGENCE_AVAILABLE:
                 try:
-                    intent_result = await intent_router.analyze_intent(
+                    decision = await routing_service.route(
                         message.content,
                         str(message.author.id),
                         str(message.channel.id)
                     )
                     
-                    logger.info(f"🧠 Intent: {intent_result.intent_type.value} (confidence: {intent_result.confidence:.2f})")
-                    logger.info(f"🔧 Tool: {intent_result.tool_name}")
+                    logger.info(f"🧠 Intent: {decision.intent_type.value} (confidence: {decision.confidence:.2f}, tier: {decision.tier})")
+                    logger.info(f"🔧 Tool: {decision.tool_name}")
+                    
+                    # Chat replies stream straight into Discord as they are generated
+                    if decision.tool_name == "jarvis_chat" and jarvis_client and config.STREAM_REPLIES:
+                        streamed_response = await stream_chat_reply(decision, message, jarvis_client)
                     
                     # Execute tool (agent system removed - direct MCP routing)
-                    raw_response = await execute_intelligent_tool(
-                        intent_result.tool_name,
-                        intent_result.arguments,
-                        message,
-                        jarvis_client,
-                        command_router,
-                        robust_mcp_client
-                    )
+                    if streamed_response is None:
+                        raw_response = await execute_intelligent_tool(
+                            decision.tool_name,
+                            decision.arguments,
+                            message,
+                            jarvis_client,
+                            command_router,
+                            robust_mcp_client,
+                            decision=decision
+                        )
                     
                 except Exception as e:
                     logger.warning(f"Intelligent routing failed, falling back to command router: {e}")
-                    intent_result = None
+                    decision = None
             
             # Step 2: Fallback to command router
-            if raw_response is None:
+            if raw_response is None and streamed_response is None:
                 if command_router:
                     raw_response = await command_router.handle_message(message)
                 else:
                     raw_response = "❌ Bot is still initializing. Please wait a moment and try again."
             
-            # Step 3: Format response using AI (if available)
-            if model_manager and config.MODEL_AVAILABLE and format_response:
+            # Step 3: Format response using AI (if available); streamed replies are already final
+            if streamed_response is not None:
+                response = streamed_response
+            elif model_manager and config.MODEL_AVAILABLE and format_response:
                 try:
                     context = f"User asked: {message.content[:100]}"
                     if user_context:
                         context += f"\nPrevious context: {user_context[:100]}"
-                    if intent_result:
-                        context += f"\nIntent: {intent_result.intent_type.value} (confidence: {intent_result.confidence:.2f})"
+                    if decision:
+                        context += f"\nIntent: {decision.intent_type.value} (confidence: {decision.confidence:.2f})"
+                        if decision.expects_detailed_response:
+                            context += "\nUser expects detailed response with specific data."
                     
                     formatted_response = await format_response(
                         raw_response=raw_response,
@@ -403,19 +433,15 @@ async def on_message(message):
             if not response or response.strip() == "":
                 response = "No response received from Jarvis."
             
-            # Send response
-            await send_long_message(message, response)
+            # Send response (a streamed reply has been sent already)
+            if streamed_response is None:
+                await send_long_message(message, response)
             
             # Store in conversation context
             if conversation_context:
                 metadata = {"timestamp": datetime.now().isoformat()}
-                if intent_result:
-                    metadata.update({
-                        "intent_type": intent_result.intent_type.value,
-                        "confidence": intent_result.confidence,
-                        "tool_used": intent_result.tool_name,
-                        "reasoning": intent_result.reasoning
-                    })
+                if decision:
+                    metadata.update(decision.metadata())
                 
                 conversation_context.add_message(
                     user_id=message.author.id,
@@ -467,7 +493,11 @@ async def on_resumed():
 
 async def cleanup():
     """Cleanup resources on shutdown."""
-    global session, event_listener, music_player
+    global session, event_listener, music_player, ollama_residency
+    
+    if ollama_residency:
+        await ollama_residency.stop()
+        ollama_residency = None
     
     if event_listener:
         try:
@@ -486,6 +516,14 @@ async def cleanup():
     if session:
         await session.close()
         logger.info("Closed aiohttp session")
+    
+    if aclose_model_managers:
+        await aclose_model_managers()
+        logger.info("Closed model provider connections")
+    
+    routing_cache = sys.modules.get("jarvis.intelligence.routing_cache")
+    if routing_cache is not None:
+        routing_cache.close_routing_caches()
 
 
 async def main():
@@ -5,6 +5,8 @@ import logging
 from typing import Dict, Any, List, Optional, Tuple
 import discord
 
+from jarvis.intelligence.command_rules import detect_query_style, get_command_table, refine_search_query
+
 from ..clients.http_client import JarvisClientMCPClient
 
 logger = logging.getLogger(__name__)
@@ -18,70 +20,15 @@ class DiscordCommandRouter:
         self.jarvis_client = jarvis_client
         self.event_listener = event_listener
         self.music_player = music_player
+        self.commands = get_command_table()
     
     def detect_query_intent(self, query: str) -> Dict[str, Any]:
         """Detect the user's intent and extract key information."""
-        query_lower = query.lower()
-        
-        intent_patterns = {
-            "specific_list": {
-                "pattern": r"list|top \d+|what are|show me|give me",
-                "expects_detailed_response": True,
-                "should_extract_items": True
-            },
-            "follow_up": {
-                "pattern": r"more about|details on|tell me more|explain|elaborate|more information",
-                "needs_context": True,
-                "expects_detailed_response": True
-            },
-            "comparison": {
-                "pattern": r"compare|versus|vs|difference between",
-                "expects_detailed_response": True,
-                "needs_multiple_sources": True
-            },
-            "current_events": {
-                "pattern": r"latest|recent|new|today|this week|breaking",
-                "prefers_news_source": True,
-                "time_sensitive": True
-            }
-        }
-        
-        detected = {
-            "intent_type": "general",
-            "confidence": 0.5,
-            "metadata": {}
-        }
-        
-        for intent_name, intent_spec in intent_patterns.items():
-            if re.search(intent_spec["pattern"], query_lower):
-                detected["intent_type"] = intent_name
-                detected["confidence"] = 0.8
-                detected["metadata"] = {k: v for k, v in intent_spec.items() if k != "pattern"}
-                break
-        
-        return detected
+        return detect_query_style(query)
     
     def refine_search_query(self, query: str, intent: Dict[str, Any]) -> str:
         """Refine search query based on intent and content."""
-        query_lower = query.lower()
-        
-        # For crypto/Web3 queries, filter out gambling sites
-        if any(word in query_lower for word in ['crypto', 'coin', 'token', 'blockchain', 'web3']):
-            return f"{query} cryptocurrency blockchain -casino -gambling -betting site:coinmarketcap.com OR site:coingecko.com OR site:decrypt.co"
-        
-        # For tariff/policy queries, add specificity
-        if any(word in query_lower for word in ['tariff', 'trade deal', 'policy', 'regulation']):
-            return f"{query} official announcement 2025 government"
-        
-        # For "top" or "best" queries, add ranking terms
-        if any(word in query_lower for word in ['top', 'best', 'leading']):
-            return f"{query} ranked list 2025"
-        
-        # For news queries, add time restriction
-        if intent.get("metadata", {}).get("time_sensitive"):
-            return f"{query} 2025"
-        
-        return query
+        return refine_search_query(query, intent)
     
     def validate_response_quality(self, response: str, query: str) -> Tuple[bool, Optional[str]]:
         """Check if response adequately answers the query."""
@@ -329,164 +276,20 @@ class DiscordCommandRouter:
         """
         Parse Discord message and return appropriate tool, arguments, and server.
         
+        Commands come from the shared command table (jarvis.intelligence.command_rules),
+        the same rules the routing service applies to slash commands.
+        
         Args:
             message_content: The Discord message content
             
         Returns:
             Tuple of (tool_name, arguments, server)
         """
-        content = message_content.lower().strip()
-        
-        # Command routing - all tools are on the jarvis server
-        if content.startswith('/news') or 'scan news' in content:
-            return "jarvis_scan_news", {}, "jarvis"
-        
-        # Trading Commands
-        elif content.startswith('/balance') or 'get balance' in content:
-            return "trading.trading.get_balance", {}, "jarvis"
-        elif content.startswith('/price') or 'get price' in content:
-            symbol = message_content.replace('/price', '').replace('get price', '').strip().upper()
-            if not symbol:
-                return "jarvis_chat", {"message": "Please specify a symbol for price lookup. Example: /price BTC"}, "jarvis"
-            if '/' not in symbol:
-                symbol = f"{symbol}/USD"
-            return "trading.trading.get_price", {"symbol": symbol}, "jarvis"
-        elif content.startswith('/ohlcv') or 'ohlcv data' in content:
-            symbol = message_content.replace('/ohlcv', '').replace('ohlcv data', '').strip().upper()
-            if not symbol:
-                return "jarvis_chat", {"message": "Please specify a symbol for OHLCV data. Example: /ohlcv BTC"}, "jarvis"
-            if '/' not in symbol:
-                symbol = f"{symbol}/USD"
-            return "trading.trading.get_ohlcv", {"symbol": symbol}, "jarvis"
-        elif content.startswith('/momentum') or 'momentum signals' in content:
-            return "trading.trading.get_momentum_signals", {}, "jarvis"
-        elif content.startswith('/doctor') or 'trading doctor' in content:
-            return "trading.trading.doctor", {}, "jarvis"
-        elif content.startswith('/history') or 'trade history' in content:
-            return "trading.trading.get_trade_history", {}, "jarvis"
-        elif content.startswith('/pnl') or 'profit loss' in content:
-            return "trading.trading.get_pnl_summary", {}, "jarvis"
-        
-        # Portfolio Commands
-        elif content.startswith('/portfolio') or 'get portfolio' in content:
-            return "trading.portfolio.get_overview", {}, "jarvis"
-        elif content.startswith('/positions') or 'get positions' in content:
-            return "trading.portfolio.get_positions", {}, "jarvis"
-        elif content.startswith('/trades') or 'get trades' in content or 'recent trades' in content:
-            return "trading.trading.get_recent_executions", {"limit": 20}, "jarvis"
-        elif content.startswith('/paper') or 'paper trading' in content:
-            return "trading.portfolio.get_overview", {}, "jarvis"
-        elif content.startswith('/performance') or 'get performance' in content:
-            return "trading.portfolio.get_performance", {}, "jarvis"
-        elif content.startswith('/exit') or 'exit engine' in content:
-            return "trading.portfolio.get_exit_engine_status", {}, "jarvis"
-        elif content.startswith('/state') or 'trading state' in content:
-            return "trading.portfolio.get_trading_state", {}, "jarvis"
-        elif content.startswith('/export') or 'export data' in content:
-            return "trading.portfolio.get_export_data", {}, "jarvis"
-        
-        # System Commands
-        elif content.startswith('/status') or 'get status' in content:
-            return "jarvis_get_status", {}, "jarvis"
-        elif content.startswith('/memory') or 'get memory' in content:
-            return "jarvis_get_memory", {"limit": 10}, "jarvis"
-        elif content.startswith('/tasks') or 'get tasks' in content:
-            return "jarvis_get_tasks", {"status": "all"}, "jarvis"
-        elif content.startswith('/quests') or 'get quests' in content:
-            return "system.system.list_quests", {}, "jarvis"
-        elif content.startswith('/system') or 'system status' in content:
-            return "system.system.get_status", {}, "jarvis"
-        
-        # Event Monitoring Commands
-        elif content.startswith('/events start') or content == '/events on':
-            return "events_start_monitoring", {}, "local"
-        elif content.startswith('/events stop') or content == '/events off':
-            return "events_stop_monitoring", {}, "local"
-        elif content.startswith('/events stats') or content == '/events statistics':
-            return "events_get_statistics", {}, "local"
-        elif content.startswith('/events history'):
-            match = re.search(r'history\s+(\d+)', content)
-            limit = int(match.group(1)) if match else 10
-            return "events_get_history", {"limit": limit}, "local"
-        elif content.startswith('/events test'):
-            test_type = content.replace('/events test', '').strip()
-            return "events_test_event", {"type": test_type if test_type else "market_alert"}, "local"
-        elif content.startswith('/events check'):
-            return "events_check_markets", {}, "local"
-        
-        # Music Commands
-        elif content.startswith('/play'):
-            song_name = message_content.replace('/play', '').strip()
-            if not song_name:
-                return "music_play_or_resume", {}, "local"
-            return "music_play", {"song_name": song_name}, "local"
-        elif content.startswith('/pause'):
-            return "music_pause", {}, "local"
-        elif content.startswith('/resume'):
-            return "music_resume", {}, "local"
-        elif content.startswith('/stop'):
-            return "music_stop", {}, "local"
-        elif content.startswith('/skip'):
-            return "music_skip", {}, "local"
-        elif content.startswith('/queue clear'):
-            return "music_clear_queue", {}, "local"
-        elif content.startswith('/queue remove'):
-            match = re.search(r'remove\s+(\d+)', content)
-            if match:
-                position = int(match.group(1))
-                return "music_remove_from_queue", {"position": position}, "local"
-            else:
-                return "music_queue_view", {}, "local"
-        elif content.startswith('/queue'):
-            rest = message_content.replace('/queue', '').strip()
-            if rest:
-                return "music_queue_add", {"song_name": rest}, "local"
-            else:
-                return "music_queue_view", {}, "local"
-        elif content.startswith('/nowplaying') or content.startswith('/np'):
-            return "music_now_playing", {}, "local"
-        elif content.startswith('/songs') or content.startswith('/list'):
-            return "music_list_songs", {}, "local"
-        elif content.startswith('/random') or content.startswith('/shuffle'):
-            return "music_random", {}, "local"
-        elif content.startswith('/findsong') or content.startswith('/find'):
-            keyword = message_content.replace('/findsong', '').replace('/find', '').strip()
-            if not keyword:
-                return "music_list_songs", {}, "local"
-            return "music_search", {"keyword": keyword}, "local"
-        elif content.startswith('/mcpqueue'):
-            return "music_mcp_queue", {}, "local"
-        elif content.startswith('/leave') or content.startswith('/disconnect'):
-            return "music_leave", {}, "local"
-        elif content.startswith('/volume'):
-            match = re.search(r'volume\s+(\d+)', content)
-            if match:
-                volume = int(match.group(1))
-                return "music_volume", {"volume": volume}, "local"
-            else:
-                return "music_volume", {}, "local"
-        elif content.startswith('/join'):
-            return "music_join", {}, "local"
-        
-        # Search Commands
-        elif content.startswith('/search') or 'web search' in content:
-            query = message_content.replace('/search', '').replace('web search', '').strip()
-            if not query:
-                query = "latest technology news"
-            
-            intent = self.detect_query_intent(query)
-            refined_query = self.refine_search_query(query, intent)
-            logger.info(f"Search query refined: '{query}' -> '{refined_query}'")
-            return "jarvis_web_search", {"query": refined_query}, "jarvis"
-        
-        # Help and Chat
-        elif content.startswith('/help') or 'help' in content:
-            return "jarvis_chat", {"message": "show available commands and help"}, "jarvis"
-        elif any(word in content for word in ['date', 'time', 'today', 'what day', 'what time']):
-            return "jarvis_chat", {"message": message_content}, "jarvis"
-        else:
+        command = self.commands.match(message_content)
+        if command is None:
             # For any other message, use natural language processing
             return "natural_language", {"query": message_content}, None
+        return command.tool, command.arguments, command.server
     
     async def handle_message(self, message: discord.Message) -> str:
         """
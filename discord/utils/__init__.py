@@ -2,12 +2,14 @@
 from .message_utils import (
     split_message_intelligently,
     send_long_message,
-    send_error_webhook
+    send_error_webhook,
+    StreamingReply
 )
 
 __all__ = [
     'split_message_intelligently',
     'send_long_message',
-    'send_error_webhook'
+    'send_error_webhook',
+    'StreamingReply'
 ]
 
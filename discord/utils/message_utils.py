@@ -1,8 +1,9 @@
 """Message utility functions for Discord bot."""
 import asyncio
 import logging
+import time
 import aiohttp
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import discord
 
@@ -127,6 +128,71 @@ async def send_long_message(message: discord.Message, text: str) -> None:
         logger.info(f"Successfully sent {len(chunks)} message parts")
 
 
+class StreamingReply:
+    """
+    A reply that grows as tokens arrive.
+    
+    The reply is posted on the first fragment and then edited in place at
+    most once per ``interval`` seconds, which keeps a stream inside Discord's
+    message edit rate limit. While streaming, text beyond one message is cut
+    off; finish() splits the complete text like send_long_message.
+    """
+    
+    def __init__(self, message: discord.Message, interval: Optional[float] = None, max_length: int = 1900):
+        self.message = message
+        self.interval = config.STREAM_EDIT_INTERVAL if interval is None else interval
+        self.max_length = max_length
+        self.text = ""
+        self.reply: Optional[discord.Message] = None
+        self.edits = 0
+        self._shown = ""
+        self._last_edit = 0.0
+    
+    @property
+    def started(self) -> bool:
+        return self.reply is not None
+    
+    def _preview(self) -> str:
+        text = self.text.strip()
+        if len(text) > self.max_length:
+            text = text[:self.max_length - 2].rstrip() + " …"
+        return text
+    
+    async def append(self, fragment: str) -> None:
+        """Add a fragment; posts or edits the reply if the edit budget allows."""
+        self.text += fragment or ""
+        preview = self._preview()
+        if not preview or preview == self._shown:
+            return
+        now = time.monotonic()
+        if self.reply is None:
+            self.reply = await self.message.reply(preview)
+        elif now - self._last_edit >= self.interval:
+            await self.reply.edit(content=preview)
+            self.edits += 1
+        else:
+            return
+        self._shown = preview
+        self._last_edit = now
+    
+    async def finish(self, text: Optional[str] = None) -> str:
+        """Show the complete text (``text`` overrides what was streamed); returns it."""
+        text = (text if text is not None else self.text).strip() or "No response received from Jarvis."
+        if self.reply is None:
+            await send_long_message(self.message, text)
+            return text
+        
+        chunks = split_message_intelligently(text, max_length=1950)
+        if chunks[0] != self._shown:
+            await self.reply.edit(content=chunks[0])
+            self.edits += 1
+        for i, chunk in enumerate(chunks[1:], 2):
+            await asyncio.sleep(0.5)
+            await self.message.channel.send(f"📄 **Part {i}/{len(chunks)}**\n\n{chunk}")
+        logger.info(f"Streamed reply ({len(text)} chars, {self.edits} edits, {len(chunks)} message(s))")
+        return text
+
+
 async def send_error_webhook(error_msg: str, original_message: str, session: aiohttp.ClientSession = None):
     """Send error notification to Discord webhook."""
     if not config.DISCORD_WEBHOOK_URL or not session:
@@ -14,6 +14,10 @@ Environment Variables:
     DISCORD_CLIENT_SERVER - Discord server ID
     DISCORD_WEBHOOK_URL - Discord webhook URL (optional)
     JARVIS_CLIENT_URL - Jarvis Client HTTP Server URL (default: http://localhost:3011)
+    DISCORD_STREAM_REPLIES - Stream chat replies by editing them in place (default: 1)
+    DISCORD_STREAM_EDIT_INTERVAL - Seconds between edits of a streaming reply (default: 1.2)
+    OLLAMA_KEEP_ALIVE - How long Ollama keeps a used model loaded (default: 30m)
+    OLLAMA_WARM_ON_TYPING - Load the Ollama model when a user starts typing (default: 1)
 """
 
 import asyncio
@@ -23,6 +27,8 @@ import os
 import sys
 import json
 import re
+import time
+import importlib.util
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from pathlib import Path
@@ -60,7 +66,7 @@ if _current_dir not in sys.path:
 
 # Import Jarvis AI model and formatter
 try:
-    from jarvis.models.model_manager import ModelManager
+    from jarvis.models.model_manager import ModelManager, aclose_model_managers
     from formatter import format_response
     MODEL_AVAILABLE = True
 except ImportError as e:
@@ -82,9 +88,12 @@ except ImportError as e:
     logging.warning(f"Could not import event listener: {e}")
     EVENT_LISTENER_AVAILABLE = False
 
+# Shared command table, the same rules as discord/routers/command_router.py
+from jarvis.intelligence.command_rules import detect_query_style, get_command_table, refine_search_query
+
 # Import intelligence core
 try:
-    from jarvis.intelligence import IntentRouter, IntentResult, IntentType
+    from jarvis.intelligence import IntentResult, IntentType, RoutingDecision, RoutingService
     INTELLIGENCE_AVAILABLE = True
 except ImportError as e:
     logging.warning(f"Could not import intelligence core: {e}")
@@ -152,6 +161,41 @@ DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN', 'YOUR_DISCORD_BOT_TOKEN_HERE'
 DISCORD_CLIENT_ID = os.getenv('DISCORD_CLIENT_ID', 'YOUR_DISCORD_CLIENT_ID_HERE')
 DISCORD_CLIENT_SERVER = os.getenv('DISCORD_CLIENT_SERVER', 'YOUR_DISCORD_SERVER_ID_HERE')
 DISCORD_WEBHOOK_URL = os.getenv('DISCORD_WEBHOOK_URL', '')
+# Chat replies are streamed into Discord (the edit interval is read by discord/config.py)
+STREAM_REPLIES = os.getenv('DISCORD_STREAM_REPLIES', '1') != '0'
+
+# Reply streaming is shared with the modular bot in discord/. discord.py owns
+# the "discord" name, so those modules are loaded by path into a discord_bot
+# namespace, the same way discord/main.py loads them.
+_BOT_PACKAGE_DIR = Path(__file__).resolve().parent / "discord"
+
+
+def _load_bot_module(module_path: str, module_name: str):
+    """Load discord/<module_path>.py as discord_bot.<module_name>, once."""
+    name = f"discord_bot.{module_name}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, _BOT_PACKAGE_DIR / f"{module_path}.py")
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Could not import {module_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+if "discord_bot" not in sys.modules:
+    _discord_bot_pkg = type(sys)("discord_bot")
+    _discord_bot_pkg.__path__ = [str(_BOT_PACKAGE_DIR)]
+    sys.modules["discord_bot"] = _discord_bot_pkg
+# The clients read config's availability flags at import time
+_load_bot_module("config", "config")._ensure_checks_done()
+# stream_chat_reply's module imports the clients, routers and utils packages from the namespace
+for _module_path, _module_name in (("clients/__init__", "clients"), ("routers/__init__", "routers"),
+                                   ("utils/__init__", "utils")):
+    _load_bot_module(_module_path, _module_name)
+SharedJarvisClient = sys.modules["discord_bot.clients"].JarvisClientMCPClient
+stream_chat_reply = _load_bot_module("handlers/tool_executor", "tool_executor").stream_chat_reply
 
 # Discord bot intents
 intents = discord.Intents.default()
@@ -308,8 +352,12 @@ class RobustMCPClient:
         self.logger.info("🛑 All MCP servers stopped")
 
 
-class JarvisClientMCPClient:
-    """Client for communicating with Jarvis Client HTTP Server."""
+class JarvisClientMCPClient(SharedJarvisClient):
+    """Client for communicating with Jarvis Client HTTP Server.
+    
+    Streaming (/nl/stream, /run-plan/stream) comes from the modular bot's
+    client; tool listing and calls here span every connected server.
+    """
     
     def __init__(self, base_url: str, session: aiohttp.ClientSession):
         self.base_url = base_url
@@ -480,18 +528,22 @@ class JarvisClientMCPClient:
         
         return f"Error: Failed to call tool after {max_retries} attempts"
     
-    async def natural_language_query(self, query: str) -> str:
+    async def natural_language_query(self, query: str, route: Optional[Dict[str, Any]] = None) -> str:
         """
         Send a natural language query to the Jarvis Client.
         
         Args:
             query: The natural language query
+            route: Routing decision already made for the query; /nl executes it
+                instead of routing again
             
         Returns:
             Response from Jarvis
         """
         try:
             payload = {"message": query}
+            if route:
+                payload["route"] = route
             
             logger.info(f"Sending natural language query: {query}")
             
@@ -634,72 +686,15 @@ class DiscordCommandRouter:
     
     def __init__(self, jarvis_client: JarvisClientMCPClient):
         self.jarvis_client = jarvis_client
+        self.commands = get_command_table()
     
     def detect_query_intent(self, query: str) -> Dict[str, Any]:
         """Detect the user's intent and extract key information."""
-        import re
-        query_lower = query.lower()
-        
-        intent_patterns = {
-            "specific_list": {
-                "pattern": r"list|top \d+|what are|show me|give me",
-                "expects_detailed_response": True,
-                "should_extract_items": True
-            },
-            "follow_up": {
-                "pattern": r"more about|details on|tell me more|explain|elaborate|more information",
-                "needs_context": True,
-                "expects_detailed_response": True
-            },
-            "comparison": {
-                "pattern": r"compare|versus|vs|difference between",
-                "expects_detailed_response": True,
-                "needs_multiple_sources": True
-            },
-            "current_events": {
-                "pattern": r"latest|recent|new|today|this week|breaking",
-                "prefers_news_source": True,
-                "time_sensitive": True
-            }
-        }
-        
-        detected = {
-            "intent_type": "general",
-            "confidence": 0.5,
-            "metadata": {}
-        }
-        
-        for intent_name, intent_spec in intent_patterns.items():
-            if re.search(intent_spec["pattern"], query_lower):
-                detected["intent_type"] = intent_name
-                detected["confidence"] = 0.8
-                detected["metadata"] = {k: v for k, v in intent_spec.items() if k != "pattern"}
-                break
-        
-        return detected
+        return detect_query_style(query)
     
     def refine_search_query(self, query: str, intent: Dict[str, Any]) -> str:
         """Refine search query based on intent and content."""
-        query_lower = query.lower()
-        
-        # For crypto/Web3 queries, filter out gambling sites
-        if any(word in query_lower for word in ['crypto', 'coin', 'token', 'blockchain', 'web3']):
-            # Add exclusion terms and specificity
-            return f"{query} cryptocurrency blockchain -casino -gambling -betting site:coinmarketcap.com OR site:coingecko.com OR site:decrypt.co"
-        
-        # For tariff/policy queries, add specificity
-        if any(word in query_lower for word in ['tariff', 'trade deal', 'policy', 'regulation']):
-            return f"{query} official announcement 2025 government"
-        
-        # For "top" or "best" queries, add ranking terms
-        if any(word in query_lower for word in ['top', 'best', 'leading']):
-            return f"{query} ranked list 2025"
-        
-        # For news queries, add time restriction
-        if intent.get("metadata", {}).get("time_sensitive"):
-            return f"{query} 2025"
-        
-        return query
+        return refine_search_query(query, intent)
     
     def validate_response_quality(self, response: str, query: str) -> tuple[bool, Optional[str]]:
         """Check if response adequately answers the query."""
@@ -977,188 +972,20 @@ class DiscordCommandRouter:
         """
         Parse Discord message and return appropriate tool, arguments, and server.
         
+        Commands come from the shared command table (jarvis.intelligence.command_rules),
+        the same rules the modular bot and the routing service use.
+        
         Args:
             message_content: The Discord message content
             
         Returns:
             Tuple of (tool_name, arguments, server)
         """
-        content = message_content.lower().strip()
-        
-        # Command routing - all tools are on the jarvis server
-        if content.startswith('/news') or 'scan news' in content:
-            return "jarvis_scan_news", {}, "jarvis"
-        
-        # Trading Commands - using ACTUAL tool names with double namespace prefix
-        elif content.startswith('/balance') or 'get balance' in content:
-            return "trading.trading.get_balance", {}, "jarvis"
-        elif content.startswith('/price') or 'get price' in content:
-            # Extract symbol from command
-            symbol = message_content.replace('/price', '').replace('get price', '').strip().upper()
-            if not symbol:
-                return "jarvis_chat", {"message": "Please specify a symbol for price lookup. Example: /price BTC"}, "jarvis"
-            
-            # Auto-format symbol for Kraken (add /USD or /USDT if not present)
-            if '/' not in symbol:
-                # Try common quote currencies
-                symbol = f"{symbol}/USD"
-            
-            return "trading.trading.get_price", {"symbol": symbol}, "jarvis"
-        elif content.startswith('/ohlcv') or 'ohlcv data' in content:
-            # Extract symbol from command
-            symbol = message_content.replace('/ohlcv', '').replace('ohlcv data', '').strip().upper()
-            if not symbol:
-                return "jarvis_chat", {"message": "Please specify a symbol for OHLCV data. Example: /ohlcv BTC"}, "jarvis"
-            
-            # Auto-format symbol for Kraken (add /USD or /USDT if not present)
-            if '/' not in symbol:
-                symbol = f"{symbol}/USD"
-            
-            return "trading.trading.get_ohlcv", {"symbol": symbol}, "jarvis"
-        elif content.startswith('/momentum') or 'momentum signals' in content:
-            return "trading.trading.get_momentum_signals", {}, "jarvis"
-        elif content.startswith('/doctor') or 'trading doctor' in content:
-            return "trading.trading.doctor", {}, "jarvis"
-        elif content.startswith('/history') or 'trade history' in content:
-            return "trading.trading.get_trade_history", {}, "jarvis"
-        elif content.startswith('/pnl') or 'profit loss' in content:
-            return "trading.trading.get_pnl_summary", {}, "jarvis"
-        
-        # Portfolio Commands (Paper Trading) - using ACTUAL tool names with trading.portfolio prefix
-        elif content.startswith('/portfolio') or 'get portfolio' in content:
-            return "trading.portfolio.get_overview", {}, "jarvis"
-        elif content.startswith('/positions') or 'get positions' in content:
-            return "trading.portfolio.get_positions", {}, "jarvis"
-        elif content.startswith('/trades') or 'get trades' in content or 'recent trades' in content:
-            return "trading.trading.get_recent_executions", {"limit": 20}, "jarvis"
-        elif content.startswith('/paper') or 'paper trading' in content:
-            return "trading.portfolio.get_overview", {}, "jarvis"
-        elif content.startswith('/performance') or 'get performance' in content:
-            return "trading.portfolio.get_performance", {}, "jarvis"
-        elif content.startswith('/exit') or 'exit engine' in content:
-            return "trading.portfolio.get_exit_engine_status", {}, "jarvis"
-        elif content.startswith('/state') or 'trading state' in content:
-            return "trading.portfolio.get_trading_state", {}, "jarvis"
-        elif content.startswith('/export') or 'export data' in content:
-            return "trading.portfolio.get_export_data", {}, "jarvis"
-        
-        # System Commands
-        elif content.startswith('/status') or 'get status' in content:
-            return "jarvis_get_status", {}, "jarvis"
-        elif content.startswith('/memory') or 'get memory' in content:
-            return "jarvis_get_memory", {"limit": 10}, "jarvis"
-        elif content.startswith('/tasks') or 'get tasks' in content:
-            return "jarvis_get_tasks", {"status": "all"}, "jarvis"
-        elif content.startswith('/quests') or 'get quests' in content:
-            return "system.system.list_quests", {}, "jarvis"
-        elif content.startswith('/system') or 'system status' in content:
-            return "system.system.get_status", {}, "jarvis"
-        
-        # Event Monitoring Commands
-        elif content.startswith('/events start') or content == '/events on':
-            return "events_start_monitoring", {}, "local"
-        elif content.startswith('/events stop') or content == '/events off':
-            return "events_stop_monitoring", {}, "local"
-        elif content.startswith('/events stats') or content == '/events statistics':
-            return "events_get_statistics", {}, "local"
-        elif content.startswith('/events history'):
-            # Extract limit if provided
-            import re
-            match = re.search(r'history\s+(\d+)', content)
-            limit = int(match.group(1)) if match else 10
-            return "events_get_history", {"limit": limit}, "local"
-        elif content.startswith('/events test'):
-            # Extract event type if provided
-            test_type = content.replace('/events test', '').strip()
-            return "events_test_event", {"type": test_type if test_type else "market_alert"}, "local"
-        elif content.startswith('/events check'):
-            return "events_check_markets", {}, "local"
-        
-        # Music Commands
-        elif content.startswith('/play'):
-            # Extract song name if provided
-            song_name = message_content.replace('/play', '').strip()
-            # If no song name, check if we should resume instead
-            if not song_name:
-                return "music_play_or_resume", {}, "local"
-            return "music_play", {"song_name": song_name}, "local"
-        elif content.startswith('/pause'):
-            return "music_pause", {}, "local"
-        elif content.startswith('/resume'):
-            return "music_resume", {}, "local"
-        elif content.startswith('/stop'):
-            return "music_stop", {}, "local"
-        elif content.startswith('/skip'):
-            return "music_skip", {}, "local"
-        elif content.startswith('/queue clear'):
-            return "music_clear_queue", {}, "local"
-        elif content.startswith('/queue remove'):
-            # Extract position
-            import re
-            match = re.search(r'remove\s+(\d+)', content)
-            if match:
-                position = int(match.group(1))
-                return "music_remove_from_queue", {"position": position}, "local"
-            else:
-                return "music_queue_view", {}, "local"
-        elif content.startswith('/queue'):
-            # Check if adding to queue or viewing queue
-            rest = message_content.replace('/queue', '').strip()
-            if rest:
-                return "music_queue_add", {"song_name": rest}, "local"
-            else:
-                return "music_queue_view", {}, "local"
-        elif content.startswith('/nowplaying') or content.startswith('/np'):
-            return "music_now_playing", {}, "local"
-        elif content.startswith('/songs') or content.startswith('/list'):
-            return "music_list_songs", {}, "local"
-        elif content.startswith('/random') or content.startswith('/shuffle'):
-            return "music_random", {}, "local"
-        elif content.startswith('/findsong') or content.startswith('/find'):
-            # Extract search keyword
-            keyword = message_content.replace('/findsong', '').replace('/find', '').strip()
-            if not keyword:
-                return "music_list_songs", {}, "local"
-            return "music_search", {"keyword": keyword}, "local"
-        elif content.startswith('/mcpqueue'):
-            return "music_mcp_queue", {}, "local"
-        elif content.startswith('/leave') or content.startswith('/disconnect'):
-            return "music_leave", {}, "local"
-        elif content.startswith('/volume'):
-            # Extract volume level
-            import re
-            match = re.search(r'volume\s+(\d+)', content)
-            if match:
-                volume = int(match.group(1))
-                return "music_volume", {"volume": volume}, "local"
-            else:
-                return "music_volume", {}, "local"
-        elif content.startswith('/join'):
-            return "music_join", {}, "local"
-        
-        # Search Commands (web search)
-        elif content.startswith('/search') or 'web search' in content:
-            # Extract search query
-            query = message_content.replace('/search', '').replace('web search', '').strip()
-            if not query:
-                query = "latest technology news"
-            
-            # Detect intent and refine query
-            intent = self.detect_query_intent(query)
-            refined_query = self.refine_search_query(query, intent)
-            
-            logger.info(f"Search query refined: '{query}' -> '{refined_query}'")
-            return "jarvis_web_search", {"query": refined_query}, "jarvis"
-        
-        # Help and Chat
-        elif content.startswith('/help') or 'help' in content:
-            return "jarvis_chat", {"message": "show available commands and help"}, "jarvis"
-        elif any(word in content for word in ['date', 'time', 'today', 'what day', 'what time']):
-            # Handle date/time questions directly with jarvis_chat
-            return "jarvis_chat", {"message": message_content}, "jarvis"
-        else:
+        command = self.commands.match(message_content)
+        if command is None:
             # For any other message, use natural language processing
             return "natural_language", {"query": message_content}, None
+        return command.tool, command.arguments, command.server
     
     async def handle_message(self, message: discord.Message) -> str:
         """
@@ -1270,14 +1097,9 @@ _STONKSS_TOOL_ALIASES: Dict[str, str] = {
 
 def _normalize_trading_symbol(symbol: str) -> str:
     """Strip crypto pair suffixes so stonkss gets a plain ticker (e.g. AAPL)."""
-    symbol = (symbol or "").strip().upper()
-    if not symbol:
-        return symbol
-    if "/" in symbol:
-        return symbol.split("/", 1)[0]
-    if "-" in symbol:
-        return symbol.split("-", 1)[0]
-    return symbol
+    from jarvis.intelligence.symbol_resolver import get_symbol_resolver
+
+    return get_symbol_resolver().canonical(symbol, "trading.get_quote")
 
 
 def resolve_trading_tool(
@@ -1350,13 +1172,13 @@ def _is_trading_formatted_response(text: str) -> bool:
     return False
 
 
-async def execute_intelligent_tool(intent_result: 'IntentResult', message: discord.Message) -> str:
+async def execute_intelligent_tool(decision: 'RoutingDecision', message: discord.Message) -> str:
     """Execute a tool based on intelligent intent analysis, trying agent system first."""
     global jarvis_client, command_router, agent_manager, robust_mcp_client
     
     try:
-        tool_name = intent_result.tool_name
-        arguments = intent_result.arguments
+        tool_name = decision.tool_name
+        arguments = decision.arguments
         
         tool_name, arguments, server = resolve_trading_tool(
             tool_name, arguments, message.content
@@ -1400,8 +1222,10 @@ async def execute_intelligent_tool(intent_result: 'IntentResult', message: disco
         
         # Final fallback to HTTP client
         if tool_name == "jarvis_chat":
-            # Use natural language processing
-            return await jarvis_client.natural_language_query(arguments.get("message", ""))
+            # Use natural language processing, passing the routing decision along
+            return await jarvis_client.natural_language_query(
+                arguments.get("message", ""), route=decision.route_hint()
+            )
         else:
             # Call specific tool via HTTP
             return await jarvis_client.call_tool(tool_name, arguments, server)
@@ -1418,7 +1242,7 @@ model_manager: Optional['ModelManager'] = None  # For AI-powered response format
 conversation_context: Optional[ConversationContext] = None  # For tracking conversation history
 event_listener: Optional['TradingEventListener'] = None  # For trading event notifications
 music_player: Optional['MusicPlayer'] = None  # For music playback in voice channels
-intent_router: Optional[IntentRouter] = None  # For intelligent command routing
+routing_service: Optional['RoutingService'] = None  # Routes each message once (intelligent routing)
 
 # Event notification channel ID (configure in .env or here)
 EVENT_NOTIFICATION_CHANNEL_ID = os.getenv('EVENT_NOTIFICATION_CHANNEL_ID', None)
@@ -1427,12 +1251,13 @@ EVENT_NOTIFICATION_CHANNEL_ID = os.getenv('EVENT_NOTIFICATION_CHANNEL_ID', None)
 agent_manager = None  # Global agent manager instance
 robust_mcp_client = None  # Global robust MCP client instance
 ollama_lifecycle: Optional["OllamaLifecycle"] = None
+ollama_residency = None  # Keeps the Ollama model loaded (jarvis.ollama_residency)
 
 
 @client.event
 async def on_ready():
     """Event handler for when the bot is ready."""
-    global session, jarvis_client, command_router, model_manager, conversation_context, event_listener, music_player, intent_router, server_manager, agent_manager, robust_mcp_client
+    global session, jarvis_client, command_router, model_manager, conversation_context, event_listener, music_player, routing_service, server_manager, agent_manager, robust_mcp_client, ollama_residency
     
     logger.info(f'{client.user} has connected to Discord!')
     logger.info(f'Bot is in {len(client.guilds)} guilds')
@@ -1493,14 +1318,14 @@ async def on_ready():
     # Initialize intelligence core
     if INTELLIGENCE_AVAILABLE:
         try:
-            intent_router = IntentRouter()
+            routing_service = RoutingService()
             logger.info("🧠 Intelligence core initialized")
         except Exception as e:
             logger.warning(f"⚠️ Could not initialize intelligence core: {e}")
-            intent_router = None
+            routing_service = None
     else:
         logger.warning("⚠️ Intelligence core not available")
-        intent_router = None
+        routing_service = None
     
     # Initialize model manager for AI-powered response formatting
     if MODEL_AVAILABLE:
@@ -1518,6 +1343,10 @@ async def on_ready():
                         logger.info("⚠️ Ollama model initialized but not currently available")
                 except Exception as e:
                     logger.warning(f"⚠️ Error checking Ollama availability: {e}")
+                
+                # Preload the model and keep it resident between messages
+                ollama_residency = model_manager.ollama_model.residency
+                ollama_residency.start()
             
             # Verify OpenAI availability
             if model_manager.openai_available and model_manager.openai_model:
@@ -1596,10 +1425,22 @@ async def on_ready():
         logger.error(f"Failed to get available tools: {e}")
 
 
+@client.event
+async def on_typing(channel, user, when):
+    """Warm the local model while a user types, so their message finds it loaded."""
+    if ollama_residency is None or user == client.user:
+        return
+    if DISCORD_CLIENT_SERVER and DISCORD_CLIENT_SERVER != 'YOUR_DISCORD_SERVER_ID_HERE':
+        guild = getattr(channel, "guild", None)
+        if guild is None or str(guild.id) != DISCORD_CLIENT_SERVER:
+            return
+    ollama_residency.schedule_warm(reason="typing")
+
+
 @client.event
 async def on_message(message):
     """Event handler for incoming Discord messages with intelligent routing."""
-    global command_router, model_manager, conversation_context, intent_router
+    global command_router, model_manager, conversation_context, routing_service
     
     # Ignore messages from the bot itself
     if message.author == client.user:
@@ -1632,40 +1473,48 @@ async def on_message(message):
             
             # Step 1: Intelligent intent analysis (if available)
             raw_response = None
-            intent_result = None
+            streamed_response = None
+            decision = None
             
-            if intent_router and INTELLIGENCE_AVAILABLE:
+            if routing_service and INTELLIGENCE_AVAILABLE:
                 try:
-                    # Use intelligent routing
-                    intent_result = await intent_router.analyze_intent(
+                    # Use intelligent routing; the decision is reused below
+                    decision = await routing_service.route(
                         message.content, 
                         str(message.author.id), 
                         str(message.channel.id)
                     )
                     
-                    logger.info(f"🧠 Intent: {intent_result.intent_type.value} "
-                              f"(confidence: {intent_result.confidence:.2f})")
-                    logger.info(f"🔧 Tool: {intent_result.tool_name}")
-                    logger.info(f"💭 Reasoning: {intent_result.reasoning}")
+                    logger.info(f"🧠 Intent: {decision.intent_type.value} "
+                              f"(confidence: {decision.confidence:.2f}, tier: {decision.tier})")
+                    logger.info(f"🔧 Tool: {decision.tool_name}")
+                    logger.info(f"💭 Reasoning: {decision.reasoning}")
+                    
+                    # Chat replies stream straight into Discord as they are generated
+                    if decision.tool_name == "jarvis_chat" and jarvis_client and STREAM_REPLIES:
+                        streamed_response = await stream_chat_reply(decision, message, jarvis_client)
                     
                     # Execute the determined tool
-                    raw_response = await execute_intelligent_tool(intent_result, message)
+                    if streamed_response is None:
+                        raw_response = await execute_intelligent_tool(decision, message)
                     
                 except Exception as e:
                     logger.warning(f"Intelligent routing failed, falling back to command router: {e}")
-                    intent_result = None
+                    decision = None
             
             # Step 2: Fallback to traditional command router if intelligent routing failed
-            if raw_response is None:
+            if raw_response is None and streamed_response is None:
                 if command_router is not None:
                     raw_response = await command_router.handle_message(message)
                 else:
                     logger.error("Command router is not initialized - cannot process message")
                     raw_response = "❌ Bot is still initializing. Please wait a moment and try again."
             
-            # Step 3: Format the response using AI (if available)
+            # Step 3: Format the response using AI (if available); streamed replies are already final
             skip_format = _is_trading_formatted_response(raw_response or "")
-            if model_manager and MODEL_AVAILABLE and not skip_format:
+            if streamed_response is not None:
+                response = streamed_response
+            elif model_manager and MODEL_AVAILABLE and not skip_format:
                 try:
                     # Get context about what command was run
                     context = f"User asked: {message.content[:100]}"
@@ -1673,13 +1522,13 @@ async def on_message(message):
                         context += f"\nPrevious context: {user_context[:100]}"
                     
                     # Add intent information if available
-                    if intent_result:
-                        context += f"\nIntent: {intent_result.intent_type.value} "
-                        context += f"(confidence: {intent_result.confidence:.2f})"
-                        context += f"\nReasoning: {intent_result.reasoning}"
+                    if decision:
+                        context += f"\nIntent: {decision.intent_type.value} "
+                        context += f"(confidence: {decision.confidence:.2f})"
+                        context += f"\nReasoning: {decision.reasoning}"
                     
-                    # Detect intent for better formatting
-                    intent = command_router.detect_query_intent(message.content)
+                    # Query style for better formatting (already computed during routing)
+                    intent = decision.query_style if decision else command_router.detect_query_intent(message.content)
                     if intent.get("metadata", {}).get("expects_detailed_response"):
                         context += "\nUser expects detailed response with specific data."
                     
@@ -1705,19 +1554,16 @@ async def on_message(message):
             if not response or response.strip() == "":
                 response = "No response received from Jarvis."
             
-            # Send response (automatically handles long messages by splitting)
-            await send_long_message(message, response)
+            # Send response (automatically handles long messages by splitting);
+            # a streamed reply has been sent already
+            if streamed_response is None:
+                await send_long_message(message, response)
             
             # Store in conversation context with intent information
             if conversation_context:
                 metadata = {"timestamp": datetime.now().isoformat()}
-                if intent_result:
-                    metadata.update({
-                        "intent_type": intent_result.intent_type.value,
-                        "confidence": intent_result.confidence,
-                        "tool_used": intent_result.tool_name,
-                        "reasoning": intent_result.reasoning
-                    })
+                if decision:
+                    metadata.update(decision.metadata())
                 
                 conversation_context.add_message(
                     user_id=message.author.id,
@@ -1864,7 +1710,7 @@ async def send_error_webhook(error_msg: str, original_message: str):
 
 async def cleanup():
     """Cleanup resources on shutdown."""
-    global session, event_listener, music_player, ollama_lifecycle
+    global session, event_listener, music_player, ollama_lifecycle, ollama_residency
     
     # Stop event monitoring if running
     if event_listener:
@@ -1886,6 +1732,14 @@ async def cleanup():
         await session.close()
         logger.info("Closed aiohttp session")
 
+    if MODEL_AVAILABLE:
+        await aclose_model_managers()
+        logger.info("Closed model provider connections")
+
+    if ollama_residency:
+        await ollama_residency.stop()
+        ollama_residency = None
+
     if ollama_lifecycle:
         try:
             await ollama_lifecycle.stop()
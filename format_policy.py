@@ -0,0 +1,355 @@
+"""
+Formatting policy for ResponseFormatter: decide how a tool result becomes a
+Discord message before paying for an LLM round-trip.
+
+In order:
+- text that is already human-readable (markdown, emoji, bullets, or short
+  prose) is sent as-is ("passthrough")
+- JSON matching a known tool result schema is rendered by a deterministic
+  template ("template"): quotes, portfolios, momentum signals, system
+  status, news/search result lists and error objects
+- small flat JSON becomes a bold key/value list ("template", "simple")
+- everything else (nested or large JSON, machine-looking text) goes to the
+  LLM ("llm"), restricted to the fast providers
+
+Environment variables (with defaults):
+- FORMATTER_POLICY: default 1 (0 sends every result to the LLM, as before)
+- FORMATTER_PROVIDERS: default "openai,ollama" (providers used for LLM formatting;
+  empty for the full ModelManager chain)
+- FORMATTER_PLAIN_TEXT_CHARS: default 800 (unformatted prose longer than this is polished by the LLM)
+- FORMATTER_SIMPLE_JSON_KEYS: default 12 (flat JSON objects up to this size use the key/value template)
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+POLICY_ENABLED = os.getenv("FORMATTER_POLICY", "1").lower() not in ("0", "false", "no")
+FAST_PROVIDERS = tuple(p.strip() for p in os.getenv("FORMATTER_PROVIDERS", "openai,ollama").split(",") if p.strip())
+PLAIN_TEXT_CHARS = int(os.getenv("FORMATTER_PLAIN_TEXT_CHARS", "800"))
+SIMPLE_JSON_KEYS = int(os.getenv("FORMATTER_SIMPLE_JSON_KEYS", "12"))
+
+# Longest list a template renders before summarizing the rest
+MAX_ITEMS = 10
+
+_EMOJI_RE = re.compile("[\U0001F300-\U0001FAFF☀-➿⬀-⯿]")
+_MARKDOWN_RE = re.compile(r"\*\*[^*]+\*\*|`[^`]+`|^\s*(?:[-*•]|\d+\.|#{1,3})\s", re.MULTILINE)
+_MACHINE_RE = re.compile(r"^\s*(?:Traceback \(most recent call last\)|[{\[]\s*['\"]|\w+=\S+(?:[,;&]\s*\w+=\S+){2,})")
+
+
+@dataclass
+class FormatDecision:
+    """How to format one tool result; ``text`` is set unless the LLM is needed."""
+    action: str  # "passthrough", "template" or "llm"
+    reason: str
+    text: Optional[str] = None
+    data: Any = None
+    is_json: bool = False
+    providers: Tuple[str, ...] = field(default_factory=tuple)
+
+
+# -- value formatting -------------------------------------------------------
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").replace("$", "").replace("%", "").strip())
+        except ValueError:
+            return None
+    return None
+
+
+def _money(value: Any) -> str:
+    number = _number(value)
+    if number is None:
+        return str(value)
+    sign = "-" if number < 0 else ""
+    number = abs(number)
+    # Sub-dollar assets need more precision than cents
+    return f"{sign}${number:,.2f}" if number >= 1 or number == 0 else f"{sign}${number:,.6f}".rstrip("0")
+
+
+def _pct(value: Any) -> str:
+    number = _number(value)
+    return str(value) if number is None else f"{number:+.2f}%"
+
+
+def _trend(value: Any) -> str:
+    number = _number(value)
+    if number is None or number == 0:
+        return "➡️"
+    return "📈" if number > 0 else "📉"
+
+
+def _first(data: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        if data.get(key) is not None:
+            return data[key]
+    return None
+
+
+def _title(key: str) -> str:
+    return key.replace("_", " ").title()
+
+
+# -- templates --------------------------------------------------------------
+
+def _quote_line(quote: Dict[str, Any]) -> Optional[str]:
+    symbol = _first(quote, "symbol", "ticker", "pair")
+    price = _first(quote, "price", "current_price", "last", "last_price")
+    if symbol is None or _number(price) is None:
+        return None
+    change_pct = _first(quote, "change_percent", "change_pct", "percent_change", "change_24h_pct")
+    line = f"{_trend(change_pct)} **{symbol}** {_money(price)}"
+    if change_pct is not None:
+        line += f" ({_pct(change_pct)})"
+    extras = []
+    for label, keys in (("High", ("high", "high_24h")), ("Low", ("low", "low_24h")),
+                        ("Volume", ("volume", "volume_24h"))):
+        value = _first(quote, *keys)
+        if _number(value) is not None:
+            extras.append(f"{label} {_number(value):,.0f}" if label == "Volume" else f"{label} {_money(value)}")
+    if extras:
+        line += " · " + " · ".join(extras)
+    return line
+
+
+def _render_quotes(data: Any) -> Optional[str]:
+    if isinstance(data, dict):
+        if isinstance(data.get("quote"), dict):
+            return _quote_line(data["quote"])
+        if isinstance(data.get("quotes"), list):
+            data = data["quotes"]
+        else:
+            return _quote_line(data)
+    if isinstance(data, list) and data and all(isinstance(q, dict) for q in data):
+        lines = [_quote_line(q) for q in data[:MAX_ITEMS]]
+        if all(lines):
+            return "\n".join(lines)
+    return None
+
+
+def _render_portfolio(data: Any) -> Optional[str]:
+    if not isinstance(data, dict) or not isinstance(data.get("positions"), (dict, list)):
+        return None
+    value = _first(data, "portfolio_value", "total_value", "equity", "balance")
+    cash = _first(data, "cash", "cash_balance", "buying_power")
+    if _number(value) is None and _number(cash) is None:
+        return None
+    lines = ["💼 **Portfolio**"]
+    if _number(value) is not None:
+        lines.append(f"**Value:** {_money(value)}")
+    if _number(cash) is not None:
+        lines.append(f"**Cash:** {_money(cash)}")
+    for label, keys in (("Return", ("return_percentage", "return_pct", "total_return_pct")),
+                        ("Today", ("daily_pnl_pct", "day_change_pct"))):
+        pct = _first(data, *keys)
+        if _number(pct) is not None:
+            lines.append(f"**{label}:** {_trend(pct)} {_pct(pct)}")
+    daily_pnl = _first(data, "daily_pnl", "day_pnl")
+    if _number(daily_pnl) is not None:
+        lines.append(f"**Daily P&L:** {_money(daily_pnl)}")
+
+    positions = data["positions"]
+    items = list(positions.items()) if isinstance(positions, dict) else [
+        (_first(p, "symbol", "ticker") or "?", p) for p in positions if isinstance(p, dict)]
+    if not items:
+        lines.append("No open positions.")
+        return "\n".join(lines)
+    lines.append(f"\n**Positions ({len(items)}):**")
+    for symbol, position in items[:MAX_ITEMS]:
+        if not isinstance(position, dict):
+            lines.append(f"• **{symbol}**: {position}")
+            continue
+        qty = _first(position, "quantity", "qty", "size", "shares", "amount")
+        worth = _first(position, "market_value", "value", "current_value")
+        pnl_pct = _first(position, "unrealized_pnl_pct", "pnl_percent", "pnl_pct", "return_pct")
+        parts = [f"• **{symbol}**"]
+        if _number(qty) is not None:
+            parts.append(f"{_number(qty):,.6g}")
+        if _number(worth) is not None:
+            parts.append(f"worth {_money(worth)}")
+        if _number(pnl_pct) is not None:
+            parts.append(f"{_trend(pnl_pct)} {_pct(pnl_pct)}")
+        lines.append(" ".join(parts))
+    if len(items) > MAX_ITEMS:
+        lines.append(f"…and {len(items) - MAX_ITEMS} more")
+    return "\n".join(lines)
+
+
+def _render_momentum(data: Any) -> Optional[str]:
+    signals = data.get("momentum_signals") if isinstance(data, dict) else None
+    if not isinstance(signals, dict) or not all(isinstance(s, dict) for s in signals.values()):
+        return None
+    if not signals:
+        return "No momentum signals available"
+    lines = []
+    for symbol, signal in list(signals.items())[:MAX_ITEMS]:
+        strength = str(signal.get("signal_strength", "NEUTRAL"))
+        emoji = "📈" if "UP" in strength else "📉" if "DOWN" in strength else "➡️"
+        lines.append(f"{emoji} **{symbol.replace('-', '/')}**: {_money(signal.get('current_price', 0))} | "
+                     f"6h: {_pct(signal.get('momentum_6h_pct', 0))} | "
+                     f"24h: {_pct(signal.get('momentum_24h_pct', 0))} | {strength}")
+    return "\n".join(lines)
+
+
+def _render_system_status(data: Any) -> Optional[str]:
+    if not isinstance(data, dict):
+        return None
+    cpu, memory = data.get("cpu"), data.get("memory")
+    if isinstance(cpu, dict) and isinstance(memory, dict):
+        cpu_pct = cpu.get("cpu_percent")
+        mem_pct = _first(memory, "percent", "memory_percent", "used_percent")
+        disk = data.get("disk") if isinstance(data.get("disk"), dict) else {}
+        disk_pct = _first(disk, "percent", "used_percent")
+        temperature = data.get("temperature") if isinstance(data.get("temperature"), dict) else {}
+        battery = data.get("battery") if isinstance(data.get("battery"), dict) else {}
+    elif "cpu_percent" in data and ("memory_percent" in data or "memory" in data):
+        cpu_pct = data.get("cpu_percent")
+        mem_pct = data.get("memory_percent", data.get("memory"))
+        disk_pct = data.get("disk_percent")
+        temperature, battery = {}, {}
+    else:
+        return None
+    if _number(cpu_pct) is None and _number(mem_pct) is None:
+        return None
+
+    def usage(label: str, pct: Any) -> Optional[str]:
+        number = _number(pct)
+        if number is None:
+            return None
+        flag = "🔴" if number >= 90 else "🟡" if number >= 75 else "🟢"
+        return f"{flag} **{label}:** {number:.1f}%"
+
+    lines = ["🖥️ **System Status**"]
+    lines += [line for line in (usage("CPU", cpu_pct), usage("Memory", mem_pct), usage("Disk", disk_pct)) if line]
+    temp = _first(temperature, "cpu_temp", "current", "temperature")
+    if _number(temp) is not None:
+        lines.append(f"🌡️ **Temperature:** {_number(temp):.0f}°C")
+    if battery.get("success", True) and _number(battery.get("percent")) is not None:
+        plugged = " (charging)" if battery.get("power_plugged") else ""
+        lines.append(f"🔋 **Battery:** {_number(battery['percent']):.0f}%{plugged}")
+    return "\n".join(lines)
+
+
+def _render_news(data: Any) -> Optional[str]:
+    topic = None
+    items = data
+    if isinstance(data, dict):
+        topic = _first(data, "topic", "query")
+        items = _first(data, "articles", "results", "news", "items")
+    if not isinstance(items, list) or not items:
+        return None
+    if not all(isinstance(item, dict) and _first(item, "title", "headline") for item in items):
+        return None
+    lines = [f"📰 **{topic}**" if topic else "📰 **Results**"]
+    for i, item in enumerate(items[:MAX_ITEMS], 1):
+        title = _first(item, "title", "headline")
+        url = _first(item, "url", "href", "link")
+        source = _first(item, "source", "publisher")
+        line = f"{i}. [{title}](<{url}>)" if url else f"{i}. **{title}**"
+        if isinstance(source, str) and source:
+            line += f" — {source}"
+        snippet = _first(item, "snippet", "body", "summary", "description")
+        if isinstance(snippet, str) and snippet.strip():
+            snippet = " ".join(snippet.split())
+            line += f"\n   {snippet[:160]}{'…' if len(snippet) > 160 else ''}"
+        lines.append(line)
+    if len(items) > MAX_ITEMS:
+        lines.append(f"…and {len(items) - MAX_ITEMS} more")
+    return "\n".join(lines)
+
+
+def _render_error(data: Any) -> Optional[str]:
+    if not isinstance(data, dict) or not data.get("error"):
+        return None
+    error = data["error"]
+    if isinstance(error, dict):
+        error = _first(error, "message", "detail") or json.dumps(error)
+    return f"⚠️ Error: {error}"
+
+
+def _render_simple(data: Any) -> Optional[str]:
+    if isinstance(data, dict) and 0 < len(data) <= SIMPLE_JSON_KEYS and all(
+            not isinstance(v, (dict, list)) for v in data.values()):
+        return "\n".join(f"**{_title(str(k))}:** {'—' if v is None else v}" for k, v in data.items())
+    if isinstance(data, list) and 0 < len(data) <= SIMPLE_JSON_KEYS and all(
+            not isinstance(v, (dict, list)) for v in data):
+        return "\n".join(f"• {v}" for v in data)
+    return None
+
+
+# Checked in order; the first template that renders wins
+TEMPLATES: List[Tuple[str, Callable[[Any], Optional[str]]]] = [
+    ("error", _render_error),
+    ("quote", _render_quotes),
+    ("portfolio", _render_portfolio),
+    ("momentum", _render_momentum),
+    ("system_status", _render_system_status),
+    ("news", _render_news),
+    ("simple", _render_simple),
+]
+
+
+# -- policy -----------------------------------------------------------------
+
+def looks_formatted(text: str) -> bool:
+    """True for text a person can read as-is (markdown, emoji or short prose)."""
+    if _MACHINE_RE.match(text):
+        return False
+    if _EMOJI_RE.search(text) or _MARKDOWN_RE.search(text):
+        return True
+    return len(text) <= PLAIN_TEXT_CHARS
+
+
+def _parse_json(text: str) -> Tuple[bool, Any]:
+    stripped = text.strip()
+    if not stripped or stripped[0] not in "{[":
+        return False, None
+    try:
+        return True, json.loads(stripped)
+    except (json.JSONDecodeError, TypeError):
+        return False, None
+
+
+class FormatPolicy:
+    """Picks passthrough, a template or the LLM for a tool result, and counts the choices."""
+
+    def __init__(self, enabled: bool = POLICY_ENABLED, providers: Tuple[str, ...] = FAST_PROVIDERS):
+        self.enabled = enabled
+        self.providers = providers
+        self.counts: Dict[str, int] = {}
+
+    def decide(self, raw_response: str) -> FormatDecision:
+        is_json, data = _parse_json(raw_response)
+        decision = self._decide(raw_response, is_json, data)
+        decision.is_json, decision.data = is_json, data
+        key = decision.action if decision.action != "template" else f"template.{decision.reason}"
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return decision
+
+    def _decide(self, raw_response: str, is_json: bool, data: Any) -> FormatDecision:
+        if not self.enabled:
+            return FormatDecision("llm", "policy disabled")
+        if not is_json:
+            if looks_formatted(raw_response):
+                return FormatDecision("passthrough", "formatted text", text=raw_response.strip())
+            return FormatDecision("llm", "unformatted text", providers=self.providers)
+        for name, render in TEMPLATES:
+            try:
+                text = render(data)
+            except Exception:
+                # A schema that looked familiar but was not; try the next one
+                text = None
+            if text:
+                return FormatDecision("template", name, text=text)
+        return FormatDecision("llm", "complex json", providers=self.providers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "providers": list(self.providers), "decisions": dict(self.counts)}
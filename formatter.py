@@ -1,14 +1,33 @@
 """
 Response Formatter for Jarvis Discord Bot
 Transforms raw tool outputs (JSON/text) into natural, human-readable Discord messages.
+
+Most tool results never reach the LLM: format_policy sends already
+formatted text through as-is and renders known schemas (quotes, portfolio,
+momentum, system status, news, errors, small flat JSON) with templates.
+Only complex JSON and machine-looking text are formatted by the model, on
+the fast providers. Formatted output is cached by a hash of the tool result
+and its context.
+
+Environment variables (with defaults):
+- FORMATTER_CACHE_SIZE: default 512 formatted results kept in memory
+- FORMATTER_POLICY, FORMATTER_PROVIDERS, FORMATTER_PLAIN_TEXT_CHARS,
+  FORMATTER_SIMPLE_JSON_KEYS: see format_policy
 """
 
+import hashlib
 import json
 import logging
-from typing import Optional, Any
+import os
+from collections import OrderedDict
+from typing import Optional, Any, Dict
+
+from format_policy import FormatPolicy
 
 logger = logging.getLogger(__name__)
 
+FORMATTER_CACHE_SIZE = int(os.getenv("FORMATTER_CACHE_SIZE", "512"))
+
 
 class ResponseFormatter:
     """Formats raw tool outputs into natural, conversational responses using Jarvis AI."""
@@ -21,6 +40,12 @@ class ResponseFormatter:
             model_manager: Jarvis model manager instance (OpenAI/Claude)
         """
         self.model_manager = model_manager
+        self.policy = FormatPolicy()
+        
+        # Formatted output by content hash of (context, raw response)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.cache_size = FORMATTER_CACHE_SIZE
+        self.stats = {"requests": 0, "cache_hits": 0, "llm_calls": 0, "fallbacks": 0}
         
         # System prompt that defines Jarvis's formatting personality
         self.system_prompt = """You are Jarvis — a refined, intelligent AI assistant built for Discord.
@@ -102,18 +127,30 @@ IMPORTANT:
         if not raw_response or raw_response.strip() == "":
             return "I didn't receive any data back. The operation may have completed, but there's nothing to report."
         
+        self.stats["requests"] += 1
+        key = self._cache_key(raw_response, context)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return cached
+        
+        decision = self.policy.decide(raw_response)
+        if decision.text is not None:
+            logger.debug(f"🧩 Formatted without LLM ({decision.action}: {decision.reason})")
+            self._remember(key, decision.text)
+            return decision.text
+        
         # Check if we have a model available
         if not self.model_manager:
             logger.warning("No model manager available, returning raw response")
             return raw_response
         
+        is_json_response = decision.is_json
         try:
-            # Determine response type
-            is_json_response = self.is_json(raw_response)
-            
             # Build the formatting prompt
             if is_json_response:
-                json_data = json.loads(raw_response)
+                json_data = decision.data
                 clean_json = self.clean_json_for_prompt(json_data)
                 
                 prompt = f"""Transform this JSON data into a natural, conversational response:
@@ -141,26 +178,49 @@ Improve readability while keeping all facts intact. Use Discord markdown where h
             logger.info(f"Using {max_tokens} max tokens for response formatting")
             
             # Call the AI model to format the response
+            self.stats["llm_calls"] += 1
             formatted = await self.model_manager.generate(
                 prompt=prompt,
                 system_prompt=self.system_prompt,
                 temperature=0.7,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                cache_site="formatter",
+                providers=decision.providers or None
             )
             
             # Validate the formatted response
             if not formatted or "Error:" in formatted[:20]:
                 logger.warning(f"Formatting failed: {formatted}")
+                self.stats["fallbacks"] += 1
                 return self._fallback_format(raw_response, is_json_response)
             
             # Log successful formatting
             logger.info(f"Formatted response: {len(raw_response)} chars -> {len(formatted)} chars")
             
-            return formatted.strip()
+            formatted = formatted.strip()
+            self._remember(key, formatted)
+            return formatted
             
         except Exception as e:
             logger.error(f"Error formatting response: {e}")
-            return self._fallback_format(raw_response, is_json_response=self.is_json(raw_response))
+            self.stats["fallbacks"] += 1
+            return self._fallback_format(raw_response, is_json_response=is_json_response)
+    
+    @staticmethod
+    def _cache_key(raw_response: str, context: Optional[str]) -> str:
+        return hashlib.sha1(f"{context or ''}\0{raw_response}".encode("utf-8")).hexdigest()
+    
+    def _remember(self, key: str, formatted: str):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = formatted
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Formatting counters: cache hits, LLM calls and how the policy decided."""
+        return {**self.stats, "cache_entries": len(self._cache), "policy": self.policy.get_stats()}
     
     def _fallback_format(self, raw_response: str, is_json_response: bool) -> str:
         """
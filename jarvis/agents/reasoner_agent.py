@@ -120,6 +120,7 @@ class ReasonerAgent(AgentBase):
                     prompt,
                     temperature=0.2,
                     max_tokens=600,
+                    lane="background",
                 )
             except Exception as e:
                 self.logger.warning(f"LLM reflection failed, using fallback: {e}")
@@ -152,6 +153,7 @@ class ReasonerAgent(AgentBase):
                     prompt,
                     temperature=0.2,
                     max_tokens=400,
+                    lane="background",
                 )
             except Exception as e:
                 self.logger.warning(f"LLM critique failed, using fallback: {e}")
@@ -184,6 +186,7 @@ class ReasonerAgent(AgentBase):
                     prompt,
                     temperature=0.2,
                     max_tokens=300,
+                    lane="background",
                 )
             except Exception as e:
                 self.logger.warning(f"LLM planning failed, using fallback: {e}")
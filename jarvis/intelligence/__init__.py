@@ -6,16 +6,51 @@ for the Jarvis AI assistant system.
 
 Modules:
 - intent_router: Main intent analysis and routing system
+- routing_cache: LRU/TTL cache of routing decisions persisted in SQLite
+- intent_patterns: precompiled single-pass intent pattern engine
+- intent_classifier: hashed n-gram classifier for the fast routing tier
+- intent_log: buffered, rotating JSONL intent log with running statistics
+- latency: log-bucketed latency histograms
+- command_rules: shared slash-command table and query style detection
+- routing_service: routes a message once and returns a reusable RoutingDecision
+- context_store: per-user context ring buffers and cached prompt fragments
+- intent_batcher: micro-batching of concurrent LLM intent classifications
+- symbol_resolver: shared ticker/crypto name index and canonical symbol formats
+- routing_rules: declarative routing rules file, compiled artifact cache and hot reload
 - context_retriever: Contextual memory and conversation history
 - reasoning_engine: LLM-based reasoning and decision making
 """
 
 from .intent_router import IntentRouter, IntentResult, IntentType, get_intent_router, analyze_user_intent
+from .routing_cache import RoutingCache, get_routing_cache, routing_cache_stats
+from .intent_patterns import CompiledIntentPatterns, KeywordTable
+from .command_rules import CommandTable, detect_query_style, get_command_table
+from .routing_service import RoutingDecision, RoutingService, get_routing_service
+from .context_store import UserContextStore
+from .symbol_resolver import SymbolResolver, get_symbol_resolver
+from .routing_rules import RoutingRules, RoutingRulesStore, get_routing_rules_store
 
 __all__ = [
     'IntentRouter',
     'IntentResult', 
     'IntentType',
     'get_intent_router',
-    'analyze_user_intent'
+    'analyze_user_intent',
+    'RoutingCache',
+    'get_routing_cache',
+    'routing_cache_stats',
+    'CompiledIntentPatterns',
+    'KeywordTable',
+    'CommandTable',
+    'detect_query_style',
+    'get_command_table',
+    'RoutingDecision',
+    'RoutingService',
+    'get_routing_service',
+    'UserContextStore',
+    'SymbolResolver',
+    'get_symbol_resolver',
+    'RoutingRules',
+    'RoutingRulesStore',
+    'get_routing_rules_store'
 ]
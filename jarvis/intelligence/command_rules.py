@@ -0,0 +1,283 @@
+"""
+Shared slash-command table and query style detection.
+
+The Discord command router used to carry these rules as a long if/elif
+chain (and the standalone bot a second copy of it). They now live here as
+one ordered table that every front end reads:
+
+- ``CommandTable.match`` resolves "/price btc", "/events history 5",
+  "get balance", ... to (tool, arguments, server); rules are tried in table
+  order, so the first rule that matches wins exactly as in the old chain
+- rules are split once at startup: a message that doesn't start with "/"
+  is only checked against the phrase rules, since every prefix rule is a
+  slash command
+- ``detect_query_style`` tags a query as a list/follow-up/comparison/
+  current-events request for search refinement and response formatting
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from jarvis.intelligence.symbol_resolver import USD_PAIR, get_symbol_resolver
+
+logger = logging.getLogger(__name__)
+
+_HISTORY_LIMIT_RE = re.compile(r'history\s+(\d+)')
+_QUEUE_REMOVE_RE = re.compile(r'remove\s+(\d+)')
+_VOLUME_RE = re.compile(r'volume\s+(\d+)')
+
+DEFAULT_SEARCH_QUERY = "latest technology news"
+
+# name -> (pattern, metadata); checked in order, first hit wins
+QUERY_STYLES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "specific_list": (r"list|top \d+|what are|show me|give me", {
+        "expects_detailed_response": True,
+        "should_extract_items": True,
+    }),
+    "follow_up": (r"more about|details on|tell me more|explain|elaborate|more information", {
+        "needs_context": True,
+        "expects_detailed_response": True,
+    }),
+    "comparison": (r"compare|versus|vs|difference between", {
+        "expects_detailed_response": True,
+        "needs_multiple_sources": True,
+    }),
+    "current_events": (r"latest|recent|new|today|this week|breaking", {
+        "prefers_news_source": True,
+        "time_sensitive": True,
+    }),
+}
+_QUERY_STYLE_RES = [(name, re.compile(pattern), meta) for name, (pattern, meta) in QUERY_STYLES.items()]
+
+
+def detect_query_style(query: str) -> Dict[str, Any]:
+    """Classify how a query wants to be answered (list, follow-up, ...)."""
+    query_lower = (query or "").lower()
+    for name, compiled, meta in _QUERY_STYLE_RES:
+        if compiled.search(query_lower):
+            return {"intent_type": name, "confidence": 0.8, "metadata": dict(meta)}
+    return {"intent_type": "general", "confidence": 0.5, "metadata": {}}
+
+
+def refine_search_query(query: str, style: Dict[str, Any]) -> str:
+    """Refine a web search query based on its style and content."""
+    query_lower = query.lower()
+
+    # For crypto/Web3 queries, filter out gambling sites
+    if any(word in query_lower for word in ['crypto', 'coin', 'token', 'blockchain', 'web3']):
+        return f"{query} cryptocurrency blockchain -casino -gambling -betting site:coinmarketcap.com OR site:coingecko.com OR site:decrypt.co"
+
+    # For tariff/policy queries, add specificity
+    if any(word in query_lower for word in ['tariff', 'trade deal', 'policy', 'regulation']):
+        return f"{query} official announcement 2025 government"
+
+    # For "top" or "best" queries, add ranking terms
+    if any(word in query_lower for word in ['top', 'best', 'leading']):
+        return f"{query} ranked list 2025"
+
+    # For news queries, add time restriction
+    if style.get("metadata", {}).get("time_sensitive"):
+        return f"{query} 2025"
+
+    return query
+
+
+@dataclass
+class CommandMatch:
+    """A message resolved by the command table."""
+    tool: str
+    arguments: Dict[str, Any]
+    server: Optional[str]
+
+
+@dataclass
+class CommandRule:
+    """One command: matched by slash prefix, exact text or a phrase anywhere."""
+    tool: str
+    server: Optional[str] = "jarvis"
+    prefixes: Tuple[str, ...] = ()
+    exact: Tuple[str, ...] = ()
+    phrases: Tuple[str, ...] = ()
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    # Extracts arguments from the message: (rule, original, lowered) -> match
+    handler: Optional[Callable[["CommandRule", str, str], CommandMatch]] = None
+
+    def matches(self, content: str) -> bool:
+        return (
+            any(content.startswith(p) for p in self.prefixes)
+            or content in self.exact
+            or any(p in content for p in self.phrases)
+        )
+
+    def resolve(self, message: str, content: str) -> CommandMatch:
+        if self.handler is not None:
+            return self.handler(self, message, content)
+        return CommandMatch(self.tool, dict(self.arguments), self.server)
+
+
+def _strip_words(message: str, words: Sequence[str]) -> str:
+    for word in words:
+        message = message.replace(word, '')
+    return message.strip()
+
+
+def _symbol_handler(label: str, example: str):
+    def handler(rule: CommandRule, message: str, content: str) -> CommandMatch:
+        symbol = _strip_words(message, rule.prefixes + rule.phrases)
+        if not symbol:
+            return CommandMatch("jarvis_chat", {"message": f"Please specify a symbol for {label}. Example: {example}"}, "jarvis")
+        resolver = get_symbol_resolver()
+        symbol = resolver.canonical(resolver.lookup(symbol) or symbol, USD_PAIR)
+        return CommandMatch(rule.tool, {"symbol": symbol}, rule.server)
+    return handler
+
+
+def _number_handler(regex: re.Pattern, key: str, default: Any = None, fallback_tool: Optional[str] = None):
+    """Pull one integer argument; without it, use ``default`` or switch to ``fallback_tool``."""
+    def handler(rule: CommandRule, message: str, content: str) -> CommandMatch:
+        match = regex.search(content)
+        if match:
+            return CommandMatch(rule.tool, {key: int(match.group(1))}, rule.server)
+        if fallback_tool:
+            return CommandMatch(fallback_tool, {}, rule.server)
+        return CommandMatch(rule.tool, {key: default} if default is not None else {}, rule.server)
+    return handler
+
+
+def _text_handler(key: str, empty_tool: Optional[str] = None):
+    """Rest of the message as one argument; ``empty_tool`` when nothing is left."""
+    def handler(rule: CommandRule, message: str, content: str) -> CommandMatch:
+        rest = _strip_words(message, rule.prefixes)
+        if not rest and empty_tool:
+            return CommandMatch(empty_tool, {}, rule.server)
+        return CommandMatch(rule.tool, {key: rest}, rule.server)
+    return handler
+
+
+def _events_test(rule: CommandRule, message: str, content: str) -> CommandMatch:
+    test_type = content.replace('/events test', '').strip()
+    return CommandMatch(rule.tool, {"type": test_type if test_type else "market_alert"}, rule.server)
+
+
+def _search(rule: CommandRule, message: str, content: str) -> CommandMatch:
+    query = _strip_words(message, rule.prefixes + rule.phrases) or DEFAULT_SEARCH_QUERY
+    refined_query = refine_search_query(query, detect_query_style(query))
+    logger.info(f"Search query refined: '{query}' -> '{refined_query}'")
+    return CommandMatch(rule.tool, {"query": refined_query}, rule.server)
+
+
+def _echo(rule: CommandRule, message: str, content: str) -> CommandMatch:
+    return CommandMatch(rule.tool, {"message": message}, rule.server)
+
+
+def default_rules() -> List[CommandRule]:
+    """The bot's command set, in priority order."""
+    R = CommandRule
+    return [
+        R("jarvis_scan_news", prefixes=('/news',), phrases=('scan news',)),
+
+        # Trading
+        R("trading.trading.get_balance", prefixes=('/balance',), phrases=('get balance',)),
+        R("trading.trading.get_price", prefixes=('/price',), phrases=('get price',),
+          handler=_symbol_handler("price lookup", "/price BTC")),
+        R("trading.trading.get_ohlcv", prefixes=('/ohlcv',), phrases=('ohlcv data',),
+          handler=_symbol_handler("OHLCV data", "/ohlcv BTC")),
+        R("trading.trading.get_momentum_signals", prefixes=('/momentum',), phrases=('momentum signals',)),
+        R("trading.trading.doctor", prefixes=('/doctor',), phrases=('trading doctor',)),
+        R("trading.trading.get_trade_history", prefixes=('/history',), phrases=('trade history',)),
+        R("trading.trading.get_pnl_summary", prefixes=('/pnl',), phrases=('profit loss',)),
+
+        # Portfolio
+        R("trading.portfolio.get_overview", prefixes=('/portfolio',), phrases=('get portfolio',)),
+        R("trading.portfolio.get_positions", prefixes=('/positions',), phrases=('get positions',)),
+        R("trading.trading.get_recent_executions", prefixes=('/trades',), phrases=('get trades', 'recent trades'),
+          arguments={"limit": 20}),
+        R("trading.portfolio.get_overview", prefixes=('/paper',), phrases=('paper trading',)),
+        R("trading.portfolio.get_performance", prefixes=('/performance',), phrases=('get performance',)),
+        R("trading.portfolio.get_exit_engine_status", prefixes=('/exit',), phrases=('exit engine',)),
+        R("trading.portfolio.get_trading_state", prefixes=('/state',), phrases=('trading state',)),
+        R("trading.portfolio.get_export_data", prefixes=('/export',), phrases=('export data',)),
+
+        # System
+        R("jarvis_get_status", prefixes=('/status',), phrases=('get status',)),
+        R("jarvis_get_memory", prefixes=('/memory',), phrases=('get memory',), arguments={"limit": 10}),
+        R("jarvis_get_tasks", prefixes=('/tasks',), phrases=('get tasks',), arguments={"status": "all"}),
+        R("system.system.list_quests", prefixes=('/quests',), phrases=('get quests',)),
+        R("system.system.get_status", prefixes=('/system',), phrases=('system status',)),
+
+        # Event monitoring
+        R("events_start_monitoring", "local", prefixes=('/events start',), exact=('/events on',)),
+        R("events_stop_monitoring", "local", prefixes=('/events stop',), exact=('/events off',)),
+        R("events_get_statistics", "local", prefixes=('/events stats',), exact=('/events statistics',)),
+        R("events_get_history", "local", prefixes=('/events history',),
+          handler=_number_handler(_HISTORY_LIMIT_RE, "limit", default=10)),
+        R("events_test_event", "local", prefixes=('/events test',), handler=_events_test),
+        R("events_check_markets", "local", prefixes=('/events check',)),
+
+        # Music
+        R("music_play", "local", prefixes=('/play',),
+          handler=_text_handler("song_name", empty_tool="music_play_or_resume")),
+        R("music_pause", "local", prefixes=('/pause',)),
+        R("music_resume", "local", prefixes=('/resume',)),
+        R("music_stop", "local", prefixes=('/stop',)),
+        R("music_skip", "local", prefixes=('/skip',)),
+        R("music_clear_queue", "local", prefixes=('/queue clear',)),
+        R("music_remove_from_queue", "local", prefixes=('/queue remove',),
+          handler=_number_handler(_QUEUE_REMOVE_RE, "position", fallback_tool="music_queue_view")),
+        R("music_queue_add", "local", prefixes=('/queue',),
+          handler=_text_handler("song_name", empty_tool="music_queue_view")),
+        R("music_now_playing", "local", prefixes=('/nowplaying', '/np')),
+        R("music_list_songs", "local", prefixes=('/songs', '/list')),
+        R("music_random", "local", prefixes=('/random', '/shuffle')),
+        R("music_search", "local", prefixes=('/findsong', '/find'),
+          handler=_text_handler("keyword", empty_tool="music_list_songs")),
+        R("music_mcp_queue", "local", prefixes=('/mcpqueue',)),
+        R("music_leave", "local", prefixes=('/leave', '/disconnect')),
+        R("music_volume", "local", prefixes=('/volume',), handler=_number_handler(_VOLUME_RE, "volume")),
+        R("music_join", "local", prefixes=('/join',)),
+
+        # Search
+        R("jarvis_web_search", prefixes=('/search',), phrases=('web search',), handler=_search),
+
+        # Help and chat
+        R("jarvis_chat", prefixes=('/help',), phrases=('help',),
+          arguments={"message": "show available commands and help"}),
+        R("jarvis_chat", phrases=('date', 'time', 'today', 'what day', 'what time'), handler=_echo),
+    ]
+
+
+class CommandTable:
+    """Ordered command rules, pre-split into slash and plain-text sets."""
+
+    def __init__(self, rules: Optional[Sequence[CommandRule]] = None):
+        self.rules = list(rules if rules is not None else default_rules())
+        # Prefix and exact rules are slash commands, so a message that doesn't
+        # start with "/" only needs the rules that have phrases or plain forms
+        self._text_rules = [
+            r for r in self.rules
+            if r.phrases or any(not p.startswith('/') for p in r.prefixes + r.exact)
+        ]
+
+    def match(self, message: str) -> Optional[CommandMatch]:
+        """Resolve a message to a command, or None for natural language."""
+        content = (message or "").lower().strip()
+        rules = self.rules if content.startswith('/') else self._text_rules
+        for rule in rules:
+            if rule.matches(content):
+                return rule.resolve(message, content)
+        return None
+
+
+_command_table: Optional[CommandTable] = None
+
+
+def get_command_table() -> CommandTable:
+    """Get the global command table."""
+    global _command_table
+    if _command_table is None:
+        _command_table = CommandTable()
+    return _command_table
@@ -0,0 +1,218 @@
+"""
+Per-user context store for intent analysis.
+
+IntentRouter used to assemble context from scratch for every message that
+missed the fast path: one ConversationMemory buffer shared by all users, a
+freshly built tool list and timestamp, and a json.dumps of all of it when
+the LLM prompt was built. This module keeps that context ready instead:
+
+- a bounded ring buffer of recent messages per user id (LRU over users)
+- a system snapshot (tool catalog, catalog version, rendered tool list)
+  rebuilt only when the catalog changes
+- pre-rendered prompt fragments per user, re-rendered only after the
+  user's history changes, with a fingerprint of what they show so routing
+  decisions made with that context can be cached
+
+Assembling the context for a message is O(1): it copies a few references
+and never touches other users' history.
+
+Environment variables (with defaults):
+- INTENT_CONTEXT_HISTORY: default 5 messages kept per user
+- INTENT_CONTEXT_MAX_USERS: default 1000 users kept in memory
+- INTENT_PROMPT_HISTORY_TOKENS: default 400 estimated tokens of history in the intent prompt
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from jarvis.intelligence.routing_cache import catalog_version
+from jarvis.models.context_window import estimate_tokens
+
+CONTEXT_HISTORY_SIZE = int(os.getenv("INTENT_CONTEXT_HISTORY", "5"))
+CONTEXT_MAX_USERS = int(os.getenv("INTENT_CONTEXT_MAX_USERS", "1000"))
+
+# How much history the intent prompt shows (the newest message always fits)
+PROMPT_HISTORY_TOKENS = int(os.getenv("INTENT_PROMPT_HISTORY_TOKENS", "400"))
+
+
+def _render(value: Any) -> str:
+    return json.dumps(value, indent=2)
+
+
+def _recent(history: List[Dict[str, Any]], budget: int = PROMPT_HISTORY_TOKENS) -> List[Dict[str, Any]]:
+    """The newest messages whose rendered JSON fits ``budget`` estimated tokens."""
+    recent: List[Dict[str, Any]] = []
+    used = 0
+    for message in reversed(history):
+        used += estimate_tokens(_render(message))
+        if recent and used > budget:
+            break
+        recent.append(message)
+    recent.reverse()
+    return recent
+
+
+def context_fingerprint(recent: List[Dict[str, Any]]) -> str:
+    """Short fingerprint of the history shown in the intent prompt ("" if none).
+
+    Covers each message's text and routed intent; timestamps and confidences
+    are left out since they never change where a message is routed.
+    """
+    if not recent:
+        return ""
+    shown = [
+        (msg.get("content"), (msg.get("intent") or {}).get("intent_type"), (msg.get("intent") or {}).get("tool_name"))
+        for msg in recent
+    ]
+    return hashlib.sha1(json.dumps(shown).encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """System context shared by every message until the tool catalog changes."""
+    tools: Tuple[str, ...]
+    catalog: str
+    tools_json: str
+    state: Dict[str, Any]
+
+    @classmethod
+    def build(cls, tools: Iterable[str]) -> "SystemSnapshot":
+        names = tuple(tools)
+        catalog = catalog_version(names)
+        return cls(
+            tools=names,
+            catalog=catalog,
+            tools_json=_render(list(names)),
+            state={
+                "timestamp": datetime.now().isoformat(),
+                "available_tools": list(names),
+                "catalog_version": catalog,
+                "system_status": "operational",
+            },
+        )
+
+
+@dataclass
+class UserSnapshot:
+    """A user's recent history with its prompt fragments rendered."""
+    history: List[Dict[str, Any]]
+    previous_intents: List[Dict[str, Any]]
+    history_json: str
+    intents_json: str
+    context_key: str = ""
+
+
+@dataclass
+class _UserContext:
+    messages: Deque[Dict[str, Any]]
+    snapshot: Optional[UserSnapshot] = None
+
+
+_EMPTY_USER = UserSnapshot(history=[], previous_intents=[], history_json="[]", intents_json="[]")
+
+
+@dataclass
+class ContextStoreStats:
+    recorded: int = 0
+    renders: int = 0
+    reuses: int = 0
+    evictions: int = 0
+    catalog_changes: int = 0
+
+
+class UserContextStore:
+    """Bounded per-user history with cached system and prompt snapshots."""
+
+    def __init__(self, tools: Iterable[str] = (), history_size: int = CONTEXT_HISTORY_SIZE,
+                 max_users: int = CONTEXT_MAX_USERS):
+        self.history_size = max(1, int(history_size))
+        self.max_users = max(1, int(max_users))
+        self.stats = ContextStoreStats()
+        self._users: "OrderedDict[str, _UserContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._system = SystemSnapshot.build(tools)
+
+    # -- system context ---------------------------------------------------
+
+    @property
+    def system(self) -> SystemSnapshot:
+        return self._system
+
+    def set_tools(self, tools: Iterable[str]) -> bool:
+        """Replace the tool catalog; returns True if the catalog changed."""
+        names = tuple(tools)
+        if names == self._system.tools:
+            return False
+        self._system = SystemSnapshot.build(names)
+        self.stats.catalog_changes += 1
+        return True
+
+    # -- user history -----------------------------------------------------
+
+    def record(self, user_id: str, message: Dict[str, Any]):
+        """Append a message to the user's ring buffer."""
+        key = str(user_id)
+        with self._lock:
+            user = self._users.get(key)
+            if user is None:
+                user = _UserContext(messages=deque(maxlen=self.history_size))
+                self._users[key] = user
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+                    self.stats.evictions += 1
+            else:
+                self._users.move_to_end(key)
+            user.messages.append(message)
+            user.snapshot = None
+            self.stats.recorded += 1
+
+    def snapshot(self, user_id: str) -> UserSnapshot:
+        """The user's history and rendered prompt fragments, cached until it changes."""
+        key = str(user_id)
+        with self._lock:
+            user = self._users.get(key)
+            if user is None:
+                return _EMPTY_USER
+            self._users.move_to_end(key)
+            if user.snapshot is not None:
+                self.stats.reuses += 1
+                return user.snapshot
+            history = list(user.messages)
+            recent = _recent(history)
+            intents = [msg["intent"] for msg in recent if msg.get("intent")]
+            user.snapshot = UserSnapshot(
+                history=history,
+                previous_intents=intents,
+                history_json=_render(recent),
+                intents_json=_render(intents),
+                context_key=context_fingerprint(recent),
+            )
+            self.stats.renders += 1
+            return user.snapshot
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            users = len(self._users)
+        return {
+            "users": users,
+            "max_users": self.max_users,
+            "history_size": self.history_size,
+            "recorded": self.stats.recorded,
+            "fragment_renders": self.stats.renders,
+            "fragment_reuses": self.stats.reuses,
+            "evictions": self.stats.evictions,
+            "catalog_version": self._system.catalog,
+            "catalog_changes": self.stats.catalog_changes,
+        }
@@ -0,0 +1,135 @@
+"""
+Micro-batching for LLM intent classification.
+
+Busy channels and event-triggered bursts deliver several messages within a
+few milliseconds, and each one that misses the fast routing tiers used to
+cost its own model call. MicroBatcher hands requests to a batch function in
+one call and resolves every caller's future with its own result. When no
+batch is running, whatever was submitted in the same event loop turn goes
+out at once, so a lone message never waits; while a batch is in flight, new
+requests are collected until it finishes, the window passes or the batch is
+full.
+
+Environment variables (with defaults):
+- INTENT_BATCH_WINDOW_MS: default 20, the longest a request waits behind a running batch ("0" disables batching)
+- INTENT_BATCH_MAX: default 8 requests per batch
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+BATCH_WINDOW_MS = float(os.getenv("INTENT_BATCH_WINDOW_MS", "20"))
+BATCH_MAX_ITEMS = int(os.getenv("INTENT_BATCH_MAX", "8"))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces concurrent submissions into batched calls.
+
+    ``run_batch`` receives the collected items in submission order and must
+    return one result per item. If it raises, every caller in the batch gets
+    the exception.
+    """
+
+    def __init__(self, run_batch: Callable[[List[T]], Awaitable[Sequence[R]]],
+                 window_ms: float = BATCH_WINDOW_MS, max_items: int = BATCH_MAX_ITEMS,
+                 name: str = "batch"):
+        self.run_batch = run_batch
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_items = max(1, int(max_items))
+        self.name = name
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self._running = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: set = set()
+        # Counters for status endpoints
+        self.submitted = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_items > 1
+
+    async def submit(self, item: T) -> R:
+        """Queue an item and wait for its result."""
+        self.submitted += 1
+        if not self.enabled:
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, 1)
+            return (await self.run_batch([item]))[0]
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop; anything queued on the old one can never complete
+            self._pending = []
+            self._timer = None
+            self._running = 0
+            self._loop = loop
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            if self._running:
+                self._timer = loop.call_later(self.window, self._flush)
+            else:
+                # Idle: only wait for the rest of this loop turn (e.g. a gather)
+                self._timer = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self._running += 1
+        task = self._loop.create_task(self._run(batch))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]):
+        try:
+            try:
+                results = list(await self.run_batch([item for item, _ in batch]))
+                if len(results) != len(batch):
+                    raise ValueError(f"{self.name}: expected {len(batch)} results, got {len(results)}")
+            except Exception as e:
+                logger.warning(f"⚠️ {self.name} batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Requests that queued behind the last running batch go out now
+            self._running = max(0, self._running - 1)
+            if not self._running and self._pending:
+                self._flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window * 1000,
+            "max_items": self.max_items,
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "mean_batch": round(self.submitted / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,160 @@
+"""
+Lightweight local intent classifier.
+
+Multinomial logistic regression over hashed word uni/bigrams, trained with
+plain SGD from past LLM routing decisions in ``logs/intents.log`` (and its
+rotated backups). It is the
+middle tier of IntentRouter: cheap enough to run on every message (a few
+dozen dictionary lookups), and confident enough on familiar phrasings to skip
+the LLM call. Pure Python, no numpy required.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import random
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from jarvis.intelligence.intent_log import iter_log_entries, log_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURES = 1 << 18
+# Only the tail of a big log is used for training
+MAX_TRAINING_BYTES = 4 * 1024 * 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9$/]+")
+
+
+def training_samples_from_log(path: Path, max_samples: int = 2000) -> List[Tuple[str, str]]:
+    """(text, intent) pairs labelled by the LLM tier, newest last."""
+    # Newest files first until the byte budget is spent, then read oldest to newest
+    selected: List[Tuple[Path, Optional[int]]] = []
+    budget = MAX_TRAINING_BYTES
+    for log_file in reversed(log_files(path)):
+        if budget <= 0:
+            break
+        size = log_file.stat().st_size
+        selected.append((log_file, budget if size > budget else None))
+        budget -= size
+
+    samples: List[Tuple[str, str]] = []
+    entries = (entry for log_file, limit in reversed(selected) for entry in iter_log_entries(log_file, max_bytes=limit))
+    for entry in entries:
+        result = entry.get("intent_result") or {}
+        text = entry.get("input_text")
+        intent = result.get("intent_type")
+        if not text or not intent or intent == "unknown":
+            continue
+        tier = result.get("tier")
+        if tier is not None:
+            teacher = tier in ("llm", "cache")
+        else:
+            # Older entries have no tier; pattern/fallback results are tagged in context_used
+            used = result.get("context_used") or []
+            teacher = "pattern_matching" not in used and "fallback" not in used
+        if teacher and float(result.get("confidence") or 0.0) > 0.7:
+            samples.append((text, intent))
+    return samples[-max_samples:]
+
+
+class HashedNgramClassifier:
+    """Sparse multinomial logistic regression on hashed n-gram features."""
+
+    def __init__(self, n_features: int = DEFAULT_FEATURES, epochs: int = 5,
+                 learning_rate: float = 0.5, l2: float = 1e-6, seed: int = 13):
+        self.n_features = n_features
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.labels: List[str] = []
+        self.n_samples = 0
+        self._weights: Dict[str, Dict[int, float]] = {}
+        self._bias: Dict[str, float] = {}
+
+    @property
+    def trained(self) -> bool:
+        return len(self.labels) >= 2
+
+    def features(self, text: str) -> List[int]:
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        grams = [f"w:{t}" for t in tokens]
+        grams.extend(f"b:{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        if tokens:
+            grams.append(f"s:{tokens[0]}")  # first word carries most of the intent
+        return sorted({zlib.crc32(g.encode("utf-8")) % self.n_features for g in grams})
+
+    def _scores(self, feats: Sequence[int]) -> Dict[str, float]:
+        scale = 1.0 / math.sqrt(len(feats)) if feats else 0.0
+        scores = {}
+        for label in self.labels:
+            weights = self._weights[label]
+            scores[label] = self._bias[label] + scale * sum(weights.get(f, 0.0) for f in feats)
+        return scores
+
+    @staticmethod
+    def _softmax(scores: Dict[str, float]) -> Dict[str, float]:
+        top = max(scores.values())
+        exps = {k: math.exp(v - top) for k, v in scores.items()}
+        total = sum(exps.values())
+        return {k: v / total for k, v in exps.items()}
+
+    def fit(self, samples: Iterable[Tuple[str, str]]) -> "HashedNgramClassifier":
+        data = [(self.features(text), label) for text, label in samples if text and label]
+        self.labels = sorted({label for _, label in data})
+        self._weights = {label: {} for label in self.labels}
+        self._bias = {label: 0.0 for label in self.labels}
+        self.n_samples = len(data)
+        if not self.trained:
+            return self
+
+        rng = random.Random(self.seed)
+        for epoch in range(self.epochs):
+            rng.shuffle(data)
+            lr = self.learning_rate / (1.0 + epoch)
+            for feats, label in data:
+                if not feats:
+                    continue
+                probs = self._softmax(self._scores(feats))
+                scale = 1.0 / math.sqrt(len(feats))
+                for cls in self.labels:
+                    grad = probs[cls] - (1.0 if cls == label else 0.0)
+                    if abs(grad) < 1e-4:
+                        continue
+                    weights = self._weights[cls]
+                    step = lr * grad
+                    for f in feats:
+                        w = weights.get(f, 0.0)
+                        weights[f] = w - step * scale - lr * self.l2 * w
+                    self._bias[cls] -= step
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        if not self.trained:
+            return {}
+        return self._softmax(self._scores(self.features(text)))
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Most likely label and its probability; (None, 0.0) if untrained."""
+        probs = self.predict_proba(text)
+        if not probs:
+            return None, 0.0
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+    @classmethod
+    def from_log(cls, path: Path, min_samples: int = 50, **kwargs) -> "HashedNgramClassifier":
+        """Train on LLM-labelled history; stays untrained below min_samples."""
+        model = cls(**kwargs)
+        samples = training_samples_from_log(path)
+        if len(samples) >= min_samples:
+            model.fit(samples)
+            logger.info(f"✅ Intent classifier trained on {model.n_samples} samples ({len(model.labels)} intents)")
+        else:
+            logger.info(f"Intent classifier not trained: {len(samples)}/{min_samples} labelled samples")
+        return model
@@ -0,0 +1,395 @@
+"""
+Append-only intent log with incrementally maintained statistics.
+
+IntentRouter used to append pretty-printed JSON to ``logs/intents.log``,
+opening the file on every call from async code, and computed statistics by
+re-reading and re-parsing the whole file. This module replaces both:
+
+- entries are serialized to compact JSONL and queued in memory; a daemon
+  thread flushes the queue every second (or when it fills up), so callers
+  never touch the disk
+- the file rotates at a size limit (intents.log -> intents.log.1 ...)
+- counts per intent/tier, confidence buckets and log-bucketed latency
+  histograms are updated on append, so statistics are O(1) in log size
+- the aggregates are snapshotted next to the log (``intents.stats.json``)
+  and reloaded at startup; if the snapshot is missing or stale they are
+  rebuilt once from the log files, including the legacy pretty-printed format
+
+Environment variables (with defaults):
+- INTENT_LOG_MAX_BYTES: default 10485760 (10 MB) per file
+- INTENT_LOG_BACKUPS: default 5 rotated files kept
+- INTENT_LOG_FLUSH_INTERVAL: default 1.0 seconds
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from jarvis.intelligence.latency import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_BUFFER_SIZE = 256
+STATS_VERSION = 1
+
+_logs: Dict[str, "IntentLog"] = {}
+_logs_lock = threading.Lock()
+
+
+def log_files(path: Path, backup_count: int = DEFAULT_BACKUPS) -> List[Path]:
+    """Existing log files for ``path``, oldest first (rotated backups, then live)."""
+    path = Path(path)
+    files = [Path(f"{path}.{i}") for i in range(backup_count, 0, -1)]
+    files.append(path)
+    return [f for f in files if f.exists()]
+
+
+def iter_log_entries(path: Path, max_bytes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield JSON entries from one intent log file.
+
+    Reads both the legacy format (pretty-printed objects separated by blank
+    lines) and one-object-per-line JSONL. With max_bytes only the end of the
+    file is read, starting at the first entry boundary.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        if max_bytes is not None:
+            size = path.stat().st_size
+            if size > max_bytes:
+                f.seek(size - max_bytes)
+                f.readline()  # drop the partial line
+        content = f.read().decode("utf-8", errors="replace")
+
+    decoder = json.JSONDecoder()
+    pos = content.find("{")
+    while 0 <= pos < len(content):
+        try:
+            entry, end = decoder.raw_decode(content, pos)
+        except json.JSONDecodeError:
+            # Partial or corrupt entry: resync at the next object start
+            pos = content.find("\n{", pos + 1)
+            pos = pos + 1 if pos >= 0 else -1
+            continue
+        if isinstance(entry, dict):
+            yield entry
+        pos = content.find("{", end)
+
+
+def _is_llm_entry(result: Dict[str, Any]) -> bool:
+    tier = result.get("tier")
+    if tier:
+        return tier in ("llm", "cache")
+    # Entries written before tiers existed
+    reasoning = str(result.get("reasoning") or "")
+    return "LLM" in reasoning or "brain" in reasoning.lower()
+
+
+class IntentStats:
+    """Running aggregates over intent log entries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.intent_types: Dict[str, int] = {}
+        self.tiers: Dict[str, int] = {}
+        self.confidence = {"high": 0, "medium": 0, "low": 0}
+        # Ten equal-width confidence buckets: [0, 0.1), ..., [0.9, 1.0]
+        self.confidence_histogram = [0] * 10
+        self.llm_vs_pattern = {"llm": 0, "pattern": 0}
+        self.latency = LatencyHistogram()
+        self.tier_latency: Dict[str, LatencyHistogram] = {}
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        result = entry.get("intent_result") or {}
+        intent = str(result.get("intent_type", "unknown"))
+        tier = str(result.get("tier") or "unknown")
+        try:
+            confidence = float(result.get("confidence") or 0.0)
+        except (TypeError, ValueError):
+            confidence = 0.0
+        try:
+            elapsed_ms = float(result.get("processing_time") or 0.0) * 1000
+        except (TypeError, ValueError):
+            elapsed_ms = 0.0
+
+        with self._lock:
+            self.total += 1
+            self.intent_types[intent] = self.intent_types.get(intent, 0) + 1
+            self.tiers[tier] = self.tiers.get(tier, 0) + 1
+            if confidence >= 0.8:
+                self.confidence["high"] += 1
+            elif confidence >= 0.5:
+                self.confidence["medium"] += 1
+            else:
+                self.confidence["low"] += 1
+            self.confidence_histogram[min(9, max(0, int(confidence * 10)))] += 1
+            self.llm_vs_pattern["llm" if _is_llm_entry(result) else "pattern"] += 1
+            histogram = self.tier_latency.get(tier)
+            if histogram is None:
+                histogram = self.tier_latency[tier] = LatencyHistogram()
+        self.latency.record(elapsed_ms)
+        histogram.record(elapsed_ms)
+
+    def merge(self, other: "IntentStats") -> None:
+        with self._lock, other._lock:
+            self.total += other.total
+            for name, counts in (("intent_types", other.intent_types), ("tiers", other.tiers)):
+                mine = getattr(self, name)
+                for key, n in counts.items():
+                    mine[key] = mine.get(key, 0) + n
+            for key, n in other.confidence.items():
+                self.confidence[key] += n
+            for i, n in enumerate(other.confidence_histogram):
+                self.confidence_histogram[i] += n
+            for key, n in other.llm_vs_pattern.items():
+                self.llm_vs_pattern[key] += n
+            tier_latency = dict(other.tier_latency)
+            for tier in tier_latency:
+                self.tier_latency.setdefault(tier, LatencyHistogram())
+        self.latency.merge(other.latency)
+        for tier, histogram in tier_latency.items():
+            self.tier_latency[tier].merge(histogram)
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistics in the shape IntentRouter.get_intent_statistics returns."""
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "total_requests": self.total,
+                "intent_types": dict(self.intent_types),
+                "confidence_distribution": dict(self.confidence),
+                "confidence_histogram": list(self.confidence_histogram),
+                "llm_vs_pattern": dict(self.llm_vs_pattern),
+                "tier_counts": dict(self.tiers),
+            }
+            tier_latency = dict(self.tier_latency)
+        if self.latency.count:
+            stats["average_processing_time"] = self.latency.total_ms / self.latency.count / 1000
+        stats["processing_time_ms"] = self.latency.summary()
+        stats["tier_latency_ms"] = {tier: h.summary() for tier, h in tier_latency.items()}
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "version": STATS_VERSION,
+                "total": self.total,
+                "intent_types": dict(self.intent_types),
+                "tiers": dict(self.tiers),
+                "confidence": dict(self.confidence),
+                "confidence_histogram": list(self.confidence_histogram),
+                "llm_vs_pattern": dict(self.llm_vs_pattern),
+            }
+            tier_latency = dict(self.tier_latency)
+        data["latency"] = self.latency.to_dict()
+        data["tier_latency"] = {tier: h.to_dict() for tier, h in tier_latency.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IntentStats":
+        stats = cls()
+        stats.total = int(data.get("total", 0))
+        stats.intent_types = {k: int(v) for k, v in (data.get("intent_types") or {}).items()}
+        stats.tiers = {k: int(v) for k, v in (data.get("tiers") or {}).items()}
+        stats.confidence.update({k: int(v) for k, v in (data.get("confidence") or {}).items()})
+        histogram = list(data.get("confidence_histogram") or [])
+        if len(histogram) == 10:
+            stats.confidence_histogram = [int(v) for v in histogram]
+        stats.llm_vs_pattern.update({k: int(v) for k, v in (data.get("llm_vs_pattern") or {}).items()})
+        stats.latency = LatencyHistogram.from_dict(data.get("latency") or {})
+        stats.tier_latency = {
+            tier: LatencyHistogram.from_dict(h) for tier, h in (data.get("tier_latency") or {}).items()
+        }
+        return stats
+
+
+class IntentLog:
+    """Buffered, rotating JSONL intent log with live aggregates."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUPS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        self.path = Path(path)
+        self.stats_path = self.path.with_name(f"{self.path.stem}.stats.json")
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+
+        self.stats = IntentStats()
+        self._pending: Deque[str] = deque()
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._ready = threading.Event()
+        self.dropped = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="intent-log", daemon=True)
+        self._thread.start()
+
+    # -- writing -------------------------------------------------------------
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Record an entry; never blocks on disk I/O."""
+        try:
+            line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Error serializing intent log entry: {e}")
+            return
+        self.stats.add(entry)
+        with self._pending_lock:
+            self._pending.append(line)
+            backlog = len(self._pending)
+        if backlog >= self.buffer_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write queued entries and the stats snapshot to disk."""
+        with self._pending_lock:
+            lines = list(self._pending)
+            self._pending.clear()
+        with self._write_lock:
+            if lines:
+                data = ("\n".join(lines) + "\n").encode("utf-8")
+                try:
+                    self._rotate_if_needed(len(data))
+                    with open(self.path, "ab") as f:
+                        f.write(data)
+                except OSError as e:
+                    self.dropped += len(lines)
+                    logger.error(f"Error writing intent log: {e}")
+                    return
+            if lines or not self.stats_path.exists():
+                self._save_stats()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _rotate_if_needed(self, incoming: int) -> None:
+        if self.max_bytes <= 0 or not self.path.exists():
+            return
+        if self.path.stat().st_size + incoming <= self.max_bytes:
+            return
+        if self.backup_count <= 0:
+            self.path.unlink()
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = Path(f"{self.path}.{i}")
+            if src.exists():
+                os.replace(src, Path(f"{self.path}.{i + 1}"))
+        os.replace(self.path, Path(f"{self.path}.1"))
+
+    def _run(self) -> None:
+        try:
+            self._load_stats()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load intent statistics: {e}")
+        finally:
+            self._ready.set()
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing intent log: {e}")
+
+    # -- statistics snapshot ---------------------------------------------------
+
+    def _log_size(self) -> int:
+        return sum(f.stat().st_size for f in log_files(self.path, self.backup_count))
+
+    def _save_stats(self) -> None:
+        data = self.stats.to_dict()
+        data["log_bytes"] = self._log_size()
+        tmp = self.stats_path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.stats_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save intent statistics: {e}")
+
+    def _load_stats(self) -> None:
+        """Restore aggregates for what is already on disk (runs before the first flush)."""
+        with self._write_lock:
+            size = self._log_size()
+            if self.stats_path.exists():
+                try:
+                    data = json.loads(self.stats_path.read_text(encoding="utf-8"))
+                    if data.get("version") == STATS_VERSION and data.get("log_bytes") == size:
+                        self.stats.merge(IntentStats.from_dict(data))
+                        return
+                except (OSError, ValueError) as e:
+                    logger.warning(f"⚠️ Ignoring unreadable intent statistics snapshot: {e}")
+            if not size:
+                return
+            # Missing or stale snapshot (e.g. a legacy log): rebuild once
+            rebuilt = IntentStats()
+            for log_file in log_files(self.path, self.backup_count):
+                for entry in iter_log_entries(log_file):
+                    rebuilt.add(entry)
+            self.stats.merge(rebuilt)
+            logger.info(f"✅ Rebuilt intent statistics from {rebuilt.total} logged entries")
+
+    def summary(self, wait: float = 0.0) -> Dict[str, Any]:
+        """Current statistics; optionally wait for the startup load to finish."""
+        if wait:
+            self._ready.wait(wait)
+        stats = self.stats.summary()
+        stats["log"] = {
+            "path": str(self.path),
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "loaded": self._ready.is_set(),
+        }
+        return stats
+
+
+def get_intent_log(path: Path) -> IntentLog:
+    """Shared IntentLog per path, configured from the environment."""
+    key = str(Path(path).resolve())
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = IntentLog(
+                path,
+                max_bytes=int(os.getenv("INTENT_LOG_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+                backup_count=int(os.getenv("INTENT_LOG_BACKUPS", str(DEFAULT_BACKUPS))),
+                flush_interval=float(os.getenv("INTENT_LOG_FLUSH_INTERVAL", str(DEFAULT_FLUSH_INTERVAL))),
+            )
+            _logs[key] = log
+        return log
+
+
+@atexit.register
+def _close_logs() -> None:
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        try:
+            log.close()
+        except Exception:
+            pass
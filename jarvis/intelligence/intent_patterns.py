@@ -0,0 +1,293 @@
+"""
+Precompiled intent pattern engine.
+
+The intent router keeps its quick-match rules as a table of regex strings per
+intent. Matching them one by one with ``re.search`` means ~20 regex scans per
+message, and the loop stops at the first hit so the router never learns which
+other intents also matched. Merging everything into one big alternation does
+not help with the stdlib ``re`` engine: it still tries every alternative at
+every word boundary.
+
+This module works like a small Hyperscan-style multi-pattern set instead:
+
+- each pattern is analysed once for the literal word prefixes it can start
+  with (``\\b(price|trades?)\\b`` -> "price", "trade")
+- a message is tokenized once; tokens are looked up in the prefix index
+  (memoized per token) to find the candidate patterns that could match
+- only candidates are verified with their precompiled regex
+
+The prefilter is conservative: patterns whose start can't be reduced to
+literal word prefixes are always verified. The prefix analysis can be saved
+(``analysis()``) and passed back in, and regexes are compiled on first use,
+so a prebuilt rule artifact loads without re-analysing or compiling. The reported pattern per intent is
+the first one in table order that matches, i.e. exactly what the sequential
+``re.search`` loop picked, so routing output is unchanged.
+
+KeywordTable is the companion for tool selection: an ordered list of
+substring rules, flattened once at startup.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Generic, Iterable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_SCORE = 0.6
+# Extra confidence per additional pattern of the same intent that matched
+HIT_BONUS = 0.05
+MAX_SCORE = 0.95
+TOKEN_CACHE_SIZE = 50000
+
+_TOKEN_RE = re.compile(r"\w+")
+_WORD_CHAR_RE = re.compile(r"\w")
+_QUANTIFIERS = "?*{"
+
+
+@dataclass
+class PatternMatch:
+    """One intent that matched a message."""
+    intent: Any
+    pattern: str
+    hits: int
+    score: float
+
+
+def _split_alternatives(body: str) -> Optional[List[str]]:
+    """Split a regex on top-level ``|``; None if parentheses are unbalanced."""
+    parts, depth, start, i = [], 0, 0, 0
+    in_class = False
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif ch == "|" and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+        i += 1
+    if depth != 0:
+        return None
+    parts.append(body[start:])
+    return parts
+
+
+def _group_end(body: str) -> Optional[int]:
+    """Index of the ``)`` closing the group that opens at body[0]."""
+    depth, i = 0, 0
+    in_class = False
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return None
+
+
+def _literal_prefix(alternative: str) -> str:
+    """Leading literal word characters an alternative must start with."""
+    prefix = []
+    for i, ch in enumerate(alternative):
+        if not _WORD_CHAR_RE.match(ch):
+            break
+        if i + 1 < len(alternative) and alternative[i + 1] in _QUANTIFIERS:
+            break  # optional character: can't be part of the required prefix
+        prefix.append(ch)
+    return "".join(prefix)
+
+
+def pattern_prefixes(pattern: str) -> Optional[Set[str]]:
+    """Literal word prefixes a match of ``pattern`` must start with.
+
+    Returns None when the pattern can't be reduced (no word-boundary anchor,
+    non-literal start, ...); such patterns must always be verified.
+    """
+    if pattern.startswith(r"\b"):
+        body = pattern[2:]
+    elif pattern.startswith("^"):
+        body = pattern[1:]
+    else:
+        return None
+
+    top = _split_alternatives(body)
+    if top is None or len(top) != 1:
+        return None
+    body = top[0]
+    if body.startswith("(") and not body.startswith("(?"):
+        # Leading capture group: prefixes come from its alternatives
+        end = _group_end(body)
+        if end is None:
+            return None
+        if end + 1 < len(body) and body[end + 1] in _QUANTIFIERS:
+            return None  # the whole group is optional
+        alternatives = _split_alternatives(body[1:end])
+        if alternatives is None:
+            return None
+    else:
+        alternatives = [body]
+
+    prefixes = set()
+    for alternative in alternatives:
+        prefix = _literal_prefix(alternative)
+        if not prefix:
+            return None
+        prefixes.add(prefix)
+    return prefixes
+
+
+class CompiledIntentPatterns:
+    """All intent patterns compiled into a prefix-indexed multi-pattern set.
+
+    ``table`` maps intent -> list of regex strings, in priority order (dict
+    order across intents, list order within one). ``base_scores`` gives the
+    confidence reported for each intent's match. ``prefixes`` optionally
+    supplies a previous ``analysis()`` (pattern -> prefixes or None).
+    """
+
+    def __init__(
+        self,
+        table: Dict[Any, Sequence[str]],
+        base_scores: Optional[Dict[Any, float]] = None,
+        default_score: float = DEFAULT_SCORE,
+        prefixes: Optional[Dict[str, Optional[Iterable[str]]]] = None,
+    ):
+        self.table = {intent: list(patterns) for intent, patterns in table.items() if patterns}
+        self.base_scores = dict(base_scores or {})
+        self.default_score = default_score
+
+        # Flattened in global priority order: (intent, pattern); regexes compiled lazily
+        self._patterns: List[Tuple[Any, str]] = [
+            (intent, pattern)
+            for intent, patterns in self.table.items()
+            for pattern in patterns
+        ]
+        self._compiled: List[Optional[re.Pattern]] = [None] * len(self._patterns)
+        self._scores = [self.base_scores.get(intent, default_score) for intent, _ in self._patterns]
+        self._prefix_index: Dict[str, Set[int]] = {}
+        self._always: Set[int] = set()
+        self._analysis: Dict[str, Optional[List[str]]] = {}
+        for idx, (_, pattern) in enumerate(self._patterns):
+            if prefixes is not None and pattern in prefixes:
+                known = prefixes[pattern]
+                literals = set(known) if known is not None else None
+            else:
+                literals = pattern_prefixes(pattern)
+            self._analysis[pattern] = sorted(literals) if literals is not None else None
+            if literals is None:
+                self._always.add(idx)
+                continue
+            for prefix in literals:
+                self._prefix_index.setdefault(prefix, set()).add(idx)
+        self._max_prefix = max((len(p) for p in self._prefix_index), default=0)
+        # Vocabulary is small and repetitive, so per-token lookups are memoized
+        self._token_cache: Dict[str, FrozenSet[int]] = {}
+
+    def analysis(self) -> Dict[str, Optional[List[str]]]:
+        """Literal prefixes per pattern, reusable as ``prefixes``."""
+        return dict(self._analysis)
+
+    def compile_all(self):
+        """Compile every pattern now (raises re.error on an invalid one)."""
+        for idx in range(len(self._patterns)):
+            self._regex(idx)
+
+    def _regex(self, idx: int) -> re.Pattern:
+        compiled = self._compiled[idx]
+        if compiled is None:
+            compiled = self._compiled[idx] = re.compile(self._patterns[idx][1])
+        return compiled
+
+    def _token_candidates(self, token: str) -> FrozenSet[int]:
+        cached = self._token_cache.get(token)
+        if cached is None:
+            found: Set[int] = set()
+            for length in range(1, min(len(token), self._max_prefix) + 1):
+                hit = self._prefix_index.get(token[:length])
+                if hit:
+                    found |= hit
+            cached = frozenset(found)
+            if len(self._token_cache) >= TOKEN_CACHE_SIZE:
+                self._token_cache.clear()
+            self._token_cache[token] = cached
+        return cached
+
+    def _candidates(self, text: str) -> List[int]:
+        found = set(self._always)
+        cache = self._token_cache
+        for token in _TOKEN_RE.findall(text):
+            hit = cache.get(token)
+            if hit is None:
+                hit = self._token_candidates(token)
+            if hit:
+                found |= hit
+        return sorted(found)
+
+    def scan(self, text: str) -> List[PatternMatch]:
+        """Return every intent matching ``text``, in priority order."""
+        if not text:
+            return []
+        first: Dict[Any, str] = {}
+        hits: Dict[Any, int] = {}
+        for idx in self._candidates(text):
+            intent, pattern = self._patterns[idx]
+            if self._regex(idx).search(text):
+                first.setdefault(intent, pattern)
+                hits[intent] = hits.get(intent, 0) + 1
+
+        matches = []
+        for intent, pattern in first.items():
+            base = self.base_scores.get(intent, self.default_score)
+            matches.append(PatternMatch(
+                intent=intent,
+                pattern=pattern,
+                hits=hits[intent],
+                score=max(base, min(MAX_SCORE, base + HIT_BONUS * (hits[intent] - 1))),
+            ))
+        return matches
+
+    def first(self, text: str) -> Optional[PatternMatch]:
+        """Highest-priority match, equivalent to the sequential search loop."""
+        if not text:
+            return None
+        for idx in self._candidates(text):
+            intent, pattern = self._patterns[idx]
+            if self._regex(idx).search(text):
+                return PatternMatch(intent=intent, pattern=pattern, hits=1, score=self._scores[idx])
+        return None
+
+
+class KeywordTable(Generic[T]):
+    """Ordered substring rules: the first rule with a keyword in the text wins."""
+
+    def __init__(self, rules: Iterable[Tuple[Sequence[str], T]], default: Optional[T] = None):
+        self._pairs: List[Tuple[str, T]] = [(word, value) for words, value in rules for word in words]
+        self.default = default
+
+    def lookup(self, text: str) -> Optional[T]:
+        for word, value in self._pairs:
+            if word in text:
+                return value
+        return self.default
@@ -7,9 +7,9 @@ natural language input and map it to the correct tools. It includes contextual
 memory retrieval and detailed reasoning logs.
 
 Features:
-- LLM-based intent recognition
-- Contextual memory retrieval
-- Dynamic tool routing
+- LLM-based intent recognition (micro-batched under bursts)
+- Contextual memory retrieval (per-user ring buffers, cached snapshots)
+- Dynamic tool routing (hot-reloadable rules in routing_rules.json)
 - Reasoning logs
 - Fallback mechanisms
 """
@@ -17,14 +17,26 @@ Features:
 import asyncio
 import json
 import logging
+import os
 import re
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
 
 from jarvis.intelligence.ticker_utils import extract_ticker_symbols, enrich_trading_arguments
+from jarvis.intelligence.symbol_resolver import get_symbol_resolver
+from jarvis.intelligence.routing_cache import catalog_version, get_routing_cache, normalize_query
+from jarvis.intelligence.intent_patterns import CompiledIntentPatterns, KeywordTable
+from jarvis.intelligence.routing_rules import RoutingRules, get_routing_rules_store
+from jarvis.intelligence.intent_classifier import HashedNgramClassifier
+from jarvis.intelligence.intent_log import get_intent_log
+from jarvis.intelligence.latency import LatencyHistogram
+from jarvis.intelligence.context_store import UserContextStore
+from jarvis.intelligence.intent_batcher import MicroBatcher
 from enum import Enum
 
 # Import LLM capabilities
@@ -54,13 +66,6 @@ try:
 except ImportError:
     MEMORY_AVAILABLE = False
 
-# Import conversation memory
-try:
-    from jarvis.memory.conversation_memory import ConversationMemory
-    CONVERSATION_MEMORY_AVAILABLE = True
-except ImportError:
-    CONVERSATION_MEMORY_AVAILABLE = False
-
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -72,6 +77,21 @@ LOGS_DIR.mkdir(exist_ok=True)
 # Intent reasoning log file
 INTENT_LOG_FILE = LOGS_DIR / "intents.log"
 
+# Tiered routing: exact command -> confident pattern -> local classifier -> LLM.
+# Only messages no cheap tier is sure about pay for a model call.
+ROUTING_TIERS = ("exact", "pattern", "classifier", "cache", "llm", "fallback")
+FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH", "1").lower() not in ("0", "false", "no")
+CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.85"))
+CLASSIFIER_MIN_SAMPLES = int(os.getenv("INTENT_CLASSIFIER_MIN_SAMPLES", "50"))
+# A lone pattern hit is trusted on short messages, or longer ones with several hits
+PATTERN_FAST_MAX_TOKENS = int(os.getenv("INTENT_PATTERN_MAX_TOKENS", "6"))
+CHAT_FAST_MAX_TOKENS = 3
+EXACT_CONFIDENCE = 0.95
+PATTERN_FAST_CONFIDENCE = 0.85
+
+_PLAY_RE = re.compile(r'play\s+(.+)')
+_SEARCH_RE = re.compile(r'search\s+(.+)')
+
 
 class IntentType(Enum):
     """Types of intents that can be recognized."""
@@ -95,6 +115,8 @@ class IntentContext:
     conversation_history: List[Dict[str, Any]]
     user_preferences: Dict[str, Any]
     system_state: Dict[str, Any]
+    # Pre-rendered JSON for the LLM prompt ("tools", "history", "intents")
+    prompt_fragments: Dict[str, str] = field(default_factory=dict)
 
 
 @dataclass
@@ -108,22 +130,20 @@ class IntentResult:
     context_used: List[str]
     fallback_suggestions: List[str]
     processing_time: float
+    tier: str = ""  # which routing tier produced the result (see ROUTING_TIERS)
 
 
 class ContextRetriever:
-    """Retrieves contextual information for intent processing."""
+    """Retrieves contextual information for intent processing.
+    
+    History is kept per user in a bounded ring buffer and the system context
+    is a snapshot rebuilt only when the tool catalog changes, so retrieving
+    context costs the same no matter how many users or messages came before.
+    """
     
     def __init__(self):
-        self.conversation_memory = None
         self.brain_memory = None
-        
-        # Initialize conversation memory
-        if CONVERSATION_MEMORY_AVAILABLE:
-            try:
-                self.conversation_memory = ConversationMemory()
-                logger.info("✅ Conversation memory initialized")
-            except Exception as e:
-                logger.warning(f"⚠️ Could not initialize conversation memory: {e}")
+        self.store = UserContextStore(self._get_available_tools())
         
         # Initialize brain memory
         if MEMORY_AVAILABLE:
@@ -135,17 +155,7 @@ class ContextRetriever:
     
     async def get_user_context(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recent user interactions for context."""
-        context = []
-        
-        # Try conversation memory first
-        if self.conversation_memory:
-            try:
-                recent_messages = self.conversation_memory.get_recent_messages(
-                    limit=limit
-                )
-                context.extend(recent_messages)
-            except Exception as e:
-                logger.warning(f"Error getting conversation memory: {e}")
+        context = self.store.snapshot(user_id).history[-limit:]
         
         # Try brain memory as fallback
         if not context and self.brain_memory:
@@ -160,11 +170,27 @@ class ContextRetriever:
     
     async def get_system_context(self) -> Dict[str, Any]:
         """Get current system state and context."""
-        return {
+        return self.store.system.state
+    
+    def set_available_tools(self, tools: List[str]) -> bool:
+        """Swap in a new tool catalog; returns True if it changed."""
+        changed = self.store.set_tools(tools)
+        if changed:
+            logger.info(f"🔄 Tool catalog updated: {len(tools)} tools ({self.store.system.catalog})")
+        return changed
+    
+    def record_interaction(self, user_id: str, text: str, result: "IntentResult"):
+        """Remember a routed message in the user's history."""
+        self.store.record(user_id, {
+            "role": "user",
+            "content": text,
             "timestamp": datetime.now().isoformat(),
-            "available_tools": self._get_available_tools(),
-            "system_status": "operational"
-        }
+            "intent": {
+                "intent_type": result.intent_type.value,
+                "tool_name": result.tool_name,
+                "confidence": result.confidence,
+            },
+        })
     
     def _get_available_tools(self) -> List[str]:
         """Get list of available tools."""
@@ -195,6 +221,64 @@ class ContextRetriever:
         ]
 
 
+_INTENT_SINGLE = """INSTRUCTIONS:
+1. Determine the user's intent (trading, music, fitness, news, system, search, chat)
+2. Select the most appropriate tool from the available tools
+3. Extract any arguments needed for the tool
+4. Provide confidence score (0.0-1.0)
+5. Explain your reasoning
+
+RESPONSE FORMAT (JSON):
+{
+    "intent_type": "trading|music|fitness|news|system|search|chat",
+    "confidence": 0.95,
+    "tool_name": "trading.trading.get_balance",
+    "arguments": {},
+    "reasoning": "User is asking for portfolio balance, which maps to trading tool",
+    "context_used": ["recent_trading_queries", "user_preferences"],
+    "fallback_suggestions": ["Try /portfolio command", "Check /balance"]
+}"""
+
+_INTENT_BATCH = """INSTRUCTIONS:
+1. Analyze each numbered request independently, using only its own history and previous intents
+2. Determine each user's intent (trading, music, fitness, news, system, search, chat)
+3. Select the most appropriate tool from the available tools
+4. Extract any arguments needed for the tool
+5. Provide confidence score (0.0-1.0)
+6. Explain your reasoning
+
+RESPONSE FORMAT (JSON array, one object per request, in order):
+[
+    {
+        "index": 1,
+        "intent_type": "trading|music|fitness|news|system|search|chat",
+        "confidence": 0.95,
+        "tool_name": "trading.get_balance",
+        "arguments": {},
+        "reasoning": "User is asking for portfolio balance, which maps to trading tool",
+        "context_used": [],
+        "fallback_suggestions": []
+    }
+]"""
+
+
+@lru_cache(maxsize=16)
+def _intent_system_prompt(tools_json: str, batch: bool = False) -> str:
+    """Static part of the intent prompt: role, tool catalog and answer format.
+    
+    Everything that varies per message (history, previous intents, the
+    request itself) goes in the user prompt after it, so this stays
+    byte-identical for as long as the tool catalog does.
+    """
+    return f"""You are Jarvis, an AI assistant with access to multiple tools. Analyze the user's request and determine the correct tool to use.
+
+AVAILABLE TOOLS:
+{tools_json}
+
+{_INTENT_BATCH if batch else _INTENT_SINGLE}
+"""
+
+
 class IntentRouter:
     """Main intent router that uses LLM reasoning to route commands."""
     
@@ -204,14 +288,25 @@ class IntentRouter:
         self.llm_available = False
         self.agent_manager = agent_manager
         
-        # Initialize LLM
+        # Cache of LLM routing decisions so repeat messages skip the model call
+        self.routing_cache = get_routing_cache("intent_router")
+        
+        # Buffered JSONL reasoning log with running statistics
+        self.intent_log = get_intent_log(INTENT_LOG_FILE)
+        
+        # Initialize LLM; concurrent classification requests share model calls
         self._initialize_llm()
+        self.intent_batcher = MicroBatcher(self._llm_intent_batch, name="intent classification")
         
-        # Tool mapping for fallback
-        self.tool_mappings = self._build_tool_mappings()
+        # Intent patterns, exact commands and tool tables come from the routing
+        # rules file, compiled into a single-pass matcher and reloaded on change
+        self.rules_store = get_routing_rules_store(IntentType)
         
-        # Intent patterns for quick matching
-        self.intent_patterns = self._build_intent_patterns()
+        # Fast-path tiers: exact commands (from the rules) and a local classifier trained from the intent log
+        self.classifier = HashedNgramClassifier()
+        self.tier_latency = {tier: LatencyHistogram() for tier in ROUTING_TIERS}
+        if FAST_PATH_ENABLED:
+            threading.Thread(target=self._train_classifier, name="intent-classifier", daemon=True).start()
         
         # Agent capability mapping
         self.agent_capability_mapping = self._build_agent_capability_mapping()
@@ -232,125 +327,170 @@ class IntentRouter:
             self.llm_available = True
             logger.info("✅ Brain LLM available for intent routing")
     
-    def _build_tool_mappings(self) -> Dict[str, Dict[str, Any]]:
-        """Build comprehensive tool mappings for fallback routing."""
-        return {
-            # Trading mappings - use new MCP format
-            "portfolio": {"tool": "trading.portfolio.get_overview", "server": "jarvis"},
-            "balance": {"tool": "trading.trading.get_portfolio_balance", "server": "jarvis"},
-            "positions": {"tool": "trading.portfolio.get_positions", "server": "jarvis"},
-            "trades": {"tool": "trading.trading.get_recent_executions", "server": "jarvis"},
-            "price": {"tool": "trading.trading.get_momentum_signals", "server": "jarvis"},
-            "momentum": {"tool": "trading.trading.get_momentum_signals", "server": "jarvis"},
-            "pnl": {"tool": "trading.portfolio.get_performance", "server": "jarvis"},
-            "doctor": {"tool": "trading.trading.get_momentum_signals", "server": "jarvis"},
-            
-            # Paper trading mappings
-            "paper_portfolio": {"tool": "trading.paper.get_portfolio", "server": "jarvis"},
-            "paper_balance": {"tool": "trading.paper.get_balance", "server": "jarvis"},
-            "paper_performance": {"tool": "trading.paper.get_performance", "server": "jarvis"},
-            "paper_trades": {"tool": "trading.paper.get_trades", "server": "jarvis"},
-            "paper_history": {"tool": "trading.paper.get_trades", "server": "jarvis"},
-            
-            # Music mappings
-            "play": {"tool": "music_play", "server": "local"},
-            "pause": {"tool": "music_pause", "server": "local"},
-            "resume": {"tool": "music_resume", "server": "local"},
-            "stop": {"tool": "music_stop", "server": "local"},
-            "skip": {"tool": "music_skip", "server": "local"},
-            "queue": {"tool": "music_queue_view", "server": "local"},
-            "songs": {"tool": "music_list_songs", "server": "local"},
-            
-            # System mappings
-            "status": {"tool": "jarvis_get_status", "server": "jarvis"},
-            "memory": {"tool": "jarvis_get_memory", "server": "jarvis"},
-            "tasks": {"tool": "jarvis_get_tasks", "server": "jarvis"},
-            "quests": {"tool": "system.system.list_quests", "server": "system"},
-            "system": {"tool": "system.system.get_status", "server": "system"},
-            "goals": {"tool": "system.system.list_goals", "server": "system"},
-            
-            # News and search
-            "news": {"tool": "web.search", "server": "search"},
-            "search": {"tool": "web.search", "server": "search"},
-            
-            # Events
-            "events": {"tool": "events_get_statistics", "server": "local"},
-        }
+    @property
+    def rules(self) -> RoutingRules:
+        """Current compiled routing rules; read once per request."""
+        return self.rules_store.current
     
-    def _build_intent_patterns(self) -> Dict[IntentType, List[str]]:
-        """Build regex patterns for quick intent recognition."""
-        return {
-            # Chat patterns - highest priority for greetings and casual conversation
-            IntentType.CHAT: [
-                r'\b(hello|hi|hey|how.?are.?you|what.?up|good.?morning|good.?evening|good.?afternoon)\b',
-                r'\b(how.?are.?we|how.?is.?it.?going|how.?do.?you.?do)\b',
-                r'\b(thank.?you|thanks|please|sorry|help|can.?you.?help)\b',
-                r'\b(what.?can.?you.?do|what.?are.?you|who.?are.?you)\b',
-                r'^(hello|hi|hey|howdy|greetings)',
-                r'\b(how.?are.?you.?today|how.?are.?we.?today)\b'
-            ],
-            IntentType.TRADING: [
-                r'\b(portfolio|balance|positions|trades?|price|momentum|pnl|profit|loss|trading|invest|buy|sell)\b',
-                r'\b(bitcoin|btc|ethereum|eth|crypto|stock|market|exchange)\b',
-                r'\b(current.?price|check.?price|get.?price)\b'
-            ],
-            IntentType.MUSIC: [
-                r'\b(play|pause|resume|stop|skip|music|song|queue|volume|shuffle|random)\b',
-                r'\b(join|leave|voice|channel|audio|sound)\b'
-            ],
-            IntentType.FITNESS: [
-                r'\b(workout|exercise|fitness|gym|muscle|chest|back|legs|arms|cardio)\b',
-                r'\b(push.?up|squat|deadlift|bench|press|curl|run|jog)\b'
-            ],
-            IntentType.NEWS: [
-                r'\b(news|latest|recent|breaking|update|article|headline)\b',
-                r'\b(ai.?developments|tech.?news|technology.?news)\b'
-            ],
-            IntentType.SYSTEM: [
-                r'\b(status|system|memory|tasks|quests|help|info|health)\b',
-                r'\b(monitor|check|diagnose|debug|log)\b'
-            ],
-            IntentType.SEARCH: [
-                r'\b(search|find|look.?up|google|web|internet|information)\b',
-                r'\b(search.?for|find.?information|look.?up)\b'
-            ]
-        }
+    @property
+    def tool_mappings(self) -> Dict[str, Dict[str, Any]]:
+        return self.rules.tool_mappings
+    
+    @property
+    def intent_patterns(self) -> Dict[IntentType, List[str]]:
+        return self.rules.intent_patterns
+    
+    @property
+    def pattern_engine(self) -> CompiledIntentPatterns:
+        return self.rules.pattern_engine
+    
+    @property
+    def tool_rules(self) -> Dict[IntentType, KeywordTable]:
+        return self.rules.tool_rules
+    
+    @property
+    def exact_commands(self) -> Dict[str, IntentType]:
+        return self.rules.exact_commands
+    
+    def _train_classifier(self):
+        """Train the middle-tier classifier off the event loop."""
+        try:
+            self.classifier = HashedNgramClassifier.from_log(INTENT_LOG_FILE, min_samples=CLASSIFIER_MIN_SAMPLES)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not train intent classifier: {e}")
+    
+    def _tier_result(self, rules: RoutingRules, intent_type: IntentType, text: str, text_lower: str,
+                     confidence: float, tier: str, reasoning: str) -> IntentResult:
+        if intent_type == IntentType.CHAT:
+            tool_info = {"tool": "jarvis_chat", "arguments": {"message": text}}
+        else:
+            tool_info = self._determine_tool_from_pattern(intent_type, text_lower, text, rules)
+        return IntentResult(
+            intent_type=intent_type,
+            confidence=confidence,
+            tool_name=tool_info["tool"],
+            arguments=tool_info.get("arguments", {}),
+            reasoning=reasoning,
+            context_used=[tier],
+            fallback_suggestions=["Try being more specific", "Use exact command syntax"],
+            processing_time=0.0,
+            tier=tier,
+        )
+    
+    def _fast_path(self, text: str, rules: Optional[RoutingRules] = None) -> Optional[IntentResult]:
+        """Resolve a message without the LLM when a cheap tier is confident."""
+        rules = rules or self.rules
+        text_lower = text.lower()
+        
+        # Tier 1: exact command ("pause", "!status", "portfolio")
+        command = normalize_query(text).lstrip("!/ ")
+        intent_type = rules.exact_commands.get(command)
+        if intent_type is not None:
+            return self._tier_result(rules, intent_type, text, text_lower, EXACT_CONFIDENCE, "exact",
+                                     f"Exact command: {command}")
+        
+        # Tier 2: unambiguous pattern hit
+        matches = rules.pattern_engine.scan(text_lower)
+        if len(matches) == 1:
+            match = matches[0]
+            tokens = len(text_lower.split())
+            if match.intent == IntentType.CHAT:
+                # Chat patterns include filler ("please", "help"), trust them on greetings only
+                confident = tokens <= CHAT_FAST_MAX_TOKENS
+            else:
+                confident = tokens <= PATTERN_FAST_MAX_TOKENS or match.hits >= 2
+            if confident:
+                label = "Chat pattern matched" if match.intent == IntentType.CHAT else f"Pattern matched for {match.intent.value}"
+                return self._tier_result(rules, match.intent, text, text_lower, PATTERN_FAST_CONFIDENCE, "pattern",
+                                         f"{label}: {match.pattern}")
+        
+        # Tier 3: local classifier trained on earlier LLM decisions
+        label, probability = self.classifier.predict(text)
+        if label and probability >= CLASSIFIER_THRESHOLD:
+            try:
+                intent_type = IntentType(label)
+            except ValueError:
+                return None
+            if intent_type != IntentType.UNKNOWN:
+                return self._tier_result(rules, intent_type, text, text_lower, round(probability, 3), "classifier",
+                                         f"Local classifier: {label} (p={probability:.2f})")
+        return None
+    
+    def _record_tier(self, result: IntentResult, started: float):
+        elapsed = time.perf_counter() - started
+        result.processing_time = elapsed
+        histogram = self.tier_latency.get(result.tier)
+        if histogram is not None:
+            histogram.record(elapsed * 1000)
     
     async def analyze_intent(self, text: str, user_id: str, channel_id: str) -> IntentResult:
-        """Analyze user input and determine the correct intent and tool."""
-        start_time = time.time()
+        """Analyze user input and determine the correct intent and tool.
+        
+        Tiers are tried cheapest first: exact command, unambiguous pattern,
+        local classifier, cached LLM decision, LLM; pattern matching is the
+        fallback when the LLM is unavailable or unsure. The tier used is
+        reported on the result and timed per tier.
+        """
+        start_time = time.perf_counter()
+        # One rule set for the whole request, even if a reload lands meanwhile
+        rules = self.rules
         
         try:
+            if FAST_PATH_ENABLED:
+                result = self._fast_path(text, rules)
+                if result is not None:
+                    result.arguments = enrich_trading_arguments(
+                        result.tool_name, result.arguments, text
+                    )
+                    self._record_tier(result, start_time)
+                    await self._log_intent(text, result, self._light_context(user_id, channel_id))
+                    self.context_retriever.record_interaction(user_id, text, result)
+                    return result
+            
             # Get context
             context = await self._get_context(user_id, channel_id)
             
-            # Try LLM-based analysis first
+            # Try LLM-based analysis first (reusing a cached decision when we have one)
             if self.llm_available:
-                result = await self._llm_intent_analysis(text, context)
+                catalog = context.system_state.get("catalog_version") or catalog_version(
+                    context.system_state.get("available_tools", [])
+                )
+                # The prompt carries the user's recent history and intents, so a
+                # decision is only reused for a message seen with the same context
+                context_key = context.prompt_fragments.get("context_key")
+                cache_scope = f"{catalog}:{context_key}" if context_key else catalog
+                result = self._cached_intent(text, cache_scope)
+                if result is None:
+                    result = await self._llm_intent_analysis(text, context)
+                    if result:
+                        result.tier = "llm"
+                    if result and result.confidence > 0.7:
+                        self._remember_intent(text, cache_scope, result)
                 if result and result.confidence > 0.7:
                     result.arguments = enrich_trading_arguments(
                         result.tool_name, result.arguments, text
                     )
-                    processing_time = time.time() - start_time
-                    result.processing_time = processing_time
+                    self._record_tier(result, start_time)
                     await self._log_intent(text, result, context)
+                    self.context_retriever.record_interaction(user_id, text, result)
                     return result
             
             # Fallback to pattern matching
-            result = await self._pattern_intent_analysis(text, context)
+            result = await self._pattern_intent_analysis(text, context, rules)
+            result.tier = "fallback"
             result.arguments = enrich_trading_arguments(
                 result.tool_name, result.arguments, text
             )
-            processing_time = time.time() - start_time
-            result.processing_time = processing_time
+            self._record_tier(result, start_time)
             
             await self._log_intent(text, result, context)
+            self.context_retriever.record_interaction(user_id, text, result)
             return result
             
         except Exception as e:
             logger.error(f"Error in intent analysis: {e}")
             # Return fallback result
-            processing_time = time.time() - start_time
+            processing_time = time.perf_counter() - start_time
             return IntentResult(
                 intent_type=IntentType.UNKNOWN,
                 confidence=0.0,
@@ -362,94 +502,179 @@ class IntentRouter:
                 processing_time=processing_time
             )
     
+    def _light_context(self, user_id: str, channel_id: str) -> IntentContext:
+        """Context for fast-path results, which never look at history."""
+        return IntentContext(
+            user_id=user_id,
+            channel_id=channel_id,
+            timestamp=datetime.now(),
+            previous_intents=[],
+            conversation_history=[],
+            user_preferences={},
+            system_state={"system_status": "fast_path"},
+        )
+    
+    def _cached_intent(self, text: str, catalog: str) -> Optional[IntentResult]:
+        """Rebuild an IntentResult from a cached LLM routing decision."""
+        data = self.routing_cache.get(text, catalog)
+        if not isinstance(data, dict):
+            return None
+        try:
+            arguments = data.get("arguments") or {}
+            if data.get("tool_name") == "jarvis_chat":
+                arguments["message"] = text
+            return IntentResult(
+                intent_type=IntentType(data.get("intent_type", "unknown")),
+                confidence=float(data.get("confidence", 0.0)),
+                tool_name=data.get("tool_name", "jarvis_chat"),
+                arguments=arguments,
+                reasoning=f"{data.get('reasoning', 'LLM analysis')} (cached routing decision)",
+                context_used=list(data.get("context_used", [])) + ["routing_cache"],
+                fallback_suggestions=data.get("fallback_suggestions", []),
+                processing_time=0.0,
+                tier="cache",
+            )
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Ignoring malformed cached routing decision: {e}")
+            return None
+    
+    def _remember_intent(self, text: str, catalog: str, result: IntentResult):
+        """Store a confident LLM routing decision for reuse."""
+        data = asdict(result)
+        data["intent_type"] = result.intent_type.value
+        data.pop("processing_time", None)
+        try:
+            self.routing_cache.put(text, catalog, data, fuzzy=not result.arguments)
+        except Exception as e:
+            logger.warning(f"Could not cache routing decision: {e}")
+    
     async def _get_context(self, user_id: str, channel_id: str) -> IntentContext:
-        """Get comprehensive context for intent analysis."""
-        # Get user conversation history
-        conversation_history = await self.context_retriever.get_user_context(user_id)
+        """Get comprehensive context for intent analysis.
         
-        # Get system context
-        system_context = await self.context_retriever.get_system_context()
-        
-        # Build previous intents from conversation history
-        previous_intents = []
-        for msg in conversation_history[-3:]:  # Last 3 interactions
-            if msg.get('intent'):
-                previous_intents.append(msg['intent'])
+        Both snapshots are cached, including their rendered prompt JSON, so
+        this only copies references.
+        """
+        user = self.context_retriever.store.snapshot(user_id)
+        system = self.context_retriever.store.system
         
         return IntentContext(
             user_id=user_id,
             channel_id=channel_id,
             timestamp=datetime.now(),
-            previous_intents=previous_intents,
-            conversation_history=conversation_history,
+            previous_intents=user.previous_intents,  # from the last 3 interactions
+            conversation_history=user.history,
             user_preferences={},  # Could be expanded
-            system_state=system_context
+            system_state=system.state,
+            prompt_fragments={
+                "tools": system.tools_json,
+                "history": user.history_json,
+                "intents": user.intents_json,
+                "context_key": user.context_key,
+            },
         )
     
+    def update_tool_catalog(self, tools: List[str]) -> bool:
+        """Route against a new tool catalog (invalidates the system snapshot)."""
+        return self.context_retriever.set_available_tools(tools)
+    
     async def _llm_intent_analysis(self, text: str, context: IntentContext) -> Optional[IntentResult]:
-        """Use LLM to analyze intent and determine the correct tool."""
+        """Use LLM to analyze intent and determine the correct tool.
+        
+        Requests arriving within the batching window are classified together
+        in one model call; a lone request uses the single-message prompt.
+        """
         try:
-            # Build prompt for LLM
-            prompt = self._build_intent_prompt(text, context)
-            
-            # Get LLM response
-            if self.model_manager:
-                # Convert prompt to message format for model manager
-                messages = [{"role": "system", "content": "You are an intelligent intent analysis system."},
-                           {"role": "user", "content": prompt}]
-                response = await self.model_manager.generate_response(messages)
-            elif BRAIN_AVAILABLE:
-                response = await brain_generate(prompt)
-            else:
-                return None
-            
-            # Parse LLM response
-            return self._parse_llm_response(response, text)
-            
+            return await self.intent_batcher.submit((text, context))
         except Exception as e:
             logger.error(f"Error in LLM intent analysis: {e}")
             return None
     
-    def _build_intent_prompt(self, text: str, context: IntentContext) -> str:
-        """Build a comprehensive prompt for LLM intent analysis."""
-        available_tools = context.system_state.get("available_tools", [])
-        recent_history = context.conversation_history[-3:] if context.conversation_history else []
+    async def _llm_intent_batch(self, requests: List[Tuple[str, IntentContext]]) -> List[Optional[IntentResult]]:
+        """Classify a batch of (text, context) requests with one LLM call."""
+        if len(requests) == 1:
+            text, context = requests[0]
+            response = await self._llm_generate(*self._build_intent_prompt(text, context))
+            return [self._parse_llm_response(response, text) if response is not None else None]
         
-        prompt = f"""
-You are Jarvis, an AI assistant with access to multiple tools. Analyze the user's request and determine the correct tool to use.
-
-USER REQUEST: "{text}"
-
-AVAILABLE TOOLS:
-{json.dumps(available_tools, indent=2)}
-
-RECENT CONVERSATION HISTORY:
-{json.dumps(recent_history, indent=2)}
+        response = await self._llm_generate(*self._build_batch_intent_prompt(requests))
+        if response is None:
+            return [None] * len(requests)
+        logger.info(f"📦 Classified {len(requests)} messages in one LLM call")
+        return self._parse_batch_response(response, [text for text, _ in requests])
+    
+    async def _llm_generate(self, system_prompt: str, prompt: str) -> Optional[str]:
+        """Send an intent prompt to whichever LLM backend is available.
+        
+        The system prompt only changes with the tool catalog, so a local
+        model reuses its evaluation and only reads the per-message prompt.
+        """
+        if self.model_manager:
+            messages = [{"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}]
+            return await self.model_manager.generate_response(messages, cache_site="intent_router")
+        elif BRAIN_AVAILABLE:
+            return await asyncio.to_thread(brain_generate, system_prompt, prompt, cache_site="intent_router")
+        return None
+    
+    def _build_intent_prompt(self, text: str, context: IntentContext) -> Tuple[str, str]:
+        """Build the (system, user) prompts for LLM intent analysis of one request."""
+        tools_json = context.prompt_fragments.get("tools")
+        if tools_json is None:
+            tools_json = json.dumps(context.system_state.get("available_tools", []), indent=2)
+        history_json, intents_json = self._context_fragments(context)
+        
+        prompt = f"""RECENT CONVERSATION HISTORY:
+{history_json}
 
 PREVIOUS INTENTS:
-{json.dumps(context.previous_intents, indent=2)}
-
-INSTRUCTIONS:
-1. Determine the user's intent (trading, music, fitness, news, system, search, chat)
-2. Select the most appropriate tool from the available tools
-3. Extract any arguments needed for the tool
-4. Provide confidence score (0.0-1.0)
-5. Explain your reasoning
+{intents_json}
 
-RESPONSE FORMAT (JSON):
-{{
-    "intent_type": "trading|music|fitness|news|system|search|chat",
-    "confidence": 0.95,
-    "tool_name": "trading.trading.get_balance",
-    "arguments": {{}},
-    "reasoning": "User is asking for portfolio balance, which maps to trading tool",
-    "context_used": ["recent_trading_queries", "user_preferences"],
-    "fallback_suggestions": ["Try /portfolio command", "Check /balance"]
-}}
+USER REQUEST: "{text}"
 
 ANALYZE THE REQUEST:
 """
-        return prompt
+        return _intent_system_prompt(tools_json), prompt
+    
+    @staticmethod
+    def _context_fragments(context: IntentContext) -> Tuple[str, str]:
+        """The rendered (history, previous intents) JSON for a request's prompt."""
+        fragments = context.prompt_fragments
+        history_json = fragments.get("history")
+        if history_json is None:
+            history_json = json.dumps(context.conversation_history[-3:], indent=2)
+        intents_json = fragments.get("intents")
+        if intents_json is None:
+            intents_json = json.dumps(context.previous_intents, indent=2)
+        return history_json, intents_json
+    
+    def _build_batch_intent_prompt(self, requests: List[Tuple[str, IntentContext]]) -> Tuple[str, str]:
+        """Build the (system, user) prompts classifying several requests.
+        
+        The tool catalog is shared, so it is listed once; each request brings
+        the same history and previous intents the single-request prompt shows,
+        so batching never changes what the model sees about a message.
+        """
+        first = requests[0][1]
+        tools_json = first.prompt_fragments.get("tools")
+        if tools_json is None:
+            tools_json = json.dumps(first.system_state.get("available_tools", []), indent=2)
+        
+        numbered = []
+        for index, (text, context) in enumerate(requests, 1):
+            history_json, intents_json = self._context_fragments(context)
+            numbered.append(
+                f'[{index}] USER REQUEST: "{text}"\n'
+                f'RECENT CONVERSATION HISTORY: {history_json}\n'
+                f'PREVIOUS INTENTS: {intents_json}'
+            )
+        requests_block = "\n\n".join(numbered)
+        
+        prompt = f"""REQUESTS ({len(requests)}):
+{requests_block}
+
+ANALYZE THE REQUESTS:
+"""
+        return _intent_system_prompt(tools_json, batch=True), prompt
     
     def _correct_tool_name(self, tool_name: str) -> str:
         """Correct common tool name mistakes made by LLM."""
@@ -495,68 +720,83 @@ ANALYZE THE REQUEST:
                 return None
             
             data = json.loads(json_match.group())
-            
-            # Correct tool name if necessary
-            raw_tool_name = data.get("tool_name", "jarvis_chat")
-            corrected_tool_name = self._correct_tool_name(raw_tool_name)
-            
-            return IntentResult(
-                intent_type=IntentType(data.get("intent_type", "unknown")),
-                confidence=float(data.get("confidence", 0.0)),
-                tool_name=corrected_tool_name,
-                arguments=enrich_trading_arguments(
-                    corrected_tool_name, data.get("arguments", {}), original_text
-                ),
-                reasoning=data.get("reasoning", "LLM analysis"),
-                context_used=data.get("context_used", []),
-                fallback_suggestions=data.get("fallback_suggestions", []),
-                processing_time=0.0  # Will be set by caller
-            )
+            return self._intent_from_data(data, original_text)
             
         except Exception as e:
             logger.error(f"Error parsing LLM response: {e}")
             return None
     
-    async def _pattern_intent_analysis(self, text: str, context: IntentContext) -> IntentResult:
+    def _parse_batch_response(self, response: str, texts: List[str]) -> List[Optional[IntentResult]]:
+        """Split a batched LLM response back into one result per request."""
+        results: List[Optional[IntentResult]] = [None] * len(texts)
+        try:
+            json_match = re.search(r'\[.*\]', response, re.DOTALL)
+            if not json_match:
+                return results
+            items = json.loads(json_match.group())
+        except Exception as e:
+            logger.error(f"Error parsing batched LLM response: {e}")
+            return results
+        
+        for position, data in enumerate(items if isinstance(items, list) else []):
+            if not isinstance(data, dict):
+                continue
+            try:
+                index = int(data.get("index", position + 1)) - 1
+            except (TypeError, ValueError):
+                index = position
+            if not 0 <= index < len(texts) or results[index] is not None:
+                continue
+            try:
+                results[index] = self._intent_from_data(data, texts[index])
+            except Exception as e:
+                logger.warning(f"Ignoring malformed batched intent #{index + 1}: {e}")
+        return results
+    
+    def _intent_from_data(self, data: Dict[str, Any], original_text: str) -> IntentResult:
+        """Build an IntentResult from one parsed LLM answer."""
+        # Correct tool name if necessary
+        raw_tool_name = data.get("tool_name", "jarvis_chat")
+        corrected_tool_name = self._correct_tool_name(raw_tool_name)
+        
+        return IntentResult(
+            intent_type=IntentType(data.get("intent_type", "unknown")),
+            confidence=float(data.get("confidence", 0.0)),
+            tool_name=corrected_tool_name,
+            arguments=enrich_trading_arguments(
+                corrected_tool_name, data.get("arguments", {}), original_text
+            ),
+            reasoning=data.get("reasoning", "LLM analysis"),
+            context_used=data.get("context_used", []),
+            fallback_suggestions=data.get("fallback_suggestions", []),
+            processing_time=0.0  # Will be set by caller
+        )
+    
+    async def _pattern_intent_analysis(self, text: str, context: IntentContext,
+                                       rules: Optional[RoutingRules] = None) -> IntentResult:
         """Fallback pattern-based intent analysis."""
+        rules = rules or self.rules
         text_lower = text.lower()
         
-        # Check chat patterns first (highest priority)
-        chat_patterns = self.intent_patterns.get(IntentType.CHAT, [])
-        for pattern in chat_patterns:
-            if re.search(pattern, text_lower):
-                tool_info = self._determine_tool_from_pattern(IntentType.CHAT, text_lower, text)
-                return IntentResult(
-                    intent_type=IntentType.CHAT,
-                    confidence=0.8,  # Higher confidence for chat patterns
-                    tool_name=tool_info["tool"],
-                    arguments=tool_info.get("arguments", {}),
-                    reasoning=f"Chat pattern matched: {pattern}",
-                    context_used=["pattern_matching"],
-                    fallback_suggestions=["Try being more specific", "Use exact command syntax"],
-                    processing_time=0.0
-                )
-        
-        # Check other intent types
-        for intent_type, patterns in self.intent_patterns.items():
-            if intent_type == IntentType.CHAT:  # Skip chat, already checked
-                continue
-                
-            for pattern in patterns:
-                if re.search(pattern, text_lower):
-                    # Found a match, determine tool
-                    tool_info = self._determine_tool_from_pattern(intent_type, text_lower, text)
-                    
-                    return IntentResult(
-                        intent_type=intent_type,
-                        confidence=0.6,  # Lower confidence for pattern matching
-                        tool_name=tool_info["tool"],
-                        arguments=tool_info.get("arguments", {}),
-                        reasoning=f"Pattern matched for {intent_type.value}: {pattern}",
-                        context_used=["pattern_matching"],
-                        fallback_suggestions=["Try being more specific", "Use exact command syntax"],
-                        processing_time=0.0
-                    )
+        # One pass over the compiled pattern set; chat patterns come first in
+        # priority order and carry the higher confidence
+        match = rules.pattern_engine.first(text_lower)
+        if match is not None:
+            tool_info = self._determine_tool_from_pattern(match.intent, text_lower, text, rules)
+            if match.intent == IntentType.CHAT:
+                reasoning = f"Chat pattern matched: {match.pattern}"
+            else:
+                reasoning = f"Pattern matched for {match.intent.value}: {match.pattern}"
+            return IntentResult(
+                intent_type=match.intent,
+                confidence=match.score,
+                tool_name=tool_info["tool"],
+                arguments=tool_info.get("arguments", {}),
+                reasoning=reasoning,
+                context_used=["pattern_matching"],
+                fallback_suggestions=["Try being more specific", "Use exact command syntax"],
+                processing_time=0.0
+            )
         
         # No pattern matched, default to chat
         return IntentResult(
@@ -570,166 +810,63 @@ ANALYZE THE REQUEST:
             processing_time=0.0
         )
     
-    def _extract_crypto_symbols(self, text: str) -> List[str]:
-        """Extract cryptocurrency symbols from text."""
-        # Common crypto symbols and their variations
-        crypto_symbols = {
-            'btc': 'BTC', 'bitcoin': 'BTC',
-            'eth': 'ETH', 'ethereum': 'ETH', 'ether': 'ETH',
-            'sol': 'SOL', 'solana': 'SOL',
-            'ada': 'ADA', 'cardano': 'ADA',
-            'dot': 'DOT', 'polkadot': 'DOT',
-            'matic': 'MATIC', 'polygon': 'MATIC',
-            'avax': 'AVAX', 'avalanche': 'AVAX',
-            'link': 'LINK', 'chainlink': 'LINK',
-            'uni': 'UNI', 'uniswap': 'UNI',
-            'atom': 'ATOM', 'cosmos': 'ATOM',
-            'near': 'NEAR',
-            'ftm': 'FTM', 'fantom': 'FTM',
-            'algo': 'ALGO', 'algorand': 'ALGO',
-            'xrp': 'XRP', 'ripple': 'XRP',
-            'ltc': 'LTC', 'litecoin': 'LTC',
-            'bch': 'BCH', 'bitcoin cash': 'BCH',
-            'doge': 'DOGE', 'dogecoin': 'DOGE',
-            'shib': 'SHIB', 'shiba': 'SHIB'
-        }
-        
-        text_lower = text.lower()
-        found_symbols = []
-        
-        # Look for exact symbol matches (3-5 uppercase letters) but exclude common words
-        common_words = {'THE', 'AND', 'FOR', 'WHAT', 'HOW', 'WHEN', 'WHERE', 'WHY', 'WHO', 'WITH', 'FROM', 'THIS', 'THAT', 'THESE', 'THOSE', 'PRICE', 'CURRENT', 'GET', 'SHOW', 'CHECK', 'FIND', 'LOOK', 'SEE'}
-        symbol_matches = re.findall(r'\b([A-Z]{3,5})\b', text.upper())
-        for match in symbol_matches:
-            if match not in found_symbols and match not in common_words:
-                found_symbols.append(match)
-        
-        # Look for crypto name matches
-        for name, symbol in crypto_symbols.items():
-            if name in text_lower and symbol not in found_symbols:
-                found_symbols.append(symbol)
-        
-        return found_symbols
-
     def _extract_ticker_symbols(self, text: str) -> List[str]:
         return extract_ticker_symbols(text)
 
     def _determine_tool_from_pattern(
         self, intent_type: IntentType, text: str, original_text: str | None = None,
+        rules: Optional[RoutingRules] = None,
     ) -> Dict[str, Any]:
         """Determine the specific tool based on intent type and text content."""
+        table = (rules or self.rules).tool_rules.get(intent_type)
+        spec = table.lookup(text) if table is not None else None
+        if spec is None:
+            return {"tool": "jarvis_chat", "server": "jarvis", "arguments": {"message": text}}
+        
+        handler = spec.get("handler")
+        if handler is None:
+            # Copy so callers can't mutate the shared table entry
+            tool_info = dict(spec)
+            if "arguments" in tool_info:
+                tool_info["arguments"] = dict(tool_info["arguments"])
+            return tool_info
+        
         source = original_text or text
-        if intent_type == IntentType.TRADING:
-            if "portfolio" in text:
-                return {"tool": "trading.get_portfolio", "server": "trading"}
-            elif "balance" in text:
-                return {"tool": "trading.get_balance", "server": "trading"}
-            elif any(word in text for word in ("price", "trading at", "worth", "quote")):
-                symbols = self._extract_ticker_symbols(source) or self._extract_crypto_symbols(text)
-                if symbols:
-                    symbol = symbols[0]
-                    if "/" in symbol:
-                        symbol = symbol.split("/", 1)[0]
-                    return {
-                        "tool": "trading.get_quote",
-                        "server": "trading",
-                        "arguments": {"symbol": symbol},
-                    }
-                return {
-                    "tool": "trading.get_quote",
-                    "server": "trading",
-                    "arguments": {"symbol": "AAPL"},
-                }
-            elif "momentum" in text:
-                return {"tool": "trading.scan_watchlist", "server": "trading"}
-            elif "trades" in text or "orders" in text:
-                return {"tool": "trading.get_orders", "server": "trading"}
-            else:
-                symbols = self._extract_ticker_symbols(source)
-                if symbols:
-                    return {
-                        "tool": "trading.get_quote",
-                        "server": "trading",
-                        "arguments": {"symbol": symbols[0]},
-                    }
-                return {"tool": "trading.get_portfolio", "server": "trading"}
-        
-        elif intent_type == IntentType.MUSIC:
-            if "play" in text:
-                # Extract song name if present
-                song_match = re.search(r'play\s+(.+)', text)
-                if song_match:
-                    return {
-                        "tool": "music_play",
-                        "server": "local",
-                        "arguments": {"song_name": song_match.group(1).strip()}
-                    }
-                else:
-                    return {"tool": "music_play_or_resume", "server": "local"}
-            elif "pause" in text:
-                return {"tool": "music_pause", "server": "local"}
-            elif "resume" in text:
-                return {"tool": "music_resume", "server": "local"}
-            elif "stop" in text:
-                return {"tool": "music_stop", "server": "local"}
-            elif "skip" in text:
-                return {"tool": "music_skip", "server": "local"}
-            elif "queue" in text:
-                return {"tool": "music_queue_view", "server": "local"}
-            else:
-                return {"tool": "music_play_or_resume", "server": "local"}
+        if handler == "quote":
+            symbols = self._extract_ticker_symbols(source)
+            symbol = symbols[0] if symbols else "AAPL"
+            symbol = get_symbol_resolver().canonical(symbol, "trading.get_quote")
+            return {"tool": "trading.get_quote", "server": "trading", "arguments": {"symbol": symbol}}
         
-        elif intent_type == IntentType.FITNESS:
-            if "chest" in text:
-                return {
-                    "tool": "fitness.list_workouts",
-                    "server": "jarvis",
-                    "arguments": {"muscle_group": "chest"}
-                }
-            elif "leg" in text:
-                return {
-                    "tool": "fitness.list_workouts",
-                    "server": "jarvis",
-                    "arguments": {"muscle_group": "legs"}
-                }
-            elif "back" in text:
+        if handler == "quote_or_portfolio":
+            symbols = self._extract_ticker_symbols(source)
+            if symbols:
+                return {"tool": "trading.get_quote", "server": "trading", "arguments": {"symbol": symbols[0]}}
+            return {"tool": "trading.get_portfolio", "server": "trading"}
+        
+        if handler == "play":
+            # Extract song name if present
+            song_match = _PLAY_RE.search(text)
+            if song_match:
                 return {
-                    "tool": "fitness.list_workouts",
-                    "server": "jarvis",
-                    "arguments": {"muscle_group": "back"}
+                    "tool": "music_play",
+                    "server": "local",
+                    "arguments": {"song_name": song_match.group(1).strip()}
                 }
-            else:
-                return {"tool": "fitness.list_workouts", "server": "jarvis"}
-        
-        elif intent_type == IntentType.NEWS:
-            return {"tool": "jarvis_scan_news", "server": "jarvis"}
-        
-        elif intent_type == IntentType.SYSTEM:
-            if "status" in text:
-                return {"tool": "jarvis_get_status", "server": "jarvis"}
-            elif "memory" in text:
-                return {"tool": "jarvis_get_memory", "server": "jarvis"}
-            elif "tasks" in text:
-                return {"tool": "jarvis_get_tasks", "server": "jarvis"}
-            elif "quests" in text:
-                return {"tool": "system.system.list_quests", "server": "jarvis"}
-            else:
-                return {"tool": "jarvis_get_status", "server": "jarvis"}
+            return {"tool": "music_play_or_resume", "server": "local"}
         
-        elif intent_type == IntentType.SEARCH:
+        if handler == "search":
             # Extract search query
-            query_match = re.search(r'search\s+(.+)', text)
+            query_match = _SEARCH_RE.search(text)
             if query_match:
                 return {
                     "tool": "jarvis_web_search",
                     "server": "jarvis",
                     "arguments": {"query": query_match.group(1).strip()}
                 }
-            else:
-                return {"tool": "jarvis_web_search", "server": "jarvis"}
+            return {"tool": "jarvis_web_search", "server": "jarvis"}
         
-        else:
-            return {"tool": "jarvis_chat", "server": "jarvis", "arguments": {"message": text}}
+        return {"tool": "jarvis_chat", "server": "jarvis", "arguments": {"message": text}}
     
     def _build_agent_capability_mapping(self) -> Dict[IntentType, AgentCapability]:
         """Build mapping from intent types to agent capabilities."""
@@ -763,69 +900,38 @@ ANALYZE THE REQUEST:
             }
         }
         
-        try:
-            with open(INTENT_LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, indent=2) + "\n\n")
-        except Exception as e:
-            logger.error(f"Error logging intent: {e}")
+        # Queued in memory and flushed by a background thread
+        self.intent_log.append(log_entry)
     
     def get_intent_statistics(self) -> Dict[str, Any]:
-        """Get statistics about intent analysis performance."""
+        """Get statistics about intent analysis performance.
+        
+        Aggregates are maintained as entries are logged, so this does not
+        depend on the size of the log.
+        """
         try:
-            if not INTENT_LOG_FILE.exists():
-                return {"error": "No intent logs found"}
-            
-            stats = {
-                "total_requests": 0,
-                "intent_types": {},
-                "confidence_distribution": {"high": 0, "medium": 0, "low": 0},
-                "processing_times": [],
-                "llm_vs_pattern": {"llm": 0, "pattern": 0}
-            }
-            
-            with open(INTENT_LOG_FILE, "r", encoding="utf-8") as f:
-                content = f.read()
-                entries = content.split("\n\n")
-                
-                for entry in entries:
-                    if entry.strip():
-                        try:
-                            data = json.loads(entry)
-                            stats["total_requests"] += 1
-                            
-                            intent_type = data["intent_result"]["intent_type"]
-                            stats["intent_types"][intent_type] = stats["intent_types"].get(intent_type, 0) + 1
-                            
-                            confidence = data["intent_result"]["confidence"]
-                            if confidence >= 0.8:
-                                stats["confidence_distribution"]["high"] += 1
-                            elif confidence >= 0.5:
-                                stats["confidence_distribution"]["medium"] += 1
-                            else:
-                                stats["confidence_distribution"]["low"] += 1
-                            
-                            processing_time = data["intent_result"]["processing_time"]
-                            stats["processing_times"].append(processing_time)
-                            
-                            # Determine if LLM or pattern was used
-                            reasoning = data["intent_result"]["reasoning"]
-                            if "LLM" in reasoning or "brain" in reasoning.lower():
-                                stats["llm_vs_pattern"]["llm"] += 1
-                            else:
-                                stats["llm_vs_pattern"]["pattern"] += 1
-                                
-                        except json.JSONDecodeError:
-                            continue
-            
-            # Calculate average processing time
-            if stats["processing_times"]:
-                stats["average_processing_time"] = sum(stats["processing_times"]) / len(stats["processing_times"])
-            
+            stats = self.intent_log.summary()
+            stats["routing_cache"] = self.routing_cache.get_stats()
+            stats["tiers"] = self.get_tier_statistics()
+            stats["context_store"] = self.context_retriever.store.get_stats()
+            stats["llm_batching"] = self.intent_batcher.get_stats()
+            stats["routing_rules"] = self.rules_store.get_stats()
             return stats
             
         except Exception as e:
             return {"error": f"Error calculating statistics: {e}"}
     
+    def get_tier_statistics(self) -> Dict[str, Any]:
+        """Per-tier request counts and latency percentiles."""
+        tiers = {tier: hist.summary() for tier, hist in self.tier_latency.items()}
+        tiers["classifier_model"] = {
+            "trained": self.classifier.trained,
+            "samples": self.classifier.n_samples,
+            "intents": list(self.classifier.labels),
+            "threshold": CLASSIFIER_THRESHOLD,
+        }
+        return tiers
+    
     async def route_to_agent(self, intent_result: IntentResult, user_id: str) -> str:
         """Route an intent result to the appropriate agent."""
         try:
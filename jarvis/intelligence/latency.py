@@ -0,0 +1,116 @@
+"""
+Log-bucketed latency histogram.
+
+HDR-style: values are counted in buckets whose width grows geometrically, so
+memory stays bounded (a few hundred buckets from 1 µs to hours) and any
+percentile is answered from the bucket counts with ~2.5% relative error,
+no matter how many samples were recorded.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+# Smallest distinguishable value (ms) and bucket growth factor
+MIN_VALUE_MS = 0.001
+GROWTH = 1.05
+_LOG_GROWTH = math.log(GROWTH)
+
+
+def _bucket_of(value_ms: float) -> int:
+    if value_ms <= MIN_VALUE_MS:
+        return 0
+    return int(math.log(value_ms / MIN_VALUE_MS) / _LOG_GROWTH) + 1
+
+
+def _bucket_value(bucket: int) -> float:
+    """Representative (upper bound) value of a bucket in ms."""
+    if bucket <= 0:
+        return MIN_VALUE_MS
+    return MIN_VALUE_MS * GROWTH ** bucket
+
+
+class LatencyHistogram:
+    """Thread-safe streaming histogram of latencies in milliseconds."""
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def record(self, value_ms: float) -> None:
+        value_ms = max(0.0, float(value_ms))
+        bucket = _bucket_of(value_ms)
+        with self._lock:
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total_ms += value_ms
+            if self.min_ms is None or value_ms < self.min_ms:
+                self.min_ms = value_ms
+            if self.max_ms is None or value_ms > self.max_ms:
+                self.max_ms = value_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        with other._lock:
+            buckets = dict(other._buckets)
+            count, total, lo, hi = other.count, other.total_ms, other.min_ms, other.max_ms
+        with self._lock:
+            for bucket, n in buckets.items():
+                self._buckets[bucket] = self._buckets.get(bucket, 0) + n
+            self.count += count
+            self.total_ms += total
+            if lo is not None and (self.min_ms is None or lo < self.min_ms):
+                self.min_ms = lo
+            if hi is not None and (self.max_ms is None or hi > self.max_ms):
+                self.max_ms = hi
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate q-th percentile (0-100) in ms, None if empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, math.ceil(self.count * q / 100.0))
+            seen = 0
+            for bucket in sorted(self._buckets):
+                seen += self._buckets[bucket]
+                if seen >= rank:
+                    value = _bucket_value(bucket)
+                    # Never report outside the observed range
+                    return min(max(value, self.min_ms), self.max_ms)
+            return self.max_ms
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99)) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 4) if self.count else None,
+            "max_ms": round(self.max_ms, 4) if self.max_ms is not None else None,
+        }
+        for q in percentiles:
+            value = self.percentile(q)
+            out[f"p{q:g}_ms"] = round(value, 4) if value is not None else None
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "buckets": {str(k): v for k, v in self._buckets.items()},
+                "count": self.count,
+                "total_ms": self.total_ms,
+                "min_ms": self.min_ms,
+                "max_ms": self.max_ms,
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        hist = cls()
+        hist._buckets = {int(k): int(v) for k, v in (data.get("buckets") or {}).items()}
+        hist.count = int(data.get("count", 0))
+        hist.total_ms = float(data.get("total_ms", 0.0))
+        hist.min_ms = data.get("min_ms")
+        hist.max_ms = data.get("max_ms")
+        return hist
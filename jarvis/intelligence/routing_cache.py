@@ -0,0 +1,463 @@
+"""
+Routing decision cache for natural-language queries.
+
+Routing a free-text message to a tool costs a full LLM call, yet the same
+messages ("btc price", "show my quests", "portfolio") arrive over and over.
+This module remembers routing decisions keyed on the normalized query text
+and a catalog version, so repeat decisions skip the LLM entirely.
+
+Features:
+- In-memory LRU with TTL eviction
+- SQLite persistence so the cache survives restarts (one connection per
+  cache, opened with the schema once and closed by close())
+- Optional near-duplicate lookup via MinHash + LSH banding
+- Hit/miss counters for status endpoints
+
+Environment variables (with defaults):
+- ROUTING_CACHE_DB: default "./data/routing_cache.sqlite" ("" disables persistence)
+- ROUTING_CACHE_SIZE: default 2048 entries per namespace
+- ROUTING_CACHE_TTL: default 86400 seconds
+- ROUTING_CACHE_FUZZY: default "0" (set "1" to enable near-duplicate lookup)
+- ROUTING_CACHE_FUZZY_THRESHOLD: default 0.85 estimated Jaccard similarity
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "./data/routing_cache.sqlite"
+
+_WS_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s.!?,;:]+$")
+_TOKEN_RE = re.compile(r"[a-z0-9$/]+")
+
+# Mersenne prime used by the MinHash permutations
+_MINHASH_PRIME = (1 << 61) - 1
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query for cache keying.
+
+    Lowercases, collapses whitespace and trims trailing punctuation so
+    "BTC price?" and "  btc   price" share a key.
+    """
+    q = _WS_RE.sub(" ", (text or "").strip().lower())
+    return _TRAILING_PUNCT_RE.sub("", q)
+
+
+def catalog_version(tools: Any) -> str:
+    """Return a short, stable fingerprint for a tool catalog.
+
+    Accepts a dict of tool name -> tool object, or any iterable of names.
+    Changing the set of available tools changes the version, which naturally
+    invalidates every cached decision made against the old catalog.
+    """
+    if not tools:
+        return "empty"
+    names = sorted(str(name) for name in (tools.keys() if isinstance(tools, dict) else tools))
+    return hashlib.sha1("\n".join(names).encode("utf-8")).hexdigest()[:12]
+
+
+def _stable_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class MinHasher:
+    """Deterministic MinHash over word unigrams and bigrams.
+
+    Coefficients are derived from a fixed seed so signatures persisted in
+    SQLite stay comparable across restarts.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1337):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._coeffs: List[Tuple[int, int]] = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode("utf-8"), digest_size=16).digest()
+            a = int.from_bytes(digest[:8], "big") % _MINHASH_PRIME or 1
+            b = int.from_bytes(digest[8:], "big") % _MINHASH_PRIME
+            self._coeffs.append((a, b))
+
+    @staticmethod
+    def shingles(text: str) -> set:
+        tokens = _TOKEN_RE.findall(text)
+        grams = set(tokens)
+        grams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return grams
+
+    def signature(self, text: str) -> List[int]:
+        hashes = [_stable_hash(s) for s in self.shingles(text)]
+        if not hashes:
+            return [_MINHASH_PRIME] * self.num_perm
+        return [min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in self._coeffs]
+
+    def band_keys(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+@dataclass
+class _Entry:
+    key: str
+    catalog: str
+    query: str
+    value: Any
+    created: float
+    fuzzy: bool = False
+    signature: Optional[List[int]] = None
+
+
+@dataclass
+class RoutingCacheStats:
+    """Counters exposed on status endpoints."""
+    hits: int = 0
+    near_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self, size: int) -> Dict[str, Any]:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": size,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class RoutingCache:
+    """LRU+TTL routing decision cache with optional SQLite persistence.
+
+    Values must be JSON-serializable. Entries stored with ``fuzzy=True`` may
+    also be served for near-duplicate queries; callers should only set it for
+    decisions whose arguments do not depend on the exact wording.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "default",
+        max_entries: int = 2048,
+        ttl_seconds: float = 86400.0,
+        db_path: Optional[str] = DEFAULT_DB_PATH,
+        near_duplicate: bool = False,
+        similarity_threshold: float = 0.85,
+    ):
+        self.namespace = namespace
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.similarity_threshold = similarity_threshold
+        self.stats = RoutingCacheStats()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._minhash = MinHasher() if near_duplicate else None
+        self._lsh: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._db_path: Optional[Path] = Path(db_path).resolve() if db_path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if self._db_path is not None:
+            try:
+                self._db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = self._connect()
+                self._load()
+            except Exception as e:
+                logger.warning(f"⚠️ Routing cache persistence disabled: {e}")
+                self.close()
+
+    # -- keys -------------------------------------------------------------
+
+    @staticmethod
+    def _make_key(catalog: str, normalized: str) -> str:
+        return hashlib.sha1(f"{catalog}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.created > self.ttl_seconds
+
+    # -- public API -------------------------------------------------------
+
+    def get(self, query: str, catalog: str = "") -> Optional[Any]:
+        """Return a copy of the cached decision for ``query`` or None on a miss."""
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        key = self._make_key(catalog, normalized)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry, now):
+                    self._drop(key)
+                    self.stats.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return copy.deepcopy(entry.value)
+
+            near = self._near_lookup(normalized, catalog, now)
+            if near is not None:
+                self._entries.move_to_end(near.key)
+                self.stats.near_hits += 1
+                return copy.deepcopy(near.value)
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, query: str, catalog: str, value: Any, fuzzy: bool = False) -> None:
+        """Store a routing decision for ``query`` under ``catalog``."""
+        normalized = normalize_query(query)
+        if not normalized:
+            return
+        key = self._make_key(catalog, normalized)
+        signature = self._minhash.signature(normalized) if self._minhash and fuzzy else None
+        entry = _Entry(
+            key=key,
+            catalog=catalog,
+            query=normalized,
+            value=value,
+            created=time.time(),
+            fuzzy=fuzzy,
+            signature=signature,
+        )
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._insert(entry)
+            self.stats.stores += 1
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._delete_rows([oldest])
+                self.stats.evictions += 1
+        self._persist(entry)
+
+    def clear(self) -> None:
+        """Drop every entry (memory and disk) for this namespace."""
+        with self._lock:
+            self._entries.clear()
+            self._lsh.clear()
+        try:
+            self._write("DELETE FROM routes WHERE namespace = ?", [(self.namespace,)])
+        except Exception as e:
+            logger.warning(f"Error clearing routing cache: {e}")
+
+    def close(self) -> None:
+        """Close the SQLite connection; the cache keeps working in memory only."""
+        with self._db_lock:
+            conn, self._conn = self._conn, None
+            self._db_path = None
+        if conn is not None:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = self.stats.as_dict(len(self._entries))
+        data.update({
+            "namespace": self.namespace,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "near_duplicate": self._minhash is not None,
+            "persistent": self._conn is not None,
+        })
+        return data
+
+    # -- internals --------------------------------------------------------
+
+    def _insert(self, entry: _Entry) -> None:
+        self._entries[entry.key] = entry
+        if self._minhash and entry.fuzzy and entry.signature:
+            for band_key in self._minhash.band_keys(entry.signature):
+                self._lsh.setdefault(band_key, set()).add(entry.key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or not (self._minhash and entry.signature):
+            return
+        for band_key in self._minhash.band_keys(entry.signature):
+            bucket = self._lsh.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._lsh[band_key]
+
+    def _near_lookup(self, normalized: str, catalog: str, now: float) -> Optional[_Entry]:
+        if self._minhash is None or not self._lsh:
+            return None
+        signature = self._minhash.signature(normalized)
+        candidates = set()
+        for band_key in self._minhash.band_keys(signature):
+            candidates.update(self._lsh.get(band_key, ()))
+        best: Optional[_Entry] = None
+        best_score = self.similarity_threshold
+        for key in candidates:
+            entry = self._entries.get(key)
+            if entry is None or entry.catalog != catalog or self._expired(entry, now):
+                continue
+            score = MinHasher.similarity(signature, entry.signature or [])
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    # -- persistence ------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # Shared by whichever thread touches the cache; _db_lock serializes use
+        conn = sqlite3.connect(str(self._db_path), timeout=5, check_same_thread=False)
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS routes (
+                    key TEXT NOT NULL,
+                    namespace TEXT NOT NULL,
+                    catalog TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    fuzzy INTEGER NOT NULL DEFAULT 0,
+                    signature TEXT,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _write(self, sql: str, rows: List[Tuple[Any, ...]]) -> None:
+        """Run one statement per row and commit (no-op without persistence)."""
+        with self._db_lock:
+            if self._conn is None:
+                return
+            self._conn.executemany(sql, rows)
+            self._conn.commit()
+
+    def _load(self) -> None:
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._db_lock:
+            conn = self._conn
+            conn.execute(
+                "DELETE FROM routes WHERE namespace = ? AND created < ?",
+                (self.namespace, cutoff),
+            )
+            rows = conn.execute(
+                "SELECT key, catalog, query, value, created, fuzzy, signature FROM routes "
+                "WHERE namespace = ? ORDER BY created DESC LIMIT ?",
+                (self.namespace, self.max_entries),
+            ).fetchall()
+            conn.commit()
+        # Oldest first so the LRU order matches recency
+        for key, catalog, query, value, created, fuzzy, signature in reversed(rows):
+            try:
+                sig = json.loads(signature) if signature else None
+                if self._minhash and fuzzy and sig is None:
+                    sig = self._minhash.signature(query)
+                self._insert(_Entry(
+                    key=key,
+                    catalog=catalog,
+                    query=query,
+                    value=json.loads(value),
+                    created=created,
+                    fuzzy=bool(fuzzy),
+                    signature=sig if self._minhash else None,
+                ))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        if rows:
+            logger.info(f"✅ Routing cache '{self.namespace}' restored {len(self._entries)} entries")
+
+    def _persist(self, entry: _Entry) -> None:
+        try:
+            self._write(
+                "INSERT OR REPLACE INTO routes(key, namespace, catalog, query, value, created, fuzzy, signature) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                [(
+                    entry.key,
+                    self.namespace,
+                    entry.catalog,
+                    entry.query,
+                    json.dumps(entry.value),
+                    entry.created,
+                    int(entry.fuzzy),
+                    json.dumps(entry.signature) if entry.signature else None,
+                )],
+            )
+        except Exception as e:
+            logger.warning(f"Error persisting routing decision: {e}")
+
+    def _delete_rows(self, keys: Iterable[str]) -> None:
+        try:
+            self._write(
+                "DELETE FROM routes WHERE namespace = ? AND key = ?",
+                [(self.namespace, k) for k in keys],
+            )
+        except Exception as e:
+            logger.warning(f"Error evicting routing decision: {e}")
+
+
+# Process-wide caches, one per namespace (e.g. "llm_router", "intent_router")
+_caches: Dict[str, RoutingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_routing_cache(namespace: str) -> RoutingCache:
+    """Get (or lazily create) the shared routing cache for ``namespace``."""
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None:
+            cache = RoutingCache(
+                namespace=namespace,
+                max_entries=int(os.getenv("ROUTING_CACHE_SIZE", "2048")),
+                ttl_seconds=float(os.getenv("ROUTING_CACHE_TTL", "86400")),
+                db_path=os.getenv("ROUTING_CACHE_DB", DEFAULT_DB_PATH) or None,
+                near_duplicate=os.getenv("ROUTING_CACHE_FUZZY", "0").strip().lower() in ("1", "true", "yes"),
+                similarity_threshold=float(os.getenv("ROUTING_CACHE_FUZZY_THRESHOLD", "0.85")),
+            )
+            _caches[namespace] = cache
+        return cache
+
+
+def close_routing_caches() -> None:
+    """Close the SQLite connection of every routing cache created in this process."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.close()
+
+
+def routing_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every routing cache created in this process."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.namespace: cache.get_stats() for cache in caches}
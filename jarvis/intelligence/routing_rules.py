@@ -0,0 +1,447 @@
+"""
+Declarative routing rules with compiled artifacts and hot reload.
+
+IntentRouter's intent patterns, exact commands and tool tables and the HTTP
+client's keyword shortcuts used to be Python literals: changing a route
+meant a redeploy, and every process rebuilt the tables at import. They live
+in ``routing_rules.json`` now (YAML works too when PyYAML is installed):
+
+- the file is validated and compiled into the prefix-indexed pattern
+  engine and keyword tables at startup
+- the compiled artifact (normalized rules plus the pattern prefix analysis)
+  is cached on disk under the file's content hash, so a cold start with
+  unchanged rules skips validation and analysis; regexes compile lazily
+- a polling watcher recompiles the file when it changes and swaps the new
+  rule set in with a single reference assignment. Requests already routing
+  keep the rule set they started with, and a file that fails to compile is
+  logged and ignored.
+
+Environment variables (with defaults):
+- ROUTING_RULES_FILE: default routing_rules.json next to this module
+- ROUTING_RULES_CACHE: default "./data/routing_rules_cache" ("" disables the artifact cache)
+- ROUTING_RULES_POLL: default 2 seconds between file checks ("0" disables hot reload)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jarvis.intelligence.intent_patterns import CompiledIntentPatterns, KeywordTable
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_FILE = Path(__file__).with_name("routing_rules.json")
+RULES_FILE = os.getenv("ROUTING_RULES_FILE", str(DEFAULT_RULES_FILE))
+RULES_CACHE_DIR = os.getenv("ROUTING_RULES_CACHE", "./data/routing_rules_cache")
+RULES_POLL_SECONDS = float(os.getenv("ROUTING_RULES_POLL", "2"))
+
+# Bump when the artifact layout or compilation changes
+COMPILER_VERSION = 1
+
+_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "strip": lambda value: value.strip(),
+    "upper": lambda value: value.strip().upper(),
+    "lower": lambda value: value.strip().lower(),
+    "int": lambda value: int(value),
+    "float": lambda value: float(value),
+}
+
+
+class RoutingRulesError(ValueError):
+    """The rules file is malformed."""
+
+
+@dataclass(frozen=True)
+class KeywordShortcut:
+    """One client keyword shortcut: substring phrases or a regex with arguments."""
+    tool: str
+    args: Dict[str, Any]
+    contains: Tuple[str, ...] = ()
+    pattern: Optional[re.Pattern] = None
+    builder: Optional[str] = None
+    captures: Tuple[Tuple[str, int, str], ...] = ()
+
+    def build_args(self, match: re.Match) -> Dict[str, Any]:
+        """Static args plus converted regex captures."""
+        args = dict(self.args)
+        for name, group, convert in self.captures:
+            value = match.group(group)
+            if value is not None:
+                args[name] = _CONVERTERS[convert](value)
+        return args
+
+
+@dataclass(frozen=True)
+class RoutingRules:
+    """A compiled, immutable rule set; swapped as a whole on reload."""
+    source: str
+    content_hash: str
+    loaded_from: str  # "source" or "artifact"
+    intent_patterns: Dict[Any, List[str]]
+    pattern_engine: CompiledIntentPatterns
+    exact_commands: Dict[str, Any]
+    tool_rules: Dict[Any, KeywordTable]
+    tool_mappings: Dict[str, Dict[str, Any]]
+    keyword_shortcuts: Tuple[KeywordShortcut, ...]
+
+
+# -- parsing and validation ---------------------------------------------------
+
+def parse_rules(text: str, suffix: str = ".json") -> Dict[str, Any]:
+    """Parse rules file contents (JSON, or YAML for .yaml/.yml files)."""
+    if suffix.lower() in (".yaml", ".yml"):
+        if not YAML_AVAILABLE:
+            raise RoutingRulesError("YAML rules need PyYAML (pip install pyyaml)")
+        loader = yaml.safe_load
+    else:
+        loader = json.loads
+    try:
+        data = loader(text)
+    except Exception as e:
+        raise RoutingRulesError(f"Could not parse routing rules: {e}") from e
+    if not isinstance(data, dict):
+        raise RoutingRulesError("Routing rules must be a mapping")
+    return data
+
+
+def _require(condition: bool, message: str):
+    if not condition:
+        raise RoutingRulesError(message)
+
+
+def _string_list(value: Any, where: str) -> List[str]:
+    _require(isinstance(value, list) and all(isinstance(v, str) for v in value), f"{where} must be a list of strings")
+    return list(value)
+
+
+def _check_regex(pattern: str, where: str, flags: int = 0):
+    try:
+        re.compile(pattern, flags)
+    except re.error as e:
+        raise RoutingRulesError(f"{where}: invalid regex {pattern!r}: {e}") from e
+
+
+def validate_rules(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a parsed rules document and return it in normalized form."""
+    patterns = data.get("intent_patterns", {})
+    _require(isinstance(patterns, dict), "intent_patterns must map intent -> patterns")
+    normalized_patterns = {}
+    for intent, items in patterns.items():
+        normalized_patterns[intent] = _string_list(items, f"intent_patterns.{intent}")
+        for pattern in normalized_patterns[intent]:
+            _check_regex(pattern, f"intent_patterns.{intent}")
+
+    scores = data.get("pattern_scores", {})
+    _require(isinstance(scores, dict) and all(isinstance(v, (int, float)) for v in scores.values()),
+             "pattern_scores must map intent -> number")
+
+    exact = data.get("exact_commands", {})
+    _require(isinstance(exact, dict), "exact_commands must map intent -> phrases")
+    normalized_exact = {intent: _string_list(phrases, f"exact_commands.{intent}") for intent, phrases in exact.items()}
+
+    tool_rules = data.get("tool_rules", {})
+    _require(isinstance(tool_rules, dict), "tool_rules must map intent -> table")
+    normalized_tools = {}
+    for intent, table in tool_rules.items():
+        _require(isinstance(table, dict), f"tool_rules.{intent} must be a mapping")
+        rules = []
+        for index, rule in enumerate(table.get("rules", [])):
+            where = f"tool_rules.{intent}.rules[{index}]"
+            _require(isinstance(rule, dict) and isinstance(rule.get("route"), dict), f"{where} needs a route mapping")
+            route = rule["route"]
+            _require("tool" in route or "handler" in route, f"{where}: route needs a tool or handler")
+            rules.append({"keywords": _string_list(rule.get("keywords"), f"{where}.keywords"), "route": route})
+        default = table.get("default")
+        _require(default is None or isinstance(default, dict), f"tool_rules.{intent}.default must be a mapping")
+        normalized_tools[intent] = {"rules": rules, "default": default}
+
+    mappings = data.get("tool_mappings", {})
+    _require(isinstance(mappings, dict) and all(isinstance(v, dict) and "tool" in v for v in mappings.values()),
+             "tool_mappings must map keyword -> {tool, server}")
+
+    shortcuts = []
+    for index, shortcut in enumerate(data.get("keyword_shortcuts", [])):
+        where = f"keyword_shortcuts[{index}]"
+        _require(isinstance(shortcut, dict) and isinstance(shortcut.get("tool"), str), f"{where} needs a tool")
+        entry = {"tool": shortcut["tool"], "args": shortcut.get("args") or {}}
+        _require(isinstance(entry["args"], dict), f"{where}.args must be a mapping")
+        if "contains" in shortcut:
+            entry["contains"] = _string_list(shortcut["contains"], f"{where}.contains")
+        if "pattern" in shortcut:
+            _require(isinstance(shortcut["pattern"], str), f"{where}.pattern must be a string")
+            entry["pattern"] = shortcut["pattern"]
+            entry["ignore_case"] = bool(shortcut.get("ignore_case", True))
+            _check_regex(entry["pattern"], where, re.IGNORECASE if entry["ignore_case"] else 0)
+            if shortcut.get("builder"):
+                entry["builder"] = str(shortcut["builder"])
+            captures = shortcut.get("captures", {})
+            _require(isinstance(captures, dict), f"{where}.captures must map arg -> [group, converter]")
+            entry["captures"] = {}
+            for name, spec in captures.items():
+                if isinstance(spec, int):
+                    spec = [spec, "strip"]
+                _require(isinstance(spec, list) and len(spec) == 2 and isinstance(spec[0], int)
+                         and spec[1] in _CONVERTERS,
+                         f"{where}.captures.{name}: expected [group, one of {sorted(_CONVERTERS)}]")
+                group, convert = spec
+                entry["captures"][name] = [group, convert]
+        _require("contains" in entry or "pattern" in entry, f"{where} needs contains or pattern")
+        shortcuts.append(entry)
+
+    return {
+        "version": data.get("version", 1),
+        "intent_patterns": normalized_patterns,
+        "pattern_scores": dict(scores),
+        "exact_commands": normalized_exact,
+        "tool_rules": normalized_tools,
+        "tool_mappings": mappings,
+        "keyword_shortcuts": shortcuts,
+    }
+
+
+# -- compilation --------------------------------------------------------------
+
+def compile_rules(
+    config: Dict[str, Any],
+    intent_key: Callable[[str], Any] = str,
+    prefixes: Optional[Dict[str, Optional[List[str]]]] = None,
+    source: str = "",
+    content_hash: str = "",
+    loaded_from: str = "source",
+) -> RoutingRules:
+    """Build the runtime matchers from normalized rules.
+
+    ``intent_key`` turns intent names into the keys the caller routes on
+    (e.g. IntentType); ``prefixes`` is a saved pattern analysis.
+    """
+    try:
+        intent_patterns = {intent_key(name): items for name, items in config["intent_patterns"].items()}
+        scores = {intent_key(name): score for name, score in config["pattern_scores"].items()}
+        exact = {
+            phrase: intent_key(name)
+            for name, phrases in config["exact_commands"].items()
+            for phrase in phrases
+        }
+        tool_rules = {
+            intent_key(name): KeywordTable(
+                [(tuple(rule["keywords"]), rule["route"]) for rule in table["rules"]],
+                default=table["default"],
+            )
+            for name, table in config["tool_rules"].items()
+        }
+    except (ValueError, KeyError) as e:
+        raise RoutingRulesError(f"Unknown intent in routing rules: {e}") from e
+
+    shortcuts = tuple(
+        KeywordShortcut(
+            tool=entry["tool"],
+            args=entry["args"],
+            contains=tuple(entry.get("contains", ())),
+            pattern=re.compile(entry["pattern"], re.IGNORECASE if entry["ignore_case"] else 0)
+            if "pattern" in entry else None,
+            builder=entry.get("builder"),
+            captures=tuple((name, group, convert) for name, (group, convert) in entry.get("captures", {}).items()),
+        )
+        for entry in config["keyword_shortcuts"]
+    )
+
+    return RoutingRules(
+        source=source,
+        content_hash=content_hash,
+        loaded_from=loaded_from,
+        intent_patterns=intent_patterns,
+        pattern_engine=CompiledIntentPatterns(intent_patterns, base_scores=scores, prefixes=prefixes),
+        exact_commands=exact,
+        tool_rules=tool_rules,
+        tool_mappings=config["tool_mappings"],
+        keyword_shortcuts=shortcuts,
+    )
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw + f"\0compiler={COMPILER_VERSION}".encode()).hexdigest()[:16]
+
+
+def _artifact_path(cache_dir: str, source: Path, digest: str) -> Path:
+    return Path(cache_dir) / f"{source.stem}.{digest}.json"
+
+
+def _read_artifact(path: Path, digest: str) -> Optional[Dict[str, Any]]:
+    try:
+        artifact = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable routing rules artifact {path}: {e}")
+        return None
+    if artifact.get("compiler") != COMPILER_VERSION or artifact.get("content_hash") != digest:
+        return None
+    return artifact
+
+
+def _write_artifact(path: Path, artifact: Dict[str, Any]):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8") as handle:
+            json.dump(artifact, handle)
+        os.replace(handle.name, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache compiled routing rules: {e}")
+
+
+def load_rules(
+    path: str = RULES_FILE,
+    intent_key: Callable[[str], Any] = str,
+    cache_dir: Optional[str] = RULES_CACHE_DIR,
+) -> RoutingRules:
+    """Load a rules file, reusing the compiled artifact for unchanged content."""
+    source = Path(path)
+    try:
+        raw = source.read_bytes()
+    except OSError as e:
+        raise RoutingRulesError(f"Could not read routing rules {source}: {e}") from e
+    digest = content_hash(raw)
+
+    artifact_path = _artifact_path(cache_dir, source, digest) if cache_dir else None
+    if artifact_path is not None:
+        artifact = _read_artifact(artifact_path, digest)
+        if artifact is not None:
+            try:
+                return compile_rules(artifact["rules"], intent_key, prefixes=artifact.get("prefixes"),
+                                     source=str(source), content_hash=digest, loaded_from="artifact")
+            except (RoutingRulesError, KeyError, TypeError) as e:
+                logger.warning(f"⚠️ Recompiling routing rules, artifact unusable: {e}")
+
+    config = validate_rules(parse_rules(raw.decode("utf-8"), source.suffix))
+    rules = compile_rules(config, intent_key, source=str(source), content_hash=digest)
+    if artifact_path is not None:
+        _write_artifact(artifact_path, {
+            "compiler": COMPILER_VERSION,
+            "content_hash": digest,
+            "rules": config,
+            "prefixes": rules.pattern_engine.analysis(),
+        })
+    return rules
+
+
+# -- hot reload ---------------------------------------------------------------
+
+class RoutingRulesStore:
+    """Holds the current rule set and swaps in recompiled ones when the file changes."""
+
+    def __init__(self, path: str = RULES_FILE, intent_key: Callable[[str], Any] = str,
+                 cache_dir: Optional[str] = RULES_CACHE_DIR, poll_seconds: float = RULES_POLL_SECONDS):
+        self.path = Path(path)
+        self.intent_key = intent_key
+        self.cache_dir = cache_dir
+        self.poll_seconds = poll_seconds
+        self.reloads = 0
+        self.failures = 0
+        self._listeners: List[Callable[[RoutingRules], None]] = []
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signature = self._stat()
+        self._rules = load_rules(str(self.path), intent_key, cache_dir)
+        logger.info(f"📐 Routing rules loaded from {self._rules.loaded_from} ({self._rules.content_hash})")
+
+    @property
+    def current(self) -> RoutingRules:
+        """The active rule set; hold on to it for the duration of one request."""
+        return self._rules
+
+    def add_listener(self, callback: Callable[[RoutingRules], None]):
+        self._listeners.append(callback)
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile if the file changed; returns True when new rules were swapped in."""
+        with self._reload_lock:
+            signature = self._stat()
+            if not force and signature == self._signature:
+                return False
+            self._signature = signature
+            try:
+                rules = load_rules(str(self.path), self.intent_key, self.cache_dir)
+            except RoutingRulesError as e:
+                self.failures += 1
+                logger.error(f"❌ Keeping previous routing rules: {e}")
+                return False
+            if rules.content_hash == self._rules.content_hash:
+                return False
+            # Single reference swap: requests in flight keep the rules they already hold
+            self._rules = rules
+            self.reloads += 1
+        logger.info(f"🔄 Routing rules reloaded ({rules.content_hash})")
+        for callback in list(self._listeners):
+            try:
+                callback(rules)
+            except Exception as e:
+                logger.warning(f"Routing rules listener failed: {e}")
+        return True
+
+    def start_watching(self):
+        """Poll the rules file in a daemon thread (no-op if polling is disabled)."""
+        if self.poll_seconds <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="routing-rules-watcher", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.warning(f"Routing rules watcher error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "content_hash": self._rules.content_hash,
+            "loaded_from": self._rules.loaded_from,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "watching": bool(self._thread and self._thread.is_alive()),
+        }
+
+
+_stores: Dict[Any, RoutingRulesStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_routing_rules_store(intent_key: Callable[[str], Any] = str) -> RoutingRulesStore:
+    """Get the shared, self-reloading rules store for an intent key type."""
+    store = _stores.get(intent_key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(intent_key)
+            if store is None:
+                store = RoutingRulesStore(intent_key=intent_key)
+                store.start_watching()
+                _stores[intent_key] = store
+    return store
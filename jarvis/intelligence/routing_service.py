@@ -0,0 +1,215 @@
+"""
+Shared message routing service.
+
+A Discord message used to be pattern-matched up to four times on its way to
+a tool: IntentRouter, the command router's parse_command/detect_query_intent,
+again at format time, and finally client/llm_router behind /nl, with an LLM
+call possible at two of those layers. RoutingService routes a message once:
+
+- slash commands resolve through the shared command table (command_rules)
+- everything else goes through IntentRouter's tiers (exact command,
+  pattern, classifier, cached decision, LLM, pattern fallback); the
+  IntentRouter LLM is the one model fallback
+- the query style used for search refinement and formatting is computed in
+  the same pass
+
+The returned RoutingDecision travels with the message: the executor takes
+the tool and server from it, the formatter reads intent and query style from
+it, and the HTTP client forwards it to /nl (``route_hint``) so the client API
+executes it instead of routing the message a second time.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from jarvis.intelligence.command_rules import CommandTable, detect_query_style, get_command_table
+from jarvis.intelligence.intent_router import (
+    ROUTING_TIERS,
+    IntentResult,
+    IntentRouter,
+    IntentType,
+    get_intent_router,
+)
+from jarvis.intelligence.latency import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# "command" comes first: explicit slash commands never reach IntentRouter
+SERVICE_TIERS = ("command",) + ROUTING_TIERS
+COMMAND_CONFIDENCE = 1.0
+
+# Tool name prefix -> intent, for decisions made by the command table
+_TOOL_INTENTS = (
+    ("music_", IntentType.MUSIC),
+    ("events_", IntentType.SYSTEM),
+    ("trading.", IntentType.TRADING),
+    ("system.", IntentType.SYSTEM),
+    ("fitness.", IntentType.FITNESS),
+    ("jarvis_scan_news", IntentType.NEWS),
+    ("jarvis_web_search", IntentType.SEARCH),
+    ("search.", IntentType.SEARCH),
+    ("jarvis_get_", IntentType.SYSTEM),
+    ("jarvis_chat", IntentType.CHAT),
+)
+
+
+def intent_for_tool(tool_name: str) -> IntentType:
+    """Best-effort intent for a tool name."""
+    for prefix, intent in _TOOL_INTENTS:
+        if tool_name.startswith(prefix):
+            return intent
+    return IntentType.UNKNOWN
+
+
+def server_for_tool(tool_name: str) -> str:
+    """Music and event commands run in the bot; everything else via the jarvis server."""
+    if tool_name.startswith(("music_", "events_")):
+        return "local"
+    return "jarvis"
+
+
+@dataclass
+class RoutingDecision:
+    """Where a message goes, decided once and shared by every later stage."""
+    text: str
+    tool_name: str
+    arguments: Dict[str, Any]
+    server: str
+    intent_type: IntentType
+    confidence: float
+    tier: str
+    reasoning: str = ""
+    query_style: Dict[str, Any] = field(default_factory=dict)
+    intent_result: Optional[IntentResult] = None
+    # Whether an LLM had its say (directly or through the cache)
+    llm_consulted: bool = False
+    elapsed_ms: float = 0.0
+
+    @property
+    def is_local(self) -> bool:
+        return self.server == "local"
+
+    @property
+    def expects_detailed_response(self) -> bool:
+        return bool(self.query_style.get("metadata", {}).get("expects_detailed_response"))
+
+    def route_hint(self) -> Optional[Dict[str, Any]]:
+        """Pre-computed route for /nl, or None to let the HTTP layer route.
+
+        Only a pattern-fallback guess made without any LLM is left to the
+        client API's router, so at most one layer asks a model.
+        """
+        if self.intent_type == IntentType.UNKNOWN:
+            return None
+        if self.tier == "fallback" and not self.llm_consulted:
+            return None
+        return {
+            "tool": self.tool_name,
+            "arguments": self.arguments,
+            "tier": self.tier,
+            "confidence": round(self.confidence, 3),
+        }
+
+    def metadata(self) -> Dict[str, Any]:
+        """Summary stored with the conversation history."""
+        return {
+            "intent_type": self.intent_type.value,
+            "confidence": self.confidence,
+            "tool_used": self.tool_name,
+            "reasoning": self.reasoning,
+            "routing_tier": self.tier,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tool_name": self.tool_name,
+            "arguments": self.arguments,
+            "server": self.server,
+            "intent_type": self.intent_type.value,
+            "confidence": self.confidence,
+            "tier": self.tier,
+            "reasoning": self.reasoning,
+            "query_style": self.query_style.get("intent_type"),
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+class RoutingService:
+    """Single entry point for turning a message into a RoutingDecision."""
+
+    def __init__(self, intent_router: Optional[IntentRouter] = None,
+                 command_table: Optional[CommandTable] = None):
+        self.intent_router = intent_router or get_intent_router()
+        self.commands = command_table or get_command_table()
+        self.latency = {tier: LatencyHistogram() for tier in SERVICE_TIERS}
+        logger.info("🧭 RoutingService initialized")
+
+    def _command_decision(self, text: str, style: Dict[str, Any]) -> Optional[RoutingDecision]:
+        if not text.lstrip().startswith("/"):
+            return None
+        command = self.commands.match(text)
+        if command is None:
+            return None
+        return RoutingDecision(
+            text=text,
+            tool_name=command.tool,
+            arguments=command.arguments,
+            server=command.server or server_for_tool(command.tool),
+            intent_type=intent_for_tool(command.tool),
+            confidence=COMMAND_CONFIDENCE,
+            tier="command",
+            reasoning=f"Slash command: {text.split()[0].lower()}",
+            query_style=style,
+        )
+
+    def _intent_decision(self, text: str, result: IntentResult, style: Dict[str, Any]) -> RoutingDecision:
+        tier = result.tier or "fallback"
+        return RoutingDecision(
+            text=text,
+            tool_name=result.tool_name,
+            arguments=result.arguments,
+            server=server_for_tool(result.tool_name),
+            intent_type=result.intent_type,
+            confidence=result.confidence,
+            tier=tier,
+            reasoning=result.reasoning,
+            query_style=style,
+            intent_result=result,
+            llm_consulted=tier in ("llm", "cache") or (tier == "fallback" and self.intent_router.llm_available),
+        )
+
+    async def route(self, text: str, user_id: str = "", channel_id: str = "") -> RoutingDecision:
+        """Route a message once; the decision is meant to be reused downstream."""
+        started = time.perf_counter()
+        style = detect_query_style(text)
+        decision = self._command_decision(text, style)
+        if decision is None:
+            result = await self.intent_router.analyze_intent(text, user_id, channel_id)
+            decision = self._intent_decision(text, result, style)
+        decision.elapsed_ms = (time.perf_counter() - started) * 1000
+        histogram = self.latency.get(decision.tier)
+        if histogram is not None:
+            histogram.record(decision.elapsed_ms)
+        return decision
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """End-to-end routing latency per tier."""
+        return {
+            "decisions": sum(h.count for h in self.latency.values()),
+            "tiers": {tier: hist.summary() for tier, hist in self.latency.items() if hist.count},
+        }
+
+
+_routing_service: Optional[RoutingService] = None
+
+
+def get_routing_service() -> RoutingService:
+    """Get the global routing service instance."""
+    global _routing_service
+    if _routing_service is None:
+        _routing_service = RoutingService()
+    return _routing_service
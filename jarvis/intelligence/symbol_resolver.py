@@ -0,0 +1,366 @@
+"""
+Shared stock/crypto symbol resolver.
+
+Symbol detection used to be re-implemented by every router: ALL-CAPS token
+scans in ticker_utils, a substring loop over a crypto name dict in
+IntentRouter (so "unit" matched UNI and "nearby" NEAR), a hard-coded crypto
+set in client/llm_router and suffix stripping in the Discord bot. They all
+go through one SymbolResolver now:
+
+- an Aho-Corasick automaton over known tickers, names and aliases, matched
+  on word boundaries in a single pass over the message
+- explicit ALL-CAPS tickers the user typed still win
+- canonical forms per target: plain ticker for stonkss, BASE/USDT pairs,
+  BASE/USD command pairs, BASE-USD quote-feed symbols
+- an LRU of resolved phrases, since the same questions repeat
+
+Extra symbols and aliases can be loaded from a CSV with the columns
+``symbol,kind,aliases`` (aliases separated by ``|``), e.g.
+``PEPE,crypto,pepe|pepecoin``.
+
+Environment variables (with defaults):
+- SYMBOL_ALIASES_CSV: default unset (extra CSV loaded at startup)
+- SYMBOL_CACHE_SIZE: default 4096 resolved phrases
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_CACHE_SIZE = int(os.getenv("SYMBOL_CACHE_SIZE", "4096"))
+
+CRYPTO = "crypto"
+STOCK = "stock"
+
+# symbol, kind, aliases (the lowercased symbol is always an alias too)
+DEFAULT_SYMBOLS: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("BTC", CRYPTO, ("bitcoin", "xbt")),
+    ("ETH", CRYPTO, ("ethereum", "ether")),
+    ("SOL", CRYPTO, ("solana",)),
+    ("ADA", CRYPTO, ("cardano",)),
+    ("DOT", CRYPTO, ("polkadot",)),
+    ("MATIC", CRYPTO, ("polygon",)),
+    ("AVAX", CRYPTO, ("avalanche",)),
+    ("LINK", CRYPTO, ("chainlink",)),
+    ("UNI", CRYPTO, ("uniswap",)),
+    ("ATOM", CRYPTO, ("cosmos",)),
+    ("NEAR", CRYPTO, ()),
+    ("FTM", CRYPTO, ("fantom",)),
+    ("ALGO", CRYPTO, ("algorand",)),
+    ("XRP", CRYPTO, ("ripple",)),
+    ("LTC", CRYPTO, ("litecoin",)),
+    ("BCH", CRYPTO, ("bitcoin cash",)),
+    ("DOGE", CRYPTO, ("dogecoin",)),
+    ("SHIB", CRYPTO, ("shiba", "shiba inu")),
+    ("AAPL", STOCK, ("apple",)),
+    ("MSFT", STOCK, ("microsoft",)),
+    ("NVDA", STOCK, ("nvidia",)),
+    ("TSLA", STOCK, ("tesla",)),
+    ("AMZN", STOCK, ("amazon",)),
+    ("GOOGL", STOCK, ("google", "alphabet")),
+    ("META", STOCK, ("facebook",)),
+    ("NFLX", STOCK, ("netflix",)),
+    ("AMD", STOCK, ()),
+    ("SPY", STOCK, ()),
+    ("QQQ", STOCK, ()),
+)
+
+# Bare words that look like tickers but almost never are
+TICKER_STOPWORDS = frozenset({
+    "THE", "AND", "FOR", "WHAT", "HOW", "WHEN", "WHERE", "WHY", "WHO", "WITH",
+    "FROM", "THIS", "THAT", "THESE", "THOSE", "PRICE", "CURRENT", "GET", "SHOW",
+    "CHECK", "FIND", "LOOK", "SEE", "TRADING", "STOCK", "MARKET", "QUOTE",
+    "WORTH", "AT", "IS", "IT", "AN", "OR", "TO", "ON", "IN", "MY", "ME", "US",
+    "ARE", "WAS", "HAS", "HAD", "CAN", "MAY", "NEW", "OLD", "TOP", "ALL",
+    "OF", "BY", "AS", "IF", "SO", "DO", "BE", "VS", "NOW", "MUCH", "TELL", "GIVE",
+})
+
+_CAPS_RE = re.compile(r"\b([A-Z]{1,5})\b")
+_UPPER_RE = re.compile(r"\b([A-Z]{2,5})\b")
+
+# Canonical forms: how each target spells a symbol
+PLAIN = "plain"          # stonkss: AAPL, BTC
+USDT_PAIR = "usdt"       # exchange pairs for crypto: BTC/USDT (stocks unchanged)
+USD_PAIR = "usd_pair"    # slash commands: BTC/USD, AAPL/USD
+DASH_USD = "dash_usd"    # quote feeds for crypto: BTC-USD (stocks unchanged)
+
+TOOL_FORMATS: Dict[str, str] = {
+    "trading.get_quote": PLAIN,
+    "trading.get_snapshot": PLAIN,
+    "trading.get_bars": PLAIN,
+    "trading.search_symbols": PLAIN,
+    "trading.get_momentum": PLAIN,
+    "trading.get_price": USDT_PAIR,
+    "trading.get_analysis": USDT_PAIR,
+    "trading.trading.get_price": USD_PAIR,
+    "trading.trading.get_ohlcv": USD_PAIR,
+}
+
+
+@dataclass(frozen=True)
+class SymbolMatch:
+    """A known symbol found in a message."""
+    symbol: str
+    kind: str
+    alias: str
+    start: int
+    end: int
+
+
+class AliasAutomaton:
+    """Aho-Corasick automaton over lowercase alias phrases."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._own: List[List[Tuple[str, int]]] = [[]]  # (alias, length) ending at a state
+        self._out: List[List[Tuple[str, int]]] = [[]]  # own outputs plus those of fail links
+        self._built = True
+
+    def add(self, alias: str):
+        state = 0
+        for char in alias:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+                self._out.append([])
+            state = nxt
+        if not any(existing == alias for existing, _ in self._own[state]):
+            self._own[state].append((alias, len(alias)))
+        self._built = False
+
+    def build(self):
+        """Compute failure links and merged outputs (breadth first)."""
+        out = [list(own) for own in self._own]
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                out[nxt] = out[nxt] + out[self._fail[nxt]]
+        self._out = out
+        self._built = True
+
+    def scan(self, text: str) -> Iterable[Tuple[int, int, str]]:
+        """Yield (start, end, alias) for every occurrence, in end order."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for alias, length in out[state]:
+                yield index + 1 - length, index + 1, alias
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class SymbolResolver:
+    """Finds, ranks and formats stock/crypto symbols in free text."""
+
+    def __init__(self, symbols: Iterable[Tuple[str, str, Iterable[str]]] = DEFAULT_SYMBOLS,
+                 cache_size: int = SYMBOL_CACHE_SIZE):
+        self._aliases: Dict[str, Tuple[str, str]] = {}  # alias -> (symbol, kind)
+        self._kinds: Dict[str, str] = {}
+        self._automaton = AliasAutomaton()
+        self._cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._cache_size = max(1, int(cache_size))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        for symbol, kind, aliases in symbols:
+            self.add(symbol, kind, aliases)
+        self._automaton.build()
+
+    # -- dictionary -------------------------------------------------------
+
+    def add(self, symbol: str, kind: str = STOCK, aliases: Iterable[str] = ()):
+        """Register a symbol and its aliases (the symbol itself is always one)."""
+        symbol = symbol.strip().upper()
+        if not symbol:
+            return
+        kind = (kind or STOCK).strip().lower()
+        with self._lock:
+            self._kinds[symbol] = kind
+            for alias in (symbol, *aliases):
+                alias = " ".join(alias.lower().split())
+                if alias:
+                    self._aliases[alias] = (symbol, kind)
+                    self._automaton.add(alias)
+            self._cache.clear()
+
+    def load_csv(self, path: str) -> int:
+        """Load ``symbol,kind,aliases`` rows; returns the number of symbols added."""
+        added = 0
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                symbol = (row.get("symbol") or "").strip()
+                if not symbol or symbol.startswith("#"):
+                    continue
+                aliases = [a for a in (row.get("aliases") or "").split("|") if a.strip()]
+                self.add(symbol, row.get("kind") or STOCK, aliases)
+                added += 1
+        self._automaton.build()
+        logger.info(f"📈 Loaded {added} symbols from {path}")
+        return added
+
+    def lookup(self, phrase: str) -> Optional[str]:
+        """Symbol for an exact name or alias ("bitcoin" -> BTC), else None."""
+        entry = self._aliases.get(" ".join((phrase or "").lower().split()))
+        return entry[0] if entry else None
+
+    def kind_of(self, symbol: str) -> Optional[str]:
+        return self._kinds.get(self.base(symbol))
+
+    def is_crypto(self, symbol: str) -> bool:
+        return self.kind_of(symbol) == CRYPTO
+
+    # -- detection --------------------------------------------------------
+
+    def find(self, text: str) -> List[SymbolMatch]:
+        """Known symbols in text, leftmost-longest, on word boundaries."""
+        lowered = text.lower()
+        candidates = []
+        for start, end, alias in self._automaton.scan(lowered):
+            if start > 0 and _is_word_char(lowered[start - 1]):
+                continue
+            if end < len(lowered) and _is_word_char(lowered[end]):
+                continue
+            candidates.append((start, -end, alias))
+        matches: List[SymbolMatch] = []
+        taken_until = 0
+        for start, neg_end, alias in sorted(candidates):
+            if start < taken_until:
+                continue
+            symbol, kind = self._aliases[alias]
+            matches.append(SymbolMatch(symbol, kind, alias, start, -neg_end))
+            taken_until = -neg_end
+        return matches
+
+    def extract(self, text: str) -> List[str]:
+        """Return symbol candidates, best match first.
+
+        ALL-CAPS tokens the user typed come first (e.g. AAPL in "what's AAPL
+        trading at"; apostrophe fragments like the S in WHAT'S are ignored),
+        then known names and aliases ("price of bitcoin" -> BTC). Only when
+        neither finds anything are bare words of 2-5 letters considered.
+        """
+        key = text or ""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return list(cached)
+            self.misses += 1
+
+        found: List[str] = []
+        for match in _CAPS_RE.findall(key):
+            if match not in TICKER_STOPWORDS and match not in found:
+                found.append(match)
+        found.sort(key=len, reverse=True)
+        for match in self.find(key):
+            if match.symbol not in found:
+                found.append(match.symbol)
+        if not found:
+            for match in _UPPER_RE.findall(key.upper()):
+                if match not in TICKER_STOPWORDS and match not in found:
+                    found.append(match)
+            found.sort(key=len, reverse=True)
+
+        with self._lock:
+            self._cache[key] = tuple(found)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    # -- canonical forms --------------------------------------------------
+
+    @staticmethod
+    def base(symbol: str) -> str:
+        """Strip pair suffixes: BTC/USDT, BTC-USD -> BTC."""
+        symbol = (symbol or "").strip().upper()
+        for separator in ("/", "-"):
+            if separator in symbol:
+                return symbol.split(separator, 1)[0]
+        return symbol
+
+    def canonical(self, symbol: str, target: str = PLAIN) -> str:
+        """Spell a symbol the way a target expects.
+
+        ``target`` is a format name (PLAIN, USDT_PAIR, USD_PAIR, DASH_USD) or a
+        tool name listed in TOOL_FORMATS; unknown tools leave the symbol as is.
+        """
+        symbol = (symbol or "").strip().upper()
+        fmt = TOOL_FORMATS.get(target, target)
+        if not symbol:
+            return symbol
+        if fmt == PLAIN:
+            return self.base(symbol)
+        if fmt == USD_PAIR:
+            return symbol if "/" in symbol else f"{symbol}/USD"
+        if fmt == USDT_PAIR:
+            if "/" in symbol:
+                return symbol
+            if self.is_crypto(symbol) or len(symbol) > 5:
+                return f"{symbol}/USDT"
+            return symbol
+        if fmt == DASH_USD:
+            base = self.base(symbol)
+            return f"{base}-USD" if self.is_crypto(base) else symbol
+        return symbol
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "symbols": len(self._kinds),
+                "aliases": len(self._aliases),
+                "cached_phrases": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_resolver: Optional[SymbolResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_symbol_resolver() -> SymbolResolver:
+    """Get the global symbol resolver (loads SYMBOL_ALIASES_CSV once)."""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                resolver = SymbolResolver()
+                extra = os.getenv("SYMBOL_ALIASES_CSV")
+                if extra:
+                    try:
+                        resolver.load_csv(extra)
+                    except (OSError, csv.Error) as e:
+                        logger.warning(f"⚠️ Could not load symbol aliases from {extra}: {e}")
+                _resolver = resolver
+    return _resolver
@@ -1,17 +1,14 @@
-"""Extract stock/crypto tickers from natural-language queries."""
+"""Extract stock/crypto tickers from natural-language queries.
+
+Detection and formatting live in symbol_resolver; these helpers keep the
+argument-enrichment rules for trading tools.
+"""
 
 from __future__ import annotations
 
-import re
 from typing import Any, Dict, List
 
-_TICKER_STOPWORDS = frozenset({
-    "THE", "AND", "FOR", "WHAT", "HOW", "WHEN", "WHERE", "WHY", "WHO", "WITH",
-    "FROM", "THIS", "THAT", "THESE", "THOSE", "PRICE", "CURRENT", "GET", "SHOW",
-    "CHECK", "FIND", "LOOK", "SEE", "TRADING", "STOCK", "MARKET", "QUOTE",
-    "WORTH", "AT", "IS", "IT", "AN", "OR", "TO", "ON", "IN", "MY", "ME", "US",
-    "ARE", "WAS", "HAS", "HAD", "CAN", "MAY", "NEW", "OLD", "TOP", "ALL",
-})
+from jarvis.intelligence.symbol_resolver import get_symbol_resolver
 
 _SYMBOL_TOOLS = frozenset({
     "trading.get_quote",
@@ -25,19 +22,10 @@ def extract_ticker_symbols(text: str) -> List[str]:
     """Return ticker candidates, best match first.
 
     Prefer user-typed ALL-CAPS tokens (e.g. AAPL in "what's AAPL trading at") so
-    apostrophe fragments like the S in WHAT'S are ignored.
+    apostrophe fragments like the S in WHAT'S are ignored, then known names
+    ("price of bitcoin" -> BTC).
     """
-    found: List[str] = []
-    for match in re.findall(r"\b([A-Z]{1,5})\b", text):
-        if match not in _TICKER_STOPWORDS and match not in found:
-            found.append(match)
-    if found:
-        return sorted(found, key=len, reverse=True)
-
-    for match in re.findall(r"\b([A-Z]{2,5})\b", text.upper()):
-        if match not in _TICKER_STOPWORDS and match not in found:
-            found.append(match)
-    return sorted(found, key=len, reverse=True)
+    return get_symbol_resolver().extract(text)
 
 
 def enrich_trading_arguments(
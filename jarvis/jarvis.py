@@ -11,8 +11,10 @@ import subprocess
 import platform
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
+from .models.context_window import pack_messages
+from .ollama_residency import keep_alive_value
 try:
-    from langchain_ollama import OllamaLLM
+    from langchain_ollama import ChatOllama
     from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
     LANGCHAIN_AVAILABLE = True
 except ImportError:
@@ -117,11 +119,13 @@ class Jarvis:
                 llm_kwargs: Dict[str, Any] = {
                     "model": model_name,
                     "temperature": 0.7,
+                    "keep_alive": keep_alive_value(),
                 }
                 # Never stream model output to stdout in MCP stdio child mode.
                 if os.environ.get("JARVIS_MCP_STDIO_CHILD") != "1":
                     llm_kwargs["callbacks"] = [StreamingStdOutCallbackHandler()]
-                self.llm = OllamaLLM(**llm_kwargs)
+                # Chat API, so the fixed persona and history prefix is evaluated once
+                self.llm = ChatOllama(**llm_kwargs)
             except Exception as e:
                 print(f"Warning: Could not initialize AI model: {e}", file=sys.stderr)
                 self.llm = None
@@ -700,6 +704,39 @@ class Jarvis:
             # Handle natural language input
             self.chat(command)
     
+    def _chat_persona(self):
+        """System prompt for chat; fixed for the session so Ollama reuses its evaluation."""
+        return f"""You are JARVIS, the AI assistant from Iron Man. You are sophisticated, helpful, and slightly witty. You assist {self.user_name} with various tasks and provide intelligent responses.
+
+Your personality:
+- Professional but friendly
+- Helpful and resourceful
+- Slightly witty and charming
+- Knowledgeable about technology and productivity
+- Respectful and supportive
+
+Keep responses concise but helpful. You can suggest tasks, provide information, or have a conversation.
+If the user asks for help with productivity, suggest specific tasks or improvements."""
+    
+    def _chat_messages(self, message):
+        """Persona, history packed to the token budget, then the current context and message.
+        
+        The time and task count change every turn, so they go with the new
+        message instead of into the system prompt, keeping the prefix stable.
+        """
+        context = f"""Current context:
+- User: {self.user_name}
+- Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+- Pending tasks: {len([t for t in self.tasks if t.status == 'pending'])}
+- System: {self.system_info['os']}
+
+{message}"""
+        # The message itself was just appended to the history
+        history = [{"role": msg["role"], "content": msg["content"]} for msg in self.conversation_history[:-1]]
+        messages = [{"role": "system", "content": self._chat_persona()}, *history,
+                    {"role": "user", "content": context}]
+        return pack_messages(messages)
+    
     def chat(self, message):
         """Handle natural language conversation with the user."""
         try:
@@ -722,34 +759,9 @@ class Jarvis:
                 print("I can still help you with task management and system commands.")
                 return
             
-            # Create context for the AI
-            context = f"""You are JARVIS, the AI assistant from Iron Man. You are sophisticated, helpful, and slightly witty. You assist {self.user_name} with various tasks and provide intelligent responses.
-
-Your personality:
-- Professional but friendly
-- Helpful and resourceful
-- Slightly witty and charming
-- Knowledgeable about technology and productivity
-- Respectful and supportive
-
-Current context:
-- User: {self.user_name}
-- Time: {datetime.now().strftime('%Y-%m-%d %H:%M')}
-- Pending tasks: {len([t for t in self.tasks if t.status == 'pending'])}
-- System: {self.system_info['os']}
-
-Keep responses concise but helpful. You can suggest tasks, provide information, or have a conversation.
-If the user asks for help with productivity, suggest specific tasks or improvements.
-
-Recent conversation:"""
-            
-            for msg in self.conversation_history[-3:]:  # Use last 3 messages for context
-                role = "User" if msg['role'] == "user" else "JARVIS"
-                context += f"\n{role}: {msg['content']}"
-            
             # Get response from AI
             print(f"\n🤖 {self.name}: ", end="")
-            response = self.llm.invoke(context + f"\nJARVIS: ")
+            response = self.llm.invoke(self._chat_messages(message)).content
             
             # Add assistant response to history
             self.conversation_history.append({"role": "assistant", "content": response})
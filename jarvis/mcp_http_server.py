@@ -450,7 +450,7 @@ class JarvisHTTPMCPServer:
                         else:
                             system_prompt = base
                         
-                        reply = brain_generate(system_prompt, message)
+                        reply = await asyncio.to_thread(brain_generate, system_prompt, message)
                         if not reply or reply.startswith("[LLM unavailable"):
                             reply = "I registered your message. I'll remember key details and respond succinctly."
                         
@@ -652,12 +652,18 @@ class JarvisHTTPMCPServer:
     
     async def get_status(self, request):
         """Get server status."""
+        try:
+            from jarvis.intelligence.routing_cache import routing_cache_stats
+            routing_cache = routing_cache_stats()
+        except Exception:
+            routing_cache = {}
         return web.json_response({
             "server": "Jarvis MCP HTTP Server",
             "user": self.jarvis.user_name,
             "host": self.host,
             "port": self.port,
             "status": "running",
+            "routing_cache": routing_cache,
             "timestamp": datetime.now().isoformat()
         })
     
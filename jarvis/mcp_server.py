@@ -46,8 +46,7 @@ load_dotenv("brain.env")
 from .tools.fitness import list_workouts as fitness_list_workouts, search_workouts as fitness_search_workouts
 try:
     # Use the new brain package for memory + LLM
-    from brain import memory as brain_memory
-    from brain.llm import generate as brain_generate
+    from brain import conversation as brain_chat
     BRAIN_AVAILABLE = True
 except Exception:
     BRAIN_AVAILABLE = False
@@ -381,32 +380,7 @@ class JarvisMCPServer:
             # Prefer brain-backed chat if available
             if BRAIN_AVAILABLE:
                 try:
-                    brain_memory.save_message("user", message)
-                    mems = brain_memory.search_memories(message, limit=5)
-                    used_memories = [m[2] for m in mems]
-                    base = (
-                        "You are Jarvis, a concise, helpful AI assistant. "
-                        "Use short sentences and helpful bullet points when useful."
-                    )
-                    if used_memories:
-                        joined = "\n- ".join(used_memories)
-                        system_prompt = base + f"\n\nRelevant memories:\n- {joined}"
-                    else:
-                        system_prompt = base
-                    reply = brain_generate(system_prompt, message)
-                    if not reply or reply.startswith("[LLM unavailable"):
-                        reply = "I registered your message. I'll remember key details and respond succinctly."
-                    brain_memory.save_message("assistant", reply)
-                    try:
-                        recent = brain_memory.recent_messages(100)
-                        if len(recent) % 10 == 0:
-                            brain_memory.summarize_thread()
-                    except Exception:
-                        pass
-                    if used_memories:
-                        preview = "\n\nRecall: " + "; ".join(used_memories[:2])
-                        if preview not in reply:
-                            reply = (reply or "").strip() + preview
+                    reply = await asyncio.to_thread(brain_chat.reply, message)
                     return [TextContent(type="text", text=reply)]
                 except Exception:
                     pass
@@ -815,7 +789,7 @@ class JarvisMCPServer:
                 ),
                 Tool(
                     name="orchestrator.run_plan",
-                    description="Execute a multi-step plan of tool calls, with optional parallel steps and retries.",
+                    description="Execute a multi-step plan of tool calls, with optional parallel steps and retries. Steps may declare id/depends_on to run as a dependency graph and reference upstream results with {{step_id}} in args.",
                     inputSchema={
                         "type": "object",
                         "properties": {
@@ -824,14 +798,25 @@ class JarvisMCPServer:
                                 "items": {
                                     "type": "object",
                                     "properties": {
+                                        "id": {"type": "string"},
+                                        "depends_on": {"type": "array", "items": {"type": "string"}},
                                         "tool": {"type": "string"},
                                         "args": {"type": "object"},
-                                        "parallel": {"type": "boolean"}
+                                        "parallel": {"type": "boolean"},
+                                        "timeout": {"type": "number"},
+                                        "idempotent": {"type": "boolean"}
                                     },
                                     "required": ["tool"]
                                 },
                                 "description": "Ordered list of steps to execute"
-                            }
+                            },
+                            "failure_policy": {
+                                "type": "string",
+                                "enum": ["propagate", "continue", "fail_fast"],
+                                "description": "What to do with dependents of a failed step"
+                            },
+                            "plan_timeout": {"type": "number", "description": "Deadline for the whole plan in seconds"},
+                            "hedge_after": {"type": "number", "description": "Send a backup request for slow read-only steps after this many seconds"}
                         },
                         "required": ["steps"]
                     }
@@ -901,45 +886,8 @@ class JarvisMCPServer:
                     # If brain is available, use it as the chat backend (memory + LLM)
                     if BRAIN_AVAILABLE:
                         try:
-                            # Save user message
-                            brain_memory.save_message("user", message)
-
-                            # Retrieve relevant memories (simple LIKE search)
-                            mems = brain_memory.search_memories(message, limit=5)
-                            used_memories = [m[2] for m in mems]
-
-                            # Build a concise Jarvis persona prompt with surfaced memories
-                            base = (
-                                "You are Jarvis, a concise, helpful AI assistant. "
-                                "Use short sentences and helpful bullet points when useful."
-                            )
-                            if used_memories:
-                                joined = "\n- ".join(used_memories)
-                                system_prompt = base + f"\n\nRelevant memories:\n- {joined}"
-                            else:
-                                system_prompt = base
-
-                            reply = brain_generate(system_prompt, message)
-                            # Hard fallback if brain returns unavailability marker
-                            if not reply or reply.startswith("[LLM unavailable"):
-                                reply = "I registered your message. I'll remember key details and respond succinctly."
-
-                            # Save assistant reply
-                            brain_memory.save_message("assistant", reply)
-
-                            # Periodically summarize to long-term memory
-                            try:
-                                recent = brain_memory.recent_messages(100)
-                                if len(recent) % 10 == 0:
-                                    brain_memory.summarize_thread()
-                            except Exception:
-                                pass
-
-                            # Include a small recall preview to make memory use visible
-                            if used_memories:
-                                preview = "\n\nRecall: " + "; ".join(used_memories[:2])
-                                if preview not in reply:
-                                    reply = (reply or "").strip() + preview
+                            # Memory + persona + LLM turn, shared with the streaming /nl endpoint
+                            reply = await asyncio.to_thread(brain_chat.reply, message)
 
                             return [TextContent(type="text", text=reply)]
                         except Exception as e:
@@ -1097,7 +1045,16 @@ class JarvisMCPServer:
                         async def call_tool(self_inner, tool_name: str, args: Dict[str, Any]):
                             return await self._dispatch_tool(tool_name, args)
 
-                    plan_results = await execute_plan(steps, _LocalClient())
+                    try:
+                        plan_results = await execute_plan(
+                            steps,
+                            _LocalClient(),
+                            failure_policy=arguments.get("failure_policy"),
+                            plan_timeout=arguments.get("plan_timeout"),
+                            hedge_after=arguments.get("hedge_after"),
+                        )
+                    except ValueError as e:
+                        return [TextContent(type="text", text=f"Error: Invalid plan: {e}")]
                     import json as _json
                     return [TextContent(type="text", text=_json.dumps({"results": plan_results}, indent=2))]
 
@@ -0,0 +1,369 @@
+"""
+Process-wide admission control for LLM calls, with priority lanes.
+
+The provider pools (see async_pool) cap in-flight requests per provider,
+but nothing ranked the callers: a burst of background summarization or a
+news scan took the local Ollama's slots and interactive chat queued behind
+it. Every LLM call now asks the AdmissionController for a slot first, in
+one of four lanes, highest priority first:
+
+- interactive: chat replies (the default)
+- routing: intent classification and /nl planning
+- formatting: the Discord response formatter
+- background: thread summaries, agent reflections and other batch work
+
+A freed slot always goes to the oldest waiter of the highest-priority lane
+that is under its own concurrency limit, so lower lanes only run on
+capacity the higher ones are not using, and their lower default limits
+keep headroom for interactive calls. Each lane also bounds its queue: a
+request that finds it full is rejected at once. Requests carry a deadline
+(the lane's maximum wait unless the caller passes one) and are shed instead
+of admitted once it has passed, or up front when the expected wait
+(requests ahead of it times the lane's average slot hold time) is already
+beyond it; a caller that would give up anyway does not hold a slot.
+
+Both asyncio callers (ModelManager) and threads (brain.llm) are served by
+the same controller, so the limits are process-wide. A thread that is
+itself running an event loop is admitted at once (counted as overflow):
+blocking it could stall the very calls holding the slots. Rejections raise
+AdmissionRejected; ModelManager turns them into its usual error replies,
+brain.llm into the chat fallback for interactive calls and an empty reply
+for the other lanes (so a shed summary is not saved as a memory).
+
+Environment variables (with defaults):
+- LLM_ADMISSION: default 1; 0 admits every call immediately
+- LLM_MAX_CONCURRENCY: default 6 LLM calls in flight across all lanes
+- LLM_LANE_<LANE>_CONCURRENCY: default interactive 4, routing 3, formatting 2, background 1
+- LLM_LANE_<LANE>_QUEUE: default interactive 64, routing 64, formatting 32, background 16
+- LLM_LANE_<LANE>_MAX_WAIT: default interactive 30, routing 10, formatting 15, background 120 seconds
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+LANES = ("interactive", "routing", "formatting", "background")
+DEFAULT_LANE = "interactive"
+
+# (concurrency, queue depth, max wait in seconds) per lane
+_LANE_DEFAULTS = {
+    "interactive": (4, 64, 30.0),
+    "routing": (3, 64, 10.0),
+    "formatting": (2, 32, 15.0),
+    "background": (1, 16, 120.0),
+}
+
+# Call sites (response cache labels, up to the first ".") outside the interactive lane
+SITE_LANES = {
+    "intent_router": "routing",
+    "llm_router": "routing",
+    "formatter": "formatting",
+    "summarize_thread": "background",
+}
+
+ADMISSION_ENABLED = os.getenv("LLM_ADMISSION", "1") != "0"
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "6"))
+
+# Recent queue waits kept per lane for percentiles
+WAIT_WINDOW = 256
+# Weight of the newest slot hold time in the per-lane average
+HOLD_ALPHA = 0.2
+
+
+def lane_for(site: Optional[str]) -> str:
+    """Lane of a call site label ("formatter", "llm_router.plan", ...); interactive if unknown."""
+    if not site:
+        return DEFAULT_LANE
+    return SITE_LANES.get(site.split(".", 1)[0], DEFAULT_LANE)
+
+
+class AdmissionRejected(RuntimeError):
+    """A request was not admitted: its lane's queue was full or its deadline passed."""
+
+    def __init__(self, lane: str, reason: str):
+        super().__init__(f"LLM {lane} lane {reason}")
+        self.lane = lane
+        self.reason = reason
+
+
+class _Lane:
+    def __init__(self, name: str):
+        concurrency, queue, max_wait = _LANE_DEFAULTS[name]
+        prefix = f"LLM_LANE_{name.upper()}_"
+        self.name = name
+        self.concurrency = max(1, int(os.getenv(prefix + "CONCURRENCY", str(concurrency))))
+        self.queue_limit = max(0, int(os.getenv(prefix + "QUEUE", str(queue))))
+        self.max_wait = float(os.getenv(prefix + "MAX_WAIT", str(max_wait)))
+        self.queue: Deque[_Waiter] = deque()
+        self.active = 0
+        self.hold_s: Optional[float] = None
+        self.waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+        # Counters for status endpoints
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.shed = 0
+        self.cancelled = 0
+        self.overflow = 0
+        self.peak_queue = 0
+        self.max_wait_ms = 0.0
+
+    def record_hold(self, seconds: float) -> None:
+        self.hold_s = seconds if self.hold_s is None else self.hold_s + HOLD_ALPHA * (seconds - self.hold_s)
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def pct(q: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))], 1)
+
+        return {
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue_limit,
+            "active": self.active,
+            "waiting": len(self.queue),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "cancelled": self.cancelled,
+            "overflow": self.overflow,
+            "peak_queue": self.peak_queue,
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": round(self.max_wait_ms, 1),
+            "avg_hold_ms": None if self.hold_s is None else round(self.hold_s * 1000, 1),
+        }
+
+
+class _Waiter:
+    """A queued request; ``notify`` wakes its owner (a thread or an event loop)."""
+
+    def __init__(self, lane: _Lane, deadline: float, notify: Callable[[], None]):
+        self.lane = lane
+        self.deadline = deadline
+        self.notify = notify
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.shed = False
+        self.ticket: Optional[Ticket] = None
+
+
+class Ticket:
+    """An admitted request's slot; release() it when the call is done."""
+
+    def __init__(self, controller: "AdmissionController", lane: _Lane):
+        self._controller = controller
+        self.lane = lane.name
+        self._lane = lane
+        self._start = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self._lane, time.monotonic() - self._start)
+
+
+class AdmissionController:
+    """Priority lanes with per-lane concurrency and queue limits under one global limit."""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, enabled: bool = ADMISSION_ENABLED):
+        self.enabled = enabled
+        self.max_concurrency = max(1, max_concurrency)
+        self.lanes: Dict[str, _Lane] = {name: _Lane(name) for name in LANES}
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def _lane(self, name: Optional[str]) -> _Lane:
+        return self.lanes.get(name or DEFAULT_LANE) or self.lanes[DEFAULT_LANE]
+
+    def _expected_wait(self, lane: _Lane) -> float:
+        """Seconds until a new request in ``lane`` would be admitted, from average hold times."""
+        if lane.hold_s is None:
+            return 0.0
+        # Each of the lane's slots frees up about once per average hold time
+        per_slot = lane.hold_s / min(lane.concurrency, self.max_concurrency)
+        return (len(lane.queue) + 1) * per_slot
+
+    def _try_enter(self, lane: _Lane, timeout: Optional[float],
+                   notify: Callable[[], None]) -> "Ticket | _Waiter":
+        """Admit at once, queue a waiter, or raise AdmissionRejected (under the lock)."""
+        now = time.monotonic()
+        deadline = now + (lane.max_wait if timeout is None else timeout)
+        # Waiters in higher lanes only remain queued while their own lane is full
+        if not lane.queue and lane.active < lane.concurrency and self.active < self.max_concurrency:
+            return self._grant(lane, 0.0)
+        if len(lane.queue) >= lane.queue_limit:
+            lane.rejected += 1
+            raise AdmissionRejected(lane.name, "queue full")
+        if now + self._expected_wait(lane) > deadline:
+            lane.shed += 1
+            raise AdmissionRejected(lane.name, "deadline exceeded")
+        waiter = _Waiter(lane, deadline, notify)
+        lane.queue.append(waiter)
+        lane.queued += 1
+        lane.peak_queue = max(lane.peak_queue, len(lane.queue))
+        return waiter
+
+    def _grant(self, lane: _Lane, waited_s: float) -> Ticket:
+        lane.active += 1
+        self.active += 1
+        lane.admitted += 1
+        lane.waits.append(waited_s * 1000)
+        lane.max_wait_ms = max(lane.max_wait_ms, waited_s * 1000)
+        return Ticket(self, lane)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, highest-priority lane first (under the lock)."""
+        now = time.monotonic()
+        for name in LANES:
+            lane = self.lanes[name]
+            while lane.queue:
+                waiter = lane.queue[0]
+                if waiter.deadline <= now:
+                    # Nobody wants this answer any more; do not spend a slot on it
+                    lane.queue.popleft()
+                    lane.shed += 1
+                    waiter.shed = True
+                    waiter.notify()
+                    continue
+                if lane.active >= lane.concurrency or self.active >= self.max_concurrency:
+                    break
+                lane.queue.popleft()
+                waiter.granted = True
+                waiter.ticket = self._grant(lane, now - waiter.enqueued)
+                waiter.notify()
+
+    def _release(self, lane: _Lane, held_s: float) -> None:
+        with self._lock:
+            lane.active -= 1
+            self.active -= 1
+            lane.record_hold(held_s)
+            self._dispatch()
+
+    def _settle(self, waiter: _Waiter, cancelled: bool) -> Ticket:
+        """Outcome of a waiter whose wait ended (under the lock); raises if it was not admitted."""
+        if waiter.granted:
+            if cancelled:
+                # Granted while being cancelled: hand the slot on
+                waiter.ticket.release()
+                raise asyncio.CancelledError()
+            return waiter.ticket
+        if not waiter.shed:
+            waiter.lane.queue.remove(waiter)
+            if cancelled:
+                waiter.lane.cancelled += 1
+            else:
+                waiter.lane.shed += 1
+            # This waiter may have been blocking lower lanes
+            self._dispatch()
+        if cancelled:
+            raise asyncio.CancelledError()
+        raise AdmissionRejected(waiter.lane.name, "deadline exceeded")
+
+    async def acquire(self, lane: Optional[str] = None, timeout: Optional[float] = None) -> Ticket:
+        """Wait for a slot in ``lane`` for up to ``timeout`` seconds (the lane's max wait by default)."""
+        target = self._lane(lane)
+        if not self.enabled:
+            return Ticket(_Unlimited(), target)
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: admitted.done() or admitted.set_result(None))
+
+        with self._lock:
+            entry = self._try_enter(target, timeout, wake)
+        if isinstance(entry, Ticket):
+            return entry
+        try:
+            await asyncio.wait_for(admitted, timeout=max(0.0, entry.deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                self._settle(entry, cancelled=True)
+        with self._lock:
+            return self._settle(entry, cancelled=False)
+
+    def acquire_sync(self, lane: Optional[str] = None, timeout: Optional[float] = None) -> Ticket:
+        """Blocking acquire() for threads."""
+        target = self._lane(lane)
+        if not self.enabled:
+            return Ticket(_Unlimited(), target)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Blocking here would stall the loop the slot holders need to finish;
+            # admit at once, over the limit, so the call is still accounted for
+            with self._lock:
+                target.overflow += 1
+                return self._grant(target, 0.0)
+        admitted = threading.Event()
+        with self._lock:
+            entry = self._try_enter(target, timeout, admitted.set)
+        if isinstance(entry, Ticket):
+            return entry
+        admitted.wait(max(0.0, entry.deadline - time.monotonic()))
+        with self._lock:
+            return self._settle(entry, cancelled=False)
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None, timeout: Optional[float] = None) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire(lane, timeout)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    @contextmanager
+    def slot_sync(self, lane: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[Ticket]:
+        ticket = self.acquire_sync(lane, timeout)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "max_concurrency": self.max_concurrency,
+                "active": self.active,
+                "lanes": {name: lane.get_stats() for name, lane in self.lanes.items()},
+            }
+
+
+class _Unlimited:
+    """Stands in for the controller when admission is disabled."""
+
+    def _release(self, lane: _Lane, held_s: float) -> None:
+        pass
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """The process-wide admission controller."""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,123 @@
+"""
+Pooled native async clients for model providers.
+
+ModelManager used to push Claude and Ollama calls onto a two-thread
+executor and ran the OpenAI SDK directly on the event loop, so concurrent
+chats queued behind two threads or froze the bot outright. Each provider
+now owns a ProviderPool:
+
+- one native async client per event loop (AsyncAnthropic, AsyncOpenAI, an
+  aiohttp session), created lazily and kept for the life of the loop, so
+  connections stay alive and are reused between requests
+- an asyncio.Semaphore capping the provider's in-flight requests, so a
+  burst turns into at most ``max_concurrency`` concurrent requests instead
+  of an unbounded pile-up (or two at a time behind an executor)
+
+Environment variables (with defaults):
+- CLAUDE_MAX_CONCURRENCY: default 4 in-flight requests
+- OPENAI_MAX_CONCURRENCY: default 8 in-flight requests
+- OLLAMA_MAX_CONCURRENCY: default 4 (match OLLAMA_NUM_PARALLEL on the server)
+- MODEL_KEEPALIVE_SECONDS: default 60 seconds an idle pooled connection is kept
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+CLAUDE_MAX_CONCURRENCY = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "4"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+KEEPALIVE_SECONDS = float(os.getenv("MODEL_KEEPALIVE_SECONDS", "60"))
+
+C = TypeVar("C")
+
+
+class ProviderPool(Generic[C]):
+    """A provider's async client and concurrency limit, bound to the running loop.
+
+    ``factory`` builds the client; ``close`` (optional) returns an awaitable
+    that releases its connections. Async clients and semaphores belong to
+    the loop they were created on, so a new loop gets a fresh client; the
+    old one is closed on its own loop if that loop is still running.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], C], max_concurrency: int,
+                 close: Optional[Callable[[C], Awaitable[Any]]] = None):
+        self.name = name
+        self.factory = factory
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._close = close
+        self._client: Optional[C] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Counters for status endpoints
+        self.requests = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.clients_created = 0
+
+    def client(self) -> C:
+        """The client for the running loop, without taking a concurrency slot."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._client is None:
+            self._retire(self._client, self._loop)
+            self._client = self.factory()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            self.clients_created += 1
+            self.in_flight = self.waiting = 0
+        return self._client
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[C]:
+        """Hold one of the provider's concurrency slots while using its client."""
+        client = self.client()
+        semaphore = self._semaphore
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield client
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def _retire(self, client: Optional[C], loop: Optional[asyncio.AbstractEventLoop]):
+        if client is None or self._close is None:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._close_quietly(client), loop)
+
+    async def _close_quietly(self, client: C):
+        try:
+            await self._close(client)
+        except Exception as e:
+            logger.debug(f"Closing {self.name} client failed: {e}")
+
+    async def aclose(self):
+        """Close the pooled client; the next request opens a new one."""
+        client, self._client, self._loop, self._semaphore = self._client, None, None, None
+        if client is not None and self._close is not None:
+            await self._close_quietly(client)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "peak_in_flight": self.peak_in_flight,
+            "clients_created": self.clients_created,
+        }
@@ -4,7 +4,9 @@ Claude API model implementation for Jarvis.
 import os
 import json
 import anthropic
-from typing import Dict, List, Optional, Union
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from .async_pool import CLAUDE_MAX_CONCURRENCY, ProviderPool
 
 class ClaudeModel:
     """Claude API model implementation."""
@@ -18,6 +20,33 @@ class ClaudeModel:
         self.client = anthropic.Anthropic(api_key=self.api_key)
         self.model = "claude-3-sonnet"  # Using Claude 3 Sonnet model
         
+        # Native async client with a keep-alive pool, shared by concurrent requests
+        self.pool = ProviderPool(
+            "claude",
+            lambda: anthropic.AsyncAnthropic(api_key=self.api_key),
+            CLAUDE_MAX_CONCURRENCY,
+            close=lambda client: client.close(),
+        )
+    
+    @staticmethod
+    def _format_messages(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Convert messages to Claude format."""
+        formatted_messages = []
+        for msg in messages:
+            role = msg["role"]
+            if role == "system":
+                # System messages are handled differently in Claude
+                formatted_messages.append({
+                    "role": "user",
+                    "content": f"System instruction: {msg['content']}"
+                })
+            else:
+                formatted_messages.append({
+                    "role": "user" if role == "user" else "assistant",
+                    "content": msg["content"]
+                })
+        return formatted_messages
+        
     def generate_response(
         self,
         messages: List[Dict[str, str]],
@@ -26,26 +55,10 @@ class ClaudeModel:
     ) -> str:
         """Generate a response using the Claude API."""
         try:
-            # Convert messages to Claude format
-            formatted_messages = []
-            for msg in messages:
-                role = msg["role"]
-                if role == "system":
-                    # System messages are handled differently in Claude
-                    formatted_messages.append({
-                        "role": "user",
-                        "content": f"System instruction: {msg['content']}"
-                    })
-                else:
-                    formatted_messages.append({
-                        "role": "user" if role == "user" else "assistant",
-                        "content": msg["content"]
-                    })
-            
             # Create the message for Claude
             response = self.client.messages.create(
                 model=self.model,
-                messages=formatted_messages,
+                messages=self._format_messages(messages),
                 temperature=temperature,
                 max_tokens=max_tokens
             )
@@ -56,6 +69,49 @@ class ClaudeModel:
             error_msg = f"Error generating response from Claude API: {str(e)}"
             print(error_msg)
             return error_msg
+    
+    async def agenerate_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> str:
+        """Async version of generate_response on the pooled client."""
+        try:
+            async with self.pool.session() as client:
+                response = await client.messages.create(
+                    model=self.model,
+                    messages=self._format_messages(messages),
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            return response.content[0].text
+        except Exception as e:
+            error_msg = f"Error generating response from Claude API: {str(e)}"
+            print(error_msg)
+            return error_msg
+    
+    async def astream_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> AsyncIterator[str]:
+        """Yield text deltas as Claude produces them.
+        
+        Unlike agenerate_response, errors are raised rather than returned as
+        text, so callers can fall back before anything has been shown.
+        """
+        async with self.pool.session() as client:
+            async with client.messages.stream(
+                model=self.model,
+                messages=self._format_messages(messages),
+                temperature=temperature,
+                max_tokens=max_tokens
+            ) as stream:
+                async for text in stream.text_stream:
+                    if text:
+                        yield text
             
     def estimate_tokens(self, text: str) -> int:
         """Estimate the number of tokens in the text."""
@@ -0,0 +1,204 @@
+"""
+Token-budgeted conversation context for local (Ollama) chats.
+
+Ollama keeps the evaluated prompt of the last request in its KV cache, so a
+request whose beginning is byte-identical to the previous one only pays
+prompt evaluation for what comes after the shared prefix. Chat callers
+therefore send the static system prompt first, then history, then the
+turn-specific text (time, recalled memories, the new message), and this
+module keeps that layout cheap:
+
+- estimate_tokens: a local tokenizer estimate (word pieces, digit groups
+  and punctuation, roughly what a BPE vocabulary produces) used for
+  budgets instead of character slicing
+- pack_messages: system message(s), as much recent history as fits the
+  token budget, then the new turn. History is cut at positions anchored to
+  the conversation (every ``CONTEXT_TRIM_STEP`` messages), so as the window
+  slides the kept prefix stays identical for several turns instead of
+  shifting every turn
+- flatten_messages: the single-prompt form for /api/generate and cache keys
+- OllamaContexts: for servers without /api/chat, the ``context`` returned
+  by /api/generate per conversation; a request that continues the previous
+  one sends only the new turn with that context
+
+Environment variables (with defaults):
+- CONTEXT_TOKEN_BUDGET: default 3072 tokens for the whole prompt
+- CONTEXT_REPLY_TOKENS: default 512 tokens kept free for the reply
+- CONTEXT_TRIM_STEP: default 8 (history starts at a multiple of this many messages)
+- OLLAMA_CONTEXT_CACHE_SIZE: default 256 conversations whose /api/generate context is kept
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3072"))
+REPLY_TOKENS = int(os.getenv("CONTEXT_REPLY_TOKENS", "512"))
+TRIM_STEP = max(1, int(os.getenv("CONTEXT_TRIM_STEP", "8")))
+CONTEXT_CACHE_SIZE = int(os.getenv("OLLAMA_CONTEXT_CACHE_SIZE", "256"))
+
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD = 4
+
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_+")
+
+Message = Dict[str, Any]
+
+
+def _piece_tokens(piece: str) -> int:
+    if len(piece) == 1:
+        return 1
+    if piece.isdigit():
+        # Numbers split into groups of up to three digits
+        return (len(piece) + 2) // 3
+    if not piece.isascii():
+        # Non-Latin scripts are close to a token per character
+        return len(piece)
+    # Common English words are one token; longer ones split every ~4 characters
+    return 1 + (len(piece) - 1) // 4
+
+
+@lru_cache(maxsize=4096)
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text`` for a typical BPE vocabulary."""
+    return sum(_piece_tokens(piece) for piece in _PIECE_RE.findall(text or ""))
+
+
+def message_tokens(message: Message) -> int:
+    return estimate_tokens(str(message.get("content") or "")) + MESSAGE_OVERHEAD
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """The longest prefix of ``text`` within ``budget`` estimated tokens, cut between pieces."""
+    if estimate_tokens(text) <= budget:
+        return text
+    used = 0
+    for match in _PIECE_RE.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > budget:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def pack_messages(messages: Sequence[Message], budget: Optional[int] = None,
+                  reply_tokens: Optional[int] = None, offset: int = 0,
+                  step: Optional[int] = None) -> List[Message]:
+    """Fit a chat into the token budget without disturbing its prefix.
+
+    ``messages`` is leading system message(s), history, then the new turn.
+    System messages and the new turn are always kept (the turn is truncated
+    if it alone overflows); history keeps its newest messages and starts at
+    an index whose absolute position ``offset + i`` is a multiple of
+    ``step``. ``offset`` is the position of the first history message in the
+    whole conversation, e.g. its row id, so the cut point only moves every
+    ``step`` messages as the conversation grows.
+    """
+    budget = TOKEN_BUDGET if budget is None else budget
+    reply_tokens = REPLY_TOKENS if reply_tokens is None else reply_tokens
+    step = TRIM_STEP if step is None else max(1, step)
+    messages = list(messages)
+    if not messages:
+        return []
+
+    head = 0
+    while head < len(messages) - 1 and messages[head].get("role") == "system":
+        head += 1
+    system, history, turn = messages[:head], messages[head:-1], messages[-1]
+
+    available = budget - reply_tokens - sum(message_tokens(m) for m in system)
+    turn_tokens = message_tokens(turn)
+    if turn_tokens > available:
+        turn = dict(turn, content=truncate_to_tokens(str(turn.get("content") or ""),
+                                                     max(0, available - MESSAGE_OVERHEAD)))
+        turn_tokens = message_tokens(turn)
+    available -= turn_tokens
+
+    # Smallest start that fits, then the next anchored position at or after it
+    start, used = len(history), 0
+    for i in range(len(history) - 1, -1, -1):
+        used += message_tokens(history[i])
+        if used > available:
+            break
+        start = i
+    start += -(offset + start) % step
+    return system + history[start:] + [turn]
+
+
+def flatten_messages(messages: Sequence[Message]) -> Tuple[str, str]:
+    """(system, prompt) for APIs that take a single prompt string."""
+    system = "\n\n".join(str(m.get("content") or "") for m in messages if m.get("role") == "system")
+    lines = []
+    for message in messages:
+        role = message.get("role", "user")
+        if role == "user":
+            lines.append(f"User: {message.get('content', '')}")
+        elif role == "assistant":
+            lines.append(f"Assistant: {message.get('content', '')}")
+    return system, "\n".join(lines)
+
+
+def _conversation_key(model: str, messages: Sequence[Message]) -> str:
+    body = json.dumps([model, [[m.get("role"), m.get("content")] for m in messages]],
+                      ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+class OllamaContexts:
+    """LRU of /api/generate ``context`` arrays keyed by the conversation they encode.
+
+    After a reply, the conversation plus that reply is stored with the
+    returned context. The next request whose history is exactly that
+    conversation can send only its new user message and the context, and
+    Ollama skips re-tokenizing and re-evaluating everything before it.
+    """
+
+    def __init__(self, size: int = CONTEXT_CACHE_SIZE):
+        self.size = max(0, size)
+        self.hits = 0
+        self.misses = 0
+        self._contexts: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generate_payload(self, model: str, messages: Sequence[Message]) -> Dict[str, Any]:
+        """``prompt``/``system``/``context`` fields of a /api/generate request for ``messages``."""
+        last = messages[-1] if messages else {"role": "user", "content": ""}
+        context = None
+        if last.get("role") == "user" and len(messages) > 1:
+            key = _conversation_key(model, messages[:-1])
+            with self._lock:
+                context = self._contexts.get(key)
+                if context is not None:
+                    self._contexts.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        if context is not None:
+            return {"prompt": str(last.get("content") or ""), "context": context}
+
+        system, prompt = flatten_messages(messages)
+        if len(messages) - (1 if system else 0) == 1 and last.get("role") == "user":
+            # A single turn goes in as-is so the model's template wraps it
+            prompt = str(last.get("content") or "")
+        else:
+            prompt += "\nAssistant:"
+        payload: Dict[str, Any] = {"prompt": prompt}
+        if system:
+            payload["system"] = system
+        return payload
+
+    def remember(self, model: str, messages: Sequence[Message], reply: str, context: Optional[List[int]]):
+        if not context or not self.size:
+            return
+        key = _conversation_key(model, list(messages) + [{"role": "assistant", "content": reply}])
+        with self._lock:
+            self._contexts[key] = context
+            self._contexts.move_to_end(key)
+            while len(self._contexts) > self.size:
+                self._contexts.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._contexts), "hits": self.hits, "misses": self.misses}
@@ -1,5 +1,15 @@
 """
 Local model handler for Jarvis using Ollama API.
+
+Chats go through /api/chat with the messages as given, so a static system
+prompt followed by history is a byte-identical prefix from turn to turn and
+Ollama only evaluates the new tail (see context_window). Servers without
+/api/chat get /api/generate instead, continuing from the ``context``
+returned for the previous turn when the conversation matches.
+
+Requests carry ``keep_alive`` and report their latency to the shared
+OllamaResidency (see jarvis.ollama_residency), which keeps the model loaded
+between sparse requests and tells cold loads apart from warm requests.
 """
 import json
 import requests
@@ -9,9 +19,12 @@ import logging
 import time
 import os
 import subprocess
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 
 from ..config import LOCAL_MODEL_NAME, LOCAL_MODEL_BASE_URL
+from ..ollama_residency import START_TIMEOUT, get_ollama_residency
+from .async_pool import KEEPALIVE_SECONDS, OLLAMA_MAX_CONCURRENCY, ProviderPool
+from .context_window import OllamaContexts
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -31,11 +44,77 @@ class OllamaModel:
         self.model_name = model_name
         self.base_url = base_url
         self.generate_endpoint = f"{base_url}/api/generate"
+        self.chat_endpoint = f"{base_url}/api/chat"
+        # Cleared if the server turns out not to have /api/chat
+        self.chat_api = True
+        self.contexts = OllamaContexts()
         self.current_retry_count = 0
         self.max_retries = 3
         self.max_timeout = 60  # Increased from 30 seconds
         self.backoff_factor = 1.5  # For exponential backoff
+        self.residency = get_ollama_residency(base_url)
         
+        # Persistent aiohttp session (keep-alive connections) for the async API
+        self.pool = ProviderPool(
+            "ollama",
+            self._new_session,
+            OLLAMA_MAX_CONCURRENCY,
+            close=lambda session: session.close(),
+        )
+    
+    @staticmethod
+    def _new_session() -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(limit=OLLAMA_MAX_CONCURRENCY, keepalive_timeout=KEEPALIVE_SECONDS)
+        return aiohttp.ClientSession(connector=connector)
+    
+    @staticmethod
+    def _messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _request(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                 stream: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """Endpoint and body for a chat: /api/chat, else /api/generate reusing a stored context."""
+        payload = {
+            "model": self.model_name,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,  # False to get a single response
+            "keep_alive": self.residency.keep_alive,
+        }
+        if self.chat_api:
+            payload["messages"] = list(messages)
+            return self.chat_endpoint, payload
+        payload.update(self.contexts.generate_payload(self.model_name, messages))
+        return self.generate_endpoint, payload
+    
+    def _chat_api_missing(self, endpoint: str, status: int, body: str) -> bool:
+        """True, and fall back to /api/generate from now on, if the server has no /api/chat."""
+        # A missing model is a 404 too, but its error names the model
+        if endpoint == self.chat_endpoint and status == 404 and "model" not in body.lower():
+            logger.warning("Ollama has no /api/chat; using /api/generate with context reuse")
+            self.chat_api = False
+            return True
+        return False
+    
+    @staticmethod
+    def _text(data: Dict[str, Any]) -> str:
+        message = data.get("message")
+        if message is not None:
+            return message.get("content") or ""
+        return data.get("response") or ""
+    
+    def _completed(self, messages: List[Dict[str, str]], data: Dict[str, Any], reply: str,
+                   start: float, was_loaded: bool):
+        """Bookkeeping for a finished request (``data`` is its final message)."""
+        self.residency.record_request(self.model_name, (time.perf_counter() - start) * 1000,
+                                      data.get("load_duration"), was_loaded)
+        if data.get("context"):
+            self.contexts.remember(self.model_name, messages, reply, data["context"])
+    
     def _is_ollama_running(self) -> bool:
         """Check if Ollama service is running.
         
@@ -70,17 +149,22 @@ class OllamaModel:
             logger.warning(f"Error checking if Ollama is running: {str(e)}")
             return False
     
-    def _calculate_timeout(self) -> int:
+    def _calculate_timeout(self, attempt: Optional[int] = None) -> int:
         """Calculate timeout with exponential backoff.
         
+        Args:
+            attempt: Retry number (defaults to the sync client's retry counter)
+        
         Returns:
             Timeout in seconds
         """
-        if self.current_retry_count == 0:
+        if attempt is None:
+            attempt = self.current_retry_count
+        if attempt == 0:
             return 30  # Start with default 30s timeout
         
         # Apply exponential backoff
-        timeout = min(30 * (self.backoff_factor ** self.current_retry_count), self.max_timeout)
+        timeout = min(30 * (self.backoff_factor ** attempt), self.max_timeout)
         return int(timeout)
     
     def _restart_ollama_if_needed(self) -> bool:
@@ -93,6 +177,26 @@ class OllamaModel:
             return True
             
         logger.warning("Ollama appears to be not running. Attempting to start...")
+        if not self._spawn_ollama():
+            return False
+        
+        # Poll until the API answers rather than sleeping a fixed interval
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._api_reachable():
+                return True
+            time.sleep(0.25)
+        logger.error(f"Ollama did not answer within {START_TIMEOUT:g}s of starting")
+        return False
+    
+    def _api_reachable(self) -> bool:
+        try:
+            return requests.get(f"{self.base_url}/api/version", timeout=1).status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def _spawn_ollama(self) -> bool:
+        """Start ``ollama serve`` in the background; returns False if it could not be launched."""
         try:
             if os.name == 'posix':  # Linux/Mac
                 # Start Ollama in the background
@@ -117,10 +221,7 @@ class OllamaModel:
                     if hasattr(subprocess, "CREATE_NO_WINDOW")
                     else 0,
                 )
-            
-            # Give it a moment to start
-            time.sleep(5)
-            return self._is_ollama_running()
+            return True
         except Exception as e:
             logger.error(f"Failed to start Ollama: {str(e)}")
             return False
@@ -141,16 +242,14 @@ class OllamaModel:
         Returns:
             The model's response as a string
         """
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": False  # Important to get a single response
-        }
-        
-        if system_prompt:
-            payload["system"] = system_prompt
+        return self.chat(self._messages(prompt, system_prompt), temperature, max_tokens)
+    
+    def chat(self,
+             messages: List[Dict[str, str]],
+             temperature: float = 0.7,
+             max_tokens: int = 1000) -> str:
+        """Generate a reply to a list of role/content messages (see generate())."""
+        endpoint, payload = self._request(messages, temperature, max_tokens)
         
         # Reset retry counter if this is a new request
         self.current_retry_count = 0
@@ -162,20 +261,26 @@ class OllamaModel:
             
             try:
                 timeout = self._calculate_timeout()
-                logger.info(f"Sending request to Ollama API: {self.generate_endpoint} (attempt {self.current_retry_count+1}/{self.max_retries+1}, timeout: {timeout}s)")
+                logger.info(f"Sending request to Ollama API: {endpoint} (attempt {self.current_retry_count+1}/{self.max_retries+1}, timeout: {timeout}s)")
                 
-                response = requests.post(self.generate_endpoint, json=payload, timeout=timeout)
+                was_loaded = self.residency.is_loaded(self.model_name)
+                start = time.perf_counter()
+                response = requests.post(endpoint, json=payload, timeout=timeout)
                 
                 if response.status_code == 200:
                     # Attempt to parse the JSON response
                     try:
                         data = response.json()
-                        return data.get("response", "")
+                        reply = self._text(data)
+                        self._completed(messages, data, reply, start, was_loaded)
+                        return reply
                     except json.JSONDecodeError as e:
                         logger.error(f"Failed to parse JSON response: {e}")
                         # If JSON parsing fails, return the raw text
                         return "Error: Failed to parse response from local model."
                 else:
+                    if self._chat_api_missing(endpoint, response.status_code, response.text):
+                        return self.chat(messages, temperature, max_tokens)
                     logger.error(f"Ollama API error: {response.status_code} - {response.text}")
                     
                     # Check if model doesn't exist and suggest pulling
@@ -217,11 +322,161 @@ class OllamaModel:
         # If we've exhausted retries
         return "Error: Failed to get a response from the local model after multiple attempts."
     
+    async def _ais_running(self) -> bool:
+        """Async check that the Ollama API answers."""
+        try:
+            async with self.pool.client().get(
+                f"{self.base_url}/api/version",
+                timeout=aiohttp.ClientTimeout(total=5),
+            ) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+    
+    async def _aensure_running(self) -> bool:
+        """Async version of _restart_ollama_if_needed."""
+        if await self._ais_running():
+            return True
+        logger.warning("Ollama appears to be not running. Attempting to start...")
+        if not self._spawn_ollama():
+            return False
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            if await self._ais_running():
+                return True
+            await asyncio.sleep(0.25)
+        logger.error(f"Ollama did not answer within {START_TIMEOUT:g}s of starting")
+        return False
+    
+    async def agenerate(self,
+                        prompt: str,
+                        system_prompt: Optional[str] = None,
+                        temperature: float = 0.7,
+                        max_tokens: int = 1000) -> str:
+        """Generate a response on the pooled aiohttp session.
+        
+        Same retries, timeouts and error strings as generate(), but backoff
+        waits on the event loop and does not hold a concurrency slot.
+        """
+        return await self.achat(self._messages(prompt, system_prompt), temperature, max_tokens)
+    
+    async def achat(self,
+                    messages: List[Dict[str, str]],
+                    temperature: float = 0.7,
+                    max_tokens: int = 1000) -> str:
+        """Async reply to a list of role/content messages (see agenerate())."""
+        endpoint, payload = self._request(messages, temperature, max_tokens)
+        attempts = self.max_retries + 1
+        
+        for attempt in range(attempts):
+            last = attempt == self.max_retries
+            timeout = self._calculate_timeout(attempt)
+            try:
+                async with self.pool.session() as session:
+                    was_loaded = self.residency.is_loaded(self.model_name)
+                    start = time.perf_counter()
+                    async with session.post(
+                        endpoint,
+                        json=payload,
+                        timeout=aiohttp.ClientTimeout(total=timeout),
+                    ) as response:
+                        status = response.status
+                        if status == 200:
+                            try:
+                                data = await response.json(content_type=None)
+                            except (json.JSONDecodeError, aiohttp.ContentTypeError) as e:
+                                logger.error(f"Failed to parse JSON response: {e}")
+                                return "Error: Failed to parse response from local model."
+                            reply = self._text(data)
+                            self._completed(messages, data, reply, start, was_loaded)
+                            return reply
+                        body = await response.text()
+                
+                if self._chat_api_missing(endpoint, status, body):
+                    return await self.achat(messages, temperature, max_tokens)
+                logger.error(f"Ollama API error: {status} - {body}")
+                if status == 404:
+                    return f"Error: Model '{self.model_name}' not found. Try running 'ollama pull {self.model_name}' to download it."
+                if last:
+                    return f"Error: Failed to get response from local model after {attempts} attempts. Status code: {status}"
+                await asyncio.sleep((attempt + 1) * 2)
+            except asyncio.TimeoutError:
+                logger.error(f"Timeout when calling Ollama API (timeout was {timeout}s)")
+                if last:
+                    return "Error: Ollama is taking too long to respond. The model might be too large for your system or Ollama may be having issues."
+            except aiohttp.ClientConnectionError:
+                logger.error("Connection error when calling Ollama API")
+                if last:
+                    return "Error: Could not connect to Ollama. Make sure the Ollama service is running."
+                if not await self._aensure_running():
+                    return "Error: Ollama service is not running and could not be started. Please start Ollama manually."
+                await asyncio.sleep((attempt + 1) * 3)
+            except Exception as e:
+                logger.error(f"Exception when calling Ollama API: {str(e)}")
+                if last:
+                    return f"Error: Failed to communicate with local model: {str(e)}"
+                await asyncio.sleep((attempt + 1) * 2)
+        
+        return "Error: Failed to get a response from the local model after multiple attempts."
+    
+    async def astream(self,
+                      prompt: str,
+                      system_prompt: Optional[str] = None,
+                      temperature: float = 0.7,
+                      max_tokens: int = 1000) -> AsyncIterator[str]:
+        """Yield response fragments as Ollama generates them.
+        
+        Ollama streams one JSON object per line until ``done``. There are no
+        retries: a failure is raised so the caller can fall back, and once
+        text has been yielded a retry would repeat it.
+        """
+        async for text in self.astream_chat(self._messages(prompt, system_prompt), temperature, max_tokens):
+            yield text
+    
+    async def astream_chat(self,
+                           messages: List[Dict[str, str]],
+                           temperature: float = 0.7,
+                           max_tokens: int = 1000) -> AsyncIterator[str]:
+        """Streaming reply to a list of role/content messages (see astream())."""
+        endpoint, payload = self._request(messages, temperature, max_tokens, stream=True)
+        parts = []
+        async with self.pool.session() as session:
+            was_loaded = self.residency.is_loaded(self.model_name)
+            start = time.perf_counter()
+            async with session.post(
+                endpoint,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=self.max_timeout),
+            ) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    if not self._chat_api_missing(endpoint, response.status, body):
+                        raise RuntimeError(f"Ollama API error: {response.status} - {body[:200]}")
+                else:
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise RuntimeError(f"Ollama error: {data['error']}")
+                        text = self._text(data)
+                        if text:
+                            parts.append(text)
+                            yield text
+                        if data.get("done"):
+                            self._completed(messages, data, "".join(parts), start, was_loaded)
+                            return
+                    return
+        # No /api/chat on this server; retried outside the concurrency slot held above
+        async for text in self.astream_chat(messages, temperature, max_tokens):
+            yield text
+    
     async def is_available(self) -> bool:
         """Check if the model is available and responding."""
         logger.info("Checking availability of local model: %s", self.model_name)
 
-        if not self._restart_ollama_if_needed():
+        if not await self._aensure_running():
             logger.error("Ollama service is not running and could not be started")
             return False
 
@@ -230,45 +485,47 @@ class OllamaModel:
 
         for attempt in range(max_retries):
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        f"{self.base_url}/api/tags",
-                        timeout=aiohttp.ClientTimeout(total=10),
-                    ) as tags_resp:
-                        if tags_resp.status == 200:
-                            data = await tags_resp.json()
-                            names = {m.get("name", "") for m in data.get("models", [])}
-                            if self.model_name in names or f"{self.model_name}:latest" in names:
-                                logger.info("Local model available (tags): %s", self.model_name)
+                # Probes share the pooled session but not the generation slots
+                session = self.pool.client()
+                async with session.get(
+                    f"{self.base_url}/api/tags",
+                    timeout=aiohttp.ClientTimeout(total=10),
+                ) as tags_resp:
+                    if tags_resp.status == 200:
+                        data = await tags_resp.json()
+                        names = {m.get("name", "") for m in data.get("models", [])}
+                        if self.model_name in names or f"{self.model_name}:latest" in names:
+                            logger.info("Local model available (tags): %s", self.model_name)
+                            return True
+                        for name in names:
+                            if name == self.model_name or name.startswith(f"{self.model_name}:"):
+                                logger.info("Local model available (tags): %s", name)
                                 return True
-                            for name in names:
-                                if name == self.model_name or name.startswith(f"{self.model_name}:"):
-                                    logger.info("Local model available (tags): %s", name)
-                                    return True
 
-                    payload = {
-                        "model": self.model_name,
-                        "prompt": "Hello",
-                        "max_tokens": 1,
-                        "stream": False,
-                    }
-                    logger.info(
-                        "Sending test request to %s (attempt %s/%s)",
-                        self.generate_endpoint,
-                        attempt + 1,
-                        max_retries,
-                    )
-                    async with session.post(
-                        self.generate_endpoint,
-                        json=payload,
-                        timeout=aiohttp.ClientTimeout(total=45),
-                    ) as response:
-                        if response.status == 200:
-                            logger.info("Local model available, status 200")
-                            return True
-                        if response.status == 404:
-                            logger.error("Model '%s' not found in Ollama", self.model_name)
-                            return False
+                payload = {
+                    "model": self.model_name,
+                    "prompt": "Hello",
+                    "max_tokens": 1,
+                    "stream": False,
+                    "keep_alive": self.residency.keep_alive,
+                }
+                logger.info(
+                    "Sending test request to %s (attempt %s/%s)",
+                    self.generate_endpoint,
+                    attempt + 1,
+                    max_retries,
+                )
+                async with session.post(
+                    self.generate_endpoint,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=45),
+                ) as response:
+                    if response.status == 200:
+                        logger.info("Local model available, status 200")
+                        return True
+                    if response.status == 404:
+                        logger.error("Model '%s' not found in Ollama", self.model_name)
+                        return False
 
                 if attempt < max_retries - 1:
                     logger.info("Retrying in %s seconds...", retry_delay)
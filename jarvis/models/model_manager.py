@@ -1,14 +1,49 @@
 """
 Model Manager for Jarvis.
 This module handles model selection and interaction.
+
+Every provider is called through its native async client (see async_pool):
+connections are pooled per provider and each provider caps its own
+in-flight requests, so concurrent chats never wait on a thread pool or
+block the event loop.
+
+Providers are ordered per request by a ProviderRouter (see
+provider_router): Claude > OpenAI > Ollama by preference, but a provider
+that is currently much slower or failing is demoted, and one whose circuit
+breaker is open is skipped until a half-open probe succeeds.
+
+stream() and stream_response() yield the reply as it is generated. A
+provider that fails before producing its first token is skipped like in
+generate(); once text has been yielded the stream stays on that provider.
+
+Ollama gets the messages as a chat (/api/chat), so callers that put a
+static system prompt first get its evaluation reused across requests.
+
+Calls that name a ``cache_site`` (none do by default: sampled chat replies
+must not be replayed) go through the shared response cache (see
+response_cache) first: a hit is returned (or yielded as one fragment)
+without touching a provider, and successful responses are stored.
+
+On a cache miss, identical requests that are already in flight are
+coalesced (see single_flight): concurrent callers share one generation,
+or one stream, which is only cancelled once all of them have gone. The
+generation then waits for a slot from the process-wide admission
+controller (see admission), in the lane given by the caller or derived
+from its cache_site; a request that is not admitted gets BUSY_MESSAGE.
 """
 import logging
 import asyncio
-from typing import Dict, Any, Optional, List
-from concurrent.futures import ThreadPoolExecutor
+import time
+import weakref
+from typing import AsyncIterator, Dict, Any, Optional, List, Sequence
 
 from .openai_model import OpenAIModel
 from .local_model import OllamaModel
+from .context_window import flatten_messages
+from .provider_router import ProviderRouter, request_class
+from .response_cache import get_response_cache, response_cache_stats
+from .single_flight import SingleFlight, request_key
+from .admission import AdmissionRejected, get_admission_controller, lane_for
 try:
     from .claude_model import ClaudeModel
     CLAUDE_AVAILABLE = True
@@ -19,6 +54,21 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ollama is the last resort; give up quickly rather than stall a Discord reply
+# (for streams this bounds the wait for the first token)
+OLLAMA_TIMEOUT = 15.0
+
+# Preference order; the router may demote a provider that is slow or failing
+PROVIDER_PRIORITY = ("claude", "openai", "ollama")
+
+NO_MODELS_MESSAGE = "Error: No models available. Please configure CLAUDE_API_KEY, OPENAI_API_KEY, or ensure Ollama is running."
+
+BUSY_MESSAGE = "Error: Models are busy ({reason}). Please try again in a moment."
+
+# Every ModelManager in the process (the bot's, the intent router's, agents'),
+# so shutdown paths can close all of their pooled connections
+_managers: "weakref.WeakSet[ModelManager]" = weakref.WeakSet()
+
 
 class ModelManager:
     """
@@ -29,9 +79,7 @@ class ModelManager:
     def __init__(self):
         """Initialize the model manager."""
         logger.info("🚀 Initializing ModelManager...")
-        
-        # Thread pool for running synchronous Ollama calls without blocking event loop
-        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ollama")
+        _managers.add(self)
         
         # Try to initialize Claude model (primary if available)
         self.claude_available = False
@@ -83,6 +131,9 @@ class ModelManager:
             logger.warning(f"⚠️ [ModelManager] OpenAI model initialization failed: {str(e)}")
             self.openai_model = None
             
+        self.router = ProviderRouter(PROVIDER_PRIORITY, timeouts={"ollama": OLLAMA_TIMEOUT})
+        self.flights = SingleFlight()
+        
         # Log initial status
         logger.info("📊 [ModelManager] Initialization complete - Priority: Claude > OpenAI > Ollama")
         
@@ -107,7 +158,10 @@ class ModelManager:
             return False
     
     async def generate(self, prompt: str, system_prompt: Optional[str] = None, 
-                       temperature: float = 0.7, max_tokens: int = 1000) -> str:
+                       temperature: float = 0.7, max_tokens: int = 1000,
+                       cache_site: Optional[str] = None,
+                       providers: Optional[Sequence[str]] = None,
+                       lane: Optional[str] = None) -> str:
         """
         Generate a response using the available model (async version to avoid blocking).
         Priority: Claude > OpenAI > Ollama
@@ -117,78 +171,27 @@ class ModelManager:
             system_prompt: Optional system instructions
             temperature: Controls randomness (0-1)
             max_tokens: Maximum tokens to generate
+            cache_site: Call site label to opt into the response cache (None bypasses it)
+            providers: Only route to these providers (e.g. the fast ones for
+                formatting); all configured providers if none of them is
+            lane: Admission lane ("interactive", "routing", "formatting",
+                "background"); derived from cache_site by default
             
         Returns:
             Generated response
         """
-        # Try Claude first (primary if available)
-        if self.claude_available and self.claude_model:
-            try:
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                # Claude API calls are async-compatible, run in executor to avoid blocking
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    self._executor,
-                    lambda: self.claude_model.generate_response(messages, temperature, max_tokens)
-                )
-                
-                if not response.startswith("Error"):
-                    logger.debug("✅ Response generated by Claude")
-                    return response
-                else:
-                    logger.warning(f"⚠️ Claude returned error, falling back")
-            except Exception as e:
-                logger.warning(f"⚠️ Claude failed: {str(e)}")
-                logger.info("🔄 Falling back to OpenAI...")
-                
-        # Fall back to OpenAI
-        if self.openai_available and self.openai_model:
-            try:
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                response = self.openai_model.generate_response(messages, temperature, max_tokens)
-                logger.debug("✅ Response generated by GPT-4o-mini")
-                return response
-            except Exception as e:
-                logger.warning(f"⚠️ GPT-4o-mini failed: {str(e)}")
-                logger.info("🔄 Falling back to Ollama...")
-                
-        # Final fallback to Ollama (local)
-        if self.ollama_model:
-            try:
-                # Run synchronous Ollama call in thread pool with short timeout
-                loop = asyncio.get_event_loop()
-                response = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        self._executor,
-                        lambda: self.ollama_model.generate(prompt, system_prompt, temperature, max_tokens)
-                    ),
-                    timeout=15.0  # Fast timeout to avoid blocking Discord
-                )
-                # If successful, mark as available for future use
-                if not self.ollama_available and not response.startswith("Error:"):
-                    self.ollama_available = True
-                    logger.info(f"✅ Ollama confirmed available: {self.ollama_model.model_name}")
-                logger.debug(f"✅ Response generated by {self.ollama_model.model_name}")
-                return response
-            except asyncio.TimeoutError:
-                logger.warning(f"⚠️ Ollama request timed out (>{15}s)")
-                self.ollama_available = False
-            except Exception as e:
-                logger.warning(f"⚠️ {self.ollama_model.model_name if self.ollama_model else 'Ollama'} failed: {str(e)}")
-                self.ollama_available = False
-                
-        return "Error: No models available. Please configure CLAUDE_API_KEY, OPENAI_API_KEY, or ensure Ollama is running."
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return await self._generate(messages, temperature, max_tokens, cache_prompt=prompt,
+                                    cache_system=system_prompt, cache_site=cache_site, providers=providers,
+                                    lane=lane)
     
     async def generate_response(self, messages: List[Dict[str, str]], 
-                                temperature: float = 0.7, max_tokens: int = 1000) -> str:
+                                temperature: float = 0.7, max_tokens: int = 1000,
+                                cache_site: Optional[str] = None,
+                                lane: Optional[str] = None) -> str:
         """
         Generate a response using the available model with message format (async to avoid blocking).
         Priority: Claude > OpenAI > Ollama
@@ -197,77 +200,271 @@ class ModelManager:
             messages: List of message dictionaries with 'role' and 'content'
             temperature: Controls randomness (0-1)
             max_tokens: Maximum tokens to generate
+            cache_site: Call site label to opt into the response cache (None bypasses it)
+            lane: Admission lane; derived from cache_site by default
             
         Returns:
             Generated response
         """
-        # Try Claude first (primary if available)
+        system, prompt = flatten_messages(messages)
+        return await self._generate(messages, temperature, max_tokens, cache_prompt=prompt,
+                                    cache_system=system, cache_site=cache_site, lane=lane)
+    
+    def _providers(self, only: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Configured providers by router name, restricted to ``only`` when any of those is configured."""
+        providers = {}
         if self.claude_available and self.claude_model:
-            try:
-                # Claude API calls are async-compatible, run in executor to avoid blocking
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    self._executor,
-                    lambda: self.claude_model.generate_response(messages, temperature, max_tokens)
-                )
-                
-                if not response.startswith("Error"):
-                    logger.debug("✅ Response generated by Claude")
-                    return response
-                else:
-                    logger.warning(f"⚠️ Claude returned error, falling back")
-            except Exception as e:
-                logger.warning(f"⚠️ Claude failed: {str(e)}")
-                logger.info("🔄 Falling back to OpenAI...")
-                
-        # Fall back to OpenAI
+            providers["claude"] = self.claude_model
         if self.openai_available and self.openai_model:
-            try:
-                response = self.openai_model.generate_response(messages, temperature, max_tokens)
-                logger.debug("✅ Response generated by GPT-4o-mini")
-                return response
-            except Exception as e:
-                logger.warning(f"⚠️ GPT-4o-mini failed: {str(e)}")
-                logger.info("🔄 Falling back to Ollama...")
-                
-        # Final fallback to Ollama (local)
+            providers["openai"] = self.openai_model
+        # Ollama is always worth a try; its circuit breaker decides when it is down
         if self.ollama_model:
+            providers["ollama"] = self.ollama_model
+        if only:
+            selected = {name: model for name, model in providers.items() if name in only}
+            if selected:
+                return selected
+        return providers
+    
+    @staticmethod
+    def _is_error(response: Optional[str]) -> bool:
+        # The providers report failures as text starting with "Error"
+        return not response or response.startswith("Error")
+    
+    def _cache_request(self, prompt: str, system: Optional[str], temperature: float,
+                       max_tokens: int, providers: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Response cache key fields; the model is the provider chain the request may use."""
+        chain = "|".join(
+            f"{name}:{getattr(model, 'model', None) or getattr(model, 'model_name', '')}"
+            for name, model in self._providers(providers).items()
+        )
+        return {"prompt": prompt, "model": chain, "system": system or "",
+                "params": {"temperature": temperature, "max_tokens": max_tokens}}
+    
+    async def _generate(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                        cache_prompt: str, cache_system: Optional[str] = None,
+                        cache_site: Optional[str] = None,
+                        providers: Optional[Sequence[str]] = None,
+                        lane: Optional[str] = None) -> str:
+        """Answer from the response cache, else try providers in the router's order."""
+        cache = get_response_cache() if cache_site else None
+        request = self._cache_request(cache_prompt, cache_system, temperature, max_tokens,
+                                      providers) if cache else {}
+        if cache is not None:
+            cached = cache.get(cache_site, **request)
+            if cached is not None:
+                logger.debug(f"💾 Response cache hit for {cache_site}")
+                return cached
+        
+        key = request_key(messages, temperature=temperature, max_tokens=max_tokens,
+                          providers=sorted(providers or ()))
+        return await self.flights.do(key, lambda: self._route_and_cache(
+            messages, temperature, max_tokens, providers, lane or lane_for(cache_site),
+            cache_site if cache is not None else None, request))
+    
+    async def _route_and_cache(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                               providers: Optional[Sequence[str]], lane: str, cache_site: Optional[str],
+                               request: Dict[str, Any]) -> str:
+        try:
+            ticket = await get_admission_controller().acquire(lane)
+        except AdmissionRejected as e:
+            logger.warning(f"🚦 {e}")
+            return BUSY_MESSAGE.format(reason=e.reason)
+        try:
+            response = await self._route(messages, temperature, max_tokens, providers)
+        finally:
+            ticket.release()
+        if cache_site and not self._is_error(response):
+            get_response_cache().put(cache_site, response=response, **request)
+        return response
+    
+    async def _route(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                     only: Optional[Sequence[str]] = None) -> str:
+        """Try providers in the router's order on their pooled async clients."""
+        providers = self._providers(only)
+        calls = {}
+        if "claude" in providers:
+            calls["claude"] = lambda: self.claude_model.agenerate_response(messages, temperature, max_tokens)
+        if "openai" in providers:
+            calls["openai"] = lambda: self.openai_model.agenerate_response(messages, temperature, max_tokens)
+        if "ollama" in providers:
+            calls["ollama"] = lambda: self.ollama_model.achat(messages, temperature, max_tokens)
+        
+        result = await self.router.run(request_class(max_tokens), calls, failed=self._is_error)
+        if self.ollama_model:
+            self.ollama_available = self.router.available("ollama")
+        if result is None:
+            return NO_MODELS_MESSAGE
+        name, response = result
+        logger.debug(f"✅ Response generated by {name}")
+        return response
+    
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None,
+                     temperature: float = 0.7, max_tokens: int = 1000,
+                     cache_site: Optional[str] = None,
+                     lane: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a response as it is generated, with the same provider priority as generate().
+        
+        Yields:
+            Text fragments; joined, they are the full response
+        """
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        async for text in self._stream(messages, temperature, max_tokens, cache_prompt=prompt,
+                                       cache_system=system_prompt, cache_site=cache_site, lane=lane):
+            yield text
+    
+    async def stream_response(self, messages: List[Dict[str, str]],
+                              temperature: float = 0.7, max_tokens: int = 1000,
+                              cache_site: Optional[str] = None,
+                              lane: Optional[str] = None) -> AsyncIterator[str]:
+        """Streaming counterpart of generate_response()."""
+        system, prompt = flatten_messages(messages)
+        async for text in self._stream(messages, temperature, max_tokens, cache_prompt=prompt,
+                                       cache_system=system, cache_site=cache_site, lane=lane):
+            yield text
+    
+    async def _stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                      cache_prompt: str, cache_system: Optional[str] = None,
+                      cache_site: Optional[str] = None,
+                      lane: Optional[str] = None) -> AsyncIterator[str]:
+        """Replay a cached response as one fragment, else stream it and cache the result."""
+        cache = get_response_cache() if cache_site else None
+        request = self._cache_request(cache_prompt, cache_system, temperature, max_tokens) if cache else {}
+        if cache is not None:
+            cached = cache.get(cache_site, **request)
+            if cached is not None:
+                logger.debug(f"💾 Response cache hit for {cache_site}")
+                yield cached
+                return
+        
+        key = request_key(messages, temperature=temperature, max_tokens=max_tokens, providers=[])
+        stream = self.flights.subscribe(key, lambda: self._stream_and_cache(
+            messages, temperature, max_tokens, lane or lane_for(cache_site),
+            cache_site if cache is not None else None, request))
+        try:
+            async for text in stream:
+                yield text
+        finally:
+            await stream.aclose()
+    
+    async def _stream_and_cache(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                                lane: str, cache_site: Optional[str],
+                                request: Dict[str, Any]) -> AsyncIterator[str]:
+        try:
+            ticket = await get_admission_controller().acquire(lane)
+        except AdmissionRejected as e:
+            logger.warning(f"🚦 {e}")
+            yield BUSY_MESSAGE.format(reason=e.reason)
+            return
+        parts = []
+        stream = self._route_stream(messages, temperature, max_tokens)
+        try:
+            async for text in stream:
+                parts.append(text)
+                yield text
+        finally:
+            # The slot is held for the whole stream
+            await stream.aclose()
+            ticket.release()
+        # Only reached when the stream ran to completion
+        response = "".join(parts)
+        if cache_site and not self._is_error(response):
+            get_response_cache().put(cache_site, response=response, **request)
+    
+    async def _route_stream(self, messages: List[Dict[str, str]], temperature: float,
+                            max_tokens: int) -> AsyncIterator[str]:
+        """Stream from the first provider, in the router's order, that produces a token."""
+        providers = self._providers()
+        streams = {}
+        if "claude" in providers:
+            streams["claude"] = lambda: self.claude_model.astream_response(messages, temperature, max_tokens)
+        if "openai" in providers:
+            streams["openai"] = lambda: self.openai_model.astream_response(messages, temperature, max_tokens)
+        if "ollama" in providers:
+            streams["ollama"] = lambda: self.ollama_model.astream_chat(messages, temperature, max_tokens)
+        
+        cls = request_class(max_tokens, stream=True)
+        for name in self.router.rank(list(streams), cls):
+            if not self.router.breakers[name].allow():
+                continue
+            start = time.perf_counter()
+            stream = streams[name]()
+            settled = False
             try:
-                # Convert messages to prompt format for Ollama
-                prompt = ""
-                for msg in messages:
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    if role == "system":
-                        prompt = f"System: {content}\n\n{prompt}"
-                    elif role == "user":
-                        prompt += f"User: {content}\n"
-                    elif role == "assistant":
-                        prompt += f"Assistant: {content}\n"
+                try:
+                    first = await asyncio.wait_for(stream.__anext__(), timeout=self.router.timeout(name))
+                except StopAsyncIteration:
+                    logger.warning(f"⚠️ {name} returned an empty stream, falling back")
+                    self.router.record_failure(name, cls, others=list(streams))
+                    settled = True
+                    continue
+                except asyncio.TimeoutError:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    logger.warning(f"⚠️ {name} produced no tokens within {self.router.timeout(name):g}s")
+                    self.router.record_failure(name, cls, elapsed, list(streams))
+                    settled = True
+                    continue
+                except Exception as e:
+                    logger.warning(f"⚠️ {name} stream failed: {str(e)}")
+                    self.router.record_failure(name, cls, others=list(streams))
+                    settled = True
+                    continue
                 
-                # Run synchronous Ollama call in thread pool with short timeout
-                loop = asyncio.get_event_loop()
-                response = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        self._executor,
-                        lambda: self.ollama_model.generate(prompt, temperature=temperature, max_tokens=max_tokens)
-                    ),
-                    timeout=15.0  # Fast timeout to avoid blocking Discord
-                )
-                # If successful, mark as available for future use
-                if not self.ollama_available and not response.startswith("Error:"):
-                    self.ollama_available = True
-                    logger.info(f"✅ Ollama confirmed available: {self.ollama_model.model_name}")
-                logger.debug(f"✅ Response generated by {self.ollama_model.model_name}")
-                return response
-            except asyncio.TimeoutError:
-                logger.warning(f"⚠️ Ollama request timed out (>{15}s)")
-                self.ollama_available = False
-            except Exception as e:
-                logger.warning(f"⚠️ {self.ollama_model.model_name if self.ollama_model else 'Ollama'} failed: {str(e)}")
-                self.ollama_available = False
+                # Time to first token is what a streaming caller waits on
+                first_token = time.perf_counter()
+                self.router.record_success(name, cls, (first_token - start) * 1000, tokens=0)
+                settled = True
+                logger.debug(f"✅ Streaming response from {name}")
                 
-        return "Error: No models available. Please configure CLAUDE_API_KEY, OPENAI_API_KEY, or ensure Ollama is running."
+                chars = len(first)
+                yield first
+                # Past the first token a fallback would repeat text, so errors propagate
+                async for text in stream:
+                    chars += len(text)
+                    yield text
+                self.router.stats(name, cls).record_throughput(chars // 4, time.perf_counter() - first_token)
+                return
+            finally:
+                if not settled:
+                    self.router.release(name)
+                await stream.aclose()
+                if name == "ollama":
+                    self.ollama_available = self.router.available("ollama")
+        
+        yield NO_MODELS_MESSAGE
+    
+    def _pools(self) -> Dict[str, Any]:
+        models = {"claude": self.claude_model, "openai": self.openai_model, "ollama": self.ollama_model}
+        return {name: model.pool for name, model in models.items() if getattr(model, "pool", None) is not None}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection pool counters, routing health, cache hits, coalesced requests and Ollama residency."""
+        stats = {
+            "pools": {name: pool.get_stats() for name, pool in self._pools().items()},
+            "router": self.router.get_stats(),
+            "response_cache": response_cache_stats(),
+            "coalescing": self.flights.get_stats(),
+            "admission": get_admission_controller().get_stats(),
+        }
+        if self.ollama_model:
+            stats["ollama_residency"] = self.ollama_model.residency.get_stats()
+        return stats
+    
+    async def aclose(self):
+        """Close every provider's pooled connections."""
+        for pool in self._pools().values():
+            await pool.aclose()
+
+
+async def aclose_model_managers():
+    """Close the pooled provider connections of every ModelManager in the process."""
+    for manager in list(_managers):
+        await manager.aclose()
+
 
 def get_model():
     """Get a model instance for text generation.
@@ -3,7 +3,9 @@ OpenAI model implementation for Jarvis.
 """
 import os
 import openai
-from typing import Dict, List, Optional, Union
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from .async_pool import OPENAI_MAX_CONCURRENCY, ProviderPool
 
 class OpenAIModel:
     """OpenAI model implementation."""
@@ -18,6 +20,14 @@ class OpenAIModel:
         self.client = openai.OpenAI(api_key=self.api_key)
         self.model = "gpt-4o-mini"  # Using GPT-4o-mini for faster, cost-effective responses
         
+        # Native async client with a keep-alive pool, shared by concurrent requests
+        self.pool = ProviderPool(
+            "openai",
+            lambda: openai.AsyncOpenAI(api_key=self.api_key),
+            OPENAI_MAX_CONCURRENCY,
+            close=lambda client: client.close(),
+        )
+        
     def generate_response(
         self,
         messages: List[Dict[str, str]],
@@ -41,6 +51,46 @@ class OpenAIModel:
             print(error_msg)
             return error_msg
             
+    async def agenerate_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> str:
+        """Async version of generate_response on the pooled client."""
+        try:
+            async with self.pool.session() as client:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            return response.choices[0].message.content
+        except Exception as e:
+            error_msg = f"Error generating response from OpenAI API: {str(e)}"
+            print(error_msg)
+            return error_msg
+    
+    async def astream_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas as the completion streams in; errors are raised."""
+        async with self.pool.session() as client:
+            stream = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
     def estimate_tokens(self, text: str) -> int:
         """Estimate the number of tokens in the text."""
         # GPT-4 uses roughly 4 characters per token on average
@@ -0,0 +1,471 @@
+"""
+Latency- and health-aware provider selection for ModelManager.
+
+ModelManager used to try Claude, then OpenAI, then Ollama on every request.
+A slow Claude endpoint cost its full timeout before OpenAI was tried, and
+one Ollama timeout marked Ollama unavailable until restart. The router
+keeps rolling statistics per provider and request class instead:
+
+- EWMA latency, error rate and token throughput, plus a window of recent
+  latencies for p95. Classes are "short" (max_tokens <= 256: formatting,
+  classification), "long" and "stream" (latency is time to first token),
+  because a provider can be fast at one and slow at the other
+- a circuit breaker per provider: consecutive failures open it, and after a
+  cooldown one request goes through as a half-open probe. A good probe
+  closes the circuit; a bad one reopens it with a doubled cooldown. The
+  circuit of the last provider a request could use with a closed circuit
+  stays closed: with nothing to fall back to, opening it would only turn
+  its partial failures into every request failing
+- optional hedging: when the first provider is still running after its own
+  p95 latency, the next one is started and whichever answers first wins
+
+Ranking keeps the configured preference (Claude > OpenAI > Ollama) unless a
+preferred provider is expected to be more than MODEL_ROUTER_PREFERENCE times
+slower per rank than the next one. Expected latency is the EWMA, inflated by
+the recent error rate. Providers without samples rank by preference alone,
+and so do providers whose statistics are older than MODEL_ROUTER_REFRESH:
+a demoted provider gets no traffic to prove it has recovered, so once its
+numbers are stale it is tried again in its preferred slot and measured
+afresh. A provider that is never first would never be measured, so one
+request per MODEL_ROUTER_EXPLORE_INTERVAL goes to an unmeasured provider
+first. A circuit coming out of its cooldown is probed in its preferred slot,
+and a successful probe clears the statistics gathered while it was failing.
+
+Environment variables (with defaults):
+- MODEL_ROUTER_ADAPTIVE: default 1; 0 keeps the fixed order (breakers still apply)
+- MODEL_ROUTER_PREFERENCE: default 1.5
+- MODEL_EWMA_ALPHA: default 0.2
+- MODEL_ROUTER_REFRESH: default 60 seconds after which unused statistics are stale
+- MODEL_ROUTER_EXPLORE_INTERVAL: default 30 seconds between exploration requests
+  per provider and class (0 disables exploration)
+- MODEL_REQUEST_TIMEOUT: default 30 seconds per Claude/OpenAI attempt
+- MODEL_BREAKER_FAILURES: default 3 consecutive failures open a circuit
+- MODEL_BREAKER_COOLDOWN: default 20 seconds before the first half-open probe
+- MODEL_BREAKER_MAX_COOLDOWN: default 300 seconds
+- MODEL_HEDGE: default 0 (off); 1 enables hedged requests
+- MODEL_HEDGE_MIN_MS: default 300 ms floor for the hedge delay
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE = os.getenv("MODEL_ROUTER_ADAPTIVE", "1") != "0"
+PREFERENCE = max(1.0, float(os.getenv("MODEL_ROUTER_PREFERENCE", "1.5")))
+EWMA_ALPHA = float(os.getenv("MODEL_EWMA_ALPHA", "0.2"))
+REFRESH_SECONDS = float(os.getenv("MODEL_ROUTER_REFRESH", "60"))
+EXPLORE_INTERVAL = float(os.getenv("MODEL_ROUTER_EXPLORE_INTERVAL", "30"))
+REQUEST_TIMEOUT = float(os.getenv("MODEL_REQUEST_TIMEOUT", "30"))
+BREAKER_FAILURES = int(os.getenv("MODEL_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("MODEL_BREAKER_COOLDOWN", "20"))
+BREAKER_MAX_COOLDOWN = float(os.getenv("MODEL_BREAKER_MAX_COOLDOWN", "300"))
+HEDGE = os.getenv("MODEL_HEDGE", "0") == "1"
+HEDGE_MIN_MS = float(os.getenv("MODEL_HEDGE_MIN_MS", "300"))
+
+SHORT_MAX_TOKENS = 256
+LATENCY_WINDOW = 100
+# A provider needs this many samples before its p95 is trusted as a hedge delay
+HEDGE_MIN_SAMPLES = 5
+# Expected latency is multiplied by (1 + ERROR_PENALTY * error_rate)
+ERROR_PENALTY = 4.0
+
+
+def request_class(max_tokens: int, stream: bool = False) -> str:
+    if stream:
+        return "stream"
+    return "short" if max_tokens <= SHORT_MAX_TOKENS else "long"
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly 4 characters per token, as in the models' estimate_tokens
+    return max(1, len(text) // 4) if text else 0
+
+
+class ProviderStats:
+    """Rolling latency, error rate and throughput for one provider and request class."""
+
+    def __init__(self, alpha: float = EWMA_ALPHA, refresh: float = REFRESH_SECONDS):
+        self.alpha = alpha
+        self.refresh = refresh
+        self.updated = 0.0
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.tokens_per_s: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.successes = 0
+        self.failures = 0
+
+    def _ewma(self, old: Optional[float], new: float) -> float:
+        return new if old is None else old + self.alpha * (new - old)
+
+    @property
+    def stale(self) -> bool:
+        return self.latency_ms is not None and time.monotonic() - self.updated > self.refresh
+
+    def reset(self):
+        """Forget latency and error history (counters are kept)."""
+        self.latency_ms = None
+        self.error_rate = 0.0
+        self.samples.clear()
+
+    def _touch(self):
+        # Stale numbers describe a provider that may have recovered; start over
+        if self.stale:
+            self.reset()
+        self.updated = time.monotonic()
+
+    def record_success(self, latency_ms: float, tokens: int = 0, duration_s: Optional[float] = None):
+        self._touch()
+        self.successes += 1
+        self.latency_ms = self._ewma(self.latency_ms, latency_ms)
+        self.error_rate = self._ewma(self.error_rate, 0.0)
+        self.samples.append(latency_ms)
+        self.record_throughput(tokens, duration_s if duration_s is not None else latency_ms / 1000.0)
+
+    def record_throughput(self, tokens: int, duration_s: float):
+        if tokens > 0 and duration_s > 0:
+            self.tokens_per_s = self._ewma(self.tokens_per_s, tokens / duration_s)
+
+    def record_failure(self, latency_ms: Optional[float] = None):
+        """A failed attempt; ``latency_ms`` is given for timeouts, which also count as slow."""
+        self._touch()
+        self.failures += 1
+        self.error_rate = self._ewma(self.error_rate, 1.0)
+        if latency_ms is not None:
+            self.latency_ms = self._ewma(self.latency_ms, latency_ms)
+            self.samples.append(latency_ms)
+
+    def record_abandoned(self, elapsed_ms: float):
+        """An attempt cancelled after ``elapsed_ms`` (a lost hedge): its latency is at least that."""
+        self._touch()
+        if self.latency_ms is None or elapsed_ms > self.latency_ms:
+            self.latency_ms = self._ewma(self.latency_ms, elapsed_ms)
+            self.samples.append(elapsed_ms)
+
+    def p95(self) -> Optional[float]:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered), math.ceil(0.95 * len(ordered))) - 1]
+
+    def expected_ms(self) -> Optional[float]:
+        if self.latency_ms is None or self.stale:
+            return None
+        return self.latency_ms * (1.0 + ERROR_PENALTY * self.error_rate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "tokens_per_s": round(self.tokens_per_s, 1) if self.tokens_per_s is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open single probe -> closed or open again."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN,
+                 max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.name = name
+        self.threshold = max(1, failures)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.probing = False
+        self.opened = 0
+        self.held_closed = 0
+
+    def available(self) -> bool:
+        """Whether a request could go through now (does not claim the probe)."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() >= self.open_until
+        return not self.probing
+
+    def allow(self) -> bool:
+        """Claim permission for one attempt; in half-open state only one probe runs."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() < self.open_until:
+                return False
+            self.state = self.HALF_OPEN
+            logger.info(f"🔌 {self.name} circuit half-open, probing")
+        if self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def release(self):
+        """The attempt ended without a verdict (e.g. a cancelled hedge)."""
+        self.probing = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"✅ {self.name} circuit closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = self.base_cooldown
+        self.probing = False
+
+    def record_failure(self, can_open: bool = True):
+        """A failed attempt; with ``can_open`` False (no healthy alternative) a closed circuit stays closed."""
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open()
+        elif self.state == self.CLOSED and self.consecutive_failures >= self.threshold:
+            if can_open:
+                self._open()
+            else:
+                self.held_closed += 1
+                if self.consecutive_failures == self.threshold:
+                    logger.warning(f"🔌 {self.name} keeps failing but is the last healthy provider; "
+                                   f"circuit stays closed")
+        self.probing = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.open_until = time.monotonic() + self.cooldown
+        self.opened += 1
+        logger.warning(f"🔌 {self.name} circuit open for {self.cooldown:g}s "
+                       f"after {self.consecutive_failures} consecutive failures")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "cooldown_s": self.cooldown,
+            "reopens_in_s": round(max(0.0, self.open_until - time.monotonic()), 1) if self.state == self.OPEN else 0.0,
+            "opened": self.opened,
+            "held_closed": self.held_closed,
+        }
+
+
+class ProviderRouter:
+    """Orders providers per request and runs attempts with breakers, timeouts and hedging.
+
+    ``priority`` is the preferred order of provider names; ``timeouts``
+    overrides REQUEST_TIMEOUT per provider.
+    """
+
+    def __init__(self, priority: Sequence[str], timeouts: Optional[Dict[str, float]] = None,
+                 adaptive: bool = ADAPTIVE, hedge: bool = HEDGE):
+        self.priority = list(priority)
+        self.timeouts = dict(timeouts or {})
+        self.adaptive = adaptive
+        self.hedge = hedge
+        self.breakers = {name: CircuitBreaker(name) for name in self.priority}
+        self._stats: Dict[Tuple[str, str], ProviderStats] = {}
+        self._explored: Dict[Tuple[str, str], float] = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.explorations = 0
+        self.requests = 0
+        self.exhausted = 0
+        self.picks: Dict[str, int] = {name: 0 for name in self.priority}
+
+    def stats(self, name: str, cls: str) -> ProviderStats:
+        key = (name, cls)
+        if key not in self._stats:
+            self._stats[key] = ProviderStats()
+        return self._stats[key]
+
+    def timeout(self, name: str) -> float:
+        return self.timeouts.get(name, REQUEST_TIMEOUT)
+
+    def available(self, name: str) -> bool:
+        return self.breakers[name].available()
+
+    def rank(self, names: Sequence[str], cls: str) -> List[str]:
+        """Providers to try, best first; those with an open circuit are left out.
+
+        Ranking a request may pick it for exploration (see module docstring).
+        """
+        candidates = [name for name in self.priority if name in names and self.breakers[name].available()]
+        if not self.adaptive:
+            return candidates
+
+        # A circuit coming out of its cooldown is probed in its preferred slot
+        expected = {
+            name: self.stats(name, cls).expected_ms() if self.breakers[name].state == CircuitBreaker.CLOSED else None
+            for name in candidates
+        }
+        measured = [(rank, name) for rank, name in enumerate(candidates) if expected[name] is not None]
+        result = list(candidates)
+        if len(measured) >= 2:
+            # Unmeasured providers keep their slot; measured ones are reordered among
+            # themselves, each step down the preference list counting PREFERENCE times faster
+            ordered = sorted(measured, key=lambda item: expected[item[1]] * PREFERENCE ** item[0])
+            for (slot, _), (_, name) in zip(measured, ordered):
+                result[slot] = name
+        if measured and EXPLORE_INTERVAL > 0:
+            self._explore(result, expected, cls)
+        return result
+
+    def _explore(self, ranked: List[str], expected: Dict[str, Optional[float]], cls: str):
+        """Move the first unmeasured, healthy provider to the front, at most once per interval."""
+        now = time.monotonic()
+        for index, name in enumerate(ranked):
+            if expected[name] is not None or self.breakers[name].state != CircuitBreaker.CLOSED:
+                continue
+            if index == 0:
+                return  # it is tried first anyway
+            if now - self._explored.get((name, cls), -math.inf) < EXPLORE_INTERVAL:
+                continue
+            self._explored[(name, cls)] = now
+            self.explorations += 1
+            ranked.insert(0, ranked.pop(index))
+            logger.debug(f"🧭 Exploring {name} for {cls} requests")
+            return
+
+    # Outcomes -------------------------------------------------------------
+
+    def record_success(self, name: str, cls: str, latency_ms: float, tokens: int = 0,
+                       duration_s: Optional[float] = None):
+        breaker = self.breakers[name]
+        if breaker.state != CircuitBreaker.CLOSED:
+            # A good probe: numbers from while it was failing no longer apply
+            for (provider, _), stats in self._stats.items():
+                if provider == name:
+                    stats.reset()
+        breaker.record_success()
+        self.stats(name, cls).record_success(latency_ms, tokens, duration_s)
+
+    def record_failure(self, name: str, cls: str, latency_ms: Optional[float] = None,
+                       others: Optional[Sequence[str]] = None):
+        """A failed attempt; ``others`` are the providers the request could have used (default: all)."""
+        if others is None:
+            others = self.priority
+        can_open = any(self.breakers[other].state == CircuitBreaker.CLOSED for other in others if other != name)
+        self.breakers[name].record_failure(can_open)
+        self.stats(name, cls).record_failure(latency_ms)
+
+    def release(self, name: str):
+        self.breakers[name].release()
+
+    # Execution ------------------------------------------------------------
+
+    async def _attempt(self, name: str, cls: str, call: Callable[[], Awaitable[str]],
+                       failed: Callable[[str], bool], others: Sequence[str]) -> Tuple[bool, Optional[str]]:
+        start = time.perf_counter()
+        try:
+            text = await asyncio.wait_for(call(), timeout=self.timeout(name))
+        except asyncio.CancelledError:
+            self.release(name)
+            self.stats(name, cls).record_abandoned((time.perf_counter() - start) * 1000)
+            raise
+        except asyncio.TimeoutError:
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.warning(f"⚠️ {name} timed out after {elapsed:.0f} ms")
+            self.record_failure(name, cls, elapsed, others)
+            return False, None
+        except Exception as e:
+            logger.warning(f"⚠️ {name} failed: {str(e)}")
+            self.record_failure(name, cls, others=others)
+            return False, None
+        elapsed = (time.perf_counter() - start) * 1000
+        if failed(text):
+            logger.warning(f"⚠️ {name} returned an error: {(text or '')[:120]}")
+            self.record_failure(name, cls, others=others)
+            return False, text
+        self.record_success(name, cls, elapsed, tokens=estimate_tokens(text))
+        return True, text
+
+    def hedge_delay(self, name: str, cls: str) -> Optional[float]:
+        """Seconds to wait on ``name`` before starting a backup, or None to not hedge."""
+        p95 = self.stats(name, cls).p95()
+        if p95 is None:
+            return None
+        return max(p95, HEDGE_MIN_MS) / 1000.0
+
+    async def run(self, cls: str, calls: Dict[str, Callable[[], Awaitable[str]]],
+                  failed: Callable[[str], bool]) -> Optional[Tuple[str, str]]:
+        """Call providers in ranked order until one succeeds.
+
+        ``calls`` maps provider name to a zero-argument coroutine factory;
+        ``failed`` recognizes error text returned instead of raised. Returns
+        (provider, text), or None if every provider failed or was skipped.
+        """
+        self.requests += 1
+        queue = self.rank(list(calls), cls)
+        pending: Dict[asyncio.Task, str] = {}
+        hedged = False
+
+        def launch() -> bool:
+            while queue:
+                name = queue.pop(0)
+                if self.breakers[name].allow():
+                    pending[asyncio.create_task(self._attempt(name, cls, calls[name], failed, list(calls)))] = name
+                    return True
+            return False
+
+        if not launch():
+            self.exhausted += 1
+            return None
+        first = next(iter(pending.values()))
+        try:
+            while pending:
+                delay = None
+                if self.hedge and not hedged and queue and len(pending) == 1:
+                    delay = self.hedge_delay(first, cls)
+                done, _ = await asyncio.wait(list(pending), timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if launch():
+                        self.hedges += 1
+                        logger.info(f"🪁 {first} slower than its p95 ({delay * 1000:.0f} ms), "
+                                    f"hedging with {list(pending.values())[-1]}")
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    ok, text = task.result()
+                    if ok:
+                        self.picks[name] += 1
+                        if hedged and name != first:
+                            self.hedge_wins += 1
+                        return name, text
+                if not pending:
+                    launch()
+            self.exhausted += 1
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        providers = {}
+        for name in self.priority:
+            classes = {cls: stats.get_stats() for (provider, cls), stats in self._stats.items() if provider == name}
+            providers[name] = {"circuit": self.breakers[name].get_stats(), "picks": self.picks[name],
+                               "classes": classes}
+        return {
+            "adaptive": self.adaptive,
+            "hedging": self.hedge,
+            "requests": self.requests,
+            "exhausted": self.exhausted,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "explorations": self.explorations,
+            "providers": providers,
+        }
@@ -0,0 +1,472 @@
+"""
+Shared response cache in front of every LLM call.
+
+The same prompts reach the models over and over: status summaries of
+unchanged tool output, repeated /nl routing prompts, the formatter on
+identical tool results, thread summaries over an unchanged window. This
+cache answers them without a model call.
+
+Tiers:
+- exact: keyed on the normalized prompt plus a scope (model chain, system
+  prompt and sampling parameters), held in an in-memory LRU with TTL
+- persistent: the same entries in SQLite, consulted on a memory miss and
+  bounded separately, so hot answers survive restarts
+- semantic (opt-in per call site): a near-duplicate prompt in the same scope
+  is served when the cosine similarity of locally computed hashed
+  bag-of-words embeddings reaches the threshold. Only enable it for call
+  sites whose answers do not depend on exact wording or numbers.
+
+Call sites opt in by passing a cache_site label ("formatter",
+"intent_router", "llm_router", "summarize_thread"); chat replies are sampled
+and never cached, so an identical message still gets a fresh answer. Every
+lookup is counted under its call site so status endpoints can show where the
+cache pays.
+
+Environment variables (with defaults):
+- RESPONSE_CACHE: default "1" (set "0" to disable the cache entirely)
+- RESPONSE_CACHE_DB: default "./data/response_cache.sqlite" ("" disables persistence)
+- RESPONSE_CACHE_SIZE: default 1024 entries kept in memory
+- RESPONSE_CACHE_DB_SIZE: default 20000 entries kept on disk
+- RESPONSE_CACHE_TTL: default 3600 seconds
+- RESPONSE_CACHE_MAX_CHARS: default 32000 (longer responses are not cached)
+- RESPONSE_CACHE_SEMANTIC: default "" (comma-separated call sites with the
+  semantic tier enabled, or "all")
+- RESPONSE_CACHE_SEMANTIC_THRESHOLD: default 0.92 cosine similarity
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "./data/response_cache.sqlite"
+
+_WS_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"\w+")
+
+# Deletes beyond the disk bound are batched rather than run on every store
+_PRUNE_EVERY = 64
+
+SparseVector = Dict[int, float]
+
+
+def normalize_prompt(text: str) -> str:
+    """Collapse runs of whitespace and trim, keeping case and punctuation.
+
+    Unlike routing queries, prompts are sent to the model verbatim, so only
+    differences the model cannot see are normalized away.
+    """
+    return _WS_RE.sub(" ", (text or "").strip())
+
+
+def scope_key(model: str, system: str = "", params: Optional[Mapping[str, Any]] = None) -> str:
+    """Fingerprint of everything besides the prompt that shapes a response."""
+    raw = json.dumps(
+        {"model": model, "system": normalize_prompt(system), "params": dict(params or {})},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class HashingEmbedder:
+    """Sparse, deterministic bag-of-words embedding computed locally.
+
+    Word unigrams and bigrams are hashed into ``dim`` signed buckets with
+    sublinear term frequency, then L2-normalized, so the dot product of two
+    vectors is their cosine similarity. Needs no model or network call and
+    stays comparable across restarts.
+    """
+
+    def __init__(self, dim: int = 1 << 18):
+        self.dim = dim
+
+    def __call__(self, text: str) -> SparseVector:
+        tokens = _TOKEN_RE.findall(text.lower())
+        counts: Dict[str, int] = {}
+        for gram in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            counts[gram] = counts.get(gram, 0) + 1
+        vector: SparseVector = {}
+        for gram, count in counts.items():
+            digest = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+            sign = 1.0 if digest & 1 else -1.0
+            bucket = (digest >> 1) % self.dim
+            vector[bucket] = vector.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if not norm:
+            return {}
+        return {k: round(v / norm, 6) for k, v in vector.items() if v}
+
+    @staticmethod
+    def similarity(a: SparseVector, b: SparseVector) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+@dataclass
+class _Entry:
+    key: str
+    scope: str
+    value: str
+    created: float
+    vector: Optional[SparseVector] = None
+
+
+@dataclass
+class SiteStats:
+    """Lookup counters for one call site."""
+    hits: int = 0
+    disk_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    skipped: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        served = self.hits + self.disk_hits + self.semantic_hits
+        lookups = served + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+        }
+
+
+@dataclass
+class _Counters:
+    evictions: int = 0
+    expirations: int = 0
+    sites: Dict[str, SiteStats] = field(default_factory=dict)
+
+    def site(self, name: str) -> SiteStats:
+        stats = self.sites.get(name)
+        if stats is None:
+            stats = self.sites[name] = SiteStats()
+        return stats
+
+
+class ResponseCache:
+    """Exact + semantic LLM response cache with a SQLite tier.
+
+    ``semantic_sites`` lists the call sites allowed to use the semantic
+    tier ("all" enables it everywhere). Responses longer than ``max_chars``
+    are not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        db_path: Optional[str] = DEFAULT_DB_PATH,
+        db_max_entries: int = 20000,
+        max_chars: int = 32000,
+        semantic_sites: Iterable[str] = (),
+        similarity_threshold: float = 0.92,
+        embedder: Optional[Callable[[str], SparseVector]] = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.db_max_entries = max(self.max_entries, int(db_max_entries))
+        self.max_chars = int(max_chars)
+        self.semantic_sites: Set[str] = {s.strip() for s in semantic_sites if s.strip()}
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder or HashingEmbedder()
+        self.counters = _Counters()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # scope -> keys of in-memory entries that carry a vector
+        self._by_scope: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._stores_since_prune = 0
+        self._db_path: Optional[Path] = Path(db_path).resolve() if db_path else None
+        if self._db_path is not None:
+            try:
+                self._db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._init_db()
+                self._load()
+            except Exception as e:
+                logger.warning(f"⚠️ Response cache persistence disabled: {e}")
+                self._db_path = None
+
+    # -- keys -------------------------------------------------------------
+
+    @staticmethod
+    def _make_key(scope: str, normalized: str) -> str:
+        return hashlib.sha1(f"{scope}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def semantic_enabled(self, site: str) -> bool:
+        return "all" in self.semantic_sites or site in self.semantic_sites
+
+    # -- public API -------------------------------------------------------
+
+    def get(self, site: str, prompt: str, model: str, system: str = "",
+            params: Optional[Mapping[str, Any]] = None) -> Optional[str]:
+        """Return the cached response for this request, or None on a miss."""
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return None
+        scope = scope_key(model, system, params)
+        key = self._make_key(scope, normalized)
+        now = time.time()
+        with self._lock:
+            stats = self.counters.site(site)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry.created, now):
+                    self._drop(key)
+                    self.counters.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    stats.hits += 1
+                    return entry.value
+
+            entry = self._disk_get(key, now)
+            if entry is not None:
+                self._insert(entry)
+                stats.disk_hits += 1
+                return entry.value
+
+            if self.semantic_enabled(site):
+                entry = self._semantic_lookup(scope, normalized, now)
+                if entry is not None:
+                    self._entries.move_to_end(entry.key)
+                    stats.semantic_hits += 1
+                    return entry.value
+
+            stats.misses += 1
+            return None
+
+    def put(self, site: str, prompt: str, model: str, response: str, system: str = "",
+            params: Optional[Mapping[str, Any]] = None) -> None:
+        """Store ``response`` for this request."""
+        normalized = normalize_prompt(prompt)
+        if not normalized or not response:
+            return
+        if len(response) > self.max_chars:
+            with self._lock:
+                self.counters.site(site).skipped += 1
+            return
+        scope = scope_key(model, system, params)
+        entry = _Entry(
+            key=self._make_key(scope, normalized),
+            scope=scope,
+            value=response,
+            created=time.time(),
+            vector=self.embedder(normalized) if self.semantic_enabled(site) else None,
+        )
+        with self._lock:
+            self._insert(entry)
+            self.counters.site(site).stores += 1
+        self._persist(entry)
+
+    def clear(self) -> None:
+        """Drop every entry (memory and disk)."""
+        with self._lock:
+            self._entries.clear()
+            self._by_scope.clear()
+        if self._db_path is not None:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM responses")
+                    conn.commit()
+            except Exception as e:
+                logger.warning(f"Error clearing response cache: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sites = {name: stats.as_dict() for name, stats in self.counters.sites.items()}
+            size = len(self._entries)
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.counters.evictions,
+            "expirations": self.counters.expirations,
+            "persistent": self._db_path is not None,
+            "semantic_sites": sorted(self.semantic_sites),
+            "sites": sites,
+        }
+
+    # -- internals --------------------------------------------------------
+
+    def _insert(self, entry: _Entry) -> None:
+        if entry.key in self._entries:
+            self._drop(entry.key)
+        self._entries[entry.key] = entry
+        if entry.vector:
+            self._by_scope.setdefault(entry.scope, set()).add(entry.key)
+        while len(self._entries) > self.max_entries:
+            # Evicted from memory only; the disk tier keeps it
+            self._drop(next(iter(self._entries)))
+            self.counters.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or not entry.vector:
+            return
+        keys = self._by_scope.get(entry.scope)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_scope[entry.scope]
+
+    def _semantic_lookup(self, scope: str, normalized: str, now: float) -> Optional[_Entry]:
+        keys = self._by_scope.get(scope)
+        if not keys:
+            return None
+        vector = self.embedder(normalized)
+        if not vector:
+            return None
+        best: Optional[_Entry] = None
+        best_score = self.similarity_threshold
+        for key in list(keys):
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry.created, now):
+                continue
+            score = HashingEmbedder.similarity(vector, entry.vector or {})
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    # -- persistence ------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self._db_path), timeout=5)
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    vector TEXT
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses(created)")
+            conn.commit()
+
+    def _load(self) -> None:
+        """Warm the memory tier (and semantic index) with the newest entries."""
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,))
+            rows = conn.execute(
+                "SELECT key, scope, value, created, vector FROM responses ORDER BY created DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+            conn.commit()
+        for key, scope, value, created, vector in reversed(rows):
+            try:
+                parsed = {int(k): v for k, v in json.loads(vector).items()} if vector else None
+            except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+                parsed = None
+            self._insert(_Entry(key=key, scope=scope, value=value, created=created, vector=parsed))
+        if rows:
+            logger.info(f"✅ Response cache restored {len(self._entries)} entries")
+
+    def _disk_get(self, key: str, now: float) -> Optional[_Entry]:
+        if self._db_path is None:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT scope, value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"Error reading response cache: {e}")
+            return None
+        if row is None or self._expired(row[2], now):
+            return None
+        # The vector is not needed for an exact hit; it is rebuilt on the next store
+        return _Entry(key=key, scope=row[0], value=row[1], created=row[2])
+
+    def _persist(self, entry: _Entry) -> None:
+        if self._db_path is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses(key, scope, value, created, vector) VALUES(?, ?, ?, ?, ?)",
+                    (
+                        entry.key,
+                        entry.scope,
+                        entry.value,
+                        entry.created,
+                        json.dumps(entry.vector) if entry.vector else None,
+                    ),
+                )
+                self._stores_since_prune += 1
+                if self._stores_since_prune >= _PRUNE_EVERY:
+                    self._stores_since_prune = 0
+                    self._prune(conn)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Error persisting LLM response: {e}")
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop expired rows and the oldest rows beyond the disk bound."""
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.db_max_entries,),
+        )
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def _enabled() -> bool:
+    return os.getenv("RESPONSE_CACHE", "1").strip().lower() not in ("0", "false", "no")
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get (or lazily create) the process-wide response cache; None if disabled."""
+    global _cache
+    if not _enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+                ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+                db_path=os.getenv("RESPONSE_CACHE_DB", DEFAULT_DB_PATH) or None,
+                db_max_entries=int(os.getenv("RESPONSE_CACHE_DB_SIZE", "20000")),
+                max_chars=int(os.getenv("RESPONSE_CACHE_MAX_CHARS", "32000")),
+                semantic_sites=os.getenv("RESPONSE_CACHE_SEMANTIC", "").split(","),
+                similarity_threshold=float(os.getenv("RESPONSE_CACHE_SEMANTIC_THRESHOLD", "0.92")),
+            )
+        return _cache
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    """Stats of the process-wide response cache ({} if it was never used)."""
+    with _cache_lock:
+        cache = _cache
+    return cache.get_stats() if cache is not None else {}
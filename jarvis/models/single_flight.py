@@ -0,0 +1,203 @@
+"""
+Single-flight coalescing of identical in-flight model requests.
+
+When several Discord users ask the same thing at once, or two call sites
+summarize the same tool output, each caller used to start its own
+generation. The response cache only helps once the first one has finished;
+SingleFlight covers the window before that. Requests are keyed on the
+canonical request (messages with whitespace normalized like the response
+cache, sampling parameters and provider restriction), and while one is
+running every identical request waits on it instead of starting another:
+
+- do(): the first caller starts the generation, later callers await the
+  same result
+- subscribe(): a shared stream. Fragments are buffered, so a caller that
+  joins late first gets everything generated so far, then follows live.
+  A do() on a key that is streaming waits for the whole text, and a
+  subscribe() on a key running through do() gets the result as one fragment
+- cancellation: a caller that is cancelled (or stops iterating) only leaves
+  the flight. The generation itself is cancelled, and its provider stream
+  closed, only once every waiter has gone; an identical request arriving
+  after that starts a new generation instead of joining the cancelled one
+
+Environment variables (with defaults):
+- MODEL_COALESCE: default 1; 0 gives every request its own generation
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence
+
+from .response_cache import normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+COALESCE = os.getenv("MODEL_COALESCE", "1") != "0"
+
+
+def request_key(messages: Sequence[Mapping[str, Any]], **params: Any) -> str:
+    """Fingerprint of a model request: normalized messages plus everything that shapes the reply."""
+    raw = json.dumps(
+        {
+            "messages": [[m.get("role"), normalize_prompt(str(m.get("content") or ""))] for m in messages],
+            "params": params,
+        },
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One running generation and the callers waiting on it."""
+
+    def __init__(self, key: str, stream: bool):
+        self.key = key
+        self.stream = stream
+        self.waiters = 0
+        self.parts: List[str] = []
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def changed(self) -> asyncio.Event:
+        """Event set at the next new fragment or when the generation ends."""
+        return self._changed
+
+    def wake(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight:
+    """In-flight requests by key; identical concurrent requests share one generation."""
+
+    def __init__(self, enabled: bool = COALESCE):
+        self.enabled = enabled
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.coalesced_streams = 0
+        self.waiters_cancelled = 0
+        self.aborted = 0
+
+    def _start(self, key: str, stream: bool, run: Callable[[_Flight], Awaitable[str]]) -> _Flight:
+        flight = _Flight(key, stream)
+        flight.task = asyncio.ensure_future(run(flight))
+        flight.task.add_done_callback(lambda task: self._finished(flight, task))
+        self._flights[key] = flight
+        self.started += 1
+        return flight
+
+    def _finished(self, flight: _Flight, task: asyncio.Task) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        if not task.cancelled():
+            # Every waiter may be gone; retrieve the error so it is not reported as lost
+            task.exception()
+        flight.wake()
+
+    def _join(self, key: str) -> Optional[_Flight]:
+        flight = self._flights.get(key)
+        if flight is not None and (flight.task.done() or flight.task.cancelling()):
+            return None
+        return flight
+
+    def _leave(self, flight: _Flight, finished: bool) -> None:
+        flight.waiters -= 1
+        if not finished:
+            self.waiters_cancelled += 1
+        if flight.waiters == 0 and not flight.task.done():
+            # Nobody is left to receive the result
+            logger.debug("🛑 Last waiter left; cancelling shared generation")
+            self.aborted += 1
+            # A request arriving before the task has unwound must start afresh, not join it
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.task.cancel()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        """Result of ``fn()``, shared with every concurrent call for ``key``."""
+        if not self.enabled:
+            return await fn()
+        flight = self._join(key)
+        if flight is None:
+            flight = self._start(key, False, lambda _flight: fn())
+        else:
+            self.coalesced += 1
+            logger.debug(f"🔗 Joined in-flight request ({flight.waiters} waiting)")
+        flight.waiters += 1
+        finished = False
+        try:
+            result = await asyncio.shield(flight.task)
+            finished = True
+            return result
+        finally:
+            self._leave(flight, finished or flight.task.done())
+
+    async def subscribe(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Fragments of ``factory()``'s stream, shared with every concurrent subscriber for ``key``."""
+        if not self.enabled:
+            stream = factory()
+            try:
+                async for text in stream:
+                    yield text
+            finally:
+                await stream.aclose()
+            return
+
+        flight = self._join(key)
+        if flight is None:
+            flight = self._start(key, True, lambda new: self._pump(new, factory()))
+        else:
+            self.coalesced_streams += 1
+            logger.debug(f"🔗 Joined in-flight stream ({flight.waiters} waiting)")
+        flight.waiters += 1
+        finished = False
+        try:
+            if not flight.stream:
+                yield await asyncio.shield(flight.task)
+                finished = True
+                return
+            sent = 0
+            while True:
+                changed = flight.changed()
+                while sent < len(flight.parts):
+                    yield flight.parts[sent]
+                    sent += 1
+                if flight.task.done() and sent == len(flight.parts):
+                    # Re-raise the generation's error, if any
+                    flight.task.result()
+                    finished = True
+                    return
+                await changed.wait()
+        finally:
+            self._leave(flight, finished or flight.task.done())
+
+    @staticmethod
+    async def _pump(flight: _Flight, source: AsyncIterator[str]) -> str:
+        """Drive the shared stream, buffering fragments for the subscribers."""
+        try:
+            async for text in source:
+                flight.parts.append(text)
+                flight.wake()
+            return "".join(flight.parts)
+        finally:
+            await source.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "waiting": sum(flight.waiters for flight in self._flights.values()),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "coalesced_streams": self.coalesced_streams,
+            "waiters_cancelled": self.waiters_cancelled,
+            "aborted": self.aborted,
+        }
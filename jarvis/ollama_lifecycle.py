@@ -2,6 +2,10 @@
 Start and stop the Ollama server alongside Jarvis (e.g. Discord bot).
 
 Only stops a process this module started — if Ollama was already running, we leave it alone.
+
+Ready means more than a reachable API: the configured models (see
+OLLAMA_PRELOAD_MODELS in ollama_residency) must be pulled and loaded, so the
+first real request does not pay the cold load.
 """
 
 from __future__ import annotations
@@ -13,10 +17,12 @@ import shutil
 import subprocess
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
 import aiohttp
 
+from .ollama_residency import OllamaResidency, get_ollama_residency
+
 logger = logging.getLogger(__name__)
 
 # Common Windows install location (not always on PATH)
@@ -51,6 +57,7 @@ class OllamaLifecycle:
         self.base_url = (base_url or os.environ.get("OLLAMA_HOST", "http://localhost:11434")).rstrip("/")
         self._process: Optional[subprocess.Popen] = None
         self._started_by_us = False
+        self.residency: OllamaResidency = get_ollama_residency(self.base_url)
 
     async def is_api_reachable(self, timeout: float = 3.0) -> bool:
         try:
@@ -63,22 +70,38 @@ class OllamaLifecycle:
         except Exception:
             return False
 
-    async def wait_until_ready(self, timeout: float = 90.0) -> bool:
-        """Poll until Ollama HTTP API responds."""
-        deadline = asyncio.get_event_loop().time() + timeout
-        while asyncio.get_event_loop().time() < deadline:
-            if await self.is_api_reachable():
-                logger.info("Ollama API is ready at %s", self.base_url)
-                return True
-            await asyncio.sleep(1.0)
-        logger.error("Timed out waiting for Ollama at %s", self.base_url)
-        return False
+    async def wait_until_ready(self, timeout: float = 90.0, models: Optional[Iterable[str]] = None) -> bool:
+        """Poll until the HTTP API responds, then until ``models`` are pulled and loaded.
+
+        ``models`` defaults to the residency manager's preload list; pass an
+        empty list to only wait for the API.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not await self.is_api_reachable():
+            if loop.time() >= deadline:
+                logger.error("Timed out waiting for Ollama at %s", self.base_url)
+                return False
+            await asyncio.sleep(0.5)
+        logger.info("Ollama API is ready at %s", self.base_url)
+
+        for model in (self.residency.preload_models if models is None else list(models)):
+            remaining = deadline - loop.time()
+            try:
+                ready = await asyncio.wait_for(self.residency.wait_for_model(model), timeout=max(remaining, 0.1))
+            except asyncio.TimeoutError:
+                ready = False
+            if not ready:
+                logger.error("Ollama model %s is not ready at %s", model, self.base_url)
+                return False
+            logger.info("Ollama model %s is loaded", model)
+        return True
 
     async def start(self) -> bool:
         """Ensure Ollama is running; start ``serve`` if needed."""
         if await self.is_api_reachable():
             logger.info("Ollama already running at %s (will not stop on exit)", self.base_url)
-            return True
+            return await self.wait_until_ready()
 
         exe = find_ollama_executable()
         if not exe:
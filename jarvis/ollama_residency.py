@@ -0,0 +1,387 @@
+"""
+Keep Ollama models resident in memory between sparse requests.
+
+Ollama unloads a model five minutes after its last request, so the first
+Discord message after a quiet spell pays a multi-second cold load. The
+residency manager:
+
+- sends ``keep_alive`` with every request (see ``keep_alive_value``) so a
+  used model stays loaded for OLLAMA_KEEP_ALIVE instead of the server default
+- preloads the configured models at startup (an empty generate request
+  loads a model without producing tokens)
+- tracks which models are loaded, and until when, through ``/api/ps``
+- pins models: preloaded models are reloaded if something evicted them, and
+  models used recently are touched again before their keep_alive runs out
+- warms a model on predicted demand (``schedule_warm``, e.g. when a user
+  starts typing) so the load overlaps with the user still writing
+- records request latency separately for cold (model had to be loaded) and
+  warm requests, using the ``load_duration`` Ollama reports when present
+
+Environment variables (with defaults):
+- OLLAMA_KEEP_ALIVE: default "30m" (Ollama duration, seconds, or -1 to keep forever)
+- OLLAMA_PRELOAD_MODELS: default OLLAMA_MODEL (comma-separated; "" disables preloading)
+- OLLAMA_PS_INTERVAL: default 30 seconds between /api/ps refreshes
+- OLLAMA_HOT_WINDOW: default 900 seconds a used model counts as hot
+- OLLAMA_WARM_ON_TYPING: default "1" (set "0" to skip warm-ups on typing)
+- OLLAMA_COLD_LOAD_MS: default 250 (load time above which a request counts as cold)
+- OLLAMA_START_TIMEOUT: default 15 seconds to wait for a freshly spawned server
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Union
+
+import aiohttp
+
+from .config import LOCAL_MODEL_BASE_URL, LOCAL_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m").strip()
+PRELOAD_MODELS = [m.strip() for m in os.getenv("OLLAMA_PRELOAD_MODELS", LOCAL_MODEL_NAME).split(",") if m.strip()]
+PS_INTERVAL = float(os.getenv("OLLAMA_PS_INTERVAL", "30"))
+HOT_WINDOW = float(os.getenv("OLLAMA_HOT_WINDOW", "900"))
+WARM_ON_TYPING = os.getenv("OLLAMA_WARM_ON_TYPING", "1").strip().lower() not in ("0", "false", "no")
+COLD_LOAD_MS = float(os.getenv("OLLAMA_COLD_LOAD_MS", "250"))
+START_TIMEOUT = float(os.getenv("OLLAMA_START_TIMEOUT", "15"))
+
+_DURATION_RE = re.compile(r"^(-?\d+(?:\.\d+)?)(ms|s|m|h)?$")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, None: 1.0}
+# Ollama reports nanosecond timestamps; datetime takes at most microseconds
+_FRACTION_RE = re.compile(r"(\.\d{6})\d+")
+
+
+def keep_alive_value(raw: str = KEEP_ALIVE) -> Union[int, float, str]:
+    """The ``keep_alive`` request field: bare numbers are seconds, anything else a duration string."""
+    try:
+        value = float(raw)
+    except ValueError:
+        return raw
+    return int(value) if value.is_integer() else value
+
+
+def keep_alive_seconds(raw: str = KEEP_ALIVE) -> float:
+    """Seconds a model stays loaded after a request (inf for negative values, like Ollama)."""
+    match = _DURATION_RE.match(raw.strip().lower())
+    if not match:
+        return 300.0  # Ollama's default
+    seconds = float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    return math.inf if seconds < 0 else seconds
+
+
+def same_model(a: str, b: str) -> bool:
+    """Compare model names, treating a missing tag as ``:latest``."""
+    def tagged(name: str) -> str:
+        return name if ":" in name else f"{name}:latest"
+    return tagged(a) == tagged(b)
+
+
+def _parse_expiry(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(_FRACTION_RE.sub(r"\1", value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class LatencySeries:
+    """Recent latencies (ms) with count, mean and percentiles."""
+
+    def __init__(self, maxlen: int = 200):
+        self.samples: Deque[float] = deque(maxlen=maxlen)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, value_ms: float) -> None:
+        self.samples.append(value_ms)
+        self.count += 1
+        self.total_ms += value_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": round(p50, 1) if p50 is not None else None,
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+        }
+
+
+class OllamaResidency:
+    """Preloads, pins and warms Ollama models; one instance per Ollama server."""
+
+    def __init__(self, base_url: str = LOCAL_MODEL_BASE_URL, preload_models: Iterable[str] = PRELOAD_MODELS,
+                 keep_alive: str = KEEP_ALIVE, ps_interval: float = PS_INTERVAL,
+                 hot_window: float = HOT_WINDOW):
+        self.base_url = base_url.rstrip("/")
+        self.preload_models: List[str] = list(preload_models)
+        self.keep_alive = keep_alive_value(keep_alive)
+        self.keep_alive_s = keep_alive_seconds(keep_alive)
+        self.ps_interval = ps_interval
+        self.hot_window = hot_window
+        self.warm_on_typing = WARM_ON_TYPING
+        # name -> expiry timestamp (None: loaded, expiry unknown)
+        self.loaded: Dict[str, Optional[float]] = {}
+        self.last_refresh: Optional[float] = None
+        self.reachable = False
+        self.last_used: Dict[str, float] = {}
+        self.latency: Dict[str, Dict[str, LatencySeries]] = {}
+        self.load_latency = LatencySeries()
+        self._warming: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Counters for status endpoints
+        self.refreshes = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.warms = 0
+        self.warms_skipped = 0
+        self.pins = 0
+
+    # -- state ------------------------------------------------------------
+
+    def _loaded_name(self, model: str) -> Optional[str]:
+        for name in self.loaded:
+            if same_model(name, model):
+                return name
+        return None
+
+    def is_loaded(self, model: str) -> bool:
+        """Whether ``model`` is believed to be in memory right now."""
+        name = self._loaded_name(model)
+        if name is None:
+            return False
+        expires = self.loaded[name]
+        return expires is None or expires > time.time()
+
+    def _mark_loaded(self, model: str) -> None:
+        name = self._loaded_name(model) or model
+        self.loaded[name] = time.time() + self.keep_alive_s if math.isfinite(self.keep_alive_s) else None
+
+    def record_request(self, model: str, latency_ms: float, load_duration_ns: Optional[int] = None,
+                       was_loaded: Optional[bool] = None) -> bool:
+        """Record a finished request; returns True if it was a cold one.
+
+        Ollama's ``load_duration`` decides when present; otherwise whether
+        the model was loaded before the request (``was_loaded``).
+        """
+        if load_duration_ns is not None:
+            cold = load_duration_ns / 1e6 >= COLD_LOAD_MS
+        else:
+            cold = was_loaded is False
+        series = self.latency.setdefault(model, {"cold": LatencySeries(), "warm": LatencySeries()})
+        series["cold" if cold else "warm"].record(latency_ms)
+        self.last_used[model] = time.time()
+        self._mark_loaded(model)
+        if cold:
+            logger.info(f"🧊 Cold Ollama request for {model}: {latency_ms:.0f} ms")
+        return cold
+
+    # -- server calls -----------------------------------------------------
+
+    async def refresh(self) -> Dict[str, Optional[float]]:
+        """Reload the set of loaded models from ``/api/ps``."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{self.base_url}/api/ps",
+                                       timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Ollama /api/ps failed: {e}")
+            self.reachable = False
+            return self.loaded
+        self.reachable = True
+        self.loaded = {
+            m.get("name") or m.get("model", ""): _parse_expiry(m.get("expires_at"))
+            for m in data.get("models") or []
+        }
+        self.last_refresh = time.time()
+        self.refreshes += 1
+        return self.loaded
+
+    async def installed(self) -> Optional[Set[str]]:
+        """Models pulled on the server (``/api/tags``), or None if it cannot be reached."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{self.base_url}/api/tags",
+                                       timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                    if resp.status != 200:
+                        return None
+                    data = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
+        return {m.get("name", "") for m in data.get("models") or []}
+
+    async def load(self, model: str, timeout: float = 120.0) -> bool:
+        """Load ``model`` into memory and (re)start its keep_alive timer."""
+        start = time.perf_counter()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": model, "keep_alive": self.keep_alive, "stream": False},
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                ) as resp:
+                    ok = resp.status == 200
+                    if not ok:
+                        logger.warning(f"⚠️ Loading Ollama model {model} failed: {resp.status} {(await resp.text())[:200]}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"⚠️ Loading Ollama model {model} failed: {e}")
+            ok = False
+        if not ok:
+            self.load_failures += 1
+            return False
+        elapsed = (time.perf_counter() - start) * 1000
+        self.loads += 1
+        self.load_latency.record(elapsed)
+        self._mark_loaded(model)
+        logger.info(f"🔥 Ollama model {model} resident ({elapsed:.0f} ms, keep_alive={self.keep_alive})")
+        return True
+
+    async def preload(self, models: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Load every configured (or given) model that is not loaded yet."""
+        await self.refresh()
+        if not self.reachable:
+            return {}
+        results = {}
+        for model in (self.preload_models if models is None else list(models)):
+            results[model] = self.is_loaded(model) or await self.load(model)
+        return results
+
+    async def wait_for_model(self, model: str) -> bool:
+        """Ready means pulled and loaded; logs why not otherwise."""
+        names = await self.installed()
+        if names is None:
+            return False
+        if not any(same_model(name, model) for name in names):
+            logger.error(f"❌ Ollama model {model} is not pulled; run 'ollama pull {model}'")
+            return False
+        await self.refresh()
+        return self.is_loaded(model) or await self.load(model)
+
+    # -- demand warming ---------------------------------------------------
+
+    async def warm(self, model: Optional[str] = None, reason: str = "demand") -> bool:
+        """Load ``model`` ahead of a request unless it is already resident."""
+        model = model or (self.preload_models[0] if self.preload_models else LOCAL_MODEL_NAME)
+        if self.is_loaded(model):
+            self.warms_skipped += 1
+            return True
+        pending = self._warming.get(model)
+        if pending is not None and not pending.done():
+            self.warms_skipped += 1
+            return await asyncio.shield(pending)
+        logger.debug(f"Warming Ollama model {model} ({reason})")
+        self.warms += 1
+        task = asyncio.create_task(self.load(model))
+        self._warming[model] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._warming.get(model) is task and task.done():
+                del self._warming[model]
+
+    def schedule_warm(self, model: Optional[str] = None, reason: str = "typing") -> None:
+        """Fire-and-forget ``warm`` from an event handler."""
+        if reason == "typing" and not self.warm_on_typing:
+            return
+        model = model or (self.preload_models[0] if self.preload_models else LOCAL_MODEL_NAME)
+        if self.is_loaded(model) or (model in self._warming and not self._warming[model].done()):
+            self.warms_skipped += 1
+            return
+        task = asyncio.create_task(self.warm(model, reason))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    # -- pinning loop -----------------------------------------------------
+
+    def _due(self, now: float) -> List[str]:
+        """Models to touch this round: pinned ones that are missing, hot ones about to expire."""
+        due = []
+        for model in self.preload_models:
+            if not self.is_loaded(model):
+                due.append(model)
+        for model, used in self.last_used.items():
+            if now - used > self.hot_window or model in due:
+                continue
+            name = self._loaded_name(model)
+            expires = self.loaded.get(name) if name else None
+            if name is not None and expires is not None and expires - now < 2 * self.ps_interval:
+                due.append(model)
+        return due
+
+    async def run(self) -> None:
+        """Refresh /api/ps and keep pinned and hot models resident until cancelled."""
+        await self.preload()
+        while True:
+            await asyncio.sleep(self.ps_interval)
+            await self.refresh()
+            if not self.reachable:
+                continue
+            for model in self._due(time.time()):
+                self.pins += 1
+                await self.load(model)
+
+    def start(self) -> asyncio.Task:
+        """Start the preload + pinning loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "keep_alive": self.keep_alive,
+            "reachable": self.reachable,
+            "preload_models": self.preload_models,
+            "loaded": {
+                name: (round(expires - now) if expires is not None else None)
+                for name, expires in self.loaded.items()
+            },
+            "refreshes": self.refreshes,
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+            "load_latency": self.load_latency.get_stats(),
+            "warms": self.warms,
+            "warms_skipped": self.warms_skipped,
+            "pins": self.pins,
+            "latency": {
+                model: {kind: series.get_stats() for kind, series in kinds.items()}
+                for model, kinds in self.latency.items()
+            },
+        }
+
+
+_residencies: Dict[str, OllamaResidency] = {}
+
+
+def get_ollama_residency(base_url: str = LOCAL_MODEL_BASE_URL) -> OllamaResidency:
+    """Get (or lazily create) the shared residency manager for an Ollama server."""
+    key = base_url.rstrip("/")
+    residency = _residencies.get(key)
+    if residency is None:
+        residency = _residencies[key] = OllamaResidency(key)
+    return residency
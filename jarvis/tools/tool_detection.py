@@ -0,0 +1,325 @@
+"""
+Compiled tool detection tables.
+
+ToolManager.detect_tool_calls used to rebuild seven pattern lists on every
+call and run them one at a time with ``re.search(..., re.IGNORECASE)`` on
+text it had already lowercased. The tables live here instead, compiled
+once at import:
+
+- DETECTION_RULES lists (tool, category, patterns, resolver) in priority
+  order; a resolver turns a regex match into tool params and a confidence,
+  or None to keep looking
+- each pattern starts with a group of literal alternatives ("weather",
+  "forecast", ...) that any match must contain; the literals of all
+  patterns are checked against the query once, and only patterns whose
+  literal was found are run
+- ToolDetector.candidates returns every tool that matched, with its
+  confidence, in priority order; detect_tool_calls keeps the first one
+
+Search type detection and weather location extraction use the same
+precompiled approach.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+WEATHER_PATTERNS = (
+    r"(weather|forecast|temperature|rain|snow|precipitation|humidity|climate).*?(in|for|at|today|tomorrow|this week|this weekend)",
+    r"(is it|will it).*(rain|snow|sunny|cloudy|warm|cold|hot)",
+    r"(what's|what is|how's|how is).*(weather|temperature).*(in|at|for)",
+    r"(weather|temperature).*?now",
+    r"(humidity|wind speed|pressure).*?(in|at)",
+)
+
+NEWS_PATTERNS = (
+    r"(news|headlines|latest).*(about|on|regarding)",
+    r"(what happened|what's happening|what is happening).*(today|now|recently)",
+)
+
+INFO_PATTERNS = (
+    r"(who is|what is|where is|when is|why is|how is|how to|what are|where are|when are)",
+    r"(tell me about|information about|details about|facts about|give me.*?about)",
+    r"(search|look up|find|google|search for|find information about)",
+)
+
+CALC_PATTERNS = (
+    r"(calculate|compute|evaluate|solve|what is)\s+([0-9+\-*/().%\s]+)",
+    r"(convert|change)\s+(\d+\.?\d*)\s+([a-zA-Z]+)\s+to\s+([a-zA-Z]+)",
+    r"(solve|what is the solution to)\s+([^=]+=.+)",
+)
+
+FILE_PATTERNS = (
+    r"(read|open|show|display)\s+(the\s+)?(file|contents\s+of)\s+([^\s]+)",
+    r"(write|save|create)\s+(to\s+)?(a\s+)?(file|document)\s+([^\s]+)",
+    r"(list|show)\s+(the\s+)?(contents\s+of|files\s+in|directory)\s+([^\s]+)",
+)
+
+SYSTEM_PATTERNS = (
+    r"(cpu|processor|memory|ram|disk|storage|system)\s+(usage|utilization|info|information|status)",
+    r"(how much|what is|show|display|tell me about)\s+(cpu|memory|ram|disk|storage)\s+(usage|utilization)",
+    r"(system|computer|machine|device)\s+(status|health|performance|specs|specifications)",
+)
+
+CODE_PATTERNS = (
+    r"(edit|create|modify|update)\s+(the\s+)?(code|file|program|script)\s+([^\s]+)",
+    r"(run|execute|test)\s+(the\s+)?(code|program|script|function)\s+([^\s]+)?",
+    r"(highlight|format|indent|beautify|pretty print|analyze)\s+(the\s+)?(code|program|script)",
+    r"(diff|compare|find differences)\s+(?:between\s+)?([^\s]+)\s+(?:and\s+)?([^\s]+)",
+    r"(undo|revert|rollback)\s+(the\s+)?(changes|edits|modifications)",
+)
+
+_NEWS_SEARCH_RES = tuple(re.compile(p) for p in (
+    r"(news|headlines|latest|recent|update|breaking)\s+(about|on|regarding|of)",
+    r"(what happened|what's happening|what is happening)",
+    r"(today|yesterday|this week)'s (news|updates|events)",
+))
+_IMAGE_SEARCH_RES = tuple(re.compile(p) for p in (
+    r"(image|images|picture|pictures|photo|photos|photograph|photographs)\s+of",
+    r"(what does|how does).+(look like)",
+    r"(show|display).+(image|picture|photo)",
+))
+
+_LOCATION_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r"(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
+    r"weather\s+(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
+    r"temperature\s+(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
+    r"forecast\s+(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
+))
+_LOCATION_STOPWORDS = frozenset((
+    "what", "where", "when", "how", "why", "who", "which",
+    "weather", "forecast", "temperature", "humidity", "will", "today",
+    "tomorrow", "current", "now",
+))
+
+_LEADING_GROUP_RE = re.compile(r"^\(([^()\[\]\\]+)\)")
+_WORD_PREFIX_RE = re.compile(r"^\w+")
+
+
+def detect_search_type(query: str) -> str:
+    """Pick "news", "images" or "text" search for a query."""
+    query_lower = query.lower()
+    if any(p.search(query_lower) for p in _NEWS_SEARCH_RES):
+        return "news"
+    if any(p.search(query_lower) for p in _IMAGE_SEARCH_RES):
+        return "images"
+    return "text"
+
+
+def extract_location(query: str) -> str:
+    """Extract the location from a weather query, or "" if none is found."""
+    for pattern in _LOCATION_RES:
+        match = pattern.search(query)
+        if match:
+            return match.group(1).strip()
+
+    # Otherwise a capitalized word might be a city name (simple heuristic)
+    for word in query.split():
+        if word[0].isupper() and len(word) > 2 and word.lower() not in _LOCATION_STOPWORDS:
+            return word
+    return ""
+
+
+def leading_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """Literal words a match of ``pattern`` must contain, from its leading group.
+
+    ``(weather|wind speed)...`` -> {"weather", "wind"}. Returns None when the
+    pattern doesn't start with a plain alternation group; such patterns are
+    always run.
+    """
+    match = _LEADING_GROUP_RE.match(pattern)
+    if not match or pattern[match.end():match.end() + 1] in ("?", "*", "{"):
+        return None
+    literals = set()
+    for alternative in match.group(1).split("|"):
+        word = _WORD_PREFIX_RE.match(alternative)
+        if not word:
+            return None
+        literal = word.group(0)
+        if alternative[len(literal):len(literal) + 1] in ("?", "*", "{"):
+            literal = literal[:-1]  # last character is optional
+        if not literal:
+            return None
+        literals.add(literal)
+    return frozenset(literals)
+
+
+@dataclass
+class ToolCandidate:
+    """A tool the query may be asking for."""
+    tool: str
+    params: Dict[str, Any]
+    confidence: float
+    category: str
+    pattern: str
+
+    def as_call(self) -> Dict[str, Any]:
+        return {"tool": self.tool, "params": self.params, "confidence": self.confidence}
+
+
+# (match, lowered query, search type function) -> (params, confidence) or None
+Resolver = Callable[[re.Match, str, Callable[[str], str]], Optional[Tuple[Dict[str, Any], float]]]
+
+
+def _web_search(match, query, search_type):
+    return {"query": query.strip(), "search_type": search_type(query), "multi_search": True}, 0.8
+
+
+def _weather(match, query, search_type):
+    location = extract_location(query)
+    if not location:
+        return None
+    return {"query": location, "research_type": "weather"}, 0.9
+
+
+def _calculator(match, query, search_type):
+    action = match.group(1)
+    if action in ("calculate", "compute", "evaluate", "what is"):
+        expression = match.group(2).strip()
+        return ({"expression": expression}, 0.9) if expression else None
+    if action in ("convert", "change"):
+        return {
+            "value": float(match.group(2)),
+            "from_unit": match.group(3),
+            "to_unit": match.group(4),
+            "conversion": True,
+        }, 0.9
+    if action in ("solve", "what is the solution to"):
+        equation = match.group(2).strip()
+        return ({"equation": equation}, 0.9) if equation else None
+    return None
+
+
+def _file_operations(match, query, search_type):
+    action = match.group(1).lower()
+    target = match.group(4) if len(match.groups()) >= 4 else ""
+    if action in ("read", "open", "show", "display"):
+        return {"operation": "read", "file_path": target}, 0.8
+    if action in ("write", "save", "create"):
+        # Content has to be provided separately, hence the lower confidence
+        return {"operation": "write", "file_path": target, "content": ""}, 0.7
+    if action in ("list", "show"):
+        return {"operation": "list", "directory_path": target}, 0.8
+    return None
+
+
+def _system_info(match, query, search_type):
+    if "cpu" in query:
+        info_type = "cpu"
+    elif "memory" in query or "ram" in query:
+        info_type = "memory"
+    elif "disk" in query or "storage" in query:
+        info_type = "disk"
+    else:
+        info_type = "all"
+    return {"info_type": info_type}, 0.8
+
+
+def _code_editor(match, query, search_type):
+    action = match.group(1).lower()
+    groups = len(match.groups())
+    if action in ("edit", "create", "modify", "update"):
+        return {"operation": "edit", "file_path": match.group(4) if groups >= 4 else ""}, 0.9
+    if action in ("run", "execute", "test"):
+        return {"operation": "execute", "file_path": match.group(4) if groups >= 4 else ""}, 0.9
+    if action in ("highlight", "format", "indent", "beautify", "pretty print", "analyze"):
+        return {"operation": "highlight"}, 0.8
+    if action in ("diff", "compare", "find differences"):
+        return {
+            "operation": "diff",
+            "file1": match.group(2) if groups >= 2 else "",
+            "file2": match.group(3) if groups >= 3 else "",
+        }, 0.9
+    if action in ("undo", "revert", "rollback"):
+        return {"operation": "undo"}, 0.9
+    return None
+
+
+@dataclass
+class DetectionRule:
+    """Patterns for one tool; the first pattern that resolves wins."""
+    tool: str
+    category: str
+    patterns: Tuple[str, ...]
+    resolver: Resolver
+
+
+DETECTION_RULES = (
+    DetectionRule("web_search", "web search", WEATHER_PATTERNS + NEWS_PATTERNS + INFO_PATTERNS, _web_search),
+    DetectionRule("web_researcher", "weather", WEATHER_PATTERNS, _weather),
+    DetectionRule("calculator", "calculator", CALC_PATTERNS, _calculator),
+    DetectionRule("file_operations", "file operation", FILE_PATTERNS, _file_operations),
+    DetectionRule("system_info", "system info", SYSTEM_PATTERNS, _system_info),
+    DetectionRule("code_editor", "code editor", CODE_PATTERNS, _code_editor),
+)
+
+
+@dataclass
+class _CompiledRule:
+    rule: DetectionRule
+    # (pattern, compiled, required literals or None)
+    patterns: List[Tuple[str, re.Pattern, Optional[FrozenSet[str]]]] = field(default_factory=list)
+
+
+class ToolDetector:
+    """All detection rules compiled into a literal-prefiltered pattern set."""
+
+    def __init__(self, rules: Iterable[DetectionRule] = DETECTION_RULES):
+        self._rules: List[_CompiledRule] = []
+        literals = set()
+        for rule in rules:
+            compiled = _CompiledRule(rule)
+            for pattern in rule.patterns:
+                required = leading_literals(pattern)
+                compiled.patterns.append((pattern, re.compile(pattern), required))
+                literals |= required or set()
+            self._rules.append(compiled)
+        self._literals = tuple(sorted(literals))
+
+    def candidates(
+        self,
+        query: str,
+        available: Optional[Iterable[str]] = None,
+        search_type: Optional[Callable[[str], str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[ToolCandidate]:
+        """Every available tool the query matches, in priority order.
+
+        ``available`` restricts the tools considered (None = all);
+        ``search_type`` picks the web search type (detect_search_type by default).
+        """
+        text = query.lower()
+        allowed = set(available) if available is not None else None
+        present = {literal for literal in self._literals if literal in text}
+        search_type = search_type or detect_search_type
+
+        found: List[ToolCandidate] = []
+        for compiled in self._rules:
+            rule = compiled.rule
+            if allowed is not None and rule.tool not in allowed:
+                continue
+            for pattern, regex, required in compiled.patterns:
+                if required is not None and required.isdisjoint(present):
+                    continue
+                match = regex.search(text)
+                if match is None:
+                    continue
+                resolved = rule.resolver(match, text, search_type)
+                if resolved is not None:
+                    params, confidence = resolved
+                    found.append(ToolCandidate(rule.tool, params, confidence, rule.category, pattern))
+                    break
+            if limit is not None and len(found) >= limit:
+                break
+        return found
+
+
+_detector: Optional[ToolDetector] = None
+
+
+def get_tool_detector() -> ToolDetector:
+    """Get the shared tool detector."""
+    global _detector
+    if _detector is None:
+        _detector = ToolDetector()
+    return _detector
@@ -2,7 +2,6 @@
 Tool manager for Jarvis.
 This module manages the available tools and their execution.
 """
-import re
 import logging
 from typing import Dict, Any, List, Optional
 
@@ -13,6 +12,7 @@ from .system_info import SystemInfo
 from .debug import DebugTool
 from .code_editor import CodeEditorTool
 from .web_researcher import web_researcher
+from .tool_detection import ToolCandidate, extract_location, get_tool_detector
 from ..config import AVAILABLE_TOOLS
 
 # Set up logging
@@ -26,6 +26,7 @@ class ToolManager:
     def __init__(self):
         """Initialize the tool manager with available tools."""
         self.tools = {}
+        self.detector = get_tool_detector()
         
         # Initialize web search tool if enabled
         if "web_search" in AVAILABLE_TOOLS:
@@ -91,8 +92,9 @@ class ToolManager:
     def detect_tool_calls(self, query: str) -> List[Dict[str, Any]]:
         """Detect potential tool calls in a user query.
         
-        This uses simple regex patterns to detect if a query
-        is asking to use a specific tool.
+        Uses the precompiled detection tables in tool_detection to find
+        whether a query is asking to use a specific tool. At most one call
+        is returned: the highest-priority available tool that matched.
         
         Args:
             query: User's input text
@@ -100,263 +102,29 @@ class ToolManager:
         Returns:
             List of detected tool calls
         """
-        tool_calls = []
-        query = query.lower()
-        
-        # Weather related patterns should use web researcher
-        weather_patterns = [
-            r"(weather|forecast|temperature|rain|snow|precipitation|humidity|climate).*?(in|for|at|today|tomorrow|this week|this weekend)",
-            r"(is it|will it).*(rain|snow|sunny|cloudy|warm|cold|hot)",
-            r"(what's|what is|how's|how is).*(weather|temperature).*(in|at|for)",
-            r"(weather|temperature).*?now",
-            r"(humidity|wind speed|pressure).*?(in|at)",
-        ]
-        
-        # News related patterns
-        news_patterns = [
-            r"(news|headlines|latest).*(about|on|regarding)",
-            r"(what happened|what's happening|what is happening).*(today|now|recently)",
-        ]
-        
-        # Information seeking patterns
-        info_patterns = [
-            r"(who is|what is|where is|when is|why is|how is|how to|what are|where are|when are)",
-            r"(tell me about|information about|details about|facts about|give me.*?about)",
-            r"(search|look up|find|google|search for|find information about)",
-        ]
-        
-        # Calculator patterns
-        calc_patterns = [
-            r"(calculate|compute|evaluate|solve|what is)\s+([0-9+\-*/().%\s]+)",
-            r"(convert|change)\s+(\d+\.?\d*)\s+([a-zA-Z]+)\s+to\s+([a-zA-Z]+)",
-            r"(solve|what is the solution to)\s+([^=]+=.+)",
-        ]
-        
-        # File operation patterns
-        file_patterns = [
-            r"(read|open|show|display)\s+(the\s+)?(file|contents\s+of)\s+([^\s]+)",
-            r"(write|save|create)\s+(to\s+)?(a\s+)?(file|document)\s+([^\s]+)",
-            r"(list|show)\s+(the\s+)?(contents\s+of|files\s+in|directory)\s+([^\s]+)",
-        ]
-        
-        # System info patterns
-        system_patterns = [
-            r"(cpu|processor|memory|ram|disk|storage|system)\s+(usage|utilization|info|information|status)",
-            r"(how much|what is|show|display|tell me about)\s+(cpu|memory|ram|disk|storage)\s+(usage|utilization)",
-            r"(system|computer|machine|device)\s+(status|health|performance|specs|specifications)",
-        ]
-        
-        # Code editor patterns
-        code_patterns = [
-            r"(edit|create|modify|update)\s+(the\s+)?(code|file|program|script)\s+([^\s]+)",
-            r"(run|execute|test)\s+(the\s+)?(code|program|script|function)\s+([^\s]+)?",
-            r"(highlight|format|indent|beautify|pretty print|analyze)\s+(the\s+)?(code|program|script)",
-            r"(diff|compare|find differences)\s+(?:between\s+)?([^\s]+)\s+(?:and\s+)?([^\s]+)",
-            r"(undo|revert|rollback)\s+(the\s+)?(changes|edits|modifications)",
-        ]
+        candidates = self.detect_tool_candidates(query, limit=1)
+        for candidate in candidates:
+            logger.info(f"Detected {candidate.category} intent in query: {query.lower()}")
+        logger.info(f"Detected {len(candidates)} tool calls")
+        return [candidate.as_call() for candidate in candidates]
+    
+    def detect_tool_candidates(self, query: str, limit: Optional[int] = None) -> List[ToolCandidate]:
+        """All available tools a query matches, with confidence, in priority order.
         
-        # Check if the query matches any web search patterns
-        if "web_search" in self.tools:
-            all_patterns = weather_patterns + news_patterns + info_patterns
+        Args:
+            query: User's input text
+            limit: Stop after this many candidates
             
-            for pattern in all_patterns:
-                if re.search(pattern, query, re.IGNORECASE):
-                    logger.info(f"Detected web search intent in query: {query}")
-                    
-                    # Detect the best search type for this query
-                    web_search_tool = self.tools["web_search"]
-                    search_type = web_search_tool.detect_search_type(query)
-                    
-                    tool_calls.append({
-                        "tool": "web_search",
-                        "params": {
-                            "query": query.strip(),
-                            "search_type": search_type,
-                            "multi_search": True
-                        },
-                        "confidence": 0.8  # Confidence score
-                    })
-                    break
-        
-        # Check if the query is a weather query that should use the researcher tool
-        if "web_researcher" in self.tools and not tool_calls:
-            for pattern in weather_patterns:
-                if re.search(pattern, query, re.IGNORECASE):
-                    logger.info(f"Detected weather intent in query: {query}")
-                    
-                    # Extract location from the query
-                    location = self._extract_location(query)
-                    
-                    if location:
-                        tool_calls.append({
-                            "tool": "web_researcher",
-                            "params": {
-                                "query": location,
-                                "research_type": "weather"
-                            },
-                            "confidence": 0.9  # High confidence for weather
-                        })
-                        break
-        
-        # Check if the query matches any calculator patterns
-        if "calculator" in self.tools and not tool_calls:
-            # Check for expressions to evaluate
-            for pattern in calc_patterns:
-                match = re.search(pattern, query, re.IGNORECASE)
-                if match:
-                    if match.group(1) in ["calculate", "compute", "evaluate", "what is"]:
-                        # Extract the expression
-                        expression = match.group(2).strip()
-                        if expression:
-                            logger.info(f"Detected calculator intent in query: {query}")
-                            tool_calls.append({
-                                "tool": "calculator",
-                                "params": {"expression": expression},
-                                "confidence": 0.9
-                            })
-                            break
-                    elif match.group(1) in ["convert", "change"]:
-                        # Extract unit conversion parameters
-                        value = float(match.group(2))
-                        from_unit = match.group(3)
-                        to_unit = match.group(4)
-                        logger.info(f"Detected unit conversion intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "calculator",
-                            "params": {
-                                "value": value,
-                                "from_unit": from_unit,
-                                "to_unit": to_unit,
-                                "conversion": True
-                            },
-                            "confidence": 0.9
-                        })
-                        break
-                    elif match.group(1) in ["solve", "what is the solution to"]:
-                        # Extract the equation
-                        equation = match.group(2).strip()
-                        if equation:
-                            logger.info(f"Detected equation solving intent in query: {query}")
-                            tool_calls.append({
-                                "tool": "calculator",
-                                "params": {"equation": equation},
-                                "confidence": 0.9
-                            })
-                            break
-                        
-        # Check if the query matches any file operation patterns
-        if "file_operations" in self.tools and not tool_calls:
-            for pattern in file_patterns:
-                match = re.search(pattern, query, re.IGNORECASE)
-                if match:
-                    action = match.group(1).lower()
-                    target = match.group(4) if len(match.groups()) >= 4 else ""
-                    
-                    if action in ["read", "open", "show", "display"]:
-                        logger.info(f"Detected file read intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "file_operations",
-                            "params": {"operation": "read", "file_path": target},
-                            "confidence": 0.8
-                        })
-                        break
-                    elif action in ["write", "save", "create"]:
-                        # Note: content will need to be provided separately
-                        logger.info(f"Detected file write intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "file_operations",
-                            "params": {"operation": "write", "file_path": target, "content": ""},
-                            "confidence": 0.7  # Lower confidence as we need content
-                        })
-                        break
-                    elif action in ["list", "show"]:
-                        logger.info(f"Detected directory list intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "file_operations",
-                            "params": {"operation": "list", "directory_path": target},
-                            "confidence": 0.8
-                        })
-                        break
-                        
-        # Check if the query matches any system info patterns
-        if "system_info" in self.tools and not tool_calls:
-            for pattern in system_patterns:
-                if re.search(pattern, query, re.IGNORECASE):
-                    # Determine which system info to get
-                    if "cpu" in query:
-                        info_type = "cpu"
-                    elif "memory" in query or "ram" in query:
-                        info_type = "memory"
-                    elif "disk" in query or "storage" in query:
-                        info_type = "disk"
-                    else:
-                        info_type = "all"  # Default to all
-                        
-                    logger.info(f"Detected system info intent in query: {query}")
-                    tool_calls.append({
-                        "tool": "system_info",
-                        "params": {"info_type": info_type},
-                        "confidence": 0.8
-                    })
-                    break
-                    
-        # Check if the query matches any code editor patterns
-        if "code_editor" in self.tools and not tool_calls:
-            for pattern in code_patterns:
-                match = re.search(pattern, query, re.IGNORECASE)
-                if match:
-                    action = match.group(1).lower()
-                    
-                    if action in ["edit", "create", "modify", "update"]:
-                        # Extract the file path
-                        target = match.group(4) if len(match.groups()) >= 4 else ""
-                        logger.info(f"Detected code edit intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "code_editor",
-                            "params": {"operation": "edit", "file_path": target},
-                            "confidence": 0.9
-                        })
-                        break
-                    elif action in ["run", "execute", "test"]:
-                        # Extract the file path or directly execute code
-                        target = match.group(4) if len(match.groups()) >= 4 else ""
-                        logger.info(f"Detected code execution intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "code_editor",
-                            "params": {"operation": "execute", "file_path": target},
-                            "confidence": 0.9
-                        })
-                        break
-                    elif action in ["highlight", "format", "indent", "beautify", "pretty print", "analyze"]:
-                        logger.info(f"Detected code highlight intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "code_editor",
-                            "params": {"operation": "highlight"},
-                            "confidence": 0.8
-                        })
-                        break
-                    elif action in ["diff", "compare", "find differences"]:
-                        # Extract the two files to compare
-                        file1 = match.group(2) if len(match.groups()) >= 2 else ""
-                        file2 = match.group(3) if len(match.groups()) >= 3 else ""
-                        logger.info(f"Detected diff intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "code_editor",
-                            "params": {"operation": "diff", "file1": file1, "file2": file2},
-                            "confidence": 0.9
-                        })
-                        break
-                    elif action in ["undo", "revert", "rollback"]:
-                        logger.info(f"Detected undo intent in query: {query}")
-                        tool_calls.append({
-                            "tool": "code_editor",
-                            "params": {"operation": "undo"},
-                            "confidence": 0.9
-                        })
-                        break
-        
-        logger.info(f"Detected {len(tool_calls)} tool calls")
-        return tool_calls
+        Returns:
+            List of tool candidates
+        """
+        web_search = self.tools.get("web_search")
+        return self.detector.candidates(
+            query,
+            available=self.tools,
+            search_type=web_search.detect_search_type if web_search else None,
+            limit=limit,
+        )
     
     def _extract_location(self, query: str) -> str:
         """Extract location from a weather query.
@@ -367,32 +135,7 @@ class ToolManager:
         Returns:
             Extracted location or empty string if none found
         """
-        # Try to extract location using patterns
-        location_patterns = [
-            r"(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
-            r"weather\s+(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
-            r"temperature\s+(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
-            r"forecast\s+(?:in|for|at)\s+([A-Za-z\s,.]+)(?:$|\?|\.)",
-        ]
-        
-        for pattern in location_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        
-        # If no specific location pattern matches, look for capitalized words
-        # that might be city names (simple heuristic)
-        words = query.split()
-        for word in words:
-            if word[0].isupper() and len(word) > 2 and word.lower() not in [
-                "what", "where", "when", "how", "why", "who", "which",
-                "weather", "forecast", "temperature", "humidity", "will", "today",
-                "tomorrow", "current", "now"
-            ]:
-                return word
-        
-        # Default to empty string if no location found
-        return ""
+        return extract_location(query)
     
     def execute_tool(self, tool_name: str, params: Dict[str, Any]) -> Optional[str]:
         """Execute a tool with the given parameters.
@@ -4,12 +4,13 @@ This tool allows Jarvis to search the web for information.
 """
 import logging
 import time
-import re
 from typing import List, Dict, Any, Optional, Union
 from duckduckgo_search import DDGS
 import requests
 from datetime import datetime, timedelta
 
+from . import tool_detection
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -375,29 +376,4 @@ class WebSearch:
         Returns:
             Recommended search type
         """
-        query_lower = query.lower()
-        
-        # Check for news-related queries
-        news_patterns = [
-            r"(news|headlines|latest|recent|update|breaking)\s+(about|on|regarding|of)",
-            r"(what happened|what's happening|what is happening)",
-            r"(today|yesterday|this week)'s (news|updates|events)",
-        ]
-        
-        for pattern in news_patterns:
-            if re.search(pattern, query_lower):
-                return "news"
-                
-        # Check for image-related queries
-        image_patterns = [
-            r"(image|images|picture|pictures|photo|photos|photograph|photographs)\s+of",
-            r"(what does|how does).+(look like)",
-            r"(show|display).+(image|picture|photo)",
-        ]
-        
-        for pattern in image_patterns:
-            if re.search(pattern, query_lower):
-                return "images"
-                
-        # Default to text search
-        return "text" 
\ No newline at end of file
+        return tool_detection.detect_search_type(query)
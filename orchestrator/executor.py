@@ -1,20 +1,202 @@
 """
 Orchestrator executor for multi-tool plans.
 
-execute_plan(steps, mcp_client) -> list[dict]
- - steps: list of dicts { server?: str, tool: str, args: dict, parallel?: bool }
+execute_plan(steps, mcp_client, ...) -> list[dict]
+ - steps: list of dicts { id?: str, depends_on?: str|list, server?: str,
+          tool: str, args: dict, parallel?: bool, timeout?: float,
+          retries?: int, idempotent?: bool, dedupe?: bool }
  - mcp_client: object with async method call_tool_server(server, tool, args)
+   (or call_tool(tool, args) for single-server clients)
 
-Runs sequentially by default. If consecutive steps have parallel=True,
-they are grouped and executed concurrently. Retries each failed step up to
-2 times with exponential backoff. Returns per-step structured results:
-{ tool, ok: bool, data?: any, error?: str } in the same order as submitted
-(for parallel groups, returned in the original ordering).
+Two plan formats are accepted:
+
+List mode (no step declares ``id`` or ``depends_on``): runs sequentially by
+default. If consecutive steps have parallel=True, they are grouped and
+executed concurrently. A failed step does not stop later steps.
+
+DAG mode (any step declares ``id`` or ``depends_on``): every step whose
+dependencies have finished is started immediately, so independent branches
+overlap and wall time approaches the plan's critical path. Arguments can
+reference upstream results with ``{{step_id}}`` (the whole result) or
+``{{step_id.field.0}}`` (a path into a JSON result); a reference implies a
+dependency. Steps without an ``id`` are named ``step1``, ``step2``, ...
+
+Both modes share one scheduler bounded by a global and a per-server
+concurrency limit. What happens after a failure is set by ``failure_policy``:
+ - "propagate" (DAG default): dependents of a failed step are skipped
+ - "continue" (list default): dependents still run; refs to it resolve to None
+ - "fail_fast": no new steps are started once any step fails
+
+With fail_fast, steps still in flight when a failure lands are cancelled.
+
+Timeouts and retries:
+ - step_timeout bounds each attempt of an idempotent step (a step may set
+   its own ``timeout``, which also applies to non-idempotent steps; without
+   one, a write is never abandoned while the server may still run it)
+ - plan_timeout is a deadline for the whole plan; retries and backoff are
+   clipped to it and anything still running when it passes is cancelled
+ - transport failures (timeouts, connection errors, 5xx/429) of idempotent
+   steps are retried up to max_retries times (per step: ``retries``) with
+   jittered exponential backoff; validation errors fail immediately. A
+   non-idempotent step is only retried when the server refused it outright
+   (connection refused, 429), since otherwise it may already have run
+ - hedge_after (seconds) enables hedged requests for idempotent read tools:
+   if an attempt hasn't answered in time an identical backup request is
+   sent and the first answer wins. Steps opt in/out with ``idempotent``.
+
+Deduplication: steps are fingerprinted by server + tool + canonical args
+(after {{ref}} substitution). Identical idempotent steps in one plan run once
+and share the result; the first one reports ``duplicates: n`` and the others
+``deduplicated: true, duplicate_of: <id>``. Other steps only take part with
+``dedupe: true``, and any step opts out with ``dedupe: false``. A step that
+is not idempotent may change what reads return, so once one starts, later
+steps no longer share results from before it. With memo_ttl (seconds),
+successful results of idempotent tools are also memoized across plans and
+served with ``memoized: true``, until the plan starts a non-idempotent step.
+
+Progress: on_step, if given, is called synchronously with each step's result
+as soon as it is final (completed, skipped or cancelled), so callers can
+stream partial progress. The event is the result plus ``index`` (position in
+the submitted plan), ``id``, ``started_ms`` (offset from plan start) and
+``elapsed_ms``.
+
+Returns per-step structured results: { tool, ok: bool, data?: any,
+error?: str, attempts: int } in the same order as submitted. DAG results
+also carry ``id``; steps that never ran have ``skipped: true``, steps that
+were stopped mid-flight ``cancelled: true`` and hedge wins ``hedged: true``.
 """
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List
+import hashlib
+import json
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+FAILURE_POLICIES = ("propagate", "continue", "fail_fast")
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_PER_SERVER_CONCURRENCY = 4
+DEFAULT_STEP_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 2
+
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4.0
+
+# Tool names (last dotted segment) treated as read-only when hedging
+_IDEMPOTENT_PREFIXES = ("get_", "list_", "search", "fetch_", "read_", "find_", "lookup", "check_")
+_IDEMPOTENT_NAMES = {"status", "health", "ping", "weather"}
+
+# Cross-plan memo of idempotent step results (enabled per call with memo_ttl)
+_MEMO_MAX_ENTRIES = 256
+_plan_memo: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Caller mistakes: retrying can't help
+_NON_RETRYABLE_ERRORS = (
+    ValueError, TypeError, KeyError, LookupError, AttributeError, PermissionError, NotImplementedError,
+)
+# Exception class name fragments used by httpx/aiohttp/mcp transport errors
+_TRANSPORT_ERROR_MARKERS = ("Timeout", "Connect", "Network", "Transport", "Protocol", "Unavailable", "Closed")
+
+# {{step_id}} or {{step_id.path.to.field}}
+_REF_RE = re.compile(r"\{\{\s*([A-Za-z0-9_\-]+)((?:\.[A-Za-z0-9_\-]+)*)\s*\}\}")
+
+
+async def _call_tool(mcp_client, server: str | None, tool: str, args: Dict[str, Any]) -> Any:
+    # Delegate to the client's router so it can choose the server
+    if hasattr(mcp_client, "call_tool_server"):
+        return await mcp_client.call_tool_server(server, tool, args)
+    return await mcp_client.call_tool(tool, args)
+
+
+def is_idempotent_tool(tool: str, step: Optional[Dict[str, Any]] = None) -> bool:
+    """True if a call can safely be issued twice (reads only).
+
+    A step may say so explicitly with ``idempotent: true/false``; otherwise the
+    tool name is matched against common read-only verbs.
+    """
+    if step is not None and "idempotent" in step:
+        return bool(step.get("idempotent"))
+    name = (tool or "").rsplit(".", 1)[-1].lower()
+    return name.startswith(_IDEMPOTENT_PREFIXES) or name in _IDEMPOTENT_NAMES
+
+
+def is_retryable_error(exc: BaseException, idempotent: bool = True) -> bool:
+    """Classify a failed attempt: transport problems are retried, bad requests are not.
+
+    With idempotent=False only failures where the request surely never ran
+    (connection refused, 429) count: a timeout or a dropped connection may
+    have hit a write that already went through.
+    """
+    # HTTP-ish errors (httpx.HTTPStatusError, aiohttp.ClientResponseError)
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(exc, "status", None)
+    if not idempotent:
+        return isinstance(exc, ConnectionRefusedError) or status == 429
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(exc, _NON_RETRYABLE_ERRORS):
+        return False
+    if isinstance(exc, OSError):
+        return True
+    name = type(exc).__name__
+    return any(marker in name for marker in _TRANSPORT_ERROR_MARKERS)
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Exponential backoff with jitter so retried siblings don't stampede a server together
+    ceiling = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt))
+    return ceiling * random.uniform(0.5, 1.0)
+
+
+async def _hedged_call(
+    mcp_client,
+    server: str | None,
+    tool: str,
+    args: Dict[str, Any],
+    hedge_after: float,
+    timeout: Optional[float],
+) -> tuple[Any, bool]:
+    """Call a tool, issuing a second identical request if the first is slow.
+
+    Returns (result, hedged) where hedged is True if the backup request won.
+    """
+    loop = asyncio.get_running_loop()
+    end = None if timeout is None else loop.time() + timeout
+    primary = asyncio.ensure_future(_call_tool(mcp_client, server, tool, args))
+    launched = [primary]
+    pending = {primary}
+    try:
+        first_wait = hedge_after if timeout is None else min(hedge_after, timeout)
+        done, pending = await asyncio.wait(pending, timeout=first_wait)
+        if not done and (end is None or loop.time() < end):
+            backup = asyncio.ensure_future(_call_tool(mcp_client, server, tool, args))
+            launched.append(backup)
+            pending.add(backup)
+        pending |= done
+        last_error: Optional[BaseException] = None
+        while pending:
+            remaining = None if end is None else end - loop.time()
+            if remaining is not None and remaining <= 0:
+                raise asyncio.TimeoutError()
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task is not primary
+                last_error = task.exception()
+        raise last_error or RuntimeError("hedged call failed")
+    finally:
+        for task in launched:
+            if not task.done():
+                task.cancel()
 
 
 async def _run_with_retries(
@@ -23,20 +205,52 @@ async def _run_with_retries(
     tool: str,
     args: Dict[str, Any],
     max_retries: int = 2,
+    *,
+    attempt_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    hedge_after: Optional[float] = None,
+    idempotent: bool = True,
 ) -> Dict[str, Any]:
+    """Run one step, retrying transient failures.
+
+    attempt_timeout bounds each attempt; deadline (loop time) bounds the whole
+    step including backoff sleeps. hedge_after enables a backup request for
+    calls that haven't answered within that many seconds. A step that is not
+    idempotent is only retried when it cannot have run (see is_retryable_error).
+    """
+    loop = asyncio.get_running_loop()
     attempt = 0
-    delay = 0.5
     while True:
+        timeout = attempt_timeout
+        if deadline is not None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return {"tool": tool, "ok": False, "error": "deadline exceeded", "attempts": attempt}
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        attempt += 1
         try:
-            # Delegate to the client's router so it can choose the server
-            result = await mcp_client.call_tool_server(server, tool, args or {})
-            return {"tool": tool, "ok": True, "data": _normalize_result(result)}
+            if hedge_after is not None:
+                result, hedged = await _hedged_call(mcp_client, server, tool, args or {}, hedge_after, timeout)
+            else:
+                result = await asyncio.wait_for(_call_tool(mcp_client, server, tool, args or {}), timeout)
+                hedged = False
+            res = {"tool": tool, "ok": True, "data": _normalize_result(result), "attempts": attempt}
+            if hedged:
+                res["hedged"] = True
+            return res
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            if attempt >= max_retries:
-                return {"tool": tool, "ok": False, "error": str(e)}
+            if isinstance(e, asyncio.TimeoutError):
+                error = f"timed out after {timeout:.1f}s" if timeout is not None else "timed out"
+            else:
+                error = str(e) or type(e).__name__
+            if attempt > max_retries or not is_retryable_error(e, idempotent):
+                return {"tool": tool, "ok": False, "error": error, "attempts": attempt}
+            delay = _backoff_delay(attempt - 1)
+            if deadline is not None and loop.time() + delay >= deadline:
+                return {"tool": tool, "ok": False, "error": error, "attempts": attempt}
             await asyncio.sleep(delay)
-            delay *= 2
-            attempt += 1
 
 
 def _normalize_result(result: Any) -> Any:
@@ -68,45 +282,423 @@ def _normalize_result(result: Any) -> Any:
         return str(result)
 
 
-async def execute_plan(steps: List[Dict[str, Any]], mcp_client) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    i = 0
-    n = len(steps)
-    while i < n:
-        step = steps[i] or {}
+# ---------------------------------------------------------------------------
+# Plan graph
+# ---------------------------------------------------------------------------
+
+def is_dag_plan(steps: List[Dict[str, Any]]) -> bool:
+    """True if any step opts into DAG mode by declaring an id or dependencies."""
+    return any(isinstance(s, dict) and ("id" in s or "depends_on" in s) for s in steps)
+
+
+def _find_refs(value: Any) -> Set[str]:
+    refs: Set[str] = set()
+    if isinstance(value, str):
+        refs.update(m.group(1) for m in _REF_RE.finditer(value))
+    elif isinstance(value, dict):
+        for v in value.values():
+            refs.update(_find_refs(v))
+    elif isinstance(value, list):
+        for v in value:
+            refs.update(_find_refs(v))
+    return refs
+
+
+def _build_dag(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalize DAG-mode steps into nodes with ids and dependency sets.
+
+    Raises ValueError for duplicate ids, unknown dependencies or cycles.
+    """
+    nodes: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    for index, raw in enumerate(steps):
+        step = raw or {}
+        step_id = str(step.get("id") or f"step{index + 1}")
+        if step_id in seen:
+            raise ValueError(f"duplicate step id '{step_id}'")
+        seen.add(step_id)
+        depends_on = step.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        deps = {str(d) for d in depends_on} | _find_refs(step.get("args") or {})
+        nodes.append({"index": index, "id": step_id, "step": step, "deps": deps})
+
+    for node in nodes:
+        unknown = node["deps"] - seen
+        if unknown:
+            raise ValueError(f"step '{node['id']}' depends on unknown step(s): {', '.join(sorted(unknown))}")
+        if node["id"] in node["deps"]:
+            raise ValueError(f"step '{node['id']}' depends on itself")
+
+    # Kahn's algorithm to reject cycles up front
+    indegree = {n["id"]: len(n["deps"]) for n in nodes}
+    dependents: Dict[str, List[str]] = {n["id"]: [] for n in nodes}
+    for n in nodes:
+        for d in n["deps"]:
+            dependents[d].append(n["id"])
+    queue = [i for i, deg in indegree.items() if deg == 0]
+    visited = 0
+    while queue:
+        current = queue.pop()
+        visited += 1
+        for child in dependents[current]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    if visited != len(nodes):
+        raise ValueError("plan dependencies contain a cycle")
+    return nodes
+
+
+def _build_list_plan(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Express the legacy list format as a DAG of barrier-separated groups."""
+    nodes: List[Dict[str, Any]] = []
+    previous_group: List[str] = []
+    current_group: List[str] = []
+    in_parallel_group = False
+    for index, raw in enumerate(steps):
+        step = raw or {}
+        step_id = f"step{index + 1}"
         is_parallel = bool(step.get("parallel"))
-        server = step.get("server") or "jarvis"
-        if not is_parallel:
-            # Run sequential step
-            res = await _run_with_retries(
-                mcp_client,
-                step.get("server"),
-                step.get("tool", ""),
-                step.get("args") or {},
-            )
-            results.append(res)
-            i += 1
-            continue
-
-        # Collect a batch of consecutive parallel steps
-        batch: List[Dict[str, Any]] = [step]
-        j = i + 1
-        while j < n and bool((steps[j] or {}).get("parallel")):
-            batch.append(steps[j] or {})
-            j += 1
-
-        # Launch all in parallel, preserving order
-        coros = [
-            _run_with_retries(
-                mcp_client,
-                s.get("server"),
-                s.get("tool", ""),
-                s.get("args") or {},
-            )
-            for s in batch
-        ]
-        batch_results = await asyncio.gather(*coros, return_exceptions=False)
-        results.extend(batch_results)
-        i = j
+        if not (is_parallel and in_parallel_group):
+            if current_group:
+                previous_group = current_group
+            current_group = []
+        in_parallel_group = is_parallel
+        nodes.append({"index": index, "id": step_id, "step": step, "deps": set(previous_group)})
+        current_group.append(step_id)
+    return nodes
+
+
+def _lookup_path(data: Any, path: List[str]) -> Any:
+    if path and isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    for part in path:
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.lstrip("-").isdigit():
+            idx = int(part)
+            data = data[idx] if -len(data) <= idx < len(data) else None
+        else:
+            return None
+    return data
+
+
+def _resolve_refs(value: Any, results: Dict[str, Dict[str, Any]]) -> Any:
+    """Substitute {{id}} / {{id.path}} references with upstream result data."""
+    if isinstance(value, str):
+        def _value_of(match: re.Match) -> Any:
+            upstream = results.get(match.group(1)) or {}
+            path = [p for p in match.group(2).split(".") if p]
+            return _lookup_path(upstream.get("data") if upstream.get("ok") else None, path)
+
+        whole = _REF_RE.fullmatch(value.strip())
+        if whole:
+            # A lone reference keeps the upstream value's type
+            return _value_of(whole)
+
+        def _as_text(match: re.Match) -> str:
+            v = _value_of(match)
+            if v is None:
+                return ""
+            return v if isinstance(v, str) else json.dumps(v, ensure_ascii=False)
+
+        return _REF_RE.sub(_as_text, value)
+    if isinstance(value, dict):
+        return {k: _resolve_refs(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(v, results) for v in value]
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Deduplication / memoization
+# ---------------------------------------------------------------------------
+
+def step_fingerprint(server: str | None, tool: str, args: Dict[str, Any]) -> str:
+    """Stable identity of a call: server + tool + canonical (key-sorted) args."""
+    canonical = json.dumps(
+        [server or "", tool or "", args or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _memo_get(fingerprint: str) -> Optional[Dict[str, Any]]:
+    entry = _plan_memo.get(fingerprint)
+    if entry is None:
+        return None
+    expires, result = entry
+    if time.monotonic() >= expires:
+        _plan_memo.pop(fingerprint, None)
+        return None
+    _plan_memo.move_to_end(fingerprint)
+    return result
+
+
+def _memo_put(fingerprint: str, result: Dict[str, Any], ttl: float) -> None:
+    _plan_memo[fingerprint] = (
+        time.monotonic() + ttl,
+        {"tool": result.get("tool"), "ok": True, "data": result.get("data")},
+    )
+    _plan_memo.move_to_end(fingerprint)
+    while len(_plan_memo) > _MEMO_MAX_ENTRIES:
+        _plan_memo.popitem(last=False)
+
+
+def clear_plan_memo() -> None:
+    """Drop all memoized step results."""
+    _plan_memo.clear()
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
 
+async def _run_graph(
+    nodes: List[Dict[str, Any]],
+    mcp_client,
+    *,
+    max_concurrency: int,
+    per_server_concurrency: int,
+    failure_policy: str,
+    step_timeout: Optional[float],
+    plan_timeout: Optional[float],
+    hedge_after: Optional[float],
+    max_retries: int,
+    dedupe: bool,
+    memo_ttl: Optional[float],
+    on_step: Optional[Callable[[Dict[str, Any]], None]],
+) -> Dict[str, Dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    plan_start = loop.time()
+    started_at: Dict[str, float] = {}
+    deadline = None if plan_timeout is None else loop.time() + plan_timeout
+    by_id = {n["id"]: n for n in nodes}
+    remaining = {n["id"]: set(n["deps"]) for n in nodes}
+    dependents: Dict[str, List[str]] = {n["id"]: [] for n in nodes}
+    for n in nodes:
+        for d in n["deps"]:
+            dependents[d].append(n["id"])
+
+    global_limit = asyncio.Semaphore(max(1, max_concurrency))
+    server_limits: Dict[str, asyncio.Semaphore] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    running: Dict[asyncio.Task, str] = {}
+    # fingerprint -> (owner step id, shared call); calls are shielded so a
+    # duplicate being cancelled never takes the owner's call down with it.
+    # Emptied whenever a non-idempotent step starts: reads from before a
+    # write must not answer steps that start after it.
+    shared: Dict[str, Tuple[str, asyncio.Future]] = {}
+    calls: List[asyncio.Future] = []
+    duplicate_counts: Dict[str, int] = {}
+    aborted = False
+    wrote = False
+
+    async def _run_node(node: Dict[str, Any]) -> Dict[str, Any]:
+        step = node["step"]
+        server_key = step.get("server") or "jarvis"
+        server_limit = server_limits.setdefault(
+            server_key, asyncio.Semaphore(max(1, per_server_concurrency))
+        )
+        tool = step.get("tool", "")
+        args = _resolve_refs(step.get("args") or {}, results)
+        retries = step.get("retries", max_retries)
+        idempotent = is_idempotent_tool(tool, step)
+        attempt_timeout = step.get("timeout", step_timeout if idempotent else None)
+        hedge = hedge_after if hedge_after is not None and idempotent else None
+
+        nonlocal wrote
+        fingerprint = None
+        if dedupe and step.get("dedupe", idempotent):
+            fingerprint = step_fingerprint(step.get("server"), tool, args)
+            owner = shared.get(fingerprint)
+            if owner is not None:
+                owner_id, call = owner
+                duplicate_counts[owner_id] = duplicate_counts.get(owner_id, 0) + 1
+                res = await asyncio.shield(call)
+                return {**res, "attempts": 0, "deduplicated": True, "duplicate_of": owner_id}
+            if memo_ttl and idempotent and not wrote:
+                cached = _memo_get(fingerprint)
+                if cached is not None:
+                    return {**cached, "attempts": 0, "memoized": True}
+        if not idempotent:
+            wrote = True
+            shared.clear()
+
+        async def _execute() -> Dict[str, Any]:
+            async with global_limit, server_limit:
+                return await _run_with_retries(
+                    mcp_client,
+                    step.get("server"),
+                    tool,
+                    args,
+                    max_retries=int(retries),
+                    attempt_timeout=float(attempt_timeout) if attempt_timeout is not None else None,
+                    deadline=deadline,
+                    hedge_after=hedge,
+                    idempotent=idempotent,
+                )
+
+        call = asyncio.ensure_future(_execute())
+        calls.append(call)
+        if fingerprint is not None:
+            shared[fingerprint] = (node["id"], call)
+        res = await asyncio.shield(call)
+        if fingerprint is not None and memo_ttl and idempotent and res.get("ok"):
+            _memo_put(fingerprint, res, memo_ttl)
+        return res
+
+    def _emit(step_id: str) -> None:
+        if on_step is None:
+            return
+        started = started_at.get(step_id)
+        now = loop.time()
+        event = {
+            "index": by_id[step_id]["index"],
+            "id": step_id,
+            **results[step_id],
+            "started_ms": round((started - plan_start) * 1000, 1) if started is not None else None,
+            "elapsed_ms": round((now - started) * 1000, 1) if started is not None else 0.0,
+        }
+        try:
+            on_step(event)
+        except Exception:
+            # A broken listener must not take the plan down with it
+            pass
+
+    def _skip(step_id: str, reason: str) -> None:
+        results[step_id] = {
+            "tool": by_id[step_id]["step"].get("tool", ""),
+            "ok": False,
+            "error": reason,
+            "skipped": True,
+        }
+        _emit(step_id)
+
+    async def _cancel_running(reason: str) -> None:
+        tasks = list(running)
+        for task in tasks + calls:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, *calls, return_exceptions=True)
+        for task in tasks:
+            step_id = running.pop(task)
+            results[step_id] = {
+                "tool": by_id[step_id]["step"].get("tool", ""),
+                "ok": False,
+                "error": reason,
+                "cancelled": True,
+            }
+            _emit(step_id)
+
+    def _finish(step_id: str) -> List[str]:
+        """Record completion of step_id; return dependents that became ready."""
+        ready: List[str] = []
+        pending = [step_id]
+        while pending:
+            done_id = pending.pop()
+            for child in dependents[done_id]:
+                if child in results:
+                    continue
+                remaining[child].discard(done_id)
+                if remaining[child]:
+                    continue
+                failed = [d for d in by_id[child]["deps"] if not results[d].get("ok")]
+                if failed and failure_policy == "propagate":
+                    _skip(child, f"skipped: upstream step '{sorted(failed)[0]}' failed")
+                    pending.append(child)
+                else:
+                    ready.append(child)
+        return ready
+
+    ready = [n["id"] for n in nodes if not n["deps"]]
+    while ready or running:
+        if not aborted:
+            for step_id in ready:
+                task = asyncio.create_task(_run_node(by_id[step_id]))
+                running[task] = step_id
+                started_at[step_id] = loop.time()
+        ready = []
+        if not running:
+            break
+        timeout = None if deadline is None else max(0.0, deadline - loop.time())
+        done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            # Plan deadline hit; steps normally give up on their own first, this is the backstop
+            await _cancel_running("cancelled: plan deadline exceeded")
+            aborted = True
+            break
+        for task in done:
+            step_id = running.pop(task)
+            try:
+                results[step_id] = task.result()
+            except Exception as e:
+                results[step_id] = {"tool": by_id[step_id]["step"].get("tool", ""), "ok": False, "error": str(e)}
+            _emit(step_id)
+            if not results[step_id].get("ok") and failure_policy == "fail_fast":
+                aborted = True
+            ready.extend(_finish(step_id))
+        if aborted and failure_policy == "fail_fast" and running:
+            await _cancel_running("cancelled: plan aborted after an earlier failure")
+
+    for n in nodes:
+        if n["id"] not in results:
+            reason = "skipped: plan aborted after an earlier failure"
+            if deadline is not None and loop.time() >= deadline:
+                reason = "skipped: plan deadline exceeded"
+            _skip(n["id"], reason)
+    for owner_id, count in duplicate_counts.items():
+        results[owner_id]["duplicates"] = count
+    return results
+
+
+async def execute_plan(
+    steps: List[Dict[str, Any]],
+    mcp_client,
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    per_server_concurrency: int = DEFAULT_PER_SERVER_CONCURRENCY,
+    failure_policy: Optional[str] = None,
+    step_timeout: Optional[float] = DEFAULT_STEP_TIMEOUT,
+    plan_timeout: Optional[float] = None,
+    hedge_after: Optional[float] = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    dedupe: bool = True,
+    memo_ttl: Optional[float] = None,
+    on_step: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    dag_mode = is_dag_plan(steps)
+    policy = failure_policy or ("propagate" if dag_mode else "continue")
+    if policy not in FAILURE_POLICIES:
+        raise ValueError(f"failure_policy must be one of {', '.join(FAILURE_POLICIES)}")
+
+    nodes = _build_dag(steps) if dag_mode else _build_list_plan(steps)
+    by_id = await _run_graph(
+        nodes,
+        mcp_client,
+        max_concurrency=max_concurrency,
+        per_server_concurrency=per_server_concurrency,
+        failure_policy=policy,
+        step_timeout=step_timeout,
+        plan_timeout=plan_timeout,
+        hedge_after=hedge_after,
+        max_retries=max_retries,
+        dedupe=dedupe,
+        memo_ttl=memo_ttl,
+        on_step=on_step,
+    )
+
+    results: List[Dict[str, Any]] = []
+    for node in nodes:
+        res = by_id[node["id"]]
+        if dag_mode:
+            res = {"id": node["id"], **res}
+        results.append(res)
     return results